@@ -9,6 +9,7 @@ from fastapi.responses import StreamingResponse
 from app.api.requests import (
     AliasRequest,
     AnalysisRequest,
+    BackfillContextStoreTemplatesRequest,
     BusinessGlossaryRequest,
     ComprehensiveAnalysisRequest,
     ContextStoreRequest,
@@ -51,6 +52,7 @@ from app.api.responses import (
 from app.data.db.storage import Storage
 from app.modules.alias.services import AliasService
 from app.modules.business_glossary.services import BusinessGlossaryService
+from app.modules.context_store.models import ContextStoreBackfillReport
 from app.modules.context_store.services import ContextStoreService
 from app.modules.database_connection.services import DatabaseConnectionService
 from app.modules.instruction.services import InstructionService
@@ -207,6 +209,22 @@ class API:
             tags=["Context Stores"],
         )
 
+        self.router.add_api_route(
+            "/api/v1/context-stores/bulk",
+            self.create_context_stores,
+            methods=["POST"],
+            status_code=201,
+            tags=["Context Stores"],
+        )
+
+        self.router.add_api_route(
+            "/api/v1/context-stores/backfill-templates",
+            self.backfill_context_store_templates,
+            methods=["POST"],
+            status_code=202,
+            tags=["Context Stores"],
+        )
+
         self.router.add_api_route(
             "/api/v1/context-stores",
             self.get_context_stores,
@@ -706,6 +724,28 @@ class API:
         )
         return ContextStoreResponse(**context_store.model_dump())
 
+    def create_context_stores(
+        self, context_store_requests: list[ContextStoreRequest]
+    ) -> list[ContextStoreResponse]:
+        context_stores = self.context_store_service.create_context_stores(
+            context_store_requests
+        )
+        return [
+            ContextStoreResponse(**context_store.model_dump())
+            for context_store in context_stores
+        ]
+
+    def backfill_context_store_templates(
+        self,
+        backfill_request: BackfillContextStoreTemplatesRequest,
+        background_tasks: BackgroundTasks,
+    ) -> ContextStoreBackfillReport:
+        return self.context_store_service.schedule_backfill_templates(
+            backfill_request.db_connection_id,
+            background_tasks,
+            force=backfill_request.force,
+        )
+
     def get_context_stores(self, db_connection_id: str) -> list[ContextStoreResponse]:
         context_stores = self.context_store_service.get_context_stores(db_connection_id)
         return [
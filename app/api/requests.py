@@ -78,6 +78,11 @@ class ContextStoreRequest(BaseModel):
     metadata: dict | None = None
 
 
+class BackfillContextStoreTemplatesRequest(BaseModel):
+    db_connection_id: str
+    force: bool = False
+
+
 class GetContextStoreByNameRequest(BaseModel):
     db_connection_id: str
     prompt_text: str
@@ -47,6 +47,7 @@ class ContextStoreResponse(BaseResponse):
     labels: list[str]
     entities: list[str]
     sql: str
+    template_version: str | None = None
 
 
 class SQLGenerationResponse(BaseResponse):
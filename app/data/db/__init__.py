@@ -3,6 +3,7 @@ import os
 
 import typesense
 
+from app.utils.tracing import timed
 # from app.server.config import Settings
 
 
@@ -11,10 +12,12 @@ class TypeSenseDB:
         self.client = self._initialize_client(setting)
         self.embedding_dimensions = setting.EMBEDDING_DIMENSIONS
         self.schema_path = "app/data/db/schemas"
+        # Collections known to exist, so only the first use lists them
+        self._collections: set[str] = set()
 
     def _initialize_client(self, setting) -> typesense.Client:
         """Initialize the Typesense client."""
-        return typesense.Client(
+        client = typesense.Client(
             {
                 "nodes": [
                     {
@@ -27,6 +30,9 @@ class TypeSenseDB:
                 # "connection_timeout_seconds": setting.TYPESENSE_TIMEOUT,
             }
         )
+        # Every request goes through make_request, count them in generation traces
+        client.api_call.make_request = timed("typesense", client.api_call.make_request)
+        return client
 
     def _get_schema(self, collection_name: str) -> dict:
         """Retrieve and parse the schema for a given collection."""
@@ -55,12 +61,16 @@ class TypeSenseDB:
 
     def ensure_collection_exists(self, collection_name: str) -> None:
         """Ensure the collection exists in Typesense; if not, create it."""
+        if collection_name in self._collections:
+            return
         existing_collection = self._get_existing_collections()
         if collection_name not in existing_collection:
             collection_schema = self._get_schema(collection_name)
             collection_schema = self._add_embedding_dimensions(collection_schema)
             self.client.collections.create(collection_schema)
+        self._collections.add(collection_name)
 
     def delete_collection(self, collection_name: str) -> None:
         """Delete a collection from Typesense."""
         self.client.collections[collection_name].delete()
+        self._collections.discard(collection_name)
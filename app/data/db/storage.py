@@ -1,8 +1,14 @@
+import logging
 import uuid
 
 from app.data.db import TypeSenseDB
 # from app.server.config import Settings
 
+logger = logging.getLogger(__name__)
+
+# Searches per multi_search request, Typesense's default limit_multi_searches
+MULTI_SEARCH_LIMIT = 50
+
 
 class Storage(TypeSenseDB):
     def __init__(self, setting) -> None:
@@ -56,6 +62,32 @@ class Storage(TypeSenseDB):
         created_id = self.client.collections[collection].documents.create(doc)["id"]
         return created_id
 
+    def bulk_import(
+        self,
+        collection: str,
+        docs: list[dict],
+        action: str = "upsert",
+        batch_size: int = 500,
+    ) -> list[dict]:
+        """Write many documents with Typesense's import endpoint.
+
+        `action` is one of create, upsert, update or emplace. Documents without
+        an id get one, like insert_one. Returns one result per document, failed
+        ones have `success` set to False and an `error`.
+        """
+        self.ensure_collection_exists(collection)
+        results = []
+        for start in range(0, len(docs), batch_size):
+            batch = docs[start : start + batch_size]
+            for doc in batch:
+                doc.setdefault("id", str(uuid.uuid4()))
+            results.extend(
+                self.client.collections[collection].documents.import_(
+                    batch, {"action": action, "batch_size": batch_size}
+                )
+            )
+        return results
+
     def update_or_create(self, collection: str, filter: dict, doc: dict) -> dict:
         self.ensure_collection_exists(collection)
         existing_doc = self.find_one(collection, filter)
@@ -89,6 +121,7 @@ class Storage(TypeSenseDB):
         sort: list = None,
         page: int = 0,
         limit: int = 0,
+        exclude_fields: list[str] = None,
     ) -> list:
         self.ensure_collection_exists(collection)
 
@@ -98,6 +131,9 @@ class Storage(TypeSenseDB):
             "page": page if page > 0 else 1,
         }
 
+        if exclude_fields:
+            search_params["exclude_fields"] = ",".join(exclude_fields)
+
         if filter:
             filter_by = " && ".join(
                 [f"{k}:={self._escape_filter_value(v)}" for k, v in filter.items()]
@@ -192,49 +228,103 @@ class Storage(TypeSenseDB):
             search_requests, common_search_params
         )
 
-        retrieved_queries = query_by.split(',')
-        retrieved_queries = [query.strip() for query in retrieved_queries]
-
         if results:
-            if results["results"][0]["found"] > 0:
-                hits = results["results"][0]["hits"]
-
-                # Deduplicate by query_by
-                unique_hits = {}
-                for hit in hits:
-                    document = hit['document']
-                    key_parts = []
-
-                    for query_field in retrieved_queries:
-                        value = document.get(query_field, "")
-                        key_parts.append(str(value).lower())
-
-                    deduplication_key = ", ".join(key_parts)
-                    if deduplication_key not in unique_hits:
-                        unique_hits[deduplication_key] = hit
-
-                # Convert dictionary values back to a list
-                hits = list(unique_hits.values())
-
-                # Sort results by vector_distance asc
-                sorted_hits = sorted(
-                    hits,
-                    key=lambda x: x["vector_distance"],
-                    reverse=False,
-                )
-                # Take top N results
-                sorted_hits = sorted_hits[:limit]
-
-                # Remapping vector_distance between 0 and 1. Higher is more similar
-                return [
-                    {**hit["document"], "score": 1 - (hit["vector_distance"] / 2)}
-                    for hit in sorted_hits
-                ]
+            hits = results["results"][0].get("hits", [])
+            return self.rank_hybrid_hits(hits, query_by, limit) or None
 
         return None
 
+    @staticmethod
+    def rank_hybrid_hits(hits: list[dict], query_by: str, limit: int) -> list[dict]:
+        """Documents of hybrid search hits, deduplicated by the `query_by` fields.
+
+        The closest `limit` documents come first, each with a `score` between
+        0 and 1 remapped from its vector distance (higher is more similar).
+        """
+        retrieved_queries = [query.strip() for query in query_by.split(",")]
+
+        # Deduplicate by query_by
+        unique_hits = {}
+        for hit in hits:
+            document = hit["document"]
+            key_parts = []
+
+            for query_field in retrieved_queries:
+                value = document.get(query_field, "")
+                key_parts.append(str(value).lower())
+
+            deduplication_key = ", ".join(key_parts)
+            if deduplication_key not in unique_hits:
+                unique_hits[deduplication_key] = hit
+
+        # Sort results by vector_distance asc and take top N results
+        sorted_hits = sorted(
+            unique_hits.values(),
+            key=lambda x: x["vector_distance"],
+            reverse=False,
+        )[:limit]
+
+        # Remapping vector_distance between 0 and 1. Higher is more similar
+        return [
+            {**hit["document"], "score": 1 - (hit["vector_distance"] / 2)}
+            for hit in sorted_hits
+        ]
+
+    def multi_search(
+        self,
+        collection: str,
+        searches: list[dict],
+        common_params: dict | None = None,
+    ) -> list[dict]:
+        """Run many searches on `collection` in as few requests as possible.
+
+        Returns the Typesense result of each search, in order. Failed searches
+        have no hits and are logged.
+        """
+        self.ensure_collection_exists(collection)
+        results = []
+        for start in range(0, len(searches), MULTI_SEARCH_LIMIT):
+            batch = [
+                {"collection": collection, **search}
+                for search in searches[start : start + MULTI_SEARCH_LIMIT]
+            ]
+            response = self.client.multi_search.perform(
+                {"searches": batch}, common_params or {}
+            )
+            results.extend(response["results"])
+        for result in results:
+            if "error" in result:
+                logger.warning(f"Search on {collection} failed: {result['error']}")
+        return results
+
+    def filter_in(self, field: str, values) -> str:
+        """Typesense filter matching `field` exactly against any of `values`."""
+        return f"{field}:=[{', '.join(self._escape_filter_value(value) for value in values)}]"
+
     def delete_by_id(self, collection: str, id: str) -> dict | None:
         self.ensure_collection_exists(collection)
         deleted = self.client.collections[collection].documents[id].delete()
 
         return deleted
+
+    def delete_by_filter(
+        self, collection: str, filter: dict, exclude: dict | None = None
+    ) -> int:
+        """Delete the documents whose fields equal `filter`, returns how many.
+
+        `exclude` maps fields to values whose documents are kept.
+        """
+        self.ensure_collection_exists(collection)
+        conditions = [f"{k}:={self._escape_filter_value(v)}" for k, v in filter.items()]
+        for field, values in (exclude or {}).items():
+            values = list(values)
+            if values:
+                conditions.append(
+                    f"{field}:!=[{', '.join(self._escape_filter_value(v) for v in values)}]"
+                )
+        if not conditions:
+            raise ValueError("delete_by_filter needs a filter")
+        deleted = self.client.collections[collection].documents.delete(
+            {"filter_by": " && ".join(conditions)}
+        )
+        return deleted.get("num_deleted", 0)
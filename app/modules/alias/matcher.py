@@ -0,0 +1,145 @@
+"""Compiled alias matcher used to find aliases referenced in a prompt.
+
+Matching a prompt against every alias (substring test plus a
+`SequenceMatcher` ratio per prompt n-gram) grows with the number of aliases.
+`AliasMatcher` compiles the aliases of a connection once:
+
+* an Aho-Corasick automaton finds every alias name occurring in the prompt
+  in a single pass over the prompt text;
+* a character trigram index restricts the fuzzy comparison to aliases that
+  share at least `FUZZY_MIN_SHARED` of their trigrams with a prompt phrase;
+  only those candidates are checked with the `SequenceMatcher` ratio. Typos
+  (a missing, extra or swapped letter) keep well above that overlap, heavily
+  garbled phrases that barely reached the ratio may no longer match.
+
+Compiled matchers are cached per connection in `alias_matchers` and rebuilt
+when the aliases of that connection change (or after a TTL, for changes made
+by other processes).
+"""
+
+import math
+import os
+from collections import deque
+from difflib import SequenceMatcher
+
+from app.modules.alias.models import Alias
+from app.utils.core.cache import KeyedCache
+
+ALIAS_MATCHER_TTL_SECONDS = int(os.getenv("ALIAS_MATCHER_TTL_SECONDS", "300"))
+
+FUZZY_MIN_LENGTH = 3
+FUZZY_THRESHOLD = 0.8
+FUZZY_MIN_SHARED = 0.4
+MAX_PHRASE_WORDS = 5
+
+
+def _trigrams(value: str) -> set[str]:
+    padded = f"\x02{value}\x03"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class AliasMatcher:
+    def __init__(self, aliases: list[Alias]):
+        self.aliases = aliases
+        self.names = [alias.name.lower() for alias in aliases]
+        self._build_automaton()
+        self._build_trigram_index()
+
+    def _build_automaton(self) -> None:
+        # goto[state] maps a character to the next state, output[state] holds
+        # the alias indexes whose name ends at that state
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[list[int]] = [[]]
+        for index, name in enumerate(self.names):
+            if not name:
+                continue
+            state = 0
+            for char in name:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(index)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = (
+                    self._output[next_state] + self._output[self._fail[next_state]]
+                )
+
+    def _build_trigram_index(self) -> None:
+        self._trigram_index: dict[str, list[int]] = {}
+        self._min_shared: dict[int, int] = {}
+        for index, name in enumerate(self.names):
+            if len(name) < FUZZY_MIN_LENGTH:
+                continue
+            trigrams = _trigrams(name)
+            self._min_shared[index] = max(1, math.ceil(FUZZY_MIN_SHARED * len(trigrams)))
+            for trigram in trigrams:
+                self._trigram_index.setdefault(trigram, []).append(index)
+
+    def exact_matches(self, text: str) -> set[int]:
+        """Indexes of aliases whose name occurs in the (lowercased) text."""
+        matches = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            matches.update(self._output[state])
+        return matches
+
+    def fuzzy_matches(self, text: str, exclude: set[int] | None = None) -> set[int]:
+        """Indexes of aliases similar to a phrase of up to five words of the text."""
+        exclude = exclude or set()
+        words = text.split()
+        phrases = set()
+        for phrase_length in range(1, min(len(words), MAX_PHRASE_WORDS) + 1):
+            for i in range(len(words) - phrase_length + 1):
+                phrases.add(" ".join(words[i : i + phrase_length]))
+
+        matches = set()
+        # The phrase is the second sequence so its index is built once per phrase
+        sequence = SequenceMatcher(None)
+        for phrase in phrases:
+            shared: dict[int, int] = {}
+            for trigram in _trigrams(phrase):
+                for index in self._trigram_index.get(trigram, ()):
+                    shared[index] = shared.get(index, 0) + 1
+            sequence.set_seq2(phrase)
+            for index, count in shared.items():
+                if count < self._min_shared[index] or index in exclude or index in matches:
+                    continue
+                name = self.names[index]
+                if abs(len(phrase) - len(name)) > len(name) * 0.5:
+                    continue
+                sequence.set_seq1(name)
+                if (
+                    sequence.real_quick_ratio() >= FUZZY_THRESHOLD
+                    and sequence.quick_ratio() >= FUZZY_THRESHOLD
+                    and sequence.ratio() >= FUZZY_THRESHOLD
+                ):
+                    matches.add(index)
+        return matches
+
+    def match(self, prompt_text: str) -> list[Alias]:
+        """Aliases referenced in the prompt, exactly or approximately, in alias order."""
+        normalized_prompt = prompt_text.lower()
+        matches = self.exact_matches(normalized_prompt)
+        matches |= self.fuzzy_matches(normalized_prompt, exclude=matches)
+        return [self.aliases[index] for index in sorted(matches)]
+
+
+alias_matchers: KeyedCache[AliasMatcher] = KeyedCache(ALIAS_MATCHER_TTL_SECONDS)
@@ -23,6 +23,17 @@ class AliasRepository:
             result.append(Alias(**row))
         return result
 
+    def find_all_by(self, filter: dict, page_size: int = 250) -> list[Alias]:
+        """Like find_by, but pages through every match instead of the first page."""
+        result = []
+        page = 1
+        while True:
+            rows = self.storage.find(DB_COLLECTION, filter, page=page, limit=page_size)
+            result.extend(Alias(**row) for row in rows)
+            if len(rows) < page_size:
+                return result
+            page += 1
+
     def find_by_name(self, name: str, db_connection_id: str = None) -> Alias | None:
         if db_connection_id:
             # Use full text search with db_connection_id filter
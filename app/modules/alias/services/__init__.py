@@ -8,6 +8,7 @@ from app.api.requests import (
 )
 from app.modules.alias.models import Alias
 from app.modules.alias.repositories import AliasRepository
+from app.modules.alias.matcher import AliasMatcher, alias_matchers
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +35,9 @@ class AliasService:
             description=alias_request.description,
             metadata=alias_request.metadata,
         )
-        return self.repository.insert(alias)
+        alias = self.repository.insert(alias)
+        alias_matchers.invalidate(alias.db_connection_id)
+        return alias
 
     def get_alias(self, alias_id: str) -> Alias:
         alias = self.repository.find_by_id(alias_id)
@@ -74,6 +77,15 @@ class AliasService:
             filter["target_type"] = target_type
         return self.repository.find_by(filter)
 
+    def get_alias_matcher(self, db_connection_id: str) -> AliasMatcher:
+        """Compiled matcher over every alias of the connection, cached until they change."""
+        return alias_matchers.get(
+            db_connection_id,
+            lambda: AliasMatcher(
+                self.repository.find_all_by({"db_connection_id": db_connection_id})
+            ),
+        )
+
     def update_alias(self, alias_id: str, update_request: UpdateAliasRequest) -> Alias:
         alias = self.repository.find_by_id(alias_id)
         if not alias:
@@ -95,6 +107,7 @@ class AliasService:
             setattr(alias, key, value)
 
         self.repository.update(alias_id, alias)
+        alias_matchers.invalidate(alias.db_connection_id)
         return alias
 
     def delete_alias(self, alias_id: str) -> Alias:
@@ -109,4 +122,5 @@ class AliasService:
                 status_code=500, detail=f"Failed to delete alias {alias_id}"
             )
 
+        alias_matchers.invalidate(alias.db_connection_id)
         return Alias(**is_deleted.model_dump())
@@ -4,7 +4,6 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any
 
@@ -21,6 +20,7 @@ from app.modules.sql_generation.models import LLMConfig, SQLGeneration
 from app.modules.sql_generation.repositories import SQLGenerationRepository
 from app.modules.sql_generation.services import SQLGenerationService
 from app.utils.analysis_generator import AnalysisAgent
+from app.utils.core.executors import get_executor
 from app.utils.sql_database.sql_database import SQLDatabase
 
 logger = logging.getLogger(__name__)
@@ -150,13 +150,12 @@ class AnalysisService:
 
         # Run SQL generation in thread pool (it's sync)
         loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            sql_generation = await loop.run_in_executor(
-                executor,
-                sql_generation_service.create_sql_generation,
-                prompt.id,
-                sql_request,
-            )
+        sql_generation = await loop.run_in_executor(
+            get_executor("generation"),
+            sql_generation_service.create_sql_generation,
+            prompt.id,
+            sql_request,
+        )
         timing["sql_generation"] = (datetime.now() - sql_start).total_seconds()
 
         # Step 3: Execute SQL and analyze
@@ -237,11 +236,10 @@ class AnalysisService:
     ) -> list[dict]:
         """Execute SQL query asynchronously."""
         loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            result = await loop.run_in_executor(
-                executor,
-                lambda: database.run_sql(sql, max_rows),
-            )
+        result = await loop.run_in_executor(
+            get_executor("db"),
+            lambda: database.run_sql(sql, max_rows),
+        )
         # run_sql returns (str, dict) - we want the dict's 'result' key
         if isinstance(result, tuple) and len(result) > 1:
             result_dict = result[1]
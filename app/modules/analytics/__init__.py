@@ -4,6 +4,7 @@ from app.modules.analytics.exceptions import (
     AnalyticsError,
     AnomalyDetectionError,
     CorrelationAnalysisError,
+    DatasetError,
     ForecastingError,
     InsufficientDataError,
     InvalidMethodError,
@@ -18,6 +19,7 @@ from app.modules.analytics.models import (
     ExportRequest,
     ExportResponse,
     ForecastResult,
+    MultiSeriesAnomalyResult,
     StatisticalTestResult,
     StatisticalTestType,
 )
@@ -40,6 +42,7 @@ __all__ = [
     "AnalyticsError",
     "AnomalyDetectionError",
     "CorrelationAnalysisError",
+    "DatasetError",
     "ForecastingError",
     "InsufficientDataError",
     "InvalidMethodError",
@@ -53,6 +56,7 @@ __all__ = [
     "ExportRequest",
     "ExportResponse",
     "ForecastResult",
+    "MultiSeriesAnomalyResult",
     "StatisticalTestResult",
     "StatisticalTestType",
     # Services
@@ -14,6 +14,7 @@ from app.modules.analytics import (
     ExportFormat,
     ExportService,
     ForecastingService,
+    MultiSeriesAnomalyResult,
     StatisticalService,
 )
 from app.modules.analytics.exceptions import (
@@ -196,6 +197,33 @@ class AnomalyRequest(BaseModel):
     threshold: float = 3.0
 
 
+class MultiSeriesAnomalyRequest(BaseModel):
+    """Request for anomaly detection over many series at once."""
+
+    series: dict[str, list[float | int | None]] | None = Field(
+        default=None,
+        description="Wide data, the values of each series by series id",
+    )
+    records: list[dict[str, Any]] | None = Field(
+        default=None,
+        description="Long data, one record per point with series_column and value_column",
+    )
+    series_column: str | None = Field(default=None, description="Series id field of records")
+    value_column: str | None = Field(default=None, description="Value field of records")
+    time_column: str | None = Field(
+        default=None, description="Field ordering the points of records"
+    )
+    method: str = Field(
+        default="zscore",
+        description="Detection method (zscore, iqr, rolling_zscore or rolling_iqr)",
+    )
+    threshold: float | None = Field(
+        default=None,
+        description="Z-score threshold (default 3) or IQR multiplier (default 1.5)",
+    )
+    window: int = Field(default=20, ge=2, description="Points before each point for rolling methods")
+
+
 class AnomalyExportRequest(BaseModel):
     """Request for exporting anomaly detection results."""
 
@@ -611,6 +639,37 @@ async def detect_anomalies(request: AnomalyRequest) -> AnomalyResponse:
         )
 
 
+@router.post("/anomalies/multi", response_model=MultiSeriesAnomalyResult)
+async def detect_multi_series_anomalies(
+    request: MultiSeriesAnomalyRequest,
+) -> MultiSeriesAnomalyResult:
+    """Detect anomalies in many series in one call, anomalies returned as columns."""
+    detail = {"method": request.method, "threshold": request.threshold}
+    try:
+        if (request.series is None) == (request.records is None):
+            raise AnomalyDetectionError("Provide either series or records")
+        if request.series is not None:
+            # Series of different lengths are padded with missing values
+            df = pd.DataFrame.from_dict(request.series, orient="index").T
+        else:
+            df = pd.DataFrame.from_records(request.records)
+
+        return _anomaly_service.detect_multi_series(
+            df,
+            method=request.method,
+            threshold=request.threshold,
+            window=request.window,
+            series_column=request.series_column,
+            value_column=request.value_column,
+            time_column=request.time_column,
+        )
+    except (InvalidMethodError, AnomalyDetectionError) as e:
+        return error_response(e, detail)
+    except Exception as e:
+        wrapped_error = AnomalyDetectionError(f"Anomaly detection failed: {e}")
+        return error_response(wrapped_error, detail)
+
+
 @router.post("/anomalies/export")
 async def export_anomalies(
     request: AnomalyExportRequest,
@@ -33,8 +33,8 @@ async def create_batch(
     can poll for progress using the GET /batch/{batch_id} endpoint.
 
     Args:
-        request: The batch request containing a list of analytics operations
-            and optional max_concurrency setting.
+        request: The batch request containing a list of analytics operations,
+            optional datasets they reference and max_concurrency setting.
         background_tasks: FastAPI BackgroundTasks for async processing.
 
     Returns:
@@ -60,9 +60,28 @@ async def create_batch(
             ],
             "max_concurrency": 5
         }
+
+    Operations over the same data can share a dataset instead:
+        {
+            "datasets": [
+                {"dataset_id": "sales", "columns": {"revenue": [10, 12, 9, 30]}}
+            ],
+            "operations": [
+                {
+                    "operation_type": "descriptive_stats",
+                    "params": {"data": {"dataset": "sales", "column": "revenue"}}
+                },
+                {
+                    "operation_type": "forecast",
+                    "params": {"values": {"dataset": "sales", "column": "revenue"}}
+                }
+            ]
+        }
     """
     # Create the batch job in the service
-    job = analytics_batch_service.create_batch_job(request.operations)
+    job = analytics_batch_service.create_batch_job(
+        request.operations, request.max_concurrency, request.datasets
+    )
 
     # Schedule background processing
     background_tasks.add_task(
@@ -70,6 +89,7 @@ async def create_batch(
         job.batch_id,
         request.operations,
         request.max_concurrency,
+        request.datasets,
     )
 
     return {
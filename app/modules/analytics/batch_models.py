@@ -6,7 +6,18 @@ from datetime import datetime
 from enum import Enum
 from typing import Any
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+# Key of a param value referencing a batch dataset, e.g.
+# {"dataset": "sales", "column": "revenue"}
+DATASET_REFERENCE_KEY = "dataset"
+
+
+def get_dataset_reference(value: Any) -> dict[str, Any] | None:
+    """Return `value` if it references a batch dataset, None otherwise."""
+    if isinstance(value, dict) and isinstance(value.get(DATASET_REFERENCE_KEY), str):
+        return value
+    return None
 
 
 class BatchJobStatus(str, Enum):
@@ -59,8 +70,15 @@ class SingleAnalyticsRequest(BaseModel):
     - t_test: group1 (list[float|int]), group2 (list[float|int]), alpha (float, optional)
     - correlation: x (list[float|int]), y (list[float|int]), method (str, optional), alpha (float, optional)
     - correlation_matrix: data (list[dict]), method (str, optional)
-    - anomaly_detection: data (list[float|int]), method (str, optional), threshold (float, optional)
+    - anomaly_detection: data (list[float|int]), method (str, optional), threshold (float, optional);
+      with a table as data (list[dict] or dict of columns), every series is scanned at once:
+      method (zscore, iqr, rolling_zscore, rolling_iqr), window, and series_column,
+      value_column and time_column for long tables
     - forecast: values (list[float|int]), periods (int, optional)
+
+    Data parameters can reference a dataset of the batch instead of carrying
+    the values: {"dataset": "<dataset_id>", "column": "<name>"} for a series,
+    {"dataset": "<dataset_id>", "columns": [...]} or no column for a table.
     """
 
     operation_id: str | None = Field(
@@ -147,6 +165,86 @@ class SingleAnalyticsRequest(BaseModel):
                     "operation_type": "forecast",
                     "params": {"values": [10, 20, 30, 40, 50], "periods": 5},
                 },
+                {
+                    "operation_id": "forecast_2",
+                    "operation_type": "forecast",
+                    "params": {
+                        "values": {"dataset": "sales", "column": "revenue"},
+                        "periods": 5,
+                    },
+                },
+            ]
+        }
+    }
+
+    def get_dataset_ids(self) -> set[str]:
+        """Return the ids of the batch datasets referenced by the params."""
+        return {
+            reference[DATASET_REFERENCE_KEY]
+            for reference in map(get_dataset_reference, self.params.values())
+            if reference is not None
+        }
+
+
+class BatchDataset(BaseModel):
+    """A dataset shared by the operations of a batch.
+
+    The data is sent once, as columns or records, or loaded with a SQL query
+    on a database connection when the batch starts. It is kept in memory as a
+    DataFrame for the duration of the batch and operations reference its
+    columns by dataset_id instead of repeating the values.
+    """
+
+    dataset_id: str = Field(
+        ...,
+        min_length=1,
+        description="Identifier operations use to reference this dataset.",
+    )
+    columns: dict[str, list[Any]] | None = Field(
+        default=None,
+        description="Column-oriented data, a list of values per column name.",
+    )
+    records: list[dict[str, Any]] | None = Field(
+        default=None,
+        description="Row-oriented data, converted to columns once.",
+    )
+    sql: str | None = Field(
+        default=None,
+        description="SQL query loading the dataset, requires db_connection_id.",
+    )
+    db_connection_id: str | None = Field(
+        default=None,
+        description="Database connection the SQL query runs on.",
+    )
+
+    @model_validator(mode="after")
+    def validate_source(self) -> "BatchDataset":
+        """Ensure exactly one data source is given."""
+        sources = [
+            name for name in ("columns", "records", "sql") if getattr(self, name) is not None
+        ]
+        if len(sources) != 1:
+            raise ValueError(
+                f"Dataset {self.dataset_id} needs exactly one of columns, records or sql"
+            )
+        if self.sql is not None and not self.db_connection_id:
+            raise ValueError(f"Dataset {self.dataset_id} needs a db_connection_id for its sql")
+        if self.columns is not None and len({len(v) for v in self.columns.values()}) > 1:
+            raise ValueError(f"Columns of dataset {self.dataset_id} differ in length")
+        return self
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "dataset_id": "sales",
+                    "columns": {"revenue": [10, 12, 9, 30], "cost": [4, 5, 4, 9]},
+                },
+                {
+                    "dataset_id": "orders",
+                    "sql": "SELECT amount, quantity FROM orders",
+                    "db_connection_id": "65f1c0ffee",
+                },
             ]
         }
     }
@@ -173,6 +271,12 @@ class AnalyticsBatchRequest(BaseModel):
         description="Maximum number of operations to process concurrently. "
         "Higher values may improve throughput but use more resources.",
     )
+    datasets: list[BatchDataset] = Field(
+        default_factory=list,
+        max_length=20,
+        description="Datasets shared by the operations, referenced from their "
+        "params by dataset_id.",
+    )
 
     @field_validator("operations")
     @classmethod
@@ -184,6 +288,21 @@ class AnalyticsBatchRequest(BaseModel):
             raise ValueError("At least one operation must be provided")
         return v
 
+    @model_validator(mode="after")
+    def validate_dataset_references(self) -> "AnalyticsBatchRequest":
+        """Ensure dataset ids are unique and every referenced dataset is given."""
+        dataset_ids = [dataset.dataset_id for dataset in self.datasets]
+        if len(set(dataset_ids)) != len(dataset_ids):
+            raise ValueError("Dataset ids must be unique")
+        for operation in self.operations:
+            unknown = operation.get_dataset_ids() - set(dataset_ids)
+            if unknown:
+                raise ValueError(
+                    f"Operation {operation.operation_id or operation.operation_type.value} "
+                    f"references unknown datasets: {', '.join(sorted(unknown))}"
+                )
+        return self
+
     model_config = {
         "json_schema_extra": {
             "examples": [
@@ -204,7 +323,28 @@ class AnalyticsBatchRequest(BaseModel):
                         },
                     ],
                     "max_concurrency": 5,
-                }
+                },
+                {
+                    "datasets": [
+                        {
+                            "dataset_id": "sales",
+                            "columns": {"revenue": [10, 12, 9, 30, 11]},
+                        }
+                    ],
+                    "operations": [
+                        {
+                            "operation_type": "descriptive_stats",
+                            "params": {"data": {"dataset": "sales", "column": "revenue"}},
+                        },
+                        {
+                            "operation_type": "anomaly_detection",
+                            "params": {
+                                "data": {"dataset": "sales", "column": "revenue"},
+                                "method": "iqr",
+                            },
+                        },
+                    ],
+                },
             ]
         }
     }
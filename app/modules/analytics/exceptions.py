@@ -48,3 +48,9 @@ class InvalidMethodError(AnalyticsError):
     """Raised when an invalid or unsupported method is specified."""
 
     pass
+
+
+class DatasetError(AnalyticsError):
+    """Raised when a batch dataset can't be loaded or a reference to it is invalid."""
+
+    pass
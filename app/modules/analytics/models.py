@@ -138,3 +138,23 @@ class AnomalyResult(BaseModel):
     anomalies: list[dict[str, Any]]
     threshold: float | None = None
     interpretation: str
+
+
+class MultiSeriesAnomalyResult(BaseModel):
+    """Result of anomaly detection over many series at once.
+
+    Anomalies and per-series summaries are columnar: each key holds one list
+    with a value per anomaly (or per series), in the same order.
+    """
+
+    method: str
+    threshold: float
+    window: int | None = None
+    series_count: int
+    total_points: int
+    anomaly_count: int
+    anomaly_percentage: float
+    anomalies: dict[str, list[Any]]
+    series: dict[str, list[Any]]
+    skipped_series: list[str] = Field(default_factory=list)
+    interpretation: str
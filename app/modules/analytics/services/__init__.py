@@ -5,15 +5,30 @@ from app.modules.analytics.services.batch_service import (
     AnalyticsBatchService,
     analytics_batch_service,
 )
+from app.modules.analytics.services.datasets import BatchDatasets, set_dataset_storage
 from app.modules.analytics.services.export_service import ExportService
 from app.modules.analytics.services.forecasting_service import ForecastingService
+from app.modules.analytics.services.job_store import (
+    BatchJobStore,
+    MemoryBatchJobStore,
+    SQLiteBatchJobStore,
+    StorageBatchJobStore,
+    create_batch_job_store,
+)
 from app.modules.analytics.services.statistical_service import StatisticalService
 
 __all__ = [
     "AnomalyService",
     "AnalyticsBatchService",
     "analytics_batch_service",
+    "BatchDatasets",
+    "BatchJobStore",
     "ExportService",
     "ForecastingService",
+    "MemoryBatchJobStore",
+    "SQLiteBatchJobStore",
     "StatisticalService",
+    "StorageBatchJobStore",
+    "create_batch_job_store",
+    "set_dataset_storage",
 ]
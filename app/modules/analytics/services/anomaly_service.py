@@ -4,12 +4,55 @@ from __future__ import annotations
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
 from app.modules.analytics.exceptions import (
     AnomalyDetectionError,
     InsufficientDataError,
+    InvalidMethodError,
 )
-from app.modules.analytics.models import AnomalyResult
+from app.modules.analytics.models import AnomalyResult, MultiSeriesAnomalyResult
+
+MULTI_SERIES_METHODS = ("zscore", "iqr", "rolling_zscore", "rolling_iqr")
+
+
+def _sorted_quantile(ordered: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Quantile `q` of the first `counts` values of each row of sorted `ordered`."""
+    position = q * (counts - 1)
+    below = np.floor(position).astype(int)
+    above = np.minimum(below + 1, counts - 1)
+    low = np.take_along_axis(ordered, below[..., None], axis=-1)[..., 0]
+    high = np.take_along_axis(ordered, above[..., None], axis=-1)[..., 0]
+    return low + (high - low) * (position - below)
+
+
+def _shift_down(stats: np.ndarray, window: int) -> np.ndarray:
+    """Align statistics of each window with the point after it."""
+    return np.concatenate([np.full((window, stats.shape[1]), np.nan), stats])
+
+
+def _rolling_mean_std(values: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and std of the `window` points before each point, from cumulative sums.
+
+    NaN where the window isn't complete or has missing points.
+    """
+    # Centered first so the sums of squares don't lose precision
+    missing = np.isnan(values)
+    centered = np.where(missing, 0.0, values - np.nanmean(values, axis=0))
+    zero = np.zeros((1, values.shape[1]))
+    sums = np.concatenate([zero, np.cumsum(centered, axis=0)])
+    squares = np.concatenate([zero, np.cumsum(centered**2, axis=0)])
+    gaps = np.concatenate([zero, np.cumsum(missing, axis=0)])
+
+    total = sums[window:-1] - sums[:-window - 1]
+    mean = total / window
+    variance = (squares[window:-1] - squares[:-window - 1] - total * mean) / (window - 1)
+    std = np.sqrt(np.maximum(variance, 0))
+    incomplete = gaps[window:-1] - gaps[:-window - 1] > 0
+    mean[incomplete] = np.nan
+    std[incomplete] = np.nan
+    mean += np.nanmean(values, axis=0)
+    return _shift_down(mean, window), _shift_down(std, window)
 
 
 class AnomalyService:
@@ -219,3 +262,178 @@ class AnomalyService:
             raise AnomalyDetectionError(
                 f"Isolation Forest detection failed: {e}"
             ) from e
+
+    def detect_multi_series(
+        self,
+        df: pd.DataFrame,
+        method: str = "zscore",
+        threshold: float | None = None,
+        window: int = 20,
+        series_column: str | None = None,
+        value_column: str | None = None,
+        time_column: str | None = None,
+    ) -> MultiSeriesAnomalyResult:
+        """Detect anomalies in many series with one pass of grouped array operations.
+
+        `df` is either wide, one column per series and one row per point, or
+        long, one row per point with its `series_column` and `value_column`.
+        Points are ordered by `time_column` when given, by position otherwise.
+
+        Methods score each point against its own series:
+
+        - zscore: mean and std of the series, `threshold` in stds (default 3);
+        - iqr: quartiles of the series, `threshold` as IQR multiplier (default 1.5);
+        - rolling_zscore / rolling_iqr: the same over the `window` points
+          before each point.
+
+        Series with too few points are skipped instead of failing the others.
+        """
+        if method not in MULTI_SERIES_METHODS:
+            raise InvalidMethodError(
+                f"Unknown method: {method}, use one of {', '.join(MULTI_SERIES_METHODS)}"
+            )
+        rolling = method.startswith("rolling")
+        use_iqr = method.endswith("iqr")
+        if threshold is None:
+            threshold = 1.5 if use_iqr else 3.0
+        if rolling and window < 2:
+            raise AnomalyDetectionError(f"Rolling window must be at least 2, got {window}")
+
+        frame = self._series_frame(df, series_column, value_column, time_column)
+        try:
+            values = frame.to_numpy(dtype=float)
+        except (TypeError, ValueError) as e:
+            raise AnomalyDetectionError(f"Series must be numeric: {e}") from e
+
+        series_ids = np.asarray([str(column) for column in frame.columns], dtype=object)
+        counts = (~np.isnan(values)).sum(axis=0)
+        eligible = counts >= (window + 1 if rolling else 4 if use_iqr else 3)
+        if not eligible.any():
+            raise InsufficientDataError(
+                f"No series has enough data points for {method} anomaly detection"
+            )
+        values, series_ids, counts = values[:, eligible], series_ids[eligible], counts[eligible]
+
+        try:
+            if rolling and use_iqr:
+                windows = np.sort(sliding_window_view(values[:-1], window, axis=0), axis=-1)
+                sizes = np.full(windows.shape[:-1], window)
+                low = _shift_down(_sorted_quantile(windows, sizes, 0.25), window)
+                high = _shift_down(_sorted_quantile(windows, sizes, 0.75), window)
+                # Windows with missing points, sorted last, have no bounds
+                low[window:][np.isnan(windows[..., -1])] = np.nan
+            elif rolling:
+                center, spread = _rolling_mean_std(values, window)
+            elif use_iqr:
+                # Quartiles interpolated like pandas, NaNs are sorted last
+                ordered = np.sort(values.T, axis=-1)
+                low = _sorted_quantile(ordered, counts, 0.25)
+                high = _sorted_quantile(ordered, counts, 0.75)
+            else:
+                center = np.nanmean(values, axis=0)
+                spread = np.nanstd(values, axis=0, ddof=1)
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                if use_iqr:
+                    iqr = high - low
+                    lower = low - threshold * iqr
+                    upper = high + threshold * iqr
+                    scores = None
+                else:
+                    lower = center - threshold * spread
+                    upper = center + threshold * spread
+                    scores = (values - center) / spread
+                # NaN bounds (no history yet) and NaN values compare False
+                mask = (values < lower) | (values > upper)
+                if scores is not None:
+                    # Like detect_zscore, constant series have no anomalies
+                    mask &= spread > 0
+
+            lower = np.broadcast_to(lower, values.shape)
+            upper = np.broadcast_to(upper, values.shape)
+            # Transposed so anomalies come grouped by series, in point order
+            series_idx, point_idx = np.nonzero(mask.T)
+            anomaly_values = values[point_idx, series_idx]
+            anomalies = {
+                "series_id": series_ids[series_idx].tolist(),
+                "index": self._index_labels(frame.index)[point_idx].tolist(),
+                "value": anomaly_values.tolist(),
+                "lower_bound": lower[point_idx, series_idx].tolist(),
+                "upper_bound": upper[point_idx, series_idx].tolist(),
+                "direction": np.where(
+                    anomaly_values > upper[point_idx, series_idx], "high", "low"
+                ).tolist(),
+            }
+            if scores is not None:
+                anomalies["z_score"] = scores[point_idx, series_idx].tolist()
+        except Exception as e:
+            raise AnomalyDetectionError(f"Multi-series {method} detection failed: {e}") from e
+
+        anomaly_counts = mask.sum(axis=0)
+        total = int(counts.sum())
+        count = int(anomaly_counts.sum())
+        pct = (count / total) * 100 if total else 0.0
+        flagged = int((anomaly_counts > 0).sum())
+        interpretation = (
+            f"{method} analysis (threshold: {threshold}"
+            f"{f', window: {window}' if rolling else ''}): Found {count} anomalies "
+            f"({pct:.1f}% of data) in {flagged} of {len(series_ids)} series."
+        )
+
+        return MultiSeriesAnomalyResult(
+            method=method,
+            threshold=threshold,
+            window=window if rolling else None,
+            series_count=len(series_ids),
+            total_points=total,
+            anomaly_count=count,
+            anomaly_percentage=round(pct, 2),
+            anomalies=anomalies,
+            series={
+                "series_id": series_ids.tolist(),
+                "total_points": counts.tolist(),
+                "anomaly_count": anomaly_counts.tolist(),
+            },
+            skipped_series=[str(column) for column in frame.columns[~eligible]],
+            interpretation=interpretation,
+        )
+
+    @staticmethod
+    def _series_frame(
+        df: pd.DataFrame,
+        series_column: str | None,
+        value_column: str | None,
+        time_column: str | None,
+    ) -> pd.DataFrame:
+        """Align the series of a wide or long frame as columns of one frame."""
+        if series_column is None and value_column is None:
+            if time_column is None:
+                return df
+            if time_column not in df.columns:
+                raise AnomalyDetectionError(f"Missing columns in dataframe: {time_column}")
+            return df.set_index(time_column).sort_index()
+
+        if series_column is None or value_column is None:
+            raise AnomalyDetectionError("Long data needs both series_column and value_column")
+        columns = [c for c in (series_column, value_column, time_column) if c is not None]
+        missing_cols = set(columns) - set(df.columns)
+        if missing_cols:
+            raise AnomalyDetectionError(
+                f"Missing columns in dataframe: {', '.join(map(str, missing_cols))}"
+            )
+        if time_column is None:
+            # Points are numbered in their order within each series
+            time_column = "__position"
+            df = df.assign(**{time_column: df.groupby(series_column, sort=False).cumcount()})
+        elif df.duplicated([series_column, time_column]).any():
+            raise AnomalyDetectionError(
+                f"Series have several values for the same {time_column}"
+            )
+        return df.pivot(index=time_column, columns=series_column, values=value_column)
+
+    @staticmethod
+    def _index_labels(index: pd.Index) -> np.ndarray:
+        """Labels of the points as in detect_zscore: ints as they are, others as text."""
+        if pd.api.types.is_integer_dtype(index):
+            return np.asarray(index.tolist(), dtype=object)
+        return np.asarray(index.astype(str).tolist(), dtype=object)
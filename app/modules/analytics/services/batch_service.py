@@ -3,9 +3,12 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import os
+import socket
 import uuid
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable
 
 import pandas as pd
 
@@ -13,12 +16,31 @@ from app.modules.analytics.batch_models import (
     AnalyticsBatchResult,
     AnalyticsBatchStatus,
     AnalyticsOperationType,
+    BatchDataset,
     BatchJobStatus,
     SingleAnalyticsRequest,
 )
+from app.modules.analytics.exceptions import DatasetError
 from app.modules.analytics.services.anomaly_service import AnomalyService
+from app.modules.analytics.services.datasets import BatchDatasets
+from app.modules.analytics.services.executor import (
+    OperationTimeoutError,
+    ProcessAnalyticsExecutor,
+    ThreadAnalyticsExecutor,
+    get_analytics_executor,
+)
 from app.modules.analytics.services.forecasting_service import ForecastingService
+from app.modules.analytics.services.job_store import (
+    ANALYTICS_BATCH_JOB_TTL,
+    ANALYTICS_BATCH_LEASE_SECONDS,
+    BatchJobStore,
+    BatchRequest,
+    MemoryBatchJobStore,
+)
 from app.modules.analytics.services.statistical_service import StatisticalService
+from app.utils.core.executors import get_executor
+
+logger = logging.getLogger(__name__)
 
 
 class AnalyticsBatchService:
@@ -28,28 +50,63 @@ class AnalyticsBatchService:
     appropriate analytics service (StatisticalService, AnomalyService,
     ForecastingService), and tracks progress.
 
+    Jobs, the requests they were submitted with and their results are kept in
+    a job store, in memory unless given one. With a shared store, jobs are
+    visible to every API worker, a worker holds a lease on the jobs it runs
+    and jobs left unfinished by a crashed worker are resumed by another.
+
     Attributes:
-        _batch_jobs: In-memory storage for batch job statuses.
+        _job_store: Store of batch jobs and their results.
+        _running: Jobs this service is running, cancelled here immediately.
+        _owner: Identity of this service in the leases of its jobs.
         _stat_service: Service for statistical operations.
         _anomaly_service: Service for anomaly detection operations.
         _forecast_service: Service for forecasting operations.
+        _executor: Backend running operations, the shared analytics
+            executor unless given.
     """
 
-    def __init__(self) -> None:
-        """Initialize the batch service with analytics services."""
-        self._batch_jobs: dict[str, AnalyticsBatchStatus] = {}
+    def __init__(
+        self,
+        executor: ThreadAnalyticsExecutor | ProcessAnalyticsExecutor | None = None,
+        job_store: BatchJobStore | None = None,
+    ) -> None:
+        """Initialize the batch service with analytics services.
+
+        Args:
+            executor: Backend running the operations of batches, by default
+                the one selected by ANALYTICS_EXECUTOR.
+            job_store: Store of batch jobs, in memory by default.
+        """
+        self._job_store: BatchJobStore = job_store or MemoryBatchJobStore()
+        self._running: dict[str, AnalyticsBatchStatus] = {}
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lease = ANALYTICS_BATCH_LEASE_SECONDS
+        self._maintenance_task: asyncio.Task | None = None
+        self._resumed_tasks: set[asyncio.Task] = set()
         self._stat_service = StatisticalService()
         self._anomaly_service = AnomalyService()
         self._forecast_service = ForecastingService()
+        self._executor = executor
+
+    def set_job_store(self, job_store: BatchJobStore) -> None:
+        """Set the store of batch jobs. Called during app startup."""
+        self._job_store = job_store
 
     def create_batch_job(
         self,
         operations: list[SingleAnalyticsRequest],
+        max_concurrency: int = 5,
+        datasets: list[BatchDataset] | None = None,
     ) -> AnalyticsBatchStatus:
         """Create a new batch job for processing analytics operations.
 
         Args:
             operations: List of analytics operations to process.
+            max_concurrency: Maximum number of operations to run concurrently,
+                stored to resume the job.
+            datasets: Datasets referenced from the operation params, stored
+                to resume the job.
 
         Returns:
             AnalyticsBatchStatus with the newly created job information.
@@ -81,7 +138,7 @@ class AnalyticsBatchService:
             completed_at=None,
         )
 
-        self._batch_jobs[batch_id] = job
+        self._job_store.create(job, BatchRequest.create(operations, max_concurrency, datasets))
         return job
 
     def get_batch_job(self, batch_id: str) -> AnalyticsBatchStatus | None:
@@ -93,7 +150,10 @@ class AnalyticsBatchService:
         Returns:
             The batch job status if found, None otherwise.
         """
-        return self._batch_jobs.get(batch_id)
+        job = self._running.get(batch_id)
+        if job is not None:
+            return job
+        return self._job_store.get(batch_id)
 
     def delete_batch_job(self, batch_id: str) -> bool:
         """Delete a batch job from storage.
@@ -104,21 +164,20 @@ class AnalyticsBatchService:
         Returns:
             True if the job was deleted, False if not found.
         """
-        if batch_id in self._batch_jobs:
-            del self._batch_jobs[batch_id]
-            return True
-        return False
+        return self._job_store.delete(batch_id)
 
     def cancel_batch_job(self, batch_id: str) -> AnalyticsBatchStatus | None:
         """Cancel a running or pending batch job.
 
+        Jobs running on another worker stop when it next renews their lease.
+
         Args:
             batch_id: The unique identifier of the batch job.
 
         Returns:
             Updated batch job status if found and cancellable, None otherwise.
         """
-        job = self._batch_jobs.get(batch_id)
+        job = self.get_batch_job(batch_id)
         if job is None:
             return None
 
@@ -129,24 +188,43 @@ class AnalyticsBatchService:
         job.status = BatchJobStatus.CANCELLED
         job.updated_at = datetime.utcnow()
         job.completed_at = datetime.utcnow()
+        self._job_store.save(job)
         return job
 
+    async def _call_store(self, fn: Callable, *args: Any) -> Any:
+        """Run a job store call off the event loop, stores may do network I/O."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor("db"), fn, *args)
+
     async def process_batch(
         self,
         batch_id: str,
-        operations: list[SingleAnalyticsRequest],
+        operations: list[SingleAnalyticsRequest] | None = None,
         max_concurrency: int = 5,
+        datasets: list[BatchDataset] | None = None,
     ) -> AnalyticsBatchStatus:
         """Process a batch of analytics operations with concurrency control.
 
         Uses asyncio.Semaphore to limit concurrent operations and tracks
         progress by updating completed/failed counts as operations finish.
+        Operations run on the analytics executor, in worker processes by
+        default, and fail once they exceed the operation timeout.
+
+        Datasets are loaded once before the operations start and kept in
+        memory until the batch finishes; operations referencing a dataset
+        that failed to load fail with its error.
+
+        The job is leased to this service while it runs and each result is
+        stored as its operation finishes. Operations that already have a
+        result, from a run that was interrupted, are skipped.
 
         Args:
             batch_id: The unique identifier of the batch job.
-            operations: List of analytics operations to process.
+            operations: List of analytics operations to process, by default
+                those the job was created with.
             max_concurrency: Maximum number of operations to run concurrently.
                 Defaults to 5.
+            datasets: Datasets referenced from the operation params.
 
         Returns:
             The final AnalyticsBatchStatus with all results.
@@ -154,7 +232,7 @@ class AnalyticsBatchService:
         Raises:
             ValueError: If the batch_id is not found in the job storage.
         """
-        job = self._batch_jobs.get(batch_id)
+        job = await self._call_store(self._job_store.get, batch_id)
         if job is None:
             raise ValueError(f"Batch job not found: {batch_id}")
 
@@ -162,13 +240,98 @@ class AnalyticsBatchService:
         if job.status == BatchJobStatus.CANCELLED:
             return job
 
+        # Finished, or running on another worker
+        if not await self._call_store(
+            self._job_store.acquire, batch_id, self._owner, self._lease
+        ):
+            return job
+
+        if operations is None:
+            request = await self._call_store(self._job_store.get_request, batch_id)
+            operations, max_concurrency = request.operations, request.max_concurrency
+            datasets = request.datasets
+
         # Mark job as running
         job.status = BatchJobStatus.RUNNING
-        job.started_at = datetime.utcnow()
+        job.started_at = job.started_at or datetime.utcnow()
         job.updated_at = datetime.utcnow()
+        self._running[batch_id] = job
+        heartbeat = None
+        try:
+            await self._call_store(self._job_store.save, job)
+            heartbeat = asyncio.create_task(self._renew_lease(job))
+            await self._run_operations(
+                job,
+                [op for op in operations if op.operation_id not in job.results],
+                max_concurrency,
+                datasets,
+            )
+            if heartbeat is not None:
+                heartbeat.cancel()
+            # A cancel or delete from another worker since the last renewal
+            stored_status = await self._call_store(
+                self._job_store.renew, batch_id, self._owner, self._lease
+            )
+            if stored_status in (None, BatchJobStatus.CANCELLED):
+                job.status = BatchJobStatus.CANCELLED
+
+            # Determine final status
+            now = datetime.utcnow()
+            job.completed_at = now
+            job.updated_at = now
 
+            if job.status == BatchJobStatus.CANCELLED:
+                # Status already set, keep it
+                pass
+            elif job.failed == job.total:
+                job.status = BatchJobStatus.FAILED
+            elif job.failed > 0:
+                job.status = BatchJobStatus.PARTIAL
+            else:
+                job.status = BatchJobStatus.COMPLETED
+
+            await self._call_store(self._job_store.save, job)
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            self._running.pop(batch_id, None)
+            await self._call_store(self._job_store.release, batch_id, self._owner)
+
+        return job
+
+    async def _renew_lease(self, job: AnalyticsBatchStatus) -> None:
+        """Renew the lease of a running job, stopping it once cancelled elsewhere."""
+        while job.status == BatchJobStatus.RUNNING:
+            await asyncio.sleep(self._lease / 3)
+            try:
+                stored_status = await self._call_store(
+                    self._job_store.renew, job.batch_id, self._owner, self._lease
+                )
+            except Exception as e:
+                logger.warning(f"Could not renew the lease of batch {job.batch_id}: {e}")
+                continue
+            if stored_status in (None, BatchJobStatus.CANCELLED):
+                job.status = BatchJobStatus.CANCELLED
+
+    async def _run_operations(
+        self,
+        job: AnalyticsBatchStatus,
+        operations: list[SingleAnalyticsRequest],
+        max_concurrency: int,
+        datasets: list[BatchDataset] | None,
+    ) -> None:
+        """Run the operations of a job, storing each result as it completes."""
         # Create semaphore for concurrency control
         semaphore = asyncio.Semaphore(max_concurrency)
+        executor = self._executor or get_analytics_executor()
+
+        # Load the shared datasets once, SQL datasets query their database
+        batch_datasets = BatchDatasets()
+        if datasets:
+            loop = asyncio.get_running_loop()
+            batch_datasets = await loop.run_in_executor(
+                get_executor("db"), BatchDatasets.load, datasets
+            )
 
         async def process_operation_with_semaphore(
             operation: SingleAnalyticsRequest,
@@ -188,70 +351,131 @@ class AnalyticsBatchService:
                         completed_at=datetime.utcnow(),
                     )
 
-                # Run the synchronous operation in a thread pool to avoid blocking
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(
-                    None, self.execute_single_operation, operation
+                # Run the CPU-bound operation off the event loop
+                started_at = datetime.utcnow()
+                try:
+                    operation = batch_datasets.bind(operation, share=not executor.in_process)
+                    return await executor.run(self, operation)
+                except (OperationTimeoutError, DatasetError) as e:
+                    error = str(e)
+                except Exception as e:
+                    # E.g. the worker died again on the retry
+                    logger.warning(
+                        f"Operation {operation.operation_id} of batch {job.batch_id} failed: {e}"
+                    )
+                    error = str(e) or type(e).__name__
+                return AnalyticsBatchResult(
+                    operation_id=operation.operation_id or "unknown",
+                    operation_type=operation.operation_type,
+                    status="failed",
+                    result=None,
+                    error=error,
+                    started_at=started_at,
+                    completed_at=datetime.utcnow(),
                 )
-                return result
-
-        # Create tasks for all operations
-        tasks = [
-            asyncio.create_task(process_operation_with_semaphore(op))
-            for op in operations
-        ]
-
-        # Process results as they complete
-        for completed_task in asyncio.as_completed(tasks):
-            try:
-                result = await completed_task
 
-                # Check if job was cancelled
-                if job.status == BatchJobStatus.CANCELLED:
-                    # Cancel remaining tasks
-                    for task in tasks:
-                        if not task.done():
-                            task.cancel()
-                    break
-
-                # Update job progress
-                operation_id = result.operation_id
-                job.results[operation_id] = result
-
-                if result.is_successful:
-                    job.completed += 1
-                else:
+        tasks: list[asyncio.Task] = []
+        try:
+            # Create tasks for all operations
+            tasks = [
+                asyncio.create_task(process_operation_with_semaphore(op))
+                for op in operations
+            ]
+
+            # Process results as they complete
+            for completed_task in asyncio.as_completed(tasks):
+                try:
+                    result = await completed_task
+
+                    # Check if job was cancelled
+                    if job.status == BatchJobStatus.CANCELLED:
+                        # Cancel remaining tasks
+                        for task in tasks:
+                            if not task.done():
+                                task.cancel()
+                        break
+
+                    # Update job progress
+                    operation_id = result.operation_id
+                    job.results[operation_id] = result
+
+                    if result.is_successful:
+                        job.completed += 1
+                    else:
+                        job.failed += 1
+
+                    job.updated_at = datetime.utcnow()
+
+                except asyncio.CancelledError:
+                    # The batch itself was cancelled, stop here
+                    if asyncio.current_task().cancelling():
+                        raise
+                    # Task was cancelled, don't count as failure
+                    continue
+                except Exception as e:
+                    # Unexpected error - this shouldn't normally happen since
+                    # execute_single_operation handles errors internally
                     job.failed += 1
+                    job.updated_at = datetime.utcnow()
+                    logger.warning(f"Unexpected error in batch {job.batch_id}: {e}")
+                    continue
+
+                # Stored right away, a resumed job won't run the operation again
+                try:
+                    await self._call_store(self._job_store.add_result, job, result)
+                except Exception as e:
+                    logger.warning(
+                        f"Could not store result {operation_id} of batch {job.batch_id}: {e}"
+                    )
+        finally:
+            # Cancelled or failed midway, nothing may still use the shared datasets
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            batch_datasets.release()
 
-                job.updated_at = datetime.utcnow()
+    async def resume_unfinished(self) -> list[str]:
+        """Resume the unfinished jobs nobody holds a lease on, e.g. after a crash.
 
-            except asyncio.CancelledError:
-                # Task was cancelled, don't count as failure
-                pass
+        Jobs updated within the last lease period are left to start normally.
+
+        Returns:
+            Ids of the jobs resumed, they run in the background.
+        """
+        batch_ids = await self._call_store(self._job_store.unfinished, self._lease)
+        for batch_id in batch_ids:
+            if batch_id in self._running:
+                continue
+            logger.info(f"Resuming analytics batch {batch_id}")
+            task = asyncio.create_task(self.process_batch(batch_id))
+            self._resumed_tasks.add(task)
+            task.add_done_callback(self._resumed_tasks.discard)
+        return batch_ids
+
+    async def run_maintenance(self) -> None:
+        """Delete expired jobs and resume unfinished ones, once per lease period."""
+        while True:
+            try:
+                deleted = await self._call_store(
+                    self._job_store.cleanup, ANALYTICS_BATCH_JOB_TTL
+                )
+                if deleted:
+                    logger.info(f"Deleted {deleted} expired analytics batches")
+                await self.resume_unfinished()
             except Exception as e:
-                # Unexpected error - this shouldn't normally happen since
-                # execute_single_operation handles errors internally
-                job.failed += 1
-                job.updated_at = datetime.utcnow()
-                # Log the unexpected error but continue processing other operations
-                # In production, you'd want proper logging here
-
-        # Determine final status
-        now = datetime.utcnow()
-        job.completed_at = now
-        job.updated_at = now
+                logger.warning(f"Analytics batch maintenance failed: {e}")
+            await asyncio.sleep(self._lease)
 
-        if job.status == BatchJobStatus.CANCELLED:
-            # Status already set, keep it
-            pass
-        elif job.failed == job.total:
-            job.status = BatchJobStatus.FAILED
-        elif job.failed > 0:
-            job.status = BatchJobStatus.PARTIAL
-        else:
-            job.status = BatchJobStatus.COMPLETED
+    def start_maintenance(self) -> None:
+        """Start `run_maintenance` in the background. Called during app startup."""
+        if self._maintenance_task is None or self._maintenance_task.done():
+            self._maintenance_task = asyncio.create_task(self.run_maintenance())
 
-        return job
+    def stop_maintenance(self) -> None:
+        """Stop the maintenance task, running jobs are resumed once their lease expires."""
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
 
     def execute_single_operation(
         self,
@@ -445,6 +669,9 @@ class AnalyticsBatchService:
     def _execute_anomaly_detection(self, params: dict[str, Any]) -> dict[str, Any]:
         """Execute anomaly detection operation.
 
+        A table as 'data' (records, columns or a dataset table) scans all its
+        series at once, see `_execute_multi_series_anomaly_detection`.
+
         Args:
             params: Parameters containing 'data', optional 'method' and 'threshold'.
 
@@ -452,6 +679,10 @@ class AnalyticsBatchService:
             Dictionary with anomaly detection result.
         """
         data = params["data"]
+        if isinstance(data, (pd.DataFrame, dict)) or (
+            isinstance(data, list) and data and isinstance(data[0], dict)
+        ):
+            return self._execute_multi_series_anomaly_detection(params)
         method = params.get("method", "zscore")
         threshold = params.get("threshold", 3.0)
         series = pd.Series(data)
@@ -473,6 +704,30 @@ class AnalyticsBatchService:
             "interpretation": result.interpretation,
         }
 
+    def _execute_multi_series_anomaly_detection(
+        self, params: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Execute anomaly detection over every series of a table.
+
+        Args:
+            params: Parameters containing 'data' as a wide or long table,
+                optional 'method', 'threshold', 'window', 'series_column',
+                'value_column' and 'time_column'.
+
+        Returns:
+            Dictionary with the multi-series anomaly detection result.
+        """
+        result = self._anomaly_service.detect_multi_series(
+            pd.DataFrame(params["data"]),
+            method=params.get("method", "zscore"),
+            threshold=params.get("threshold"),
+            window=params.get("window", 20),
+            series_column=params.get("series_column"),
+            value_column=params.get("value_column"),
+            time_column=params.get("time_column"),
+        )
+        return result.model_dump()
+
     def _execute_forecast(self, params: dict[str, Any]) -> dict[str, Any]:
         """Execute forecast operation.
 
@@ -0,0 +1,166 @@
+"""Datasets shared by the operations of an analytics batch.
+
+A batch running several operations over the same series used to send the
+values once per operation and rebuild a pandas Series for each. A batch can
+declare its datasets once instead, as columns, records or a SQL query on a
+database connection. `BatchDatasets` loads them into DataFrames when the
+batch starts and binds the references in operation params,
+{"dataset": "<dataset_id>", "column": "<name>"}, to the loaded data:
+
+* on threads, to the Series or DataFrame itself, without copying;
+* for worker processes, to numeric column arrays placed in shared memory once
+  per batch (columns of at least `ANALYTICS_SHARED_MEMORY_MIN_VALUES` values,
+  shorter ones are pickled as arrays), released when the batch finishes.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from app.data.db.storage import Storage
+from app.modules.analytics.batch_models import (
+    DATASET_REFERENCE_KEY,
+    BatchDataset,
+    SingleAnalyticsRequest,
+    get_dataset_reference,
+)
+from app.modules.analytics.exceptions import DatasetError
+from app.modules.analytics.services import executor as analytics_executor
+from app.modules.analytics.services.executor import SharedArray
+from app.modules.database_connection.repositories import DatabaseConnectionRepository
+from app.utils.sql_database.sql_database import SQLDatabase
+
+logger = logging.getLogger(__name__)
+
+# Storage of the database connections SQL datasets run on, configured at startup
+_storage: Storage | None = None
+
+
+def set_dataset_storage(storage: Storage) -> None:
+    """Set the storage used to find database connections. Called during app startup."""
+    global _storage
+    _storage = storage
+
+
+def load_dataset(dataset: BatchDataset, storage: Storage | None = None) -> pd.DataFrame:
+    """Load a batch dataset into a DataFrame, running its SQL query if it has one."""
+    if dataset.columns is not None:
+        return pd.DataFrame(dataset.columns)
+    if dataset.records is not None:
+        return pd.DataFrame.from_records(dataset.records)
+
+    storage = storage or _storage
+    if storage is None:
+        raise DatasetError("Storage not configured, SQL datasets can't be loaded")
+    db_connection = DatabaseConnectionRepository(storage).find_by_id(dataset.db_connection_id)
+    if db_connection is None:
+        raise DatasetError(f"Database connection not found: {dataset.db_connection_id}")
+    database = SQLDatabase.get_sql_engine(db_connection, False)
+    query = database.parser_to_filter_commands(dataset.sql)
+    # Read columnar straight away instead of through run_sql's row dicts
+    with database.engine.connect() as connection:
+        return pd.read_sql_query(text(query), connection)
+
+
+class BatchDatasets:
+    """Loaded datasets of a batch, binding operation params to their columns."""
+
+    def __init__(
+        self,
+        frames: dict[str, pd.DataFrame] | None = None,
+        errors: dict[str, str] | None = None,
+        min_shared_values: int | None = None,
+    ):
+        self.frames = frames or {}
+        # Datasets that failed to load, their operations fail with the error
+        self.errors = errors or {}
+        if min_shared_values is None:
+            min_shared_values = analytics_executor.ANALYTICS_SHARED_MEMORY_MIN_VALUES
+        self.min_shared_values = min_shared_values
+        self._shared: dict[tuple[str, str], SharedArray | np.ndarray] = {}
+
+    @classmethod
+    def load(
+        cls, datasets: list[BatchDataset], storage: Storage | None = None
+    ) -> "BatchDatasets":
+        """Load every dataset, recording the error of those that fail."""
+        frames, errors = {}, {}
+        for dataset in datasets:
+            try:
+                frames[dataset.dataset_id] = load_dataset(dataset, storage)
+            except Exception as e:
+                logger.warning(f"Could not load dataset {dataset.dataset_id}: {e}")
+                errors[dataset.dataset_id] = str(e)
+        return cls(frames, errors)
+
+    def select(self, reference: dict[str, Any]) -> pd.Series | pd.DataFrame:
+        """The column, or the table of columns, a dataset reference points to."""
+        dataset_id = reference[DATASET_REFERENCE_KEY]
+        if dataset_id in self.errors:
+            raise DatasetError(f"Dataset {dataset_id} could not be loaded: {self.errors[dataset_id]}")
+        frame = self.frames.get(dataset_id)
+        if frame is None:
+            raise DatasetError(f"Unknown dataset: {dataset_id}")
+
+        column = reference.get("column")
+        names = [column] if column is not None else reference.get("columns") or list(frame.columns)
+        missing = [name for name in names if name not in frame.columns]
+        if missing:
+            raise DatasetError(f"Dataset {dataset_id} has no column {', '.join(map(str, missing))}")
+        return frame[column] if column is not None else frame[names]
+
+    def bind(
+        self, operation: SingleAnalyticsRequest, share: bool = False
+    ) -> SingleAnalyticsRequest:
+        """Return `operation` with its dataset references replaced by the data.
+
+        With `share`, columns are bound as shared arrays for worker processes.
+        A referenced column also becomes the default `column_name`.
+
+        Raises:
+            DatasetError: If a reference can't be resolved.
+        """
+        params = dict(operation.params)
+        bound = False
+        for key, value in operation.params.items():
+            reference = get_dataset_reference(value)
+            if reference is None:
+                continue
+            data = self.select(reference)
+            dataset_id = reference[DATASET_REFERENCE_KEY]
+            if isinstance(data, pd.Series):
+                params[key] = self._share(dataset_id, data) if share else data
+                if "column_name" not in operation.params:
+                    params["column_name"] = reference["column"]
+            else:
+                params[key] = (
+                    {name: self._share(dataset_id, data[name]) for name in data.columns}
+                    if share
+                    else data
+                )
+            bound = True
+        return operation.model_copy(update={"params": params}) if bound else operation
+
+    def _share(self, dataset_id: str, column: pd.Series) -> SharedArray | np.ndarray:
+        key = (dataset_id, column.name)
+        shared = self._shared.get(key)
+        if shared is None:
+            values = column.to_numpy()
+            if values.dtype.kind in "iuf" and len(values) >= self.min_shared_values:
+                shared = SharedArray.create(values)
+            else:
+                shared = values
+            self._shared[key] = shared
+        return shared
+
+    def release(self) -> None:
+        """Release the shared memory of the columns bound for workers."""
+        for shared in self._shared.values():
+            if isinstance(shared, SharedArray):
+                shared.release()
+        self._shared.clear()
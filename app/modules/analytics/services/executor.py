@@ -0,0 +1,309 @@
+"""Execution backends for batch analytics operations.
+
+Forecasts, isolation forests and correlation matrices are CPU-bound, so on
+threads the GIL runs them one at a time. `ProcessAnalyticsExecutor` runs them
+in a pool of worker processes instead:
+
+* workers are forked from a forkserver that imported the server and the
+  scientific stack once (`ANALYTICS_WORKER_PRELOAD`), so they start warm;
+* each operation has a timeout (`ANALYTICS_OPERATION_TIMEOUT`), a worker
+  stuck past it is killed and the pool restarted;
+* workers run with an address space limit (`ANALYTICS_WORKER_MEMORY_MB`),
+  exceeding it fails the operation instead of the host;
+* numeric series of at least `ANALYTICS_SHARED_MEMORY_MIN_VALUES` values
+  are handed over through shared memory instead of being pickled.
+
+`ThreadAnalyticsExecutor` runs operations on the shared analytics thread pool
+as before. `ANALYTICS_EXECUTOR` selects the backend: `process` (default) or
+`thread`, also used where there is no forkserver.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Any, Callable
+
+import numpy as np
+
+from app.utils.core.executors import get_executor
+
+if TYPE_CHECKING:
+    from app.modules.analytics.batch_models import AnalyticsBatchResult, SingleAnalyticsRequest
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_EXECUTOR = os.getenv("ANALYTICS_EXECUTOR", "process")
+ANALYTICS_PROCESS_WORKERS = int(os.getenv("ANALYTICS_PROCESS_WORKERS") or os.cpu_count() or 4)
+ANALYTICS_OPERATION_TIMEOUT = float(os.getenv("ANALYTICS_OPERATION_TIMEOUT", "300"))
+ANALYTICS_WORKER_MEMORY_MB = int(os.getenv("ANALYTICS_WORKER_MEMORY_MB", "0"))
+ANALYTICS_SHARED_MEMORY_MIN_VALUES = int(
+    os.getenv("ANALYTICS_SHARED_MEMORY_MIN_VALUES", "100000")
+)
+# app.server first, importing the analytics package on its own is circular
+ANALYTICS_WORKER_PRELOAD = os.getenv(
+    "ANALYTICS_WORKER_PRELOAD",
+    "app.server,pandas,scipy.stats,sklearn.ensemble,prophet",
+).split(",")
+
+
+class OperationTimeoutError(TimeoutError):
+    """Raised when an analytics operation runs longer than its timeout."""
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """A numeric array in a shared memory block, passed to workers by name."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> "SharedArray":
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        block.close()
+        return cls(block.name, array.shape, array.dtype.str)
+
+    def load(self) -> np.ndarray:
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            # Copied so the block can be closed, a memcpy instead of unpickling
+            return np.ndarray(self.shape, dtype=self.dtype, buffer=block.buf).copy()
+        finally:
+            block.close()
+
+    def release(self) -> None:
+        try:
+            block = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return
+        block.close()
+        block.unlink()
+
+
+def share_params(
+    params: dict[str, Any], min_values: int = ANALYTICS_SHARED_MEMORY_MIN_VALUES
+) -> tuple[dict[str, Any], list[SharedArray]]:
+    """Move long numeric lists of `params` to shared memory.
+
+    Returns the params to send and the shared arrays to release afterwards.
+    """
+    shared_params, shared = {}, []
+    for key, value in params.items():
+        if isinstance(value, list) and len(value) >= min_values:
+            array = np.asarray(value)
+            # Only plain numbers, lists with None or strings are pickled as is
+            if array.ndim == 1 and array.dtype.kind in "iuf":
+                array = SharedArray.create(array)
+                shared.append(array)
+                shared_params[key] = array
+                continue
+        shared_params[key] = value
+    return shared_params, shared
+
+
+def load_params(params: dict[str, Any]) -> dict[str, Any]:
+    """Inverse of `share_params`, in the worker.
+
+    Also loads the shared columns of tables bound from batch datasets.
+    """
+    loaded = {}
+    for key, value in params.items():
+        if isinstance(value, SharedArray):
+            value = value.load()
+        elif isinstance(value, dict):
+            value = {
+                name: column.load() if isinstance(column, SharedArray) else column
+                for name, column in value.items()
+            }
+        loaded[key] = value
+    return loaded
+
+
+_worker_service = None
+
+
+def _init_worker(memory_mb: int) -> None:
+    if memory_mb > 0:
+        try:
+            import resource
+
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning(f"Could not limit analytics worker memory: {e}")
+
+
+def _execute_in_worker(operation: "SingleAnalyticsRequest") -> "AnalyticsBatchResult":
+    global _worker_service
+    if _worker_service is None:
+        from app.modules.analytics.services.batch_service import AnalyticsBatchService
+
+        _worker_service = AnalyticsBatchService()
+    operation = operation.model_copy(update={"params": load_params(operation.params)})
+    return _worker_service.execute_single_operation(operation)
+
+
+class ThreadAnalyticsExecutor:
+    """Runs operations on the shared analytics thread pool.
+
+    Timed out operations are reported but keep their thread until they return.
+    """
+
+    # Operations can be given the batch datasets themselves
+    in_process = True
+
+    def __init__(self, timeout: float = ANALYTICS_OPERATION_TIMEOUT):
+        self.timeout = timeout
+
+    async def call(self, fn: Callable, *args: Any, timeout: float | None = None) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(get_executor("analytics"), fn, *args)
+        try:
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except TimeoutError:
+            raise OperationTimeoutError(
+                f"Operation timed out after {timeout or self.timeout}s"
+            ) from None
+
+    async def run(self, service: Any, operation: "SingleAnalyticsRequest") -> "AnalyticsBatchResult":
+        return await self.call(service.execute_single_operation, operation)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ProcessAnalyticsExecutor:
+    """Runs operations in a pool of warm worker processes, see the module docstring."""
+
+    in_process = False
+
+    def __init__(
+        self,
+        max_workers: int = ANALYTICS_PROCESS_WORKERS,
+        timeout: float = ANALYTICS_OPERATION_TIMEOUT,
+        memory_mb: int = ANALYTICS_WORKER_MEMORY_MB,
+        preload: list[str] | None = None,
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.preload = [name for name in (preload or ANALYTICS_WORKER_PRELOAD) if name]
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self.restarts = 0
+
+    def _context(self) -> multiprocessing.context.BaseContext:
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(self.preload)
+        return context
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=self._context(),
+                    initializer=_init_worker,
+                    initargs=(self.memory_mb,),
+                )
+            return self._pool
+
+    def _restart(self, pool: ProcessPoolExecutor) -> None:
+        """Kill the workers of `pool` unless it was already replaced."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self.restarts += 1
+        # Running tasks can't be cancelled, only their process killed. The pool
+        # has no public handle on its processes.
+        for process in list((pool._processes or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def warmup(self) -> None:
+        """Start every worker now instead of on the first operations."""
+        pool = self._get_pool()
+        for future in [pool.submit(int) for _ in range(self.max_workers)]:
+            future.result()
+
+    async def call(self, fn: Callable, *args: Any, timeout: float | None = None) -> Any:
+        """Run picklable `fn(*args)` in a worker, killing it after `timeout` seconds.
+
+        Operations lost with a worker that crashed or was killed for another
+        operation are retried once on the new pool.
+        """
+        timeout = timeout or self.timeout
+        for attempt in range(2):
+            pool = self._get_pool()
+            try:
+                future = asyncio.wrap_future(pool.submit(fn, *args))
+            except (BrokenProcessPool, RuntimeError):
+                # The pool broke or is being shut down by a restart
+                self._restart(pool)
+                continue
+            try:
+                return await asyncio.wait_for(future, timeout)
+            except TimeoutError:
+                logger.warning(f"Analytics operation timed out after {timeout}s, restarting workers")
+                self._restart(pool)
+                raise OperationTimeoutError(f"Operation timed out after {timeout}s") from None
+            except BrokenProcessPool as e:
+                self._restart(pool)
+                if attempt:
+                    raise BrokenProcessPool(f"Analytics worker died: {e}") from e
+        raise BrokenProcessPool("Analytics workers could not be started")
+
+    async def run(self, service: Any, operation: "SingleAnalyticsRequest") -> "AnalyticsBatchResult":
+        params, shared = share_params(operation.params)
+        try:
+            return await self.call(
+                _execute_in_worker, operation.model_copy(update={"params": params})
+            )
+        finally:
+            for array in shared:
+                array.release()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: ThreadAnalyticsExecutor | ProcessAnalyticsExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_analytics_executor() -> ThreadAnalyticsExecutor | ProcessAnalyticsExecutor:
+    """The process-wide analytics executor selected by `ANALYTICS_EXECUTOR`."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned workers would import the analytics package without the server
+            if (
+                ANALYTICS_EXECUTOR == "thread"
+                or "forkserver" not in multiprocessing.get_all_start_methods()
+            ):
+                _executor = ThreadAnalyticsExecutor()
+            else:
+                _executor = ProcessAnalyticsExecutor()
+        return _executor
+
+
+def shutdown_analytics_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
@@ -0,0 +1,590 @@
+"""Stores of analytics batch jobs and their results.
+
+Batch jobs used to live in a dict of the service, so they vanished on restart,
+weren't visible to other API workers and were never removed. A job store keeps
+each job with the request it was submitted with and its results, written as
+operations complete:
+
+* `MemoryBatchJobStore` keeps them in process, as before;
+* `SQLiteBatchJobStore` in a SQLite file (`ANALYTICS_BATCH_STORE_PATH`),
+  shared by the workers of a host;
+* `StorageBatchJobStore` in Typesense collections, shared by every host.
+
+The worker running a job holds a lease on it (`ANALYTICS_BATCH_LEASE_SECONDS`)
+and renews it while the job runs. Unfinished jobs whose lease expired, e.g.
+after a crash, are resumed by another worker from their stored request,
+skipping the operations that already have a result. Jobs not updated for
+`ANALYTICS_BATCH_JOB_TTL` seconds are deleted. `ANALYTICS_BATCH_STORE` selects
+the store the server uses: `sqlite` (default), `storage` or `memory`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Protocol
+
+from app.modules.analytics.batch_models import (
+    AnalyticsBatchResult,
+    AnalyticsBatchStatus,
+    BatchDataset,
+    BatchJobStatus,
+    SingleAnalyticsRequest,
+)
+
+if TYPE_CHECKING:
+    from app.data.db.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_BATCH_STORE = os.getenv("ANALYTICS_BATCH_STORE", "sqlite")
+ANALYTICS_BATCH_STORE_PATH = os.getenv(
+    "ANALYTICS_BATCH_STORE_PATH", os.path.join("app", "data", "dbdata", "analytics_batches.db")
+)
+ANALYTICS_BATCH_JOB_TTL = float(os.getenv("ANALYTICS_BATCH_JOB_TTL", "86400"))
+ANALYTICS_BATCH_LEASE_SECONDS = float(os.getenv("ANALYTICS_BATCH_LEASE_SECONDS", "60"))
+
+BATCH_JOBS_COLLECTION_NAME = "analytics_batch_jobs"
+BATCH_RESULTS_COLLECTION_NAME = "analytics_batch_results"
+UNFINISHED_STATUSES = (BatchJobStatus.PENDING.value, BatchJobStatus.RUNNING.value)
+# Jobs resumed or cleaned up per sweep of the Storage store
+STORAGE_SWEEP_LIMIT = 250
+
+
+class BatchRequest(dict):
+    """What a batch was submitted with, enough to run it again."""
+
+    @classmethod
+    def create(
+        cls,
+        operations: list[SingleAnalyticsRequest],
+        max_concurrency: int = 5,
+        datasets: list[BatchDataset] | None = None,
+    ) -> "BatchRequest":
+        return cls(
+            operations=[operation.model_dump(mode="json") for operation in operations],
+            max_concurrency=max_concurrency,
+            datasets=[dataset.model_dump(mode="json") for dataset in datasets or []],
+        )
+
+    @property
+    def operations(self) -> list[SingleAnalyticsRequest]:
+        return [SingleAnalyticsRequest.model_validate(op) for op in self["operations"]]
+
+    @property
+    def max_concurrency(self) -> int:
+        return self["max_concurrency"]
+
+    @property
+    def datasets(self) -> list[BatchDataset]:
+        return [BatchDataset.model_validate(dataset) for dataset in self["datasets"]]
+
+
+class BatchJobStore(Protocol):
+    """Protocol of the stores of batch jobs, see the module docstring."""
+
+    def create(self, job: AnalyticsBatchStatus, request: BatchRequest) -> None:
+        """Store a new job and the request to run it."""
+        ...
+
+    def get(self, batch_id: str) -> AnalyticsBatchStatus | None:
+        """The job with its results, None if unknown."""
+        ...
+
+    def get_request(self, batch_id: str) -> BatchRequest | None:
+        ...
+
+    def save(self, job: AnalyticsBatchStatus) -> None:
+        """Store the status, counters and timestamps of a job, not its results."""
+        ...
+
+    def add_result(self, job: AnalyticsBatchStatus, result: AnalyticsBatchResult) -> None:
+        """Store one operation result and the updated counters of its job."""
+        ...
+
+    def delete(self, batch_id: str) -> bool:
+        ...
+
+    def acquire(self, batch_id: str, owner: str, lease: float) -> bool:
+        """Take the lease of an unfinished job unless another owner holds it."""
+        ...
+
+    def renew(self, batch_id: str, owner: str, lease: float) -> BatchJobStatus | None:
+        """Extend the lease held by `owner`, returns the stored job status.
+
+        None if the job was deleted or its lease was taken over.
+        """
+        ...
+
+    def release(self, batch_id: str, owner: str) -> None:
+        ...
+
+    def unfinished(self, idle: float = 0.0) -> list[str]:
+        """Ids of pending or running jobs nobody holds a valid lease on.
+
+        Only those not updated for `idle` seconds, new jobs are about to start.
+        """
+        ...
+
+    def cleanup(self, ttl: float) -> int:
+        """Delete the jobs not updated for `ttl` seconds, returns how many."""
+        ...
+
+
+class MemoryBatchJobStore:
+    """Jobs in a dict of this process, lost on restart."""
+
+    def __init__(self):
+        self._jobs: dict[str, AnalyticsBatchStatus] = {}
+        self._requests: dict[str, BatchRequest] = {}
+        self._leases: dict[str, tuple[str, float]] = {}
+        self._updated: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def create(self, job: AnalyticsBatchStatus, request: BatchRequest) -> None:
+        with self._lock:
+            self._jobs[job.batch_id] = job
+            self._requests[job.batch_id] = request
+            self._updated[job.batch_id] = time.time()
+
+    def get(self, batch_id: str) -> AnalyticsBatchStatus | None:
+        return self._jobs.get(batch_id)
+
+    def get_request(self, batch_id: str) -> BatchRequest | None:
+        return self._requests.get(batch_id)
+
+    def save(self, job: AnalyticsBatchStatus) -> None:
+        with self._lock:
+            if job.batch_id in self._jobs:
+                stored = self._jobs[job.batch_id]
+                if stored is not job:
+                    job.results = stored.results
+                    self._jobs[job.batch_id] = job
+                self._updated[job.batch_id] = time.time()
+
+    def add_result(self, job: AnalyticsBatchStatus, result: AnalyticsBatchResult) -> None:
+        with self._lock:
+            stored = self._jobs.get(job.batch_id)
+            if stored is None:
+                return
+            stored.results[result.operation_id] = result
+            stored.completed, stored.failed = job.completed, job.failed
+            stored.updated_at = job.updated_at
+            self._updated[job.batch_id] = time.time()
+
+    def delete(self, batch_id: str) -> bool:
+        with self._lock:
+            self._requests.pop(batch_id, None)
+            self._leases.pop(batch_id, None)
+            self._updated.pop(batch_id, None)
+            return self._jobs.pop(batch_id, None) is not None
+
+    def acquire(self, batch_id: str, owner: str, lease: float) -> bool:
+        with self._lock:
+            job = self._jobs.get(batch_id)
+            if job is None or job.status.value not in UNFINISHED_STATUSES:
+                return False
+            holder, expires_at = self._leases.get(batch_id, (None, 0.0))
+            if holder not in (None, owner) and expires_at > time.time():
+                return False
+            self._leases[batch_id] = (owner, time.time() + lease)
+            return True
+
+    def renew(self, batch_id: str, owner: str, lease: float) -> BatchJobStatus | None:
+        with self._lock:
+            job = self._jobs.get(batch_id)
+            if job is None or self._leases.get(batch_id, (None,))[0] != owner:
+                return None
+            self._leases[batch_id] = (owner, time.time() + lease)
+            return job.status
+
+    def release(self, batch_id: str, owner: str) -> None:
+        with self._lock:
+            if self._leases.get(batch_id, (None,))[0] == owner:
+                del self._leases[batch_id]
+
+    def unfinished(self, idle: float = 0.0) -> list[str]:
+        now = time.time()
+        with self._lock:
+            return [
+                batch_id
+                for batch_id, job in self._jobs.items()
+                if job.status.value in UNFINISHED_STATUSES
+                and self._leases.get(batch_id, (None, 0.0))[1] <= now
+                and self._updated[batch_id] <= now - idle
+            ]
+
+    def cleanup(self, ttl: float) -> int:
+        cutoff = time.time() - ttl
+        with self._lock:
+            expired = [batch_id for batch_id, at in self._updated.items() if at < cutoff]
+        return sum(self.delete(batch_id) for batch_id in expired)
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch_jobs (
+    batch_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    job TEXT NOT NULL,
+    request TEXT NOT NULL,
+    owner TEXT,
+    lease_expires_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS batch_jobs_status ON batch_jobs (status, lease_expires_at);
+CREATE INDEX IF NOT EXISTS batch_jobs_updated_at ON batch_jobs (updated_at);
+CREATE TABLE IF NOT EXISTS batch_results (
+    batch_id TEXT NOT NULL,
+    operation_id TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (batch_id, operation_id)
+);
+"""
+
+
+class SQLiteBatchJobStore:
+    """Jobs in a SQLite file, shared by the processes of a host.
+
+    Leases are taken with a conditional UPDATE, so only one worker runs a job.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or ANALYTICS_BATCH_STORE_PATH
+        self._connection: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use, importing the service doesn't create the file
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SQLITE_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connect().execute(sql, params)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def create(self, job: AnalyticsBatchStatus, request: BatchRequest) -> None:
+        self._execute(
+            "INSERT INTO batch_jobs (batch_id, status, job, request, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                job.batch_id,
+                job.status.value,
+                job.model_dump_json(exclude={"results"}),
+                json.dumps(request),
+                time.time(),
+            ),
+        )
+
+    def get(self, batch_id: str) -> AnalyticsBatchStatus | None:
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT job FROM batch_jobs WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            results = connection.execute(
+                "SELECT result FROM batch_results WHERE batch_id = ? ORDER BY rowid",
+                (batch_id,),
+            ).fetchall()
+        job = AnalyticsBatchStatus.model_validate_json(row[0])
+        for (result,) in results:
+            result = AnalyticsBatchResult.model_validate_json(result)
+            job.results[result.operation_id] = result
+        return job
+
+    def get_request(self, batch_id: str) -> BatchRequest | None:
+        row = self._execute(
+            "SELECT request FROM batch_jobs WHERE batch_id = ?", (batch_id,)
+        ).fetchone()
+        return BatchRequest(json.loads(row[0])) if row is not None else None
+
+    def save(self, job: AnalyticsBatchStatus) -> None:
+        self._execute(
+            "UPDATE batch_jobs SET status = ?, job = ?, updated_at = ? WHERE batch_id = ?",
+            (job.status.value, job.model_dump_json(exclude={"results"}), time.time(), job.batch_id),
+        )
+
+    def add_result(self, job: AnalyticsBatchStatus, result: AnalyticsBatchResult) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO batch_results (batch_id, operation_id, result) "
+                    "VALUES (?, ?, ?)",
+                    (job.batch_id, result.operation_id, result.model_dump_json()),
+                )
+                # Only the counters, a concurrent cancel keeps its status
+                row = connection.execute(
+                    "SELECT job FROM batch_jobs WHERE batch_id = ?", (job.batch_id,)
+                ).fetchone()
+                if row is not None:
+                    stored = json.loads(row[0])
+                    stored.update(
+                        completed=job.completed,
+                        failed=job.failed,
+                        updated_at=job.updated_at.isoformat(),
+                    )
+                    connection.execute(
+                        "UPDATE batch_jobs SET job = ?, updated_at = ? WHERE batch_id = ?",
+                        (json.dumps(stored), time.time(), job.batch_id),
+                    )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def delete(self, batch_id: str) -> bool:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM batch_results WHERE batch_id = ?", (batch_id,))
+            deleted = connection.execute(
+                "DELETE FROM batch_jobs WHERE batch_id = ?", (batch_id,)
+            ).rowcount
+        return deleted > 0
+
+    def acquire(self, batch_id: str, owner: str, lease: float) -> bool:
+        now = time.time()
+        cursor = self._execute(
+            "UPDATE batch_jobs SET owner = ?, lease_expires_at = ? "
+            "WHERE batch_id = ? AND status IN (?, ?) "
+            "AND (owner IS NULL OR owner = ? OR lease_expires_at < ?)",
+            (owner, now + lease, batch_id, *UNFINISHED_STATUSES, owner, now),
+        )
+        return cursor.rowcount == 1
+
+    def renew(self, batch_id: str, owner: str, lease: float) -> BatchJobStatus | None:
+        with self._lock:
+            connection = self._connect()
+            renewed = connection.execute(
+                "UPDATE batch_jobs SET lease_expires_at = ? WHERE batch_id = ? AND owner = ?",
+                (time.time() + lease, batch_id, owner),
+            ).rowcount
+            if not renewed:
+                return None
+            row = connection.execute(
+                "SELECT status FROM batch_jobs WHERE batch_id = ?", (batch_id,)
+            ).fetchone()
+        return BatchJobStatus(row[0]) if row is not None else None
+
+    def release(self, batch_id: str, owner: str) -> None:
+        self._execute(
+            "UPDATE batch_jobs SET owner = NULL, lease_expires_at = NULL "
+            "WHERE batch_id = ? AND owner = ?",
+            (batch_id, owner),
+        )
+
+    def unfinished(self, idle: float = 0.0) -> list[str]:
+        now = time.time()
+        rows = self._execute(
+            "SELECT batch_id FROM batch_jobs WHERE status IN (?, ?) "
+            "AND (lease_expires_at IS NULL OR lease_expires_at < ?) AND updated_at <= ? "
+            "ORDER BY updated_at",
+            (*UNFINISHED_STATUSES, now, now - idle),
+        ).fetchall()
+        return [batch_id for (batch_id,) in rows]
+
+    def cleanup(self, ttl: float) -> int:
+        cutoff = time.time() - ttl
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "DELETE FROM batch_results WHERE batch_id IN "
+                "(SELECT batch_id FROM batch_jobs WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            return connection.execute(
+                "DELETE FROM batch_jobs WHERE updated_at < ?", (cutoff,)
+            ).rowcount
+
+
+def _result_doc_id(batch_id: str, operation_id: str) -> str:
+    return hashlib.sha1(f"{batch_id}\x00{operation_id}".encode()).hexdigest()
+
+
+class StorageBatchJobStore:
+    """Jobs in Typesense collections, shared by every host.
+
+    Typesense has no conditional writes, so taking a lease reads it first and
+    two workers can rarely take the same expired lease; results are keyed by
+    operation and a job run twice only repeats work.
+    """
+
+    def __init__(self, storage: "Storage"):
+        self.storage = storage
+
+    def _get_doc(self, batch_id: str) -> dict | None:
+        return self.storage.find_by_id(BATCH_JOBS_COLLECTION_NAME, batch_id)
+
+    def _update(self, batch_id: str, fields: dict) -> None:
+        self.storage.bulk_import(
+            BATCH_JOBS_COLLECTION_NAME, [{"id": batch_id, **fields}], action="update"
+        )
+
+    def create(self, job: AnalyticsBatchStatus, request: BatchRequest) -> None:
+        self.storage.bulk_import(
+            BATCH_JOBS_COLLECTION_NAME,
+            [
+                {
+                    "id": job.batch_id,
+                    "status": job.status.value,
+                    "job": job.model_dump_json(exclude={"results"}),
+                    "request": json.dumps(request),
+                    "owner": "",
+                    "lease_expires_at": 0,
+                    "updated_at": int(time.time()),
+                }
+            ],
+            action="create",
+        )
+
+    def get(self, batch_id: str) -> AnalyticsBatchStatus | None:
+        doc = self._get_doc(batch_id)
+        if doc is None:
+            return None
+        job = AnalyticsBatchStatus.model_validate_json(doc["job"])
+        page = 1
+        while True:
+            docs = self.storage.find(
+                BATCH_RESULTS_COLLECTION_NAME,
+                {"batch_id": batch_id},
+                sort=["position:asc"],
+                page=page,
+                limit=250,
+            )
+            for result_doc in docs:
+                result = AnalyticsBatchResult.model_validate_json(result_doc["result"])
+                job.results[result.operation_id] = result
+            if len(docs) < 250:
+                return job
+            page += 1
+
+    def get_request(self, batch_id: str) -> BatchRequest | None:
+        doc = self._get_doc(batch_id)
+        return BatchRequest(json.loads(doc["request"])) if doc is not None else None
+
+    def save(self, job: AnalyticsBatchStatus) -> None:
+        self._update(
+            job.batch_id,
+            {
+                "status": job.status.value,
+                "job": job.model_dump_json(exclude={"results"}),
+                "updated_at": int(time.time()),
+            },
+        )
+
+    def add_result(self, job: AnalyticsBatchStatus, result: AnalyticsBatchResult) -> None:
+        self.storage.bulk_import(
+            BATCH_RESULTS_COLLECTION_NAME,
+            [
+                {
+                    "id": _result_doc_id(job.batch_id, result.operation_id),
+                    "batch_id": job.batch_id,
+                    "position": job.completed + job.failed,
+                    "result": result.model_dump_json(),
+                }
+            ],
+        )
+        # Only the counters, a concurrent cancel keeps its status
+        doc = self._get_doc(job.batch_id)
+        if doc is not None:
+            stored = json.loads(doc["job"])
+            stored.update(
+                completed=job.completed, failed=job.failed, updated_at=job.updated_at.isoformat()
+            )
+            self._update(job.batch_id, {"job": json.dumps(stored), "updated_at": int(time.time())})
+
+    def delete(self, batch_id: str) -> bool:
+        self.storage.delete_by_filter(BATCH_RESULTS_COLLECTION_NAME, {"batch_id": batch_id})
+        if self._get_doc(batch_id) is None:
+            return False
+        self.storage.delete_by_id(BATCH_JOBS_COLLECTION_NAME, batch_id)
+        return True
+
+    def acquire(self, batch_id: str, owner: str, lease: float) -> bool:
+        doc = self._get_doc(batch_id)
+        now = time.time()
+        if doc is None or doc["status"] not in UNFINISHED_STATUSES:
+            return False
+        if doc.get("owner") not in ("", owner) and doc.get("lease_expires_at", 0) > now:
+            return False
+        self._update(batch_id, {"owner": owner, "lease_expires_at": int(now + lease)})
+        return True
+
+    def renew(self, batch_id: str, owner: str, lease: float) -> BatchJobStatus | None:
+        doc = self._get_doc(batch_id)
+        if doc is None or doc.get("owner") != owner:
+            return None
+        self._update(batch_id, {"lease_expires_at": int(time.time() + lease)})
+        return BatchJobStatus(doc["status"])
+
+    def release(self, batch_id: str, owner: str) -> None:
+        doc = self._get_doc(batch_id)
+        if doc is not None and doc.get("owner") == owner:
+            self._update(batch_id, {"owner": "", "lease_expires_at": 0})
+
+    def unfinished(self, idle: float = 0.0) -> list[str]:
+        now = time.time()
+        return [
+            doc["id"]
+            for status in UNFINISHED_STATUSES
+            for doc in self.storage.find(
+                BATCH_JOBS_COLLECTION_NAME,
+                {"status": status},
+                sort=["updated_at:asc"],
+                limit=STORAGE_SWEEP_LIMIT,
+                exclude_fields=["job", "request"],
+            )
+            if doc.get("lease_expires_at", 0) < now and doc["updated_at"] <= now - idle
+        ]
+
+    def cleanup(self, ttl: float) -> int:
+        cutoff = time.time() - ttl
+        docs = self.storage.find(
+            BATCH_JOBS_COLLECTION_NAME,
+            {},
+            sort=["updated_at:asc"],
+            limit=STORAGE_SWEEP_LIMIT,
+            exclude_fields=["job", "request"],
+        )
+        return sum(self.delete(doc["id"]) for doc in docs if doc["updated_at"] < cutoff)
+
+
+def create_batch_job_store(
+    store_type: str | None = None, storage: "Storage | None" = None
+) -> BatchJobStore:
+    """The job store selected by `store_type`, by default `ANALYTICS_BATCH_STORE`."""
+    store_type = (store_type or ANALYTICS_BATCH_STORE).lower()
+    if store_type == "memory":
+        return MemoryBatchJobStore()
+    if store_type == "sqlite":
+        return SQLiteBatchJobStore()
+    if store_type == "storage":
+        if storage is None:
+            raise ValueError("The storage batch job store needs a Storage")
+        return StorageBatchJobStore(storage)
+    raise ValueError(f"Unknown batch job store {store_type}, use sqlite, storage or memory")
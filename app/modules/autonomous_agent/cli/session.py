@@ -296,10 +296,12 @@ async def _delete_session(session_id: str, force: bool):
     from app.data.db.storage import Storage
     from app.server.config import Settings
     from app.modules.session import SessionRepository
+    from app.modules.session.graph.checkpointer import TypesenseCheckpointer
 
     settings = Settings()
     storage = Storage(settings)
     repo = SessionRepository(storage)
+    checkpointer = TypesenseCheckpointer(storage)
 
     # Check if session exists
     session = await repo.get(session_id)
@@ -315,6 +317,7 @@ async def _delete_session(session_id: str, force: bool):
             console.print("[dim]Cancelled[/dim]")
             return
 
+    await checkpointer.adelete_thread(session_id)
     await repo.delete(session_id)
     console.print(f"[green]✔ Session deleted:[/green] {session_id}")
 
@@ -345,10 +348,12 @@ async def _clear_sessions(db_connection_id: str | None, force: bool):
     from app.data.db.storage import Storage
     from app.server.config import Settings
     from app.modules.session import SessionRepository
+    from app.modules.session.graph.checkpointer import TypesenseCheckpointer
 
     settings = Settings()
     storage = Storage(settings)
     repo = SessionRepository(storage)
+    checkpointer = TypesenseCheckpointer(storage)
 
     sessions = await repo.list(db_connection_id=db_connection_id, limit=1000)
 
@@ -368,6 +373,7 @@ async def _clear_sessions(db_connection_id: str | None, force: bool):
 
     deleted = 0
     for session in sessions:
+        await checkpointer.adelete_thread(session.id)
         await repo.delete(session.id)
         deleted += 1
 
@@ -381,7 +381,8 @@ def scan_tables(db_connection_id: str, table_ids: tuple, with_descriptions: bool
 @click.option("--refresh/--no-refresh", default=True, help="Refresh table list from database first")
 @click.option("--generate-mdl", "-m", is_flag=True, help="Generate MDL semantic layer manifest after scan")
 @click.option("--mdl-name", type=str, help="Name for generated MDL manifest (default: auto-generated)")
-def scan_all(db_connection_id: str, with_descriptions: bool, model_family: str, model_name: str, instruction: str, refresh: bool, generate_mdl: bool, mdl_name: str):
+@click.option("--force", "-f", is_flag=True, help="Re-profile every table, even if its schema fingerprint is unchanged (needed to pick up data changes on dialects other than PostgreSQL and MySQL)")
+def scan_all(db_connection_id: str, with_descriptions: bool, model_family: str, model_name: str, instruction: str, refresh: bool, generate_mdl: bool, mdl_name: str, force: bool):
     """Scan ALL tables in a database connection.
 
     This is a convenience command that:
@@ -401,6 +402,9 @@ def scan_all(db_connection_id: str, with_descriptions: bool, model_family: str,
         # Skip refresh, just scan existing tables
         kai table scan-all abc123 --no-refresh
 
+        # Re-profile tables even when nothing changed
+        kai table scan-all abc123 --force
+
         # Use OpenAI for descriptions
         kai table scan-all abc123 -d --model-family openai --model-name gpt-4o
 
@@ -421,6 +425,7 @@ def scan_all(db_connection_id: str, with_descriptions: bool, model_family: str,
     from app.modules.table_description.services import TableDescriptionService
     from app.modules.sql_generation.models import LLMConfig
     from app.utils.sql_database.scanner import SqlAlchemyScanner
+    from app.utils.sql_database.statistics import tracks_activity
 
     if not ensure_typesense_or_prompt():
         return
@@ -458,7 +463,7 @@ def scan_all(db_connection_id: str, with_descriptions: bool, model_family: str,
         console.print(f"\n[cyan]Step 1:[/cyan] Skipping refresh (--no-refresh)")
 
     # Step 2: Get all tables to scan
-    tables_to_scan = table_repo.find_by({"db_connection_id": db_connection_id})
+    tables_to_scan = table_repo.find_all_by({"db_connection_id": db_connection_id})
 
     if not tables_to_scan:
         console.print("[yellow]No tables found to scan[/yellow]")
@@ -482,6 +487,7 @@ def scan_all(db_connection_id: str, with_descriptions: bool, model_family: str,
     try:
         schemas_processed = set()
         total_scanned = 0
+        total_unchanged = 0
 
         for table in tables_to_scan:
             schema = table.db_schema
@@ -494,20 +500,28 @@ def scan_all(db_connection_id: str, with_descriptions: bool, model_family: str,
 
             with console.status(f"[bold cyan]Scanning {schema}...[/bold cyan]"):
                 database = db_connection_service.get_sql_database(db_connection, schema)
-                scanner.scan(
+                report = scanner.scan(
                     database.engine,
                     schema_tables,
                     table_repo,
                     llm_config,
-                    instruction or ""
+                    instruction or "",
+                    force=force,
                 )
 
             for t in schema_tables:
                 console.print(f"    [green]✔[/green] {t.table_name}")
-                total_scanned += 1
+            if report.unchanged and not tracks_activity(database.engine):
+                console.print(
+                    f"    [yellow]Note:[/yellow] {database.engine.dialect.name} tables are "
+                    "fingerprinted by structure only, data changes need --force"
+                )
+            total_scanned += report.scanned + report.skipped
+            total_unchanged += report.unchanged
 
         console.print(f"\n[green]✔ Scan complete![/green]")
         console.print(f"  Total tables scanned: {total_scanned}")
+        console.print(f"  Unchanged (skipped): {total_unchanged}")
         if with_descriptions:
             console.print(f"  AI descriptions: generated")
 
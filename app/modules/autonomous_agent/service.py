@@ -198,6 +198,7 @@ from app.modules.autonomous_agent.learning import (
     capture_with_correction_detection,
     get_memory_context_async,
 )
+from app.modules.memory.index import MemoryIndex
 from app.modules.memory.services import MemoryService
 from app.modules.skill.services import SkillService
 from app.modules.autonomous_agent.tools import (
@@ -287,8 +288,9 @@ class AutonomousAgentService:
             from app.server.config import get_settings
             storage = Storage(get_settings())
         self.storage = storage
-        # Initialize memory service for corrections and memory operations
-        self.memory_service = MemoryService(storage)
+        # Initialize memory service for corrections and memory operations,
+        # recalls of the session are answered from its in-memory index
+        self.memory_service = MemoryService(storage, index=MemoryIndex(db_connection.id))
         # Language setting (None = use from Settings)
         self._language = language
         # Track seen content to prevent duplicates from nested agent calls
@@ -365,11 +367,11 @@ class AutonomousAgentService:
             create_search_skills_tool(self.db_connection, self.storage),
             create_find_skills_for_question_tool(self.db_connection, self.storage),
             # Memory tools - long-term memory across conversations
-            create_remember_tool(self.db_connection, self.storage),
-            create_recall_tool(self.db_connection, self.storage),
-            create_forget_tool(self.db_connection, self.storage),
-            create_list_memories_tool(self.db_connection, self.storage),
-            create_recall_for_question_tool(self.db_connection, self.storage),
+            create_remember_tool(self.db_connection, self.storage, self.memory_service),
+            create_recall_tool(self.db_connection, self.storage, self.memory_service),
+            create_forget_tool(self.db_connection, self.storage, self.memory_service),
+            create_list_memories_tool(self.db_connection, self.storage, self.memory_service),
+            create_recall_for_question_tool(self.db_connection, self.storage, self.memory_service),
             # SQL and analysis tools
             create_sql_query_tool(self.database),
             create_pandas_analysis_tool(),
@@ -1375,7 +1377,7 @@ class AutonomousAgentService:
             final_answer: The final response to the user
         """
         try:
-            memory_service = MemoryService(self.storage)
+            memory_service = self.memory_service
 
             # Build conversation summary for LLM analysis
             conversation_text = self._format_messages_for_summary(messages)
@@ -1493,7 +1495,7 @@ Return ONLY the JSON object, no other text."""
             Tuple of (formatted memory context string, memory stats dict)
         """
         try:
-            memory_service = MemoryService(self.storage)
+            memory_service = self.memory_service
             results = memory_service.recall(
                 db_connection_id=self.db_connection.id,
                 query=question,
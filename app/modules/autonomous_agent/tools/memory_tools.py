@@ -62,9 +62,13 @@ def _is_potentially_stale(created_at: str, namespace: str) -> bool:
         return False
 
 
-def create_remember_tool(db_connection: DatabaseConnection, storage: Storage):
+def create_remember_tool(
+    db_connection: DatabaseConnection,
+    storage: Storage,
+    memory_service: MemoryService | None = None,
+):
     """Create tool for storing memories."""
-    service = MemoryService(storage)
+    service = memory_service or MemoryService(storage)
 
     def remember(
         namespace: str,
@@ -126,9 +130,13 @@ def create_remember_tool(db_connection: DatabaseConnection, storage: Storage):
     return remember
 
 
-def create_recall_tool(db_connection: DatabaseConnection, storage: Storage):
+def create_recall_tool(
+    db_connection: DatabaseConnection,
+    storage: Storage,
+    memory_service: MemoryService | None = None,
+):
     """Create tool for recalling memories."""
-    service = MemoryService(storage)
+    service = memory_service or MemoryService(storage)
 
     def recall(
         query: str,
@@ -224,9 +232,13 @@ def create_recall_tool(db_connection: DatabaseConnection, storage: Storage):
     return recall
 
 
-def create_forget_tool(db_connection: DatabaseConnection, storage: Storage):
+def create_forget_tool(
+    db_connection: DatabaseConnection,
+    storage: Storage,
+    memory_service: MemoryService | None = None,
+):
     """Create tool for deleting memories."""
-    service = MemoryService(storage)
+    service = memory_service or MemoryService(storage)
 
     def forget(namespace: str, key: str) -> str:
         """Remove a memory that is no longer relevant or was incorrect.
@@ -273,9 +285,13 @@ def create_forget_tool(db_connection: DatabaseConnection, storage: Storage):
     return forget
 
 
-def create_list_memories_tool(db_connection: DatabaseConnection, storage: Storage):
+def create_list_memories_tool(
+    db_connection: DatabaseConnection,
+    storage: Storage,
+    memory_service: MemoryService | None = None,
+):
     """Create tool for listing memories."""
-    service = MemoryService(storage)
+    service = memory_service or MemoryService(storage)
 
     def list_memories(namespace: str | None = None, limit: int = 20) -> str:
         """List all stored memories, optionally filtered by namespace.
@@ -338,10 +354,12 @@ def create_list_memories_tool(db_connection: DatabaseConnection, storage: Storag
 
 
 def create_recall_for_question_tool(
-    db_connection: DatabaseConnection, storage: Storage
+    db_connection: DatabaseConnection,
+    storage: Storage,
+    memory_service: MemoryService | None = None,
 ):
     """Create tool to automatically recall memories relevant to a user's question."""
-    service = MemoryService(storage)
+    service = memory_service or MemoryService(storage)
 
     def recall_for_question(question: str) -> str:
         """Automatically recall memories that might be relevant to a user's question.
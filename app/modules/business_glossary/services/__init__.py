@@ -6,6 +6,7 @@ from app.modules.business_glossary.models import BusinessGlossary
 from app.modules.business_glossary.repositories import BusinessGlossaryRepository
 from app.modules.database_connection.repositories import DatabaseConnectionRepository
 from app.modules.prompt.models import Prompt
+from app.utils.prompts_ner.template_matcher import prompt_template_indexes
 
 
 class BusinessGlossaryService:
@@ -40,7 +41,9 @@ class BusinessGlossaryService:
             sql=business_glossary_request.sql,
             metadata=business_glossary_request.metadata,
         )
-        return self.repository.insert(business_glossary)
+        business_glossary = self.repository.insert(business_glossary)
+        prompt_template_indexes.invalidate(db_connection_id)
+        return business_glossary
 
     def get_business_glossary(self, business_glossary_id) -> BusinessGlossary:
         business_glossary = self.repository.find_by_id(business_glossary_id)
@@ -63,6 +66,7 @@ class BusinessGlossaryService:
             setattr(business_glossary, key, value)
 
         self.repository.update(business_glossary_id, business_glossary)
+        prompt_template_indexes.invalidate(business_glossary.db_connection_id)
         return business_glossary
 
     def delete_business_glossary(self, business_glossary_id) -> BusinessGlossary:
@@ -72,4 +76,5 @@ class BusinessGlossaryService:
         deleted = self.repository.delete(business_glossary_id)
         if not deleted:
             raise HTTPException(status_code=500, detail=f"Failed to delete business glossary {business_glossary_id}")
+        prompt_template_indexes.invalidate(business_glossary.db_connection_id)
         return deleted
@@ -13,4 +13,17 @@ class ContextStore(BaseModel):
     prompt_embedding: list[float]
     sql: str
     metadata: dict | None = None
+    # Version of the NER labels/prompt prompt_text_ner was generated with
+    template_version: str | None = None
     created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+
+
+class ContextStoreBackfillReport(BaseModel):
+    db_connection_id: str
+    template_version: str
+    total: int = 0
+    # Context stores with a stale template, backfilled in the background
+    stale: int = 0
+    updated: int = 0
+    failed: int = 0
+    status: str = "completed"
@@ -28,6 +28,17 @@ class ContextStoreRepository:
             result.append(ContextStore(**row))
         return result
 
+    def find_all_by(self, filter: dict, page_size: int = 250) -> list[ContextStore]:
+        """Like find_by, but pages through every match instead of the first page."""
+        result = []
+        page = 1
+        while True:
+            rows = self.storage.find(DB_COLLECTION, filter, page=page, limit=page_size)
+            result.extend(ContextStore(**row) for row in rows)
+            if len(rows) < page_size:
+                return result
+            page += 1
+
     def find_by_prompt(
         self, db_connection_id: str, prompt_text: str
     ) -> ContextStore | None:
@@ -127,6 +138,7 @@ class ContextStoreRepository:
                                 "prompt_text": row["document"]["prompt_text"],
                                 "prompt_text_ner": row["document"]["prompt_text_ner"],
                                 "sql": row["document"]["sql"],
+                                "template_version": row["document"].get("template_version"),
                                 "score": score,
                             }
                         )
@@ -143,10 +155,23 @@ class ContextStoreRepository:
         deleted_count = self.storage.delete_by_id(DB_COLLECTION, id)
         return bool(deleted_count)
 
-    def update(self, context_store: ContextStore) -> ContextStore:
+    def update(self, id: str, context_store: ContextStore) -> ContextStore:
         self.storage.update_or_create(
             DB_COLLECTION,
-            {"id": context_store.id},
+            {"id": id},
             context_store.model_dump(exclude={"id"}),
         )
         return context_store
+
+    def bulk_upsert(self, context_stores: list[ContextStore]) -> list[dict]:
+        """Insert or replace many context stores with one bulk import."""
+        docs = []
+        for context_store in context_stores:
+            doc = context_store.model_dump(exclude={"id"})
+            if context_store.id:
+                doc["id"] = context_store.id
+            docs.append(doc)
+        results = self.storage.bulk_import(DB_COLLECTION, docs, action="upsert")
+        for context_store, doc in zip(context_stores, docs, strict=True):
+            context_store.id = doc["id"]
+        return results
@@ -1,6 +1,6 @@
 import logging
 import os
-from fastapi import HTTPException
+from fastapi import BackgroundTasks, HTTPException
 from sql_metadata import Parser
 from dotenv import load_dotenv
 
@@ -8,34 +8,46 @@ from app.api.requests import (
     ContextStoreRequest,
     UpdateContextStoreRequest,
 )
-from app.modules.context_store.models import ContextStore
+from app.modules.business_glossary.repositories import BusinessGlossaryRepository
+from app.modules.context_store.models import ContextStore, ContextStoreBackfillReport
 from app.modules.context_store.repositories import ContextStoreRepository
 from app.modules.database_connection.repositories import DatabaseConnectionRepository
 from app.modules.prompt.models import Prompt
+from app.modules.table_description.models import TableDescriptionStatus
+from app.modules.table_description.repositories import TableDescriptionRepository
 from app.utils.model.embedding_model import EmbeddingModel
 from app.utils.model.chat_model import ChatModel
 from app.utils.sql_database.sql_utils import extract_the_schemas_from_sql
 from app.utils.prompts_ner.prompts_ner import (
     get_ner_labels,
+    get_ner_template_version,
     # request_ner_service,
-    request_ner_llm,
+    request_ner_llm_batch,
     get_labels_entities,
     # get_prompt_text_ner
     replace_entities_with_labels,
 )
+from app.utils.prompts_ner.template_matcher import (
+    EntityDictionary,
+    PromptTemplateIndex,
+    prompt_template_indexes,
+)
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+CONTEXT_STORE_EMBEDDING_BATCH = int(os.getenv("CONTEXT_STORE_EMBEDDING_BATCH", "100"))
+CONTEXT_STORE_NER_CONCURRENCY = int(os.getenv("CONTEXT_STORE_NER_CONCURRENCY", "8"))
+
 
 class ContextStoreService:
     def __init__(self, storage):
         self.storage = storage
         self.repository = ContextStoreRepository(self.storage)
 
-    def create_context_store(
-        self, context_store_request: ContextStoreRequest
-    ) -> ContextStore:
+    def _validate_context_store_request(
+        self, context_store_request: ContextStoreRequest, db_connection
+    ) -> None:
         try:
             Parser(context_store_request.sql).tables  # noqa: B018
         except Exception as e:
@@ -44,10 +56,6 @@ class ContextStoreService:
                 detail=f"SQL {context_store_request.sql} is malformed. Please check the syntax.",
             ) from e
 
-        db_connection_repository = DatabaseConnectionRepository(self.storage)
-        db_connection = db_connection_repository.find_by_id(
-            context_store_request.db_connection_id
-        )
         if not db_connection:
             raise HTTPException(
                 status_code=404, detail=f"Database connection {context_store_request.db_connection_id} not found"
@@ -66,49 +74,184 @@ class ContextStoreService:
                     detail=f"SQL {context_store_request.sql} does not contain any of the schemas {db_connection.schemas}",
                 )
 
-        # Get Embedding Vector from Prompt, used in SQL Generation as Few Show Examples
-        embedding_model = EmbeddingModel().get_model()
-        prompt_embedding = embedding_model.embed_query(
-            context_store_request.prompt_text
+    def _get_ner_model(self):
+        return ChatModel().get_model(
+            database_connection=None,
+            model_family=os.getenv("CHAT_FAMILY"),
+            model_name=os.getenv("CHAT_MODEL"),
+            api_base=None,
+            temperature=0,
+            max_retries=2,
         )
-        prompt_text_ner = context_store_request.prompt_text
-        labels_entities = {"entities": [], "labels": []}
-        try:
-            llm_model = ChatModel().get_model(
-                database_connection=None,
-                model_family=os.getenv("CHAT_FAMILY"),
-                model_name=os.getenv("CHAT_MODEL"),
-                api_base=None,
-                temperature=0,
-                max_retries=2,
+
+    def _apply_templates(self, context_stores: list[ContextStore]) -> int:
+        """Template and embed context stores in batches; returns how many NER calls failed."""
+        template_version = get_ner_template_version()
+        prompt_texts = [context_store.prompt_text for context_store in context_stores]
+
+        embedding_model = EmbeddingModel().get_model()
+        embeddings = []
+        for start in range(0, len(prompt_texts), CONTEXT_STORE_EMBEDDING_BATCH):
+            embeddings.extend(
+                embedding_model.embed_documents(
+                    prompt_texts[start : start + CONTEXT_STORE_EMBEDDING_BATCH]
+                )
             )
-            labels = get_ner_labels(context_store_request.prompt_text)
-            if labels:
-                # labels_entities_ner = request_ner_service(context_store_request.prompt_text, labels)
-                labels_entities_ner = request_ner_llm(
-                    llm_model, context_store_request.prompt_text, labels
+
+        labels = get_ner_labels("")
+        results = [None] * len(context_stores)
+        if labels:
+            try:
+                results = request_ner_llm_batch(
+                    self._get_ner_model(),
+                    prompt_texts,
+                    labels,
+                    max_concurrency=CONTEXT_STORE_NER_CONCURRENCY,
                 )
-                # prompt_text_ner = get_prompt_text_ner(context_store_request.prompt_text, labels_entities_ner)
-                if labels_entities_ner[0]:
-                    prompt_text_ner = replace_entities_with_labels(
-                        context_store_request.prompt_text, labels_entities_ner
-                    )
-                    labels_entities = get_labels_entities(labels_entities_ner)
-        except Exception as e:
-            print(e)
-            pass
+            except Exception as e:
+                logger.warning(f"NER templating failed: {e}")
+
+        failed = 0
+        for context_store, embedding, labels_entities_ner in zip(
+            context_stores, embeddings, results, strict=True
+        ):
+            context_store.prompt_embedding = embedding
+            context_store.prompt_text_ner = context_store.prompt_text
+            context_store.entities = []
+            context_store.labels = []
+            if labels_entities_ner is None:
+                # Retried by the next backfill since the version is not set
+                context_store.template_version = None
+                failed += 1
+                continue
+            if labels_entities_ner and labels_entities_ner[0]:
+                context_store.prompt_text_ner = replace_entities_with_labels(
+                    context_store.prompt_text, labels_entities_ner
+                )
+                labels_entities = get_labels_entities(labels_entities_ner)
+                context_store.entities = labels_entities["entities"]
+                context_store.labels = labels_entities["labels"]
+            context_store.template_version = template_version
+        return failed
+
+    def create_context_store(
+        self, context_store_request: ContextStoreRequest
+    ) -> ContextStore:
+        db_connection_repository = DatabaseConnectionRepository(self.storage)
+        db_connection = db_connection_repository.find_by_id(
+            context_store_request.db_connection_id
+        )
+        self._validate_context_store_request(context_store_request, db_connection)
 
         context_store = ContextStore(
             db_connection_id=context_store_request.db_connection_id,
             prompt_text=context_store_request.prompt_text,
-            prompt_text_ner=prompt_text_ner,
-            entities=labels_entities["entities"],
-            labels=labels_entities["labels"],
-            prompt_embedding=prompt_embedding,
+            prompt_text_ner=context_store_request.prompt_text,
+            entities=[],
+            labels=[],
+            prompt_embedding=[],
             sql=context_store_request.sql,
             metadata=context_store_request.metadata,
         )
-        return self.repository.insert(context_store)
+        # Get Embedding Vector from Prompt, used in SQL Generation as Few Show Examples
+        self._apply_templates([context_store])
+        context_store = self.repository.insert(context_store)
+        prompt_template_indexes.invalidate(context_store.db_connection_id)
+        return context_store
+
+    def create_context_stores(
+        self, context_store_requests: list[ContextStoreRequest]
+    ) -> list[ContextStore]:
+        """Create many context stores with batched embedding/NER and one bulk import."""
+        db_connection_repository = DatabaseConnectionRepository(self.storage)
+        db_connections = {}
+        for context_store_request in context_store_requests:
+            db_connection_id = context_store_request.db_connection_id
+            if db_connection_id not in db_connections:
+                db_connections[db_connection_id] = db_connection_repository.find_by_id(
+                    db_connection_id
+                )
+            self._validate_context_store_request(
+                context_store_request, db_connections[db_connection_id]
+            )
+
+        context_stores = [
+            ContextStore(
+                db_connection_id=context_store_request.db_connection_id,
+                prompt_text=context_store_request.prompt_text,
+                prompt_text_ner=context_store_request.prompt_text,
+                entities=[],
+                labels=[],
+                prompt_embedding=[],
+                sql=context_store_request.sql,
+                metadata=context_store_request.metadata,
+            )
+            for context_store_request in context_store_requests
+        ]
+        self._apply_templates(context_stores)
+        self.repository.bulk_upsert(context_stores)
+        for db_connection_id in db_connections:
+            prompt_template_indexes.invalidate(db_connection_id)
+        return context_stores
+
+    def backfill_templates(
+        self, db_connection_id: str, force: bool = False
+    ) -> ContextStoreBackfillReport:
+        """Re-template and re-embed the context stores whose template version is stale."""
+        template_version = get_ner_template_version()
+        context_stores = self.repository.find_all_by({"db_connection_id": db_connection_id})
+        stale = [
+            context_store
+            for context_store in context_stores
+            if force or context_store.template_version != template_version
+        ]
+        report = ContextStoreBackfillReport(
+            db_connection_id=db_connection_id,
+            template_version=template_version,
+            total=len(context_stores),
+            stale=len(stale),
+        )
+        if not stale:
+            return report
+
+        report.failed = self._apply_templates(stale)
+        results = self.repository.bulk_upsert(stale)
+        report.failed += sum(1 for result in results if not result.get("success", True))
+        report.updated = len(stale) - report.failed
+        prompt_template_indexes.invalidate(db_connection_id)
+        logger.info(
+            f"Backfilled {report.updated}/{len(stale)} context store templates for {db_connection_id}"
+        )
+        return report
+
+    def schedule_backfill_templates(
+        self,
+        db_connection_id: str,
+        background_tasks: BackgroundTasks,
+        force: bool = False,
+    ) -> ContextStoreBackfillReport:
+        """Count the stale context stores and backfill them in the background.
+
+        A backfill makes one NER and embedding call per stale row, too many to
+        run while the request waits.
+        """
+        template_version = get_ner_template_version()
+        context_stores = self.repository.find_all_by({"db_connection_id": db_connection_id})
+        stale = sum(
+            1
+            for context_store in context_stores
+            if force or context_store.template_version != template_version
+        )
+        report = ContextStoreBackfillReport(
+            db_connection_id=db_connection_id,
+            template_version=template_version,
+            total=len(context_stores),
+            stale=stale,
+        )
+        if stale:
+            background_tasks.add_task(self.backfill_templates, db_connection_id, force)
+            report.status = "scheduled"
+        return report
 
     def get_context_store(self, context_store_id) -> ContextStore:
         context_store = self.repository.find_by_id(context_store_id)
@@ -161,6 +304,7 @@ class ContextStoreService:
             setattr(context_store, key, value)
 
         self.repository.update(context_store_id, context_store)
+        prompt_template_indexes.invalidate(context_store.db_connection_id)
         return context_store
 
     def delete_context_store(self, context_store_id) -> ContextStore:
@@ -173,6 +317,7 @@ class ContextStoreService:
         if not is_deleted:
             raise HTTPException(status_code=500, detail=f"Failed to delete context store {context_store_id}")
 
+        prompt_template_indexes.invalidate(context_store.db_connection_id)
         return is_deleted
 
     def retrieve_exact_prompt(self, db_connection_id, prompt) -> ContextStore:
@@ -181,9 +326,63 @@ class ContextStoreService:
     def retrieve_exact_prompt_ner(
         self, db_connection_id, prompt_text_ner, filter_by
     ) -> ContextStore:
-        return self.repository.find_by_prompt_ner(
+        # Rows templated with other labels/prompt would not match reliably
+        template_version = get_ner_template_version()
+        try:
+            matches = self.repository.find_by_prompt_ner(
+                db_connection_id,
+                prompt_text_ner,
+                {**(filter_by or {}), "template_version": template_version},
+            )
+        except Exception as e:
+            # Collections created before the field existed can't filter on it
+            logger.warning(f"Context store lookup by template version failed: {e}")
+            matches = None
+        if matches:
+            return matches
+
+        # Rows not backfilled yet have no version and match as before
+        matches = self.repository.find_by_prompt_ner(
             db_connection_id, prompt_text_ner, filter_by
         )
+        if matches is None:
+            return None
+        return [
+            match
+            for match in matches
+            if match.get("template_version") in (None, template_version)
+        ]
+
+    def get_prompt_template_index(self, db_connection_id: str) -> PromptTemplateIndex:
+        """Templates of every context store of the connection, cached until they change."""
+
+        def build() -> PromptTemplateIndex:
+            tables = TableDescriptionRepository(self.storage).find_all_by(
+                {
+                    "db_connection_id": db_connection_id,
+                    "sync_status": TableDescriptionStatus.SCANNED.value,
+                }
+            )
+            glossaries = BusinessGlossaryRepository(self.storage).find_by(
+                {"db_connection_id": db_connection_id}
+            )
+            dictionary = EntityDictionary.from_sources(
+                tables, glossaries, known_labels=get_ner_labels("")
+            )
+            context_stores = self.repository.find_all_by(
+                {"db_connection_id": db_connection_id}
+            )
+            return PromptTemplateIndex(
+                dictionary, context_stores, template_version=get_ner_template_version()
+            )
+
+        return prompt_template_indexes.get(db_connection_id, build)
+
+    def retrieve_similar_prompt_templates(
+        self, db_connection_id: str, prompt_text: str
+    ) -> list[dict]:
+        """Similar questions found by local NER templating, without any LLM call."""
+        return self.get_prompt_template_index(db_connection_id).find(prompt_text)
 
     def retrieve_context_for_question(self, prompt: Prompt) -> list[dict]:
         logger.info(f"Getting context for {prompt.text}")
@@ -12,6 +12,7 @@ from app.modules.memory.backends.base import MemoryBackend
 
 if TYPE_CHECKING:
     from app.data.db.storage import Storage
+    from app.modules.memory.index import MemoryIndex
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,7 @@ logger = logging.getLogger(__name__)
 def create_memory_backend(
     storage: "Storage" = None,
     backend_type: str | None = None,
+    index: "MemoryIndex | None" = None,
 ) -> MemoryBackend:
     """Create appropriate memory backend based on configuration.
 
@@ -30,6 +32,7 @@ def create_memory_backend(
     Args:
         storage: TypeSense storage instance (required for typesense backend).
         backend_type: Override backend type ("typesense" or "letta").
+        index: In-memory recall index for the TypeSense backend (ignored by Letta).
 
     Returns:
         Configured memory backend implementing MemoryBackend protocol.
@@ -78,7 +81,7 @@ def create_memory_backend(
         storage = Storage(settings)
 
     logger.info("Using TypeSense memory backend")
-    return TypeSenseMemoryBackend(storage)
+    return TypeSenseMemoryBackend(storage, index=index)
 
 
 __all__ = [
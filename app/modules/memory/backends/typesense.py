@@ -6,11 +6,15 @@ combining text and vector similarity.
 """
 
 import logging
+import uuid
+from datetime import datetime, timezone
 from typing import Any
 
 from app.data.db.storage import Storage
+from app.modules.memory.index import MEMORY_INDEX_MAX_MEMORIES, MemoryIndex
 from app.modules.memory.models import Memory, MemorySearchResult
 from app.modules.memory.repositories import MemoryRepository
+from app.modules.memory.write_behind import get_memory_writer
 from app.utils.model.embedding_model import EmbeddingModel
 
 logger = logging.getLogger(__name__)
@@ -23,16 +27,24 @@ class TypeSenseMemoryBackend:
     - Hybrid search (text + vector similarity)
     - Local embedding generation
     - Full CRUD operations on memories
+
+    Writes of `remember` and access counts go through the write-behind
+    queue (see `app.modules.memory.write_behind`) unless it is disabled.
+    With a `MemoryIndex`, recalls of the shared memories of its connection
+    are answered from the index (see `app.modules.memory.index`).
     """
 
-    def __init__(self, storage: Storage):
+    def __init__(self, storage: Storage, index: MemoryIndex | None = None):
         """Initialize TypeSense backend.
 
         Args:
             storage: TypeSense storage instance.
+            index: Optional in-memory recall index of one connection.
         """
         self.storage = storage
         self.repository = MemoryRepository(storage)
+        self.writer = get_memory_writer(storage)
+        self.index = index
 
     def _generate_content_text(self, value: dict) -> str:
         """Generate searchable text from memory value.
@@ -74,6 +86,7 @@ class TypeSenseMemoryBackend:
         """Store a memory with automatic content text generation.
 
         If a memory with the same namespace and key exists, it will be updated.
+        The embedding is only recomputed when the content text changed.
 
         Args:
             db_connection_id: Database connection ID.
@@ -84,12 +97,87 @@ class TypeSenseMemoryBackend:
             session_id: Optional session ID. None for shared (database-level) memory.
         """
         content_text = self._generate_content_text(value)
-        memory = self.repository.put(
-            db_connection_id, namespace, key, value, content_text, importance, session_id
-        )
-        # Add embedding for semantic search
-        memory = self._add_embedding(memory)
-        return self.repository.update(memory)
+        now = datetime.now(timezone.utc).isoformat()
+        memory = self._find(db_connection_id, namespace, key, session_id)
+        if memory:
+            if memory.content_text != content_text:
+                memory.memory_embedding = None
+            memory.value = value
+            memory.content_text = content_text
+            memory.importance = importance
+            memory.access_count += 1
+            memory.last_accessed_at = now
+            memory.updated_at = now
+        else:
+            memory = Memory(
+                id=str(uuid.uuid4()),
+                db_connection_id=db_connection_id,
+                session_id=session_id,
+                namespace=namespace,
+                key=key,
+                value=value,
+                content_text=content_text,
+                importance=importance,
+                access_count=0,
+                created_at=now,
+                updated_at=now,
+            )
+        if not memory.memory_embedding:
+            # Add embedding for semantic search
+            memory = self._add_embedding(memory)
+
+        if self.writer is not None:
+            self.writer.upsert(memory)
+        else:
+            self.repository.bulk_upsert([memory])
+        if self.index is not None:
+            self.index.upsert(memory)
+        return memory
+
+    def _use_index(self, db_connection_id: str, session_id: str | None) -> bool:
+        """Whether recalls of these memories are answered by the index, loading it if needed."""
+        if self.index is None or session_id or db_connection_id != self.index.db_connection_id:
+            return False
+        try:
+            return self.index.ensure_loaded(
+                lambda: self.repository.find_shared_for_connection(
+                    db_connection_id, limit=MEMORY_INDEX_MAX_MEMORIES
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load the memory index, recalling from TypeSense: {e}")
+            return False
+
+    def _recall_from_index(
+        self, query: str, namespace: str | None, limit: int
+    ) -> list[MemorySearchResult]:
+        try:
+            embedding_model = EmbeddingModel().get_model()
+            query_embedding = self.index.embed(query, embedding_model.embed_query)
+        except Exception as e:
+            logger.warning(f"Query embedding failed, recalling by text: {e}")
+            query_embedding = None
+        return self.index.search(query, query_embedding, namespace, limit)
+
+    def _find(
+        self,
+        db_connection_id: str,
+        namespace: str,
+        key: str,
+        session_id: str | None = None,
+    ) -> Memory | None:
+        """Find a memory by key, queued writes first."""
+        if self.writer is not None:
+            memory = self.writer.get(db_connection_id, namespace, key, session_id)
+            if memory:
+                return memory.model_copy(deep=True)
+        return self.repository.find_by_key(db_connection_id, namespace, key, session_id)
+
+    def _record_access(self, memories: list[Memory]) -> None:
+        if self.writer is not None:
+            self.writer.increment_access(memories)
+        else:
+            self.repository.bulk_increment_access(memories)
 
     def recall(
         self,
@@ -110,6 +198,12 @@ class TypeSenseMemoryBackend:
             session_id: Optional session ID. If None, returns only shared memories.
             include_shared: If True and session_id is set, include shared memories.
         """
+        if self._use_index(db_connection_id, session_id):
+            results = self._recall_from_index(query, namespace, limit)
+            if results:
+                self._record_access([result.memory for result in results])
+            return results
+
         try:
             embedding_model = EmbeddingModel().get_model()
             query_embedding = embedding_model.embed_query(query)
@@ -125,8 +219,7 @@ class TypeSenseMemoryBackend:
 
             # Increment access count for retrieved memories (batch operation)
             if results:
-                memories_to_update = [result.memory for result in results]
-                self.repository.bulk_increment_access(memories_to_update)
+                self._record_access([result.memory for result in results])
 
             return results
 
@@ -136,6 +229,79 @@ class TypeSenseMemoryBackend:
                 db_connection_id, query, namespace, limit
             )
 
+    def recall_many(
+        self,
+        db_connection_id: str,
+        queries: list[tuple[str, str | None, int]],
+        session_id: str | None = None,
+        include_shared: bool = True,
+    ) -> list[list[MemorySearchResult]]:
+        """Recall memories for many (query, namespace, limit) at once.
+
+        The queries are embedded in one call and searched in one multi_search
+        request. Falls back to text search like `recall`.
+        """
+        if not queries:
+            return []
+        if self._use_index(db_connection_id, session_id):
+            results = [
+                self._recall_from_index(query, namespace, limit)
+                for query, namespace, limit in queries
+            ]
+            self._record_access([result.memory for found in results for result in found])
+            return results
+        try:
+            embedding_model = EmbeddingModel().get_model()
+            embeddings = embedding_model.embed_documents([query for query, _, _ in queries])
+            requests = [
+                self.repository.search_request(
+                    db_connection_id,
+                    query,
+                    embedding,
+                    namespace,
+                    limit,
+                    session_id=session_id,
+                    include_shared=include_shared,
+                )
+                for (query, namespace, limit), embedding in zip(queries, embeddings)
+            ]
+            results = self.repository.search_many(requests)
+            self._record_access([result.memory for found in results for result in found])
+            return results
+
+        except Exception as e:
+            logger.warning(f"Semantic search failed, falling back to text search: {e}")
+            return [
+                self.repository.search_by_text(db_connection_id, query, namespace, limit)
+                for query, namespace, limit in queries
+            ]
+
+    def get_memories(
+        self,
+        db_connection_id: str,
+        keys: list[tuple[str, str]],
+        session_id: str | None = None,
+    ) -> list[Memory | None]:
+        """Get many memories by (namespace, key) with one lookup.
+
+        Args:
+            db_connection_id: Database connection ID.
+            keys: (namespace, key) pairs.
+            session_id: Optional session ID. If None, gets shared memories.
+        """
+        found = {}
+        for namespace, key in keys:
+            if self.writer is not None:
+                memory = self.writer.get(db_connection_id, namespace, key, session_id)
+                if memory:
+                    found[(namespace, key)] = memory.model_copy(deep=True)
+        missing = [pair for pair in keys if pair not in found]
+        if missing:
+            found.update(self.repository.find_by_keys(db_connection_id, missing, session_id))
+        memories = [found.get(pair) for pair in keys]
+        self._record_access(list({id(m): m for m in memories if m}.values()))
+        return memories
+
     def get_memory(
         self,
         db_connection_id: str,
@@ -151,9 +317,9 @@ class TypeSenseMemoryBackend:
             key: Memory key.
             session_id: Optional session ID. If None, gets shared memory.
         """
-        memory = self.repository.find_by_key(db_connection_id, namespace, key, session_id)
+        memory = self._find(db_connection_id, namespace, key, session_id)
         if memory:
-            self.repository.increment_access(memory)
+            self._record_access([memory])
         return memory
 
     def forget(
@@ -171,7 +337,14 @@ class TypeSenseMemoryBackend:
             key: Memory key.
             session_id: Optional session ID. If None, deletes shared memory.
         """
-        return self.repository.delete_by_key(db_connection_id, namespace, key, session_id)
+        discarded = 0
+        if self.writer is not None:
+            discarded = self.writer.discard(db_connection_id, namespace, key, session_id)
+        deleted = self.repository.delete_by_key(db_connection_id, namespace, key, session_id)
+        if self.index is not None and not session_id:
+            if db_connection_id == self.index.db_connection_id:
+                self.index.remove(namespace, key)
+        return deleted or bool(discarded)
 
     def list_memories(
         self,
@@ -225,10 +398,18 @@ class TypeSenseMemoryBackend:
         namespace: str,
     ) -> int:
         """Clear all memories in a namespace."""
+        if self.writer is not None:
+            self.writer.discard(db_connection_id, namespace)
+        if self.index is not None and db_connection_id == self.index.db_connection_id:
+            self.index.clear(namespace)
         return self.repository.delete_by_namespace(db_connection_id, namespace)
 
     def clear_all(self, db_connection_id: str) -> int:
         """Clear all memories for a database connection using batch delete."""
+        if self.writer is not None:
+            self.writer.discard(db_connection_id)
+        if self.index is not None and db_connection_id == self.index.db_connection_id:
+            self.index.clear()
         return self.repository.delete_by_connection(db_connection_id)
 
     def format_memories_for_prompt(
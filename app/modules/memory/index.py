@@ -0,0 +1,254 @@
+"""In-memory recall index of the shared memories of one database connection.
+
+Agent sessions recall memories many times with overlapping queries, and each
+recall costs an embedding call and a Typesense hybrid search. A session keeps
+the shared memories of its connection in a `MemoryIndex` instead, loaded on
+the first recall and updated by `remember`/`forget` of the same backend, and
+answers recalls locally:
+
+* text matches are ranked with BM25 over content text, namespace and key;
+* vector matches by cosine similarity to the query embedding;
+* both ranks are fused like Typesense hybrid search (`alpha` weights the
+  vector rank), the best `limit` are ordered by vector distance and scored
+  `1 - distance / 2`, as `MemoryRepository.search` does.
+
+Query embeddings are cached, so repeated recalls don't leave the process.
+The index reloads after `MEMORY_INDEX_TTL` seconds to pick up memories written
+by other sessions, and connections with more than `MEMORY_INDEX_MAX_MEMORIES`
+memories are not indexed.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from app.modules.memory.models import Memory, MemorySearchResult
+
+logger = logging.getLogger(__name__)
+
+MEMORY_INDEX_TTL = float(os.getenv("MEMORY_INDEX_TTL", "300"))
+MEMORY_INDEX_MAX_MEMORIES = int(os.getenv("MEMORY_INDEX_MAX_MEMORIES", "5000"))
+QUERY_EMBEDDING_CACHE_SIZE = 256
+# Same as MemoryRepository.search
+MIN_SCORE = 0.2
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class MemoryIndex:
+    """Shared memories of a connection with their embeddings and term statistics."""
+
+    def __init__(self, db_connection_id: str, ttl: float = MEMORY_INDEX_TTL):
+        self.db_connection_id = db_connection_id
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._memories: dict[tuple[str, str], Memory] = {}
+        self._terms: dict[tuple[str, str], Counter] = {}
+        self._document_frequency: Counter = Counter()
+        self._total_length = 0
+        # Rows of the normalized embedding matrix, rebuilt after changes
+        self._keys: list[tuple[str, str]] = []
+        self._matrix: np.ndarray | None = None
+        self._embeddings: OrderedDict[str, list[float]] = OrderedDict()
+        self._loaded_at: float | None = None
+        self.disabled = False
+
+    def __len__(self) -> int:
+        return len(self._memories)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    def load(self, memories: list[Memory]) -> None:
+        """Replace the indexed memories, e.g. with `find_shared_for_connection`."""
+        with self._lock:
+            self._memories.clear()
+            self._terms.clear()
+            self._document_frequency.clear()
+            self._total_length = 0
+            self.disabled = len(memories) > MEMORY_INDEX_MAX_MEMORIES
+            if self.disabled:
+                logger.info(
+                    f"Not indexing {len(memories)} memories of {self.db_connection_id}, "
+                    f"more than {MEMORY_INDEX_MAX_MEMORIES}"
+                )
+            else:
+                for memory in memories:
+                    self._add(memory)
+            self._matrix = None
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, load: Callable[[], list[Memory]]) -> bool:
+        """Load the index with `load()` unless it is fresh; False if it can't be used."""
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(load())
+        return not self.disabled
+
+    def upsert(self, memory: Memory) -> None:
+        if memory.db_connection_id != self.db_connection_id or memory.session_id:
+            return
+        with self._lock:
+            self._remove((memory.namespace, memory.key))
+            self._add(memory)
+            self._matrix = None
+
+    def remove(self, namespace: str, key: str) -> None:
+        with self._lock:
+            if self._remove((namespace, key)):
+                self._matrix = None
+
+    def clear(self, namespace: str | None = None) -> None:
+        with self._lock:
+            for pair in [pair for pair in self._memories if namespace in (None, pair[0])]:
+                self._remove(pair)
+            self._matrix = None
+
+    def _add(self, memory: Memory) -> None:
+        pair = (memory.namespace, memory.key)
+        terms = Counter(
+            _tokens(memory.content_text) + _tokens(memory.namespace) + _tokens(memory.key)
+        )
+        self._memories[pair] = memory
+        self._terms[pair] = terms
+        self._document_frequency.update(terms.keys())
+        self._total_length += sum(terms.values())
+
+    def _remove(self, pair: tuple[str, str]) -> bool:
+        if self._memories.pop(pair, None) is None:
+            return False
+        terms = self._terms.pop(pair)
+        self._document_frequency.subtract(terms.keys())
+        self._document_frequency += Counter()
+        self._total_length -= sum(terms.values())
+        return True
+
+    def embed(self, query: str, embed_query: Callable[[str], list[float]]) -> list[float]:
+        """Embedding of `query`, computed with `embed_query` once per query."""
+        with self._lock:
+            embedding = self._embeddings.get(query)
+            if embedding is not None:
+                self._embeddings.move_to_end(query)
+                return embedding
+        embedding = embed_query(query)
+        with self._lock:
+            self._embeddings[query] = embedding
+            while len(self._embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+                self._embeddings.popitem(last=False)
+        return embedding
+
+    def _vectors(self) -> tuple[list[tuple[str, str]], np.ndarray | None]:
+        if self._matrix is None:
+            keys = [pair for pair, memory in self._memories.items() if memory.memory_embedding]
+            if keys:
+                matrix = np.array(
+                    [self._memories[pair].memory_embedding for pair in keys], dtype=np.float32
+                )
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix = matrix / np.where(norms == 0, 1, norms)
+            else:
+                matrix = np.zeros((0, 0), dtype=np.float32)
+            self._keys, self._matrix = keys, matrix
+        return self._keys, self._matrix
+
+    def _text_scores(self, query: str, candidates: list[tuple[str, str]]) -> dict:
+        query_terms = set(_tokens(query))
+        if not query_terms or not candidates:
+            return {}
+        count = len(self._memories)
+        average_length = self._total_length / count if count else 0
+        scores = {}
+        for pair in candidates:
+            terms = self._terms[pair]
+            length = sum(terms.values())
+            score = 0.0
+            for term in query_terms & terms.keys():
+                frequency = terms[term]
+                document_frequency = self._document_frequency[term]
+                idf = math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+                score += idf * (frequency * (BM25_K1 + 1)) / (
+                    frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1))
+                )
+            if score > 0:
+                scores[pair] = score
+        return scores
+
+    def search(
+        self,
+        query: str,
+        query_embedding: list[float] | None = None,
+        namespace: str | None = None,
+        limit: int = 10,
+        alpha: float = 0.6,
+    ) -> list[MemorySearchResult]:
+        """Hybrid search of the indexed memories, scored like `MemoryRepository.search`.
+
+        Without a query embedding, memories are ranked by text match only
+        and scored by their normalized BM25 score.
+        """
+        with self._lock:
+            candidates = [
+                pair for pair in self._memories if namespace is None or pair[0] == namespace
+            ]
+            text_scores = self._text_scores(query, candidates)
+
+            distances = {}
+            if query_embedding is not None:
+                keys, matrix = self._vectors()
+                if keys:
+                    vector = np.asarray(query_embedding, dtype=np.float32)
+                    vector = vector / (np.linalg.norm(vector) or 1)
+                    similarities = matrix @ vector
+                    allowed = set(candidates)
+                    distances = {
+                        pair: 1 - float(similarity)
+                        for pair, similarity in zip(keys, similarities)
+                        if pair in allowed
+                    }
+            memories = self._memories
+
+            if query_embedding is None:
+                top = max(text_scores.values(), default=0)
+                ranked = sorted(text_scores, key=text_scores.get, reverse=True)[:limit]
+                return [
+                    MemorySearchResult(
+                        memory=memories[pair],
+                        score=text_scores[pair] / top,
+                        match_type="text",
+                    )
+                    for pair in ranked
+                ]
+
+            # Rank fusion of the text and vector ranks, like Typesense hybrid search
+            fused: dict[tuple[str, str], float] = {}
+            for rank, pair in enumerate(sorted(text_scores, key=text_scores.get, reverse=True)):
+                fused[pair] = (1 - alpha) / (rank + 1)
+            for rank, pair in enumerate(sorted(distances, key=distances.get)):
+                fused[pair] = fused.get(pair, 0) + alpha / (rank + 1)
+            hits = sorted(fused, key=fused.get, reverse=True)[:limit]
+
+            results = []
+            for pair in sorted(hits, key=lambda pair: distances.get(pair, 2)):
+                score = 1 - distances.get(pair, 2) / 2
+                if score >= MIN_SCORE:
+                    results.append(
+                        MemorySearchResult(
+                            memory=memories[pair], score=score, match_type="hybrid"
+                        )
+                    )
+            return results
@@ -8,6 +8,8 @@ from app.data.db.storage import Storage
 from app.modules.memory.models import Memory, MemorySearchResult
 
 DB_COLLECTION = "kai_memories"
+# Keys looked up per search of find_by_keys
+KEYS_PER_SEARCH = 100
 
 
 class MemoryRepository:
@@ -28,6 +30,30 @@ class MemoryRepository:
         memory.id = str(self.storage.insert_one(DB_COLLECTION, memory_dict))
         return memory
 
+    def to_document(self, memory: Memory) -> dict:
+        """TypeSense document of a memory, including its id when set."""
+        doc = memory.model_dump(exclude={"id"})
+        # Serialize value dict to JSON string for TypeSense
+        doc["value"] = json.dumps(doc["value"])
+        if memory.id:
+            doc["id"] = memory.id
+        return doc
+
+    def bulk_upsert(self, memories: list[Memory]) -> list[dict]:
+        """Insert or replace memories with one bulk import.
+
+        Memories without an id get one. Returns one import result per memory.
+        """
+        docs = [self.to_document(memory) for memory in memories]
+        results = self.storage.bulk_import(DB_COLLECTION, docs, action="upsert")
+        for memory, doc in zip(memories, docs):
+            memory.id = doc["id"]
+        return results
+
+    def bulk_update(self, updates: list[dict]) -> list[dict]:
+        """Partially update memories, each dict holding an id and the changed fields."""
+        return self.storage.bulk_import(DB_COLLECTION, updates, action="update")
+
     def find_by_id(self, id: str) -> Memory | None:
         """Find a memory by its TypeSense ID."""
         row = self.storage.find_one(DB_COLLECTION, {"id": id})
@@ -91,6 +117,30 @@ class MemoryRepository:
         """Find all memories for a database connection."""
         return self.find_by({"db_connection_id": db_connection_id})
 
+    def find_shared_for_connection(
+        self, db_connection_id: str, limit: int | None = None, page_size: int = 250
+    ) -> list[Memory]:
+        """Find the shared memories of a connection, with their embeddings, page by page.
+
+        Session memories are filtered out by TypeSense. With a `limit`, paging stops
+        as soon as more than `limit` memories were found.
+        """
+        memories = []
+        page = 1
+        while True:
+            rows = self.storage.find(
+                DB_COLLECTION,
+                {"db_connection_id": db_connection_id, "session_id": None},
+                page=page,
+                limit=page_size,
+            )
+            memories.extend(
+                self._to_memory(row) for row in rows if row.get("session_id") is None
+            )
+            if len(rows) < page_size or (limit is not None and len(memories) > limit):
+                return memories
+            page += 1
+
     def find_by_namespace(
         self, db_connection_id: str, namespace: str, limit: int = 100
     ) -> list[Memory]:
@@ -132,6 +182,30 @@ class MemoryRepository:
             session_id: Optional session ID to filter by.
             include_shared: If True and session_id is set, include shared memories.
         """
+        request = self.search_request(
+            db_connection_id,
+            query,
+            query_embedding,
+            namespace,
+            limit,
+            alpha,
+            session_id,
+            include_shared,
+        )
+        return self.search_many([request])[0]
+
+    def search_request(
+        self,
+        db_connection_id: str,
+        query: str,
+        query_embedding: list[float],
+        namespace: str | None = None,
+        limit: int = 10,
+        alpha: float = 0.6,
+        session_id: str | None = None,
+        include_shared: bool = True,
+    ) -> dict:
+        """Search of `search`, to run many of them at once with `search_many`."""
         filter_by = f"db_connection_id:={db_connection_id}"
         if namespace:
             filter_by += f"&&namespace:={namespace}"
@@ -148,29 +222,85 @@ class MemoryRepository:
             # Only shared (database-level) memories
             filter_by += "&&session_id:=null"
 
-        rows = self.storage.hybrid_search(
-            collection=DB_COLLECTION,
-            query=query,
-            query_by="content_text, namespace, key",
-            vector_query=f"memory_embedding:({query_embedding}, alpha:{alpha})",
-            exclude_fields="memory_embedding",
-            filter_by=filter_by,
-            limit=limit,
-        )
-        result = []
-        if rows:
-            for row in rows:
-                score = row.get("score", 0)
-                if score >= 0.2:  # Lower threshold for memories
-                    if isinstance(row.get("value"), str):
-                        row["value"] = json.loads(row["value"])
-                    memory = Memory(**row)
-                    result.append(MemorySearchResult(
-                        memory=memory,
-                        score=score,
-                        match_type="hybrid",
-                    ))
-        return result
+        return {
+            "q": query,
+            "query_by": "content_text, namespace, key",
+            "vector_query": f"memory_embedding:({query_embedding}, alpha:{alpha})",
+            "exclude_fields": "memory_embedding",
+            "filter_by": filter_by,
+            "per_page": limit,
+        }
+
+    def search_many(self, requests: list[dict]) -> list[list[MemorySearchResult]]:
+        """Run searches built by `search_request` in one multi_search request."""
+        if not requests:
+            return []
+        results = self.storage.multi_search(DB_COLLECTION, requests)
+        found = []
+        for request, result in zip(requests, results):
+            rows = self.storage.rank_hybrid_hits(
+                result.get("hits", []), request["query_by"], request["per_page"]
+            )
+            found.append(
+                [
+                    MemorySearchResult(
+                        memory=self._to_memory(row), score=row["score"], match_type="hybrid"
+                    )
+                    # Lower threshold for memories
+                    for row in rows
+                    if row["score"] >= 0.2
+                ]
+            )
+        return found
+
+    def find_by_keys(
+        self,
+        db_connection_id: str,
+        keys: list[tuple[str, str]],
+        session_id: str | None = None,
+    ) -> dict[tuple[str, str], Memory]:
+        """Find memories by (namespace, key) pairs with one multi_search request.
+
+        Args:
+            db_connection_id: Database connection ID.
+            keys: (namespace, key) pairs to look up.
+            session_id: Optional session ID. If None, finds shared memories.
+        """
+        keys = list(dict.fromkeys(keys))
+        searches = []
+        for start in range(0, len(keys), KEYS_PER_SEARCH):
+            batch = keys[start : start + KEYS_PER_SEARCH]
+            filter_by = " && ".join(
+                [
+                    f"db_connection_id:={db_connection_id}",
+                    self.storage.filter_in("namespace", {namespace for namespace, _ in batch}),
+                    self.storage.filter_in("key", {key for _, key in batch}),
+                ]
+            )
+            searches.append(
+                {
+                    "q": "*",
+                    "filter_by": filter_by,
+                    "exclude_fields": "memory_embedding",
+                    "per_page": 250,
+                }
+            )
+        found = {}
+        wanted = set(keys)
+        for result in self.storage.multi_search(DB_COLLECTION, searches) if searches else []:
+            for hit in result.get("hits", []):
+                row = hit["document"]
+                # Namespaces and keys are matched separately, keep the requested pairs
+                pair = (row.get("namespace"), row.get("key"))
+                if pair in wanted and row.get("session_id") == session_id:
+                    found[pair] = self._to_memory(row)
+        return found
+
+    def _to_memory(self, row: dict) -> Memory:
+        # Deserialize value from JSON string
+        if isinstance(row.get("value"), str):
+            row["value"] = json.loads(row["value"])
+        return Memory(**row)
 
     def search_by_text(
         self,
@@ -293,7 +423,7 @@ class MemoryRepository:
                 updates.append(update_data)
 
         if updates:
-            self.storage.bulk_update(DB_COLLECTION, updates)
+            self.bulk_update(updates)
 
     def delete(self, id: str) -> dict | None:
         """Delete a memory by ID."""
@@ -11,6 +11,7 @@ from typing import Any
 
 from app.data.db.storage import Storage
 from app.modules.memory.backends import MemoryBackend, create_memory_backend
+from app.modules.memory.index import MemoryIndex
 from app.modules.memory.models import Memory, MemorySearchResult
 
 logger = logging.getLogger(__name__)
@@ -27,17 +28,19 @@ class MemoryService:
         self,
         storage: Storage = None,
         backend: MemoryBackend | None = None,
+        index: MemoryIndex | None = None,
     ):
         """Initialize memory service with storage or explicit backend.
 
         Args:
             storage: TypeSense storage instance (for backward compatibility).
             backend: Explicit backend to use (overrides auto-detection).
+            index: In-memory recall index of a session, used by the TypeSense backend.
         """
         if backend:
             self._backend = backend
         else:
-            self._backend = create_memory_backend(storage)
+            self._backend = create_memory_backend(storage, index=index)
 
         # Keep storage reference for backward compatibility
         self.storage = storage
@@ -121,6 +124,58 @@ class MemoryService:
         """
         return self._backend.get_memory(db_connection_id, namespace, key, session_id)
 
+    def get_memories(
+        self,
+        db_connection_id: str,
+        keys: list[tuple[str, str]],
+        session_id: str | None = None,
+    ) -> list[Memory | None]:
+        """Get many memories by (namespace, key), in one lookup when the backend supports it.
+
+        Args:
+            db_connection_id: Database connection ID.
+            keys: (namespace, key) pairs.
+            session_id: Optional session ID. If None, gets shared memories.
+
+        Returns:
+            The Memory of each pair, None for those not found.
+        """
+        if hasattr(self._backend, "get_memories"):
+            return self._backend.get_memories(db_connection_id, keys, session_id)
+        return [
+            self._backend.get_memory(db_connection_id, namespace, key, session_id)
+            for namespace, key in keys
+        ]
+
+    def recall_many(
+        self,
+        db_connection_id: str,
+        queries: list[tuple[str, str | None, int]],
+        session_id: str | None = None,
+        include_shared: bool = True,
+    ) -> list[list[MemorySearchResult]]:
+        """Recall memories for many queries, batched when the backend supports it.
+
+        Args:
+            db_connection_id: Database connection to search within.
+            queries: (query, namespace, limit) of each search.
+            session_id: Optional session ID. If None, returns only shared memories.
+            include_shared: If True and session_id is set, include shared memories.
+
+        Returns:
+            The MemorySearchResults of each query.
+        """
+        if hasattr(self._backend, "recall_many"):
+            return self._backend.recall_many(
+                db_connection_id, queries, session_id, include_shared
+            )
+        return [
+            self._backend.recall(
+                db_connection_id, query, namespace, limit, session_id, include_shared
+            )
+            for query, namespace, limit in queries
+        ]
+
     def forget(
         self,
         db_connection_id: str,
@@ -4,8 +4,10 @@ This module provides a LangGraph-compatible store backed by TypeSense,
 enabling long-term memory for autonomous agents.
 """
 
+import asyncio
 from datetime import datetime
-from typing import Any, Iterable, Literal
+from functools import partial
+from typing import Any, Callable, Iterable, Literal
 
 from langgraph.store.base import (
     BaseStore,
@@ -19,7 +21,9 @@ from langgraph.store.base import (
 )
 
 from app.data.db.storage import Storage
+from app.modules.memory.models import Memory
 from app.modules.memory.services import MemoryService
+from app.utils.core.executors import get_executor
 
 
 class TypesenseStore(BaseStore):
@@ -67,72 +71,164 @@ class TypesenseStore(BaseStore):
     def batch(self, ops: Iterable[Any]) -> list[Any]:
         """Execute multiple operations synchronously in a single batch.
 
+        Reads are grouped by kind (see `_read_tasks`) and run before the
+        writes, which are applied in order.
+
         Args:
             ops: An iterable of operations to execute.
 
         Returns:
             A list of results corresponding to each operation.
         """
-        results = []
-        for op in ops:
-            if isinstance(op, GetOp):
-                result = self._get(op.namespace, op.key)
-                results.append(result)
-            elif isinstance(op, PutOp):
-                self._put(op.namespace, op.key, op.value)
-                results.append(None)
-            elif isinstance(op, SearchOp):
-                result = self._search(
-                    op.namespace_prefix,
-                    query=op.query,
-                    filter=op.filter,
-                    limit=op.limit,
-                    offset=op.offset,
-                )
-                results.append(result)
-            elif isinstance(op, ListNamespacesOp):
-                result = self._list_namespaces(
-                    prefix=op.prefix,
-                    suffix=op.suffix,
-                    max_depth=op.max_depth,
-                    limit=op.limit,
-                    offset=op.offset,
-                )
-                results.append(result)
-            else:
-                # Handle delete operations (check by attribute since DeleteOp may vary)
-                if hasattr(op, 'namespace') and hasattr(op, 'key') and not hasattr(op, 'value'):
-                    self._delete(op.namespace, op.key)
-                    results.append(None)
-                else:
-                    results.append(None)
+        ops = list(ops)
+        results: list[Any] = [None] * len(ops)
+        for task in self._read_tasks(ops):
+            for index, result in task().items():
+                results[index] = result
+        self._apply_writes(ops)
         return results
 
     async def abatch(self, ops: Iterable[Any]) -> list[Any]:
         """Execute multiple operations asynchronously in a single batch.
 
+        Like `batch`, but the grouped reads run concurrently on the shared
+        Typesense executor instead of blocking the event loop, so a step
+        costs about one embedding call and one search round-trip.
+
         Args:
             ops: An iterable of operations to execute.
 
         Returns:
             A list of results corresponding to each operation.
         """
-        # For now, delegate to synchronous implementation
-        # TypeSense client operations are synchronous
-        return self.batch(ops)
+        ops = list(ops)
+        results: list[Any] = [None] * len(ops)
+        loop = asyncio.get_running_loop()
+        executor = get_executor("typesense")
+        done = await asyncio.gather(
+            *(loop.run_in_executor(executor, task) for task in self._read_tasks(ops))
+        )
+        for task_results in done:
+            for index, result in task_results.items():
+                results[index] = result
+        if any(not isinstance(op, (GetOp, SearchOp, ListNamespacesOp)) for op in ops):
+            await loop.run_in_executor(executor, self._apply_writes, ops)
+        return results
+
+    def _read_tasks(self, ops: list[Any]) -> list[Callable[[], dict[int, Any]]]:
+        """Group the reads of a batch, each task returns results by op index.
+
+        All GetOps are one lookup and all SearchOps with a query one batched
+        recall; listings and namespace listings are a task each.
+        """
+        gets = [(i, op) for i, op in enumerate(ops) if isinstance(op, GetOp)]
+        searches = [(i, op) for i, op in enumerate(ops) if isinstance(op, SearchOp) and op.query]
+        listings = [
+            (i, op) for i, op in enumerate(ops) if isinstance(op, SearchOp) and not op.query
+        ]
+        namespace_ops = [(i, op) for i, op in enumerate(ops) if isinstance(op, ListNamespacesOp)]
+
+        tasks = []
+        if gets:
+            tasks.append(partial(self._get_many, gets))
+        if searches:
+            tasks.append(partial(self._search_many, searches))
+        tasks.extend(partial(self._list_items, i, op) for i, op in listings)
+        if namespace_ops:
+            tasks.append(partial(self._list_namespaces_many, namespace_ops))
+        return tasks
+
+    def _apply_writes(self, ops: list[Any]) -> None:
+        for op in ops:
+            if isinstance(op, PutOp):
+                # LangGraph deletes with a PutOp without value
+                if op.value is None:
+                    self._delete(op.namespace, op.key)
+                else:
+                    self._put(op.namespace, op.key, op.value)
+            elif not isinstance(op, (GetOp, SearchOp, ListNamespacesOp)):
+                # Handle delete operations (check by attribute since DeleteOp may vary)
+                if hasattr(op, 'namespace') and hasattr(op, 'key') and not hasattr(op, 'value'):
+                    self._delete(op.namespace, op.key)
+
+    def _get_many(self, gets: list[tuple[int, GetOp]]) -> dict[int, Item | None]:
+        memories = self.service.get_memories(
+            self.db_connection_id,
+            [(self._namespace_to_str(op.namespace), op.key) for _, op in gets],
+        )
+        return {
+            i: self._to_item(op.namespace, memory) if memory else None
+            for (i, op), memory in zip(gets, memories)
+        }
+
+    def _list_items(self, index: int, op: SearchOp) -> dict[int, list[SearchItem]]:
+        return {index: self._search(op.namespace_prefix, None, op.filter, op.limit, op.offset)}
+
+    def _search_many(self, searches: list[tuple[int, SearchOp]]) -> dict[int, list[SearchItem]]:
+        results = self.service.recall_many(
+            self.db_connection_id,
+            [
+                (
+                    op.query,
+                    self._namespace_to_str(op.namespace_prefix) if op.namespace_prefix else None,
+                    op.limit,
+                )
+                for _, op in searches
+            ],
+        )
+        return {
+            i: [self._to_search_item(r.memory, r.score) for r in found]
+            for (i, _), found in zip(searches, results)
+        }
+
+    def _list_namespaces_many(
+        self, namespace_ops: list[tuple[int, ListNamespacesOp]]
+    ) -> dict[int, list[tuple[str, ...]]]:
+        namespaces = self.service.list_namespaces(self.db_connection_id)
+        return {
+            i: self._filter_namespaces(
+                namespaces,
+                prefix=self._match_path(op.match_conditions, "prefix"),
+                suffix=self._match_path(op.match_conditions, "suffix"),
+                max_depth=op.max_depth,
+                limit=op.limit,
+                offset=op.offset,
+            )
+            for i, op in namespace_ops
+        }
+
+    @staticmethod
+    def _match_path(match_conditions, match_type: str) -> NamespacePath | None:
+        for condition in match_conditions or ():
+            if condition.match_type == match_type:
+                return condition.path
+        return None
+
+    def _to_item(self, namespace: tuple[str, ...], memory: Memory) -> Item:
+        return Item(
+            namespace=namespace,
+            key=memory.key,
+            value=memory.value,
+            created_at=datetime.fromisoformat(memory.created_at),
+            updated_at=datetime.fromisoformat(memory.updated_at),
+        )
+
+    def _to_search_item(self, memory: Memory, score: float) -> SearchItem:
+        return SearchItem(
+            namespace=self._str_to_namespace(memory.namespace),
+            key=memory.key,
+            value=memory.value,
+            created_at=datetime.fromisoformat(memory.created_at),
+            updated_at=datetime.fromisoformat(memory.updated_at),
+            score=score,
+        )
 
     def _get(self, namespace: tuple[str, ...], key: str) -> Item | None:
         """Internal get implementation."""
         ns_str = self._namespace_to_str(namespace)
         memory = self.service.get_memory(self.db_connection_id, ns_str, key)
         if memory:
-            return Item(
-                namespace=namespace,
-                key=key,
-                value=memory.value,
-                created_at=datetime.fromisoformat(memory.created_at),
-                updated_at=datetime.fromisoformat(memory.updated_at),
-            )
+            return self._to_item(namespace, memory)
         return None
 
     def _put(
@@ -172,17 +268,7 @@ class TypesenseStore(BaseStore):
                 namespace=ns_str,
                 limit=limit,
             )
-            return [
-                SearchItem(
-                    namespace=self._str_to_namespace(r.memory.namespace),
-                    key=r.memory.key,
-                    value=r.memory.value,
-                    created_at=datetime.fromisoformat(r.memory.created_at),
-                    updated_at=datetime.fromisoformat(r.memory.updated_at),
-                    score=r.score,
-                )
-                for r in results
-            ]
+            return [self._to_search_item(r.memory, r.score) for r in results]
         else:
             # List memories in namespace
             memories = self.service.list_memories(
@@ -191,14 +277,8 @@ class TypesenseStore(BaseStore):
                 limit=limit,
             )
             return [
-                SearchItem(
-                    namespace=self._str_to_namespace(m.namespace),
-                    key=m.key,
-                    value=m.value,
-                    created_at=datetime.fromisoformat(m.created_at),
-                    updated_at=datetime.fromisoformat(m.updated_at),
-                    score=1.0,  # No search score for listing
-                )
+                # No search score for listing
+                self._to_search_item(m, 1.0)
                 for m in memories[offset:offset + limit]
             ]
 
@@ -217,6 +297,17 @@ class TypesenseStore(BaseStore):
     ) -> list[tuple[str, ...]]:
         """Internal list_namespaces implementation."""
         namespaces = self.service.list_namespaces(self.db_connection_id)
+        return self._filter_namespaces(namespaces, prefix, suffix, max_depth, limit, offset)
+
+    def _filter_namespaces(
+        self,
+        namespaces: list[str],
+        prefix: NamespacePath | None = None,
+        suffix: NamespacePath | None = None,
+        max_depth: int | None = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> list[tuple[str, ...]]:
         result = [self._str_to_namespace(ns) for ns in namespaces]
 
         # Apply prefix filter
@@ -273,7 +364,7 @@ class TypesenseStore(BaseStore):
         refresh_ttl: bool | None = None,
     ) -> Item | None:
         """Asynchronously retrieve a single item."""
-        return self._get(namespace, key)
+        return (await self.abatch([GetOp(namespace, key)]))[0]
 
     def put(
         self,
@@ -305,7 +396,7 @@ class TypesenseStore(BaseStore):
         ttl: float | None = None,
     ) -> None:
         """Asynchronously store or update an item in the store."""
-        self._put(namespace, key, value)
+        await self.abatch([PutOp(namespace, key, value)])
 
     def search(
         self,
@@ -345,7 +436,9 @@ class TypesenseStore(BaseStore):
         refresh_ttl: bool | None = None,
     ) -> list[SearchItem]:
         """Asynchronously search for items within a namespace prefix."""
-        return self._search(namespace_prefix, query, filter, limit, offset)
+        return (
+            await self.abatch([SearchOp(namespace_prefix, filter, limit, offset, query)])
+        )[0]
 
     def delete(self, namespace: tuple[str, ...], key: str) -> None:
         """Delete an item.
@@ -358,7 +451,7 @@ class TypesenseStore(BaseStore):
 
     async def adelete(self, namespace: tuple[str, ...], key: str) -> None:
         """Asynchronously delete an item."""
-        self._delete(namespace, key)
+        await self.abatch([PutOp(namespace, key, None)])
 
     def list_namespaces(
         self,
@@ -393,4 +486,7 @@ class TypesenseStore(BaseStore):
         offset: int = 0,
     ) -> list[tuple[str, ...]]:
         """Asynchronously list and filter namespaces in the store."""
-        return self._list_namespaces(prefix, suffix, max_depth, limit, offset)
+        return await asyncio.get_running_loop().run_in_executor(
+            get_executor("typesense"),
+            partial(self._list_namespaces, prefix, suffix, max_depth, limit, offset),
+        )
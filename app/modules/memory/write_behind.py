@@ -0,0 +1,306 @@
+"""Write-behind queue for memory writes.
+
+Recalls bump the access count of every memory they return and agents call
+`remember` for the same keys over and over, so writing each of them right away
+puts Typesense writes on the read path. Instead the writes are queued here and
+coalesced:
+
+* upserts by memory key (connection, session, namespace, key), the last value wins;
+* access count increments by memory id, summed.
+
+A background thread writes the queue with bulk imports every
+`MEMORY_FLUSH_INTERVAL` seconds, or as soon as `MEMORY_FLUSH_BATCH_SIZE`
+writes are pending. Failed writes are queued again, and the queue is drained
+at exit and on server shutdown. Memories discarded while a flush writes them
+are deleted again once it's done, and not queued again if their write failed. Queued memories are returned by `get_memory`
+and `remember` right away but only show up in searches once flushed.
+Set `MEMORY_WRITE_BEHIND=false` to write synchronously.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.modules.memory.models import Memory
+from app.modules.memory.repositories import MemoryRepository
+
+logger = logging.getLogger(__name__)
+
+MEMORY_WRITE_BEHIND = os.getenv("MEMORY_WRITE_BEHIND", "true").lower() == "true"
+MEMORY_FLUSH_INTERVAL = float(os.getenv("MEMORY_FLUSH_INTERVAL", "2"))
+MEMORY_FLUSH_BATCH_SIZE = int(os.getenv("MEMORY_FLUSH_BATCH_SIZE", "200"))
+# Attempts to drain the queue when shutting down
+MEMORY_DRAIN_ATTEMPTS = 3
+
+MemoryKey = tuple[str, str | None, str, str]
+
+
+def memory_key(
+    db_connection_id: str, namespace: str, key: str, session_id: str | None = None
+) -> MemoryKey:
+    return (db_connection_id, session_id or None, namespace, key)
+
+
+def _key_of(memory: Memory) -> MemoryKey:
+    return memory_key(memory.db_connection_id, memory.namespace, memory.key, memory.session_id)
+
+
+class MemoryWriteBehind:
+    """Coalescing queue of memory upserts and access count increments."""
+
+    def __init__(
+        self,
+        repository: MemoryRepository,
+        flush_interval: float = MEMORY_FLUSH_INTERVAL,
+        batch_size: int = MEMORY_FLUSH_BATCH_SIZE,
+    ):
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._upserts: dict[MemoryKey, Memory] = {}
+        # Upserts being written, still served to readers
+        self._writing: dict[MemoryKey, Memory] = {}
+        # Keys of upserts being written that were discarded meanwhile
+        self._discarded: set[MemoryKey] = set()
+        # Memory id -> [stored access count, increments, last accessed at]
+        self._increments: dict[str, list] = {}
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._upserts) + len(self._increments)
+
+    def get(
+        self, db_connection_id: str, namespace: str, key: str, session_id: str | None = None
+    ) -> Memory | None:
+        """The queued version of a memory, if it has not been written yet."""
+        key = memory_key(db_connection_id, namespace, key, session_id)
+        with self._lock:
+            return self._upserts.get(key) or self._writing.get(key)
+
+    def upsert(self, memory: Memory) -> None:
+        """Queue a memory (with its id set) to be inserted or replaced."""
+        with self._lock:
+            key = _key_of(memory)
+            queued = self._upserts.get(key)
+            if queued is not None and queued.id == memory.id:
+                # Keep accesses recorded since the caller read the memory
+                memory.access_count = max(memory.access_count, queued.access_count)
+            pending = self._increments.pop(memory.id, None)
+            if pending is not None:
+                memory.access_count = max(memory.access_count, pending[0] + pending[1])
+            self._upserts[key] = memory
+            self._notify()
+
+    def increment_access(self, memories: list[Memory]) -> None:
+        """Queue an access of each memory, updating the given objects to match."""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            for memory in memories:
+                if not memory.id:
+                    continue
+                queued = self._upserts.get(_key_of(memory))
+                if queued is not None and queued.id == memory.id:
+                    queued.access_count += 1
+                    queued.last_accessed_at = now
+                    memory.access_count = queued.access_count
+                else:
+                    pending = self._increments.setdefault(memory.id, [memory.access_count, 0, now])
+                    pending[1] += 1
+                    pending[2] = now
+                    memory.access_count = pending[0] + pending[1]
+                memory.last_accessed_at = now
+            self._notify()
+
+    def discard(
+        self,
+        db_connection_id: str,
+        namespace: str | None = None,
+        key: str | None = None,
+        session_id: str | None = None,
+    ) -> int:
+        """Drop queued upserts of deleted memories, e.g. before forget or clear.
+
+        Without `key` every queued memory of the connection (and namespace) is
+        dropped, whatever its session. Memories a flush is writing are marked
+        so the flush deletes them again afterwards.
+        """
+        with self._lock:
+            if key is not None:
+                dropped = [memory_key(db_connection_id, namespace, key, session_id)]
+            else:
+                dropped = [
+                    queued
+                    for queued in [*self._upserts, *self._writing]
+                    if queued[0] == db_connection_id
+                    and (namespace is None or queued[2] == namespace)
+                ]
+            count = 0
+            for queued in set(dropped):
+                memory = self._upserts.pop(queued, None)
+                if memory is not None:
+                    self._increments.pop(memory.id, None)
+                if queued in self._writing:
+                    self._discarded.add(queued)
+                    memory = memory or self._writing[queued]
+                if memory is not None:
+                    count += 1
+            return count
+
+    def _notify(self) -> None:
+        """Start the flusher if needed and wake it up once the batch is full. Holds _lock."""
+        if self._closed:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="kai-memory-writer", daemon=True
+            )
+            self._thread.start()
+        if len(self._upserts) + len(self._increments) >= self.batch_size:
+            self._wakeup.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._closed:
+                    self._wakeup.wait(timeout=self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Memory write-behind flush failed: {e}")
+
+    def flush(self) -> int:
+        """Write the queued memories and increments now; returns how many were written.
+
+        Writes that fail are queued again unless a newer write replaced them.
+        """
+        with self._flush_lock:
+            with self._lock:
+                upserts, self._upserts = self._upserts, {}
+                increments, self._increments = self._increments, {}
+                self._writing = dict(upserts)
+            written = 0
+            # Keys known not written, None while the upserts may have landed
+            unwritten: set[MemoryKey] | None = None
+            try:
+                failed_upserts = self._write_upserts(list(upserts.values()))
+                unwritten = {_key_of(memory) for memory in failed_upserts}
+                written += len(upserts) - len(failed_upserts)
+                failed_increments = self._write_increments(increments)
+                written += len(increments) - len(failed_increments)
+            except Exception:
+                failed_upserts, failed_increments = list(upserts.values()), increments
+                raise
+            finally:
+                with self._lock:
+                    discarded, self._discarded = self._discarded, set()
+                    self._writing = {}
+                    for memory in failed_upserts:
+                        if _key_of(memory) not in discarded:
+                            self._upserts.setdefault(_key_of(memory), memory)
+                    for memory_id, (stored, count, last) in failed_increments.items():
+                        pending = self._increments.setdefault(memory_id, [stored, 0, last])
+                        pending[1] += count
+                # Written after the delete that discarded them, delete them again
+                for queued in discarded:
+                    if unwritten is not None and queued in unwritten:
+                        continue
+                    try:
+                        self.repository.delete(upserts[queued].id)
+                    except Exception as e:
+                        logger.warning(f"Failed to delete discarded memory {queued}: {e}")
+            if written:
+                logger.debug(f"Memory write-behind wrote {written} memories")
+            return written
+
+    def _write_upserts(self, memories: list[Memory]) -> list[Memory]:
+        if not memories:
+            return []
+        results = self.repository.bulk_upsert(memories)
+        failed = [
+            memory for memory, result in zip(memories, results) if not result.get("success")
+        ]
+        for result in results:
+            if not result.get("success"):
+                logger.warning(f"Failed to write memory: {result.get('error')}")
+        return failed
+
+    def _write_increments(self, increments: dict[str, list]) -> dict[str, list]:
+        if not increments:
+            return {}
+        updates = [
+            {
+                "id": memory_id,
+                "access_count": stored + count,
+                "last_accessed_at": last,
+                "updated_at": last,
+            }
+            for memory_id, (stored, count, last) in increments.items()
+        ]
+        results = self.repository.bulk_update(updates)
+        failed = {}
+        for update, result in zip(updates, results):
+            if not result.get("success"):
+                # Memories deleted since their recall can't be updated, drop those
+                if result.get("code") != 404:
+                    failed[update["id"]] = increments[update["id"]]
+        return failed
+
+    def close(self) -> None:
+        """Stop the flusher and drain the queue, retrying failed writes."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        for attempt in range(MEMORY_DRAIN_ATTEMPTS):
+            if not len(self):
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Memory write-behind drain failed: {e}")
+            if len(self) and attempt + 1 < MEMORY_DRAIN_ATTEMPTS:
+                time.sleep(0.5 * 2**attempt)
+        if len(self):
+            logger.error(f"Memory write-behind dropped {len(self)} queued writes")
+
+
+_writer: MemoryWriteBehind | None = None
+_writer_lock = threading.Lock()
+
+
+def get_memory_writer(storage) -> MemoryWriteBehind | None:
+    """The process-wide memory write queue, None when write-behind is disabled.
+
+    The queue writes through the storage it was first created with.
+    """
+    global _writer
+    if not MEMORY_WRITE_BEHIND:
+        return None
+    with _writer_lock:
+        if _writer is None:
+            _writer = MemoryWriteBehind(MemoryRepository(storage))
+        return _writer
+
+
+def shutdown_memory_writer() -> None:
+    """Drain and close the memory write queue; a later write starts a new one."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+
+atexit.register(shutdown_memory_writer)
@@ -19,9 +19,12 @@ MAX_FULL_MESSAGES = 3  # Keep last N messages in full
 SUMMARIZE_THRESHOLD_MESSAGES = 5  # Trigger summarization when messages exceed this
 SUMMARIZE_THRESHOLD_TOKENS = 2000  # Or when token count exceeds this
 MAX_SUMMARY_TOKENS = 500  # Maximum tokens for summary
+MAX_CONTEXT_TOKENS = 2000  # Budget of the summary and recent messages given to the LLM
 
 # Session configuration
 SESSION_COLLECTION_NAME = "sessions"
+CHECKPOINT_BLOBS_COLLECTION_NAME = "checkpoint_blobs"
+CHECKPOINT_WRITES_COLLECTION_NAME = "checkpoint_writes"
 DEFAULT_SESSION_TTL_HOURS = 24
 
 # Summarization prompt
@@ -44,7 +47,10 @@ __all__ = [
     "SUMMARIZE_THRESHOLD_MESSAGES",
     "SUMMARIZE_THRESHOLD_TOKENS",
     "MAX_SUMMARY_TOKENS",
+    "MAX_CONTEXT_TOKENS",
     "SESSION_COLLECTION_NAME",
+    "CHECKPOINT_BLOBS_COLLECTION_NAME",
+    "CHECKPOINT_WRITES_COLLECTION_NAME",
     "DEFAULT_SESSION_TTL_HOURS",
     "SUMMARIZATION_PROMPT",
 ]
@@ -1,17 +1,54 @@
-"""Typesense-backed checkpointer for LangGraph session persistence."""
-import json
+"""Typesense-backed checkpointer for LangGraph session persistence.
+
+Checkpoints are stored as deltas. Each channel value is written once per
+channel version to the checkpoint blobs collection, and only for the channels
+a step changed (`new_versions`). The session document keeps the latest
+checkpoint without its values, which point to the blobs via `channel_versions`.
+Pending writes of a checkpoint go to the checkpoint writes collection so
+interrupted steps can resume.
+
+Every `CHECKPOINT_COMPACT_EVERY` saves of a session, blobs no longer
+referenced by its latest checkpoint and writes of older checkpoints are
+deleted. Sessions saved before delta checkpoints keep their inline values
+until their next save.
+
+Checkpoints, metadata and values are encoded with a `SessionSerializer`,
+msgpack with zstd compression by default.
+"""
+import hashlib
+import logging
+import os
 import time
 from typing import Any, AsyncIterator, Optional, Sequence, Tuple
 
 from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
     BaseCheckpointSaver,
+    ChannelVersions,
     Checkpoint,
     CheckpointMetadata,
     CheckpointTuple,
 )
 from langchain_core.runnables import RunnableConfig
 
-from app.modules.session.constants import SESSION_COLLECTION_NAME
+from app.modules.session.constants import (
+    CHECKPOINT_BLOBS_COLLECTION_NAME,
+    CHECKPOINT_WRITES_COLLECTION_NAME,
+    SESSION_COLLECTION_NAME,
+)
+from app.modules.session.serialization import SessionSerializer
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_COMPACT_EVERY = int(os.getenv("CHECKPOINT_COMPACT_EVERY", "20"))
+# Blob ids per lookup, like MemoryRepository.find_by_keys
+BLOBS_PER_SEARCH = 100
+MAX_PENDING_WRITES = 250
+
+
+def _doc_id(*parts: Any) -> str:
+    """Stable document id, channel names like `branch:to:node` aren't valid ids."""
+    return hashlib.sha1("\x00".join(str(part) for part in parts).encode()).hexdigest()
 
 
 class TypesenseCheckpointer(BaseCheckpointSaver):
@@ -20,30 +57,99 @@ class TypesenseCheckpointer(BaseCheckpointSaver):
 
     This enables session state to be saved and restored across
     multiple queries, allowing for resumable conversations.
+    Only the latest checkpoint of a session is kept.
     """
 
-    def __init__(self, storage: Any):
+    def __init__(self, storage: Any, serializer: SessionSerializer | None = None):
         """
         Initialize checkpointer with Typesense storage.
 
         Args:
             storage: Typesense storage instance
+            serializer: Encoding of checkpoints, SESSION_SERIALIZATION by default
         """
         super().__init__()
         self.storage = storage
+        self.serializer = serializer or SessionSerializer(serde=self.serde)
         self.collection = SESSION_COLLECTION_NAME
+        self.blobs_collection = CHECKPOINT_BLOBS_COLLECTION_NAME
+        self.writes_collection = CHECKPOINT_WRITES_COLLECTION_NAME
+        # Saves per session since the last compaction
+        self._saves: dict[str, int] = {}
+        # Sessions loaded from an inline checkpoint, their next save writes every channel
+        self._inline: set[str] = set()
 
     def _get_thread_id(self, config: RunnableConfig) -> str:
         """Extract thread_id (session_id) from config."""
         return config["configurable"]["thread_id"]
 
     def _serialize(self, checkpoint: Checkpoint) -> str:
-        """Serialize checkpoint to JSON string."""
-        return json.dumps(checkpoint, default=str)
+        """Serialize checkpoint to tagged text."""
+        return self.serializer.dumps(checkpoint)
 
     def _deserialize(self, data: str) -> Checkpoint:
-        """Deserialize checkpoint from JSON string."""
-        return json.loads(data)
+        """Deserialize checkpoint from tagged text or JSON."""
+        return self.serializer.loads(data)
+
+    def _dump_value(self, value: Any) -> tuple[str, str]:
+        """Serialize a channel value or write with the graph serializer."""
+        type_, data = self.serializer.serde.dumps_typed(value)
+        return type_, self.serializer.dumps_bytes(data)
+
+    def _load_value(self, doc: dict) -> Any:
+        return self.serializer.serde.loads_typed(
+            (doc["type"], self.serializer.loads_bytes(doc.get("value", "")))
+        )
+
+    def _blob_id(self, thread_id: str, channel: str, version: Any) -> str:
+        return _doc_id(thread_id, channel, version)
+
+    def _load_blobs(self, thread_id: str, channel_versions: ChannelVersions) -> dict[str, Any]:
+        """Channel values of a checkpoint, from the blob of each channel version."""
+        ids = {
+            self._blob_id(thread_id, channel, version): channel
+            for channel, version in channel_versions.items()
+        }
+        if not ids:
+            return {}
+        chunks = [list(ids)[i : i + BLOBS_PER_SEARCH] for i in range(0, len(ids), BLOBS_PER_SEARCH)]
+        results = self.storage.multi_search(
+            self.blobs_collection,
+            [
+                {"q": "*", "filter_by": self.storage.filter_in("id", chunk), "per_page": len(chunk)}
+                for chunk in chunks
+            ],
+        )
+        values = {}
+        for result in results:
+            for hit in result.get("hits", []):
+                doc = hit["document"]
+                if doc["id"] in ids and doc.get("type") != "empty":
+                    values[ids[doc["id"]]] = self._load_value(doc)
+        missing = len(ids) - len(values)
+        if missing:
+            logger.debug(f"Checkpoint of {thread_id} has {missing} empty or missing channels")
+        return values
+
+    def _load_writes(self, thread_id: str, checkpoint_id: str) -> list[tuple[str, str, Any]]:
+        docs = self.storage.find(
+            self.writes_collection,
+            {"thread_id": thread_id, "checkpoint_id": checkpoint_id},
+            limit=MAX_PENDING_WRITES,
+        )
+        docs.sort(key=lambda doc: (doc["task_id"], doc["idx"]))
+        return [(doc["task_id"], doc["channel"], self._load_value(doc)) for doc in docs]
+
+    def _import(self, collection: str, docs: list[dict], action: str = "upsert") -> None:
+        results = self.storage.bulk_import(collection, docs, action=action)
+        errors = [
+            result.get("error")
+            for result in results
+            # Writes that already exist are kept, like other LangGraph savers
+            if not result.get("success") and not (action == "create" and result.get("code") == 409)
+        ]
+        if errors:
+            raise RuntimeError(f"Failed to write {len(errors)} checkpoint documents: {errors[0]}")
 
     async def aget(self, config: RunnableConfig) -> Optional[Checkpoint]:
         """
@@ -55,13 +161,8 @@ class TypesenseCheckpointer(BaseCheckpointSaver):
         Returns:
             Checkpoint if exists, None otherwise
         """
-        thread_id = self._get_thread_id(config)
-        # Storage methods are synchronous
-        doc = self.storage.find_by_id(self.collection, thread_id)
-
-        if doc and doc.get("checkpoint"):
-            return self._deserialize(doc["checkpoint"])
-        return None
+        checkpoint_tuple = await self.aget_tuple(config)
+        return checkpoint_tuple.checkpoint if checkpoint_tuple else None
 
     async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
         """
@@ -79,15 +180,29 @@ class TypesenseCheckpointer(BaseCheckpointSaver):
 
         if doc and doc.get("checkpoint"):
             checkpoint = self._deserialize(doc["checkpoint"])
+            if "channel_values" in checkpoint:
+                # Saved before delta checkpoints, values are inline
+                self._inline.add(thread_id)
+            else:
+                checkpoint["channel_values"] = self._load_blobs(
+                    thread_id, checkpoint.get("channel_versions", {})
+                )
             metadata = doc.get("checkpoint_metadata", {})
             if isinstance(metadata, str):
-                metadata = json.loads(metadata)
+                metadata = self.serializer.loads(metadata) or {}
 
             return CheckpointTuple(
-                config=config,
+                config={
+                    **config,
+                    "configurable": {
+                        **config.get("configurable", {}),
+                        "checkpoint_id": checkpoint["id"],
+                    },
+                },
                 checkpoint=checkpoint,
                 metadata=metadata,
-                parent_config=None
+                parent_config=None,
+                pending_writes=self._load_writes(thread_id, checkpoint["id"]),
             )
         return None
 
@@ -136,18 +251,49 @@ class TypesenseCheckpointer(BaseCheckpointSaver):
             Updated config with checkpoint ID
         """
         thread_id = self._get_thread_id(config)
+        values = checkpoint.get("channel_values", {})
+        if thread_id in self._inline:
+            # The values are only in the old inline checkpoint, write them all
+            new_versions = {**checkpoint.get("channel_versions", {}), **new_versions}
 
         # Storage methods are synchronous
+        now = int(time.time())
+        blobs = []
+        for channel, version in new_versions.items():
+            type_, value = self._dump_value(values[channel]) if channel in values else ("empty", "")
+            blobs.append(
+                {
+                    "id": self._blob_id(thread_id, channel, version),
+                    "thread_id": thread_id,
+                    "channel": channel,
+                    "version": str(version),
+                    "type": type_,
+                    "value": value,
+                    "created_at": now,
+                }
+            )
+        if blobs:
+            # Blobs first, the session never points to versions that aren't stored
+            self._import(self.blobs_collection, blobs)
+        self._inline.discard(thread_id)
+
         self.storage.update_or_create(
             self.collection,
             {"id": thread_id},
             {
-                "checkpoint": self._serialize(checkpoint),
-                "checkpoint_metadata": json.dumps(metadata) if metadata else "{}",
-                "updated_at": int(time.time())
+                "checkpoint": self._serialize(
+                    {k: v for k, v in checkpoint.items() if k != "channel_values"}
+                ),
+                "checkpoint_metadata": self.serializer.dumps(metadata or {}),
+                "updated_at": now
             }
         )
 
+        self._saves[thread_id] = self._saves.get(thread_id, 0) + 1
+        if self._saves[thread_id] >= CHECKPOINT_COMPACT_EVERY:
+            self._saves.pop(thread_id)
+            self.compact(thread_id, checkpoint)
+
         return {
             **config,
             "configurable": {
@@ -160,14 +306,82 @@ class TypesenseCheckpointer(BaseCheckpointSaver):
         self,
         config: RunnableConfig,
         writes: Sequence[Tuple[str, Any]],
-        task_id: str
+        task_id: str,
+        task_path: str = "",
     ) -> None:
         """
-        Save intermediate writes (not implemented for Typesense).
+        Save the pending writes of a task to the checkpoint in config.
 
-        For simplicity, this implementation only saves full checkpoints.
+        Writes to special channels (errors, interrupts) replace earlier
+        ones, other writes are only stored once.
+
+        Args:
+            config: Runnable config containing thread_id and checkpoint_id
+            writes: Channel and value of each write
+            task_id: Task that produced the writes
+            task_path: Path of the task
         """
-        pass
+        thread_id = self._get_thread_id(config)
+        checkpoint_id = config["configurable"].get("checkpoint_id")
+        if not checkpoint_id or not writes:
+            return
+
+        now = int(time.time())
+        docs: dict[str, list[dict]] = {"upsert": [], "create": []}
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            type_, data = self._dump_value(value)
+            docs["upsert" if idx < 0 else "create"].append(
+                {
+                    "id": _doc_id(thread_id, checkpoint_id, task_id, idx),
+                    "thread_id": thread_id,
+                    "checkpoint_id": checkpoint_id,
+                    "task_id": task_id,
+                    "task_path": task_path,
+                    "idx": idx,
+                    "channel": channel,
+                    "type": type_,
+                    "value": data,
+                    "created_at": now,
+                }
+            )
+        for action, batch in docs.items():
+            if batch:
+                self._import(self.writes_collection, batch, action=action)
+
+    def compact(self, thread_id: str, checkpoint: Checkpoint) -> int:
+        """Delete blobs and writes of a session not used by its latest checkpoint."""
+        current = [
+            self._blob_id(thread_id, channel, version)
+            for channel, version in checkpoint.get("channel_versions", {}).items()
+        ]
+        try:
+            deleted = self.storage.delete_by_filter(
+                self.blobs_collection, {"thread_id": thread_id}, exclude={"id": current}
+            )
+            deleted += self.storage.delete_by_filter(
+                self.writes_collection,
+                {"thread_id": thread_id},
+                exclude={"checkpoint_id": [checkpoint["id"]]},
+            )
+        except Exception as e:
+            # Compaction only saves space, the checkpoint is already saved
+            logger.warning(f"Failed to compact checkpoints of {thread_id}: {e}")
+            return 0
+        if deleted:
+            logger.debug(f"Compacted {deleted} checkpoint documents of {thread_id}")
+        return deleted
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete the checkpoint blobs and writes of a session."""
+        self.delete_thread(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete the checkpoint blobs and writes of a session."""
+        for collection in (self.blobs_collection, self.writes_collection):
+            self.storage.delete_by_filter(collection, {"thread_id": thread_id})
+        self._saves.pop(thread_id, None)
+        self._inline.discard(thread_id)
 
     # Sync methods (delegate to async)
     def get(self, config: RunnableConfig) -> Optional[Checkpoint]:
@@ -212,10 +426,19 @@ class TypesenseCheckpointer(BaseCheckpointSaver):
         self,
         config: RunnableConfig,
         writes: Sequence[Tuple[str, Any]],
-        task_id: str
+        task_id: str,
+        task_path: str = "",
     ) -> None:
-        """Sync version of aput_writes."""
-        pass
+        """Sync version of aput_writes - not recommended for production."""
+        import asyncio
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+        return loop.run_until_complete(
+            self.aput_writes(config, writes, task_id, task_path)
+        )
 
 
 __all__ = ["TypesenseCheckpointer"]
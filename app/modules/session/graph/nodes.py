@@ -1,64 +1,135 @@
-"""Session graph nodes for LangGraph."""
+"""Session graph nodes for LangGraph.
+
+Conversation history is summarized incrementally. `summarized_count` marks the
+leading messages already folded into the summary, so each summarization only
+sends the summary and the messages since then to the LLM. Messages are
+formatted and token-counted once per version of their content, and the
+context is packed into `MAX_CONTEXT_TOKENS`, so the per-turn cost stays flat
+however long the session runs.
+"""
 import uuid
 from datetime import datetime
+from functools import lru_cache
 from typing import Any
 
 from app.api.requests import PromptRequest
 from app.modules.session.graph.state import SessionState, MessageDict
 from app.modules.session.constants import (
     MAX_FULL_MESSAGES,
+    MAX_CONTEXT_TOKENS,
     SUMMARIZE_THRESHOLD_MESSAGES,
+    SUMMARIZE_THRESHOLD_TOKENS,
     MAX_SUMMARY_TOKENS,
     SUMMARIZATION_PROMPT,
 )
 from app.modules.session.prompts import ROUTER_PROMPT, REASONING_PROMPT
+from app.utils.core.tokens import count_tokens
+
+FORMATTED_MESSAGES_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=FORMATTED_MESSAGES_CACHE_SIZE)
+def _context_entry(
+    query: str, sql: str | None, results_summary: str | None, analysis: str | None
+) -> tuple[str, int]:
+    """A message as shown in the LLM context, with its token count."""
+    parts = [f"Q: {query}"]
+    if sql:
+        parts.append(f"SQL: {sql}")
+    if results_summary:
+        parts.append(f"Result: {results_summary}")
+    if analysis:
+        parts.append(f"Response: {analysis}")
+    text = "\n".join(parts)
+    return text, count_tokens(text)
+
+
+@lru_cache(maxsize=FORMATTED_MESSAGES_CACHE_SIZE)
+def _history_entry(
+    query: str, sql: str | None, results_summary: str | None, analysis: str | None
+) -> tuple[str, int]:
+    """A message as given to the summarization prompt, with its token count."""
+    entry = f"Q: {query}"
+    if sql:
+        entry += f"\nSQL: {sql}"
+    if results_summary:
+        entry += f"\nResult: {results_summary}"
+    if analysis:
+        # Truncate long analysis
+        if len(analysis) > 200:
+            analysis = analysis[:200] + "..."
+        entry += f"\nAnalysis: {analysis}"
+    return entry, count_tokens(entry)
+
+
+def _message_fields(msg: MessageDict) -> tuple:
+    return (msg.get("query", "") or "", msg.get("sql"), msg.get("results_summary"), msg.get("analysis"))
+
+
+def _pending_messages(state: SessionState) -> list[MessageDict]:
+    """Messages neither folded into the summary nor kept in full."""
+    messages = state.get("messages", [])
+    start = min(state.get("summarized_count") or 0, len(messages))
+    return messages[start:-MAX_FULL_MESSAGES] if len(messages) > MAX_FULL_MESSAGES else []
 
 
 def should_summarize(state: SessionState) -> bool:
     """
     Determine if conversation history should be summarized.
 
+    Only messages not yet folded into the summary count, by number or tokens.
+
     Args:
         state: Current session state
 
     Returns:
         True if summarization is needed
     """
-    message_count = len(state.get("messages", []))
-    return message_count > SUMMARIZE_THRESHOLD_MESSAGES
+    messages = state.get("messages", [])
+    unsummarized = len(messages) - min(state.get("summarized_count") or 0, len(messages))
+    if unsummarized > SUMMARIZE_THRESHOLD_MESSAGES:
+        return True
+    pending = _pending_messages(state)
+    return bool(pending) and sum(
+        _history_entry(*_message_fields(msg))[1] for msg in pending
+    ) > SUMMARIZE_THRESHOLD_TOKENS
 
 
-def format_context_for_llm(state: SessionState) -> str:
+def format_context_for_llm(state: SessionState, max_tokens: int = MAX_CONTEXT_TOKENS) -> str:
     """
     Format conversation context for LLM consumption.
 
-    Combines summary (if exists) with recent full messages.
+    Combines summary (if exists) with recent full messages, newest first
+    until `max_tokens` is used. The latest message is always included.
 
     Args:
         state: Current session state
+        max_tokens: Token budget of the context
 
     Returns:
         Formatted context string
     """
     context_parts = []
+    budget = max_tokens
 
     # Add summary if exists
     if state.get("summary"):
-        context_parts.append(f"Previous context:\n{state['summary']}")
+        summary = f"Previous context:\n{state['summary']}"
+        context_parts.append(summary)
+        budget -= count_tokens(summary)
 
     # Add recent messages in full
     messages = state.get("messages", [])
     recent_messages = messages[-MAX_FULL_MESSAGES:] if messages else []
 
-    for msg in recent_messages:
-        parts = [f"Q: {msg.get('query', '')}"]
-        if msg.get("sql"):
-            parts.append(f"SQL: {msg['sql']}")
-        if msg.get("results_summary"):
-            parts.append(f"Result: {msg['results_summary']}")
-        if msg.get("analysis"):
-            parts.append(f"Response: {msg['analysis']}")
-        context_parts.append("\n".join(parts))
+    entries = []
+    for msg in reversed(recent_messages):
+        text, tokens = _context_entry(*_message_fields(msg))
+        if entries and tokens > budget:
+            break
+        entries.append(text)
+        budget -= tokens
+    context_parts.extend(reversed(entries))
 
     return "\n\n".join(context_parts)
 
@@ -73,21 +144,7 @@ def format_history_for_summarization(messages: list[MessageDict]) -> str:
     Returns:
         Formatted history string
     """
-    history_parts = []
-    for msg in messages:
-        entry = f"Q: {msg.get('query', '')}"
-        if msg.get("sql"):
-            entry += f"\nSQL: {msg['sql']}"
-        if msg.get("results_summary"):
-            entry += f"\nResult: {msg['results_summary']}"
-        if msg.get("analysis"):
-            analysis = msg["analysis"]
-            # Truncate long analysis
-            if len(analysis) > 200:
-                analysis = analysis[:200] + "..."
-            entry += f"\nAnalysis: {analysis}"
-        history_parts.append(entry)
-    return "\n---\n".join(history_parts)
+    return "\n---\n".join(_history_entry(*_message_fields(msg))[0] for msg in messages)
 
 
 async def build_context_node(state: SessionState) -> dict[str, Any]:
@@ -299,51 +356,61 @@ async def summarize_node(
     llm: Any
 ) -> dict[str, Any]:
     """
-    Summarize older conversation history.
+    Fold older conversation history into the summary.
 
-    Called when message count exceeds threshold.
+    Called when the unsummarized messages exceed the threshold. Only those
+    messages are sent with the existing summary, in chunks of at most
+    SUMMARIZE_THRESHOLD_TOKENS so a long backlog can't overflow the prompt.
 
     Args:
         state: Current session state
         llm: Language model for summarization
 
     Returns:
-        State update with new summary and trimmed messages
+        State update with new summary and summarized message count
     """
     if not should_summarize(state):
         return {}
 
-    messages = state.get("messages", [])
-
-    # Messages to summarize (older ones)
-    messages_to_summarize = messages[:-MAX_FULL_MESSAGES]
-
-    # Combine existing summary with messages to summarize
-    existing_summary = state.get("summary", "")
-    history = format_history_for_summarization(messages_to_summarize)
-
-    if existing_summary:
-        history = f"Previous summary:\n{existing_summary}\n\nNew messages:\n{history}"
-
-    prompt = SUMMARIZATION_PROMPT.format(
-        max_tokens=MAX_SUMMARY_TOKENS,
-        history=history
-    )
-
-    try:
-        response = await llm.ainvoke(prompt)
-        new_summary = response.content if hasattr(response, 'content') else str(response)
+    pending = _pending_messages(state)
+    if not pending:
+        return {}
 
-        # Keep only recent messages
-        recent_messages = messages[-MAX_FULL_MESSAGES:]
+    # Split the messages to fold into chunks within the token budget
+    chunks: list[list[MessageDict]] = [[]]
+    chunk_tokens = 0
+    for msg in pending:
+        tokens = _history_entry(*_message_fields(msg))[1]
+        if chunks[-1] and chunk_tokens + tokens > SUMMARIZE_THRESHOLD_TOKENS:
+            chunks.append([])
+            chunk_tokens = 0
+        chunks[-1].append(msg)
+        chunk_tokens += tokens
+
+    summary = state.get("summary") or ""
+    summarized_count = min(state.get("summarized_count") or 0, len(state.get("messages", [])))
+    update: dict[str, Any] = {}
+    for chunk in chunks:
+        history = format_history_for_summarization(chunk)
+        if summary:
+            history = f"Previous summary:\n{summary}\n\nNew messages:\n{history}"
+
+        prompt = SUMMARIZATION_PROMPT.format(
+            max_tokens=MAX_SUMMARY_TOKENS,
+            history=history
+        )
 
-        return {
-            "summary": new_summary,
-            "messages": recent_messages
-        }
-    except Exception as e:
-        # Summarization failure is non-fatal, keep messages
-        return {}
+        try:
+            response = await llm.ainvoke(prompt)
+        except Exception:
+            # Summarization failure is non-fatal, keep what was folded so far
+            break
+        summary = response.content if hasattr(response, 'content') else str(response)
+        summarized_count += len(chunk)
+        update = {"summary": summary, "summarized_count": summarized_count}
+
+    # Messages stay in state as the session history, the count marks the folded ones
+    return update
 
 
 async def save_message_node(state: SessionState) -> dict[str, Any]:
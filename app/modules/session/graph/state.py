@@ -28,6 +28,8 @@ class SessionState(TypedDict):
     # Conversation history (use Annotated to accumulate messages across nodes)
     messages: Annotated[list[MessageDict], add]
     summary: str | None
+    # Leading messages already folded into the summary
+    summarized_count: int
 
     # Current query processing
     current_query: str | None
@@ -67,6 +69,7 @@ def create_initial_state(
         db_connection_id=db_connection_id,
         messages=[],
         summary=None,
+        summarized_count=0,
         current_query=None,
         current_sql=None,
         current_results=None,
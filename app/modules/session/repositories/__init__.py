@@ -1,11 +1,14 @@
 """Session repository for Typesense storage."""
 import uuid
-import json
 from datetime import datetime
 from typing import Optional, Any
 
 from app.modules.session.models import Session, Message, SessionStatus
 from app.modules.session.constants import SESSION_COLLECTION_NAME
+from app.modules.session.serialization import SessionSerializer
+
+# Checkpoints are only read by the checkpointer, listings skip them
+CHECKPOINT_FIELDS = ["checkpoint", "checkpoint_metadata"]
 
 
 class SessionRepository:
@@ -17,15 +20,17 @@ class SessionRepository:
     for consistency with the rest of the codebase.
     """
 
-    def __init__(self, storage: Any):
+    def __init__(self, storage: Any, serializer: SessionSerializer | None = None):
         """
         Initialize repository with storage.
 
         Args:
             storage: Typesense storage instance
+            serializer: Encoding of messages, SESSION_SERIALIZATION by default
         """
         self.storage = storage
         self.collection = SESSION_COLLECTION_NAME
+        self.serializer = serializer or SessionSerializer()
 
     async def create(
         self,
@@ -46,7 +51,7 @@ class SessionRepository:
 
         session_data = {
             "db_connection_id": db_connection_id,
-            "messages": "[]",  # JSON string for Typesense
+            "messages": self.serializer.dumps([]),  # Tagged text for Typesense
             "summary": None,
             "status": SessionStatus.IDLE.value,
             "metadata": metadata or {},
@@ -108,7 +113,8 @@ class SessionRepository:
             self.collection,
             filter=filters,
             limit=limit,
-            page=offset // limit if limit > 0 else 0
+            page=offset // limit if limit > 0 else 0,
+            exclude_fields=CHECKPOINT_FIELDS
         )
 
         return [self._doc_to_session(doc) for doc in docs]
@@ -121,7 +127,10 @@ class SessionRepository:
             session: Session with updated data
         """
         session_data = {
-            "messages": json.dumps([m.to_dict() for m in session.messages]),
+            "messages": self.serializer.dumps(
+                # Keep timestamps as datetimes, msgpack stores them as is
+                [{**m.to_dict(), "timestamp": m.timestamp} for m in session.messages]
+            ),
             "summary": session.summary,
             "status": session.status.value,
             "metadata": session.metadata,
@@ -172,10 +181,10 @@ class SessionRepository:
         Returns:
             Session instance
         """
-        # Parse messages from JSON string
+        # Parse messages from tagged text or JSON string
         messages_raw = doc.get("messages", "[]")
         if isinstance(messages_raw, str):
-            messages_data = json.loads(messages_raw)
+            messages_data = self.serializer.loads(messages_raw) or []
         else:
             messages_data = messages_raw
 
@@ -7,9 +7,10 @@ SESSIONS_SCHEMA = {
         {"name": "db_connection_id", "type": "string", "facet": True},
         {"name": "status", "type": "string", "facet": True},
         {"name": "summary", "type": "string", "optional": True},
-        {"name": "messages", "type": "string"},  # JSON stringified array
-        {"name": "checkpoint", "type": "string", "optional": True},  # LangGraph checkpoint
-        {"name": "checkpoint_metadata", "type": "string", "optional": True},
+        # Encoded with SessionSerializer, not searchable
+        {"name": "messages", "type": "string", "index": False, "optional": True},
+        {"name": "checkpoint", "type": "string", "index": False, "optional": True},  # LangGraph checkpoint
+        {"name": "checkpoint_metadata", "type": "string", "index": False, "optional": True},
         {"name": "metadata", "type": "object", "optional": True},
         {"name": "created_at", "type": "int64"},
         {"name": "updated_at", "type": "int64"},
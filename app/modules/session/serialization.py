@@ -0,0 +1,108 @@
+"""Serialization of session messages and checkpoints for Typesense string fields.
+
+Session data used to be stored as `json.dumps(default=str)`, which turns
+datetimes and Decimals into strings and is bulky for long histories. A
+`SessionSerializer` encodes values with the LangGraph serializer (msgpack,
+lossless for datetimes, Decimals and LangChain messages), optionally
+compressed with zstd, as tagged text:
+
+* `msgpack+zstd:<base64>` and `msgpack:<base64>` for values;
+* `zstd:<base64>` and plain base64 for bytes, e.g. checkpoint blobs.
+
+Untagged text is read as JSON, so sessions stored before keep loading and are
+rewritten in the configured format on their next save. Set
+`SESSION_SERIALIZATION` to `msgpack+zstd` (default), `msgpack` or `json`.
+"""
+
+import base64
+import json
+import logging
+import os
+import re
+from typing import Any
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - installed with langsmith
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+SESSION_SERIALIZATION = os.getenv("SESSION_SERIALIZATION", "msgpack+zstd")
+SESSION_ZSTD_LEVEL = int(os.getenv("SESSION_ZSTD_LEVEL", "3"))
+SESSION_FORMATS = ("msgpack+zstd", "msgpack", "json")
+
+ZSTD_TAG = "zstd"
+TAG_RE = re.compile(r"^([a-z]+)(\+zstd)?:")
+
+
+class SessionSerializer:
+    """Tagged text encoding of session values, pluggable in the session storage."""
+
+    def __init__(
+        self,
+        format: str = SESSION_SERIALIZATION,
+        serde: SerializerProtocol | None = None,
+        level: int = SESSION_ZSTD_LEVEL,
+    ):
+        if format not in SESSION_FORMATS:
+            raise ValueError(f"Unknown session serialization {format}, use one of {SESSION_FORMATS}")
+        if format == "msgpack+zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, session data is stored uncompressed")
+            format = "msgpack"
+        self.format = format
+        self.serde = serde or JsonPlusSerializer()
+        self.compressed = format == "msgpack+zstd"
+        self.level = level
+
+    def dumps(self, value: Any) -> str:
+        if self.format == "json":
+            return json.dumps(value, default=str)
+        type_, data = self.serde.dumps_typed(value)
+        if self.compressed:
+            return f"{type_}+{ZSTD_TAG}:{self._encode(_compress(data, self.level))}"
+        return f"{type_}:{self._encode(data)}"
+
+    def loads(self, text: str | None) -> Any:
+        """Decode a value written by `dumps` in any format, or plain JSON."""
+        if not text:
+            return None
+        match = TAG_RE.match(text)
+        if match is None:
+            return json.loads(text)
+        data = base64.b64decode(text[match.end() :])
+        if match.group(2):
+            data = _decompress(data)
+        return self.serde.loads_typed((match.group(1), data))
+
+    def dumps_bytes(self, data: bytes) -> str:
+        """Text for already serialized bytes, compressed unless the format is uncompressed."""
+        if self.compressed:
+            return f"{ZSTD_TAG}:{self._encode(_compress(data, self.level))}"
+        return self._encode(data)
+
+    def loads_bytes(self, text: str) -> bytes:
+        if text.startswith(f"{ZSTD_TAG}:"):
+            return _decompress(base64.b64decode(text[len(ZSTD_TAG) + 1 :]))
+        return base64.b64decode(text)
+
+    @staticmethod
+    def _encode(data: bytes) -> str:
+        return base64.b64encode(data).decode("ascii")
+
+
+# (De)compressor objects aren't thread safe, they're cheap to create per call
+def _compress(data: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def _decompress(data: bytes) -> bytes:
+    if zstandard is None:
+        raise RuntimeError("zstandard is required to read compressed session data")
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+__all__ = ["SessionSerializer", "SESSION_SERIALIZATION"]
@@ -96,11 +96,12 @@ class SessionService:
 
     async def delete_session(self, session_id: str) -> None:
         """
-        Delete a session.
+        Delete a session with its checkpoint blobs and pending writes.
 
         Args:
             session_id: Session ID to delete
         """
+        await self.checkpointer.adelete_thread(session_id)
         await self.repository.delete(session_id)
 
     async def close_session(self, session_id: str) -> None:
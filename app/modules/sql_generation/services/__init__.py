@@ -1,7 +1,7 @@
 import os
 import asyncio
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from concurrent.futures import TimeoutError
 from datetime import datetime
 from queue import Queue
 from threading import Thread
@@ -11,7 +11,6 @@ from fastapi import HTTPException
 from dotenv import load_dotenv
 import logging
 import re
-from difflib import SequenceMatcher
 import mimetypes
 import requests
 from requests.adapters import HTTPAdapter
@@ -38,6 +37,7 @@ from app.modules.sql_generation.models import LLMConfig, SQLGeneration
 from app.modules.sql_generation.repositories import SQLGenerationRepository
 
 # from app.server.config import Settings
+from app.utils.core.executors import get_executor
 from app.utils.sql_database.sql_database import SQLDatabase
 from app.utils.sql_evaluator.simple_evaluator import SimpleEvaluator
 from app.utils.sql_generator.sql_agent import SQLAgent
@@ -65,6 +65,9 @@ from app.modules.sql_generation.services.adapter import (
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Ask the LLM for entities when local NER templating finds no similar question
+NER_LLM_FALLBACK = os.getenv("NER_LLM_FALLBACK", "true").lower() == "true"
+
 
 class SQLGenerationService:
     def __init__(self, storage):
@@ -223,42 +226,41 @@ class SQLGenerationService:
             )
 
             try:
-                with ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(
+                try:
+                    sql_generation = get_executor("generation").run(
                         self.generate_response_with_timeout,
-                        sql_generator,
-                        prompt,
-                        db_connection,
-                        metadata=agent_metadata,
+                        args=(sql_generator, prompt, db_connection),
+                        kwargs={"metadata": agent_metadata},
+                        timeout=int(os.environ.get("DH_ENGINE_TIMEOUT", 150)),
                     )
-                    try:
-                        sql_generation = future.result(
-                            timeout=int(os.environ.get("DH_ENGINE_TIMEOUT", 150))
-                        )
-                    except TimeoutError as e:
-                        self.update_error(
-                            initial_sql_generation, "SQL generation request timed out"
-                        )
-                        raise HTTPException(
-                            "SQL generation request timed out",
-                            initial_sql_generation.id,
-                        ) from e
+                except TimeoutError as e:
+                    self.update_error(
+                        initial_sql_generation, "SQL generation request timed out"
+                    )
+                    raise HTTPException(
+                        "SQL generation request timed out",
+                        initial_sql_generation.id,
+                    ) from e
             except Exception as e:
                 self.update_error(initial_sql_generation, str(e))
                 raise HTTPException(status_code=500, detail=str(e)) from e
         thread_pool_end_time = datetime.now()
         if sql_generation_request.evaluate:
-            evaluator = SimpleEvaluator()
-            evaluator.llm_config = (
-                sql_generation_request.llm_config
-                if sql_generation_request.llm_config
-                else LLMConfig()
-            )
-            confidence_score = evaluator.get_confidence_score(
-                user_prompt=prompt,
-                sql_generation=sql_generation,
-                database_connection=db_connection,
-            )
+            # Speculative generation already scored the selected candidate
+            speculation = (sql_generation.metadata or {}).get("speculation") or {}
+            confidence_score = speculation.get("confidence_score")
+            if confidence_score is None:
+                evaluator = SimpleEvaluator()
+                evaluator.llm_config = (
+                    sql_generation_request.llm_config
+                    if sql_generation_request.llm_config
+                    else LLMConfig()
+                )
+                confidence_score = evaluator.get_confidence_score(
+                    user_prompt=prompt,
+                    sql_generation=sql_generation,
+                    database_connection=db_connection,
+                )
             initial_sql_generation.evaluate = sql_generation_request.evaluate
             initial_sql_generation.confidence_score = confidence_score
         sql_generation.input_tokens_used += input_tokens
@@ -776,6 +778,19 @@ class SQLGenerationService:
     def get_similar_prompts(
         self, prompt: PromptRepository, llm_model: ChatModel
     ) -> list[dict] | None:
+        # Local templating answers most similar questions without an LLM call
+        context_store_service = ContextStoreService(self.storage)
+        try:
+            similar_prompts = context_store_service.retrieve_similar_prompt_templates(
+                prompt.db_connection_id, prompt.text
+            )
+            if similar_prompts:
+                return similar_prompts
+        except Exception as e:
+            logger.warning(f"Local NER template matching failed: {str(e)}")
+        if not NER_LLM_FALLBACK:
+            return None
+
         labels = get_ner_labels(prompt.text)
         prompt_text_ner = prompt.text
 
@@ -790,7 +805,7 @@ class SQLGenerationService:
         filter_by = get_labels_entities(labels_entities_ner)
         filter_by = {"labels": filter_by.get("labels")}
 
-        similar_prompts = ContextStoreService(self.storage).retrieve_exact_prompt_ner(
+        similar_prompts = context_store_service.retrieve_exact_prompt_ner(
             prompt.db_connection_id, prompt_text_ner, filter_by
         )
 
@@ -870,61 +885,14 @@ class SQLGenerationService:
         if not prompt_text or not db_connection_id:
             return []
 
-        # Normalize the prompt text for better matching
-        normalized_prompt = prompt_text.lower()
-
-        # Get all aliases for this database connection
         try:
-            all_aliases = self.alias_service.get_aliases(db_connection_id)
-            if not all_aliases:
-                return []
-
-            # Find aliases that might be referenced in the prompt
-            relevant_aliases = []
-
-            # Prepare data for Strategy 2, avoids recomputing phrases for each alias
-            # Optimize sliding window approach to reduce time complexity
-            # Pre-compute n-grams from the prompt for faster matching
-            words = normalized_prompt.split()
-            max_phrase_length = min(len(words), 5)  # Consider phrases up to 5 words
-
-            # Create a set of potential phrases to check (reduces duplicates)
-            phrases_to_check = set()
-            for phrase_length in range(1, max_phrase_length + 1):
-                for i in range(len(words) - phrase_length + 1):
-                    phrases_to_check.add(" ".join(words[i : i + phrase_length]))
-
-            for alias in all_aliases:
-                # Try different matching strategies
-                alias_name = alias.name.lower()
-
-                # Strategy 1: Direct match - the alias name appears exactly in the prompt
-                if alias_name in normalized_prompt:
-                    relevant_aliases.append(self._format_alias_for_context(alias))
-                    continue
-
-                # Strategy 2: Fuzzy matching for longer aliases (3+ characters)
-                # This handles typos and slight variations in alias names
-                if len(alias_name) >= 3:
-                    # Check similarity against each unique phrase
-                    found_match = False
-                    for phrase in phrases_to_check:
-                        # Early optimization: if phrase is much shorter/longer than alias_name, skip
-                        if abs(len(phrase) - len(alias_name)) > len(alias_name) * 0.5:
-                            continue
-
-                        similarity = self._calculate_similarity(alias_name, phrase)
-                        if similarity >= 0.8:  # 80% similarity threshold
-                            relevant_aliases.append(
-                                self._format_alias_for_context(alias)
-                            )
-                            found_match = True
-                            break
-
-                    # If we found a match, continue to the next alias
-                    if found_match:
-                        continue
-            return relevant_aliases
+            # Exact and fuzzy matching run against a matcher compiled once per
+            # connection, so the cost does not grow with the number of aliases
+            matcher = self.alias_service.get_alias_matcher(db_connection_id)
+            return [
+                self._format_alias_for_context(alias)
+                for alias in matcher.match(prompt_text)
+            ]
         except Exception as e:
             logger.warning(f"Error finding aliases in prompt: {str(e)}")
             return []
@@ -943,14 +911,3 @@ class SQLGenerationService:
             "target_name": alias.target_name,
             "target_type": alias.target_type,
         }
-
-    def _calculate_similarity(self, str1: str, str2: str) -> float:
-        """
-        Calculate the similarity between two strings using Levenshtein distance.
-        Returns a value between 0 (completely different) and 1 (identical).
-        """
-        if not str1 or not str2:
-            return 0.0
-
-        # Use Levenshtein distance for string similarity
-        return SequenceMatcher(None, str1, str2).ratio()
@@ -20,6 +20,7 @@ from app.modules.instruction.services import InstructionService
 from app.modules.business_glossary.services import BusinessGlossaryService
 from app.utils.sql_database.sql_database import SQLDatabase
 from app.utils.sql_generator.graph_agent import LangGraphSQLAgent
+from app.utils.sql_generator.graph_agent.nodes import SQL_SPECULATIVE_CANDIDATES
 from app.utils.sql_generator.sql_agent import SQLAgent
 from app.utils.sql_generator.sql_agent_dev import FullContextSQLAgent
 from app.utils.sql_generator.sql_agent_graph import LangGraphReActSQLAgent
@@ -29,6 +30,7 @@ from app.utils.model.embedding_model import EmbeddingModel
 from app.data.db.storage import Storage
 from app.utils.deep_agent.tools import KaiToolContext
 from app.utils.deep_agent.stream_bridge import bridge_event_to_queue
+from app.utils.tracing import current_trace, trace_generation
 from app.server.config import Settings
 
 logger = logging.getLogger(__name__)
@@ -153,7 +155,9 @@ class DeepAgentSQLGeneratorProxy(SQLGenerator):
         logger.info(msg)
         print(msg)
 
-        result = agent.invoke(initial_state)
+        trace = current_trace.get()
+        config = {"callbacks": [trace.callback_handler]} if trace else None
+        result = agent.invoke(initial_state, config)
 
         msg = f"[DEEPAGENT] Agent invocation complete. Result keys: {list(result.keys())}"
         logger.info(msg)
@@ -260,7 +264,9 @@ class DeepAgentSQLGeneratorProxy(SQLGenerator):
         artifact_log: list = []
         event_count = 0
 
-        for event in stream(initial_state):
+        trace = current_trace.get()
+        config = {"callbacks": [trace.callback_handler]} if trace else None
+        for event in stream(initial_state, config):
             event_count += 1
             logger.info(f"[DEEPAGENT] Stream event {event_count}: {list(event.keys()) if event else 'None'}")
 
@@ -331,6 +337,21 @@ class DeepAgentSQLGeneratorProxy(SQLGenerator):
         database_connection,
         context: list[dict] | None = None,
         metadata: dict | None = None,
+    ) -> SQLGeneration:
+        with trace_generation("deep_agent") as trace:
+            response = self._generate_response(
+                user_prompt, database_connection, context, metadata
+            )
+            response.metadata = response.metadata or {}
+            response.metadata["trace"] = trace.to_dict()
+        return response
+
+    def _generate_response(
+        self,
+        user_prompt,
+        database_connection,
+        context: list[dict] | None,
+        metadata: dict | None,
     ) -> SQLGeneration:
         try:
             result = self._invoke_agent(user_prompt, metadata, context)
@@ -468,6 +489,22 @@ class DeepAgentSQLGeneratorProxy(SQLGenerator):
         response,
         queue,
         metadata: dict | None = None,
+    ):
+        with trace_generation("deep_agent") as trace:
+            response = self._stream_response(
+                user_prompt, database_connection, response, queue, metadata
+            )
+            response.metadata = response.metadata or {}
+            response.metadata["trace"] = trace.to_dict()
+        return response
+
+    def _stream_response(
+        self,
+        user_prompt,
+        database_connection,
+        response,
+        queue,
+        metadata: dict | None,
     ):
         artifact_log: list = []
         try:
@@ -481,10 +518,8 @@ class DeepAgentSQLGeneratorProxy(SQLGenerator):
             response.sql = self._extract_sql_from_result(final_event)
         except AttributeError:
             queue.put("Deep Agent runtime missing streaming support; falling back to sync execution.\n")
-            final_response = self.generate_response(
-                user_prompt=user_prompt,
-                database_connection=database_connection,
-                metadata=metadata,
+            final_response = self._generate_response(
+                user_prompt, database_connection, None, metadata
             )
             response.sql = final_response.sql
         finally:
@@ -507,11 +542,32 @@ class KaiSqlGeneratorAdapter:
     def __init__(self, repository: SQLGenerationRepository):
         self.repository = repository
 
+    def speculative_candidates(self, option: str, metadata: dict | None) -> int:
+        """SQL candidates to generate concurrently, 1 when speculation is off.
+
+        Enabled by the "speculative" option (SQL_SPECULATIVE_CANDIDATES
+        candidates) or by `speculative_candidates` in the request metadata.
+        """
+        value = (metadata or {}).get("speculative_candidates")
+        if value is None:
+            value = SQL_SPECULATIVE_CANDIDATES if option == "speculative" else 1
+        try:
+            return max(int(value), 1)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid speculative_candidates {value!r}, speculation disabled")
+            return 1
+
     def _legacy_generator(
         self,
         option: str,
         llm_config: LLMConfig,
+        metadata: dict | None = None,
     ) -> SQLGenerator:
+        candidates = self.speculative_candidates(option, metadata)
+        if candidates > 1:
+            logger.info(f"Using LangGraph SQL Agent with {candidates} speculative candidates")
+            return LangGraphSQLAgent(llm_config, candidates=candidates)
+
         # Use LangGraph ReAct agents when feature flag is enabled
         if USE_LANGGRAPH_AGENTS:
             if option == "dev":
@@ -574,4 +630,4 @@ class KaiSqlGeneratorAdapter:
                 tool_context=tool_context,
                 extra_instructions=extra_instructions,
             )
-        return self._legacy_generator(option, llm_config)
+        return self._legacy_generator(option, llm_config, metadata)
@@ -26,6 +26,38 @@ class ColumnDescription(BaseModel):
     low_cardinality: bool = False
     categories: list[Any] | None = None
     foreign_key: ForeignKeyDetail | None = None
+    description_hash: str | None = None
+
+
+class ColumnFingerprint(BaseModel):
+    name: str
+    hash: str
+
+
+class TableFingerprint(BaseModel):
+    hash: str
+    columns: list[ColumnFingerprint] = []
+    row_count: int | None = None
+    modification_count: int | None = None
+
+    def changed_columns(self, previous: "TableFingerprint | None") -> set[str]:
+        """Names of columns that are new or whose definition changed."""
+        if previous is None:
+            return {column.name for column in self.columns}
+        previous_hashes = {column.name: column.hash for column in previous.columns}
+        return {
+            column.name
+            for column in self.columns
+            if previous_hashes.get(column.name) != column.hash
+        }
+
+    def data_changed(self, previous: "TableFingerprint | None") -> bool:
+        if previous is None:
+            return True
+        return (
+            self.row_count != previous.row_count
+            or self.modification_count != previous.modification_count
+        )
 
 
 class TableDescription(BaseModel):
@@ -44,3 +76,4 @@ class TableDescription(BaseModel):
     metadata: dict | None = None
     created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
     instruction: str | None = ''
+    schema_fingerprint: TableFingerprint | None = None
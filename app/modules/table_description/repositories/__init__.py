@@ -82,6 +82,18 @@ class TableDescriptionRepository:
             result.append(obj)
         return result
 
+    def find_all_by(self, filter: dict, page_size: int = 250) -> list[TableDescription]:
+        """Like find_by, but pages through every match instead of the first page."""
+        filter = {k: v for k, v in filter.items() if v}
+        result = []
+        page = 1
+        while True:
+            rows = self.storage.find(DB_COLLECTION, filter, page=page, limit=page_size)
+            result.extend(TableDescription(**row) for row in rows)
+            if len(rows) < page_size:
+                return result
+            page += 1
+
     def update_fields(self, table: TableDescription, table_description_request):
         if table_description_request.table_description is not None:
             table.table_description = table_description_request.table_description
@@ -6,6 +6,7 @@ from app.data.db.storage import Storage
 from app.modules.database_connection.repositories import DatabaseConnectionRepository
 from app.modules.database_connection.services import DatabaseConnectionService
 from app.modules.table_description.repositories import TableDescriptionRepository
+from app.utils.sql_database.reflection_cache import reflection_cache
 from app.utils.sql_database.scanner import SqlAlchemyScanner
 
 
@@ -57,6 +58,7 @@ class TableDescriptionService:
             scanner_request,
             TableDescriptionRepository(self.storage),
         )
+        synchronized = {row.id: row for row in rows}
 
         database_connection_service = DatabaseConnectionService(scanner, self.storage)
         for db_connection_id, schemas_and_table_descriptions in data.items():
@@ -68,6 +70,9 @@ class TableDescriptionService:
                 )
 
                 engine = database.engine
+                table_descriptions = [
+                    synchronized.get(table.id, table) for table in table_descriptions
+                ]
 
                 background_tasks.add_task(
                     async_scanning, scanner, engine, table_descriptions, self.storage, scanner_request.llm_config, scanner_request.instruction
@@ -83,26 +88,43 @@ class TableDescriptionService:
         database_connection_service = DatabaseConnectionService(scanner, self.storage)
         try:
             data = {}
+            fingerprints = {}
             if db_connection.schemas:
                 for schema in db_connection.schemas:
                     sql_database = database_connection_service.get_sql_database(
                         db_connection, schema
                     )
+                    # A refresh is the explicit signal that the source schema moved
+                    reflection_cache.invalidate(sql_database.engine, schema)
                     if schema not in data.keys():
                         data[schema] = []
                     data[schema] = sql_database.get_tables_and_views(schema)
+                    schema_fingerprints = scanner.fingerprint_tables(
+                        sql_database.engine, schema, data[schema]
+                    )
+                    if schema_fingerprints is not None:
+                        fingerprints[schema] = schema_fingerprints
             else:
                 sql_database = database_connection_service.get_sql_database(
                     db_connection
                 )
-                data[None] = sql_database.get_tables_and_views(schema)
+                reflection_cache.invalidate(sql_database.engine)
+                data[None] = sql_database.get_tables_and_views()
+                default_fingerprints = scanner.fingerprint_tables(
+                    sql_database.engine, None, data[None]
+                )
+                if default_fingerprints is not None:
+                    fingerprints[None] = default_fingerprints
 
             scanner_repository = TableDescriptionRepository(self.storage)
 
             return [
                 TableDescription(**record.model_dump())
                 for record in scanner.refresh_tables(
-                    data, str(db_connection.id), scanner_repository
+                    data,
+                    str(db_connection.id),
+                    scanner_repository,
+                    fingerprints=fingerprints,
                 )
             ]
         except Exception as e:
@@ -3,7 +3,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api import API
 
 from app.data.db.storage import Storage
+from app.modules.analytics.services.executor import shutdown_analytics_executor
+from app.modules.memory.write_behind import shutdown_memory_writer
 from app.server.config import Settings
+from app.utils.core.executors import shutdown_executors
 from app.utils.sql_database.sql_database import DBConnections
 
 # Session module imports
@@ -21,6 +24,11 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 
 # Analytics module imports
 from app.modules.analytics import analytics_router, batch_analytics_router
+from app.modules.analytics.services import (
+    analytics_batch_service,
+    create_batch_job_store,
+    set_dataset_storage,
+)
 
 # MDL module imports
 from app.modules.mdl.api import create_mdl_router
@@ -57,16 +65,27 @@ class FastAPI:
         # Configure and register session module
         self._setup_session_module()
 
-        # Register analytics routers
+        # Register analytics routers, SQL batch datasets read connections from storage
+        set_dataset_storage(self._storage)
+        analytics_batch_service.set_job_store(create_batch_job_store(storage=self._storage))
         self._app.include_router(analytics_router)
         self._app.include_router(batch_analytics_router)
 
         # Register MDL router
         self._setup_mdl_module()
 
+        @self._app.on_event("startup")
+        async def startup_event():
+            # Expire old batch jobs and resume those a previous run left unfinished
+            analytics_batch_service.start_maintenance()
+
         @self._app.on_event("shutdown")
         async def shutdown_event():
+            analytics_batch_service.stop_maintenance()
             DBConnections.dispose_all_engines()
+            shutdown_executors()
+            shutdown_memory_writer()
+            shutdown_analytics_executor()
 
     def _setup_session_module(self):
         """Configure and register the session module."""
@@ -33,6 +33,7 @@ ERROR_MAPPING = {
     "AnomalyDetectionError": "anomaly_detection_failed",
     "ForecastingError": "forecasting_failed",
     "InvalidMethodError": "invalid_method",
+    "DatasetError": "invalid_dataset",
     # Visualization module errors
     "ChartGenerationError": "chart_generation_failed",
     "InvalidChartTypeError": "invalid_chart_type",
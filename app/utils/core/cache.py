@@ -0,0 +1,41 @@
+import threading
+import time
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class KeyedCache(Generic[T]):
+    """Values built per key (usually a db connection id), kept until invalidated or expired.
+
+    Entries also expire after `ttl_seconds` so changes made by other processes
+    are eventually picked up.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._entries: dict[str, tuple[T, float]] = {}
+        # Bumped on invalidation so a build racing with a change is not kept
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, build: Callable[[], T]) -> T:
+        """Return the cached value of `key`, building it if missing or expired."""
+        with self._lock:
+            cached = self._entries.get(key)
+            generation = self._generations.get(key, 0)
+        if cached and time.monotonic() - cached[1] < self.ttl_seconds:
+            return cached[0]
+
+        value = build()
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = (value, time.monotonic())
+        return value
+
+    def invalidate(self, key: str | None = None) -> None:
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            for key in keys:
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
@@ -0,0 +1,181 @@
+"""Named, bounded thread pools shared by the whole process.
+
+Creating a `ThreadPoolExecutor` per request (or a raw thread per query) makes
+the number of threads grow with the load. Work is instead submitted to one of
+these pools, created on first use:
+
+* `db`: queries against the customer databases;
+* `typesense`: Typesense and embedding calls while collecting context;
+* `llm`: concurrent LLM calls, e.g. speculative SQL candidates;
+* `generation`: whole SQL generations run off the event loop or under a timeout;
+* `analytics`: CPU-bound analytics.
+
+Sizes are set with `EXECUTOR_<NAME>_WORKERS`. The pools copy the caller's
+context into their threads, so the active generation trace follows the work.
+`executor_stats` reports queue depth and saturation per pool, also exported as
+Prometheus gauges when `prometheus_client` is installed. `shutdown_executors`
+runs at exit and on server shutdown.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZES = {
+    "db": 32,
+    "typesense": 16,
+    "llm": 16,
+    "generation": 16,
+    "analytics": os.cpu_count() or 4,
+}
+
+
+def pool_size(name: str) -> int:
+    default = DEFAULT_POOL_SIZES.get(name, 8)
+    return max(int(os.getenv(f"EXECUTOR_{name.upper()}_WORKERS") or default), 1)
+
+
+class BoundedExecutor(ContextThreadPoolExecutor):
+    """Context-copying thread pool that counts queued, running and finished tasks."""
+
+    def __init__(self, name: str, max_workers: int):
+        super().__init__(max_workers=max_workers, thread_name_prefix=f"kai-{name}")
+        self.name = name
+        self.max_workers = max_workers
+        self._stats_lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._peak_queued = 0
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        def run(*args: Any, **kwargs: Any) -> Any:
+            with self._stats_lock:
+                self._queued -= 1
+                self._active += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        with self._stats_lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        try:
+            future = super().submit(run, *args, **kwargs)
+        except BaseException:
+            with self._stats_lock:
+                self._queued -= 1
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():
+            # Cancelled before it started, run never dequeued it
+            with self._stats_lock:
+                self._queued -= 1
+
+    def in_worker(self) -> bool:
+        return threading.current_thread().name.startswith(f"kai-{self.name}_")
+
+    def run(
+        self,
+        fn: Callable,
+        args: tuple = (),
+        kwargs: dict | None = None,
+        timeout: float | None = None,
+    ) -> Any:
+        """Run fn in the pool and wait for it, raising TimeoutError after `timeout` seconds.
+
+        A task that times out keeps its worker until it returns. Calls made
+        from a worker of this pool run inline instead of waiting on the pool.
+        """
+        if self.in_worker():
+            return fn(*args, **(kwargs or {}))
+        return self.submit(fn, *args, **(kwargs or {})).result(timeout=timeout)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "peak_queued": self._peak_queued,
+                "completed": self._completed,
+                "saturation": round(self._active / self.max_workers, 3),
+            }
+
+
+_executors: dict[str, BoundedExecutor] = {}
+_lock = threading.Lock()
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """Shared pool `name`, created on first use with `pool_size(name)` workers."""
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+    with _lock:
+        if name not in _executors:
+            _executors[name] = BoundedExecutor(name, pool_size(name))
+        return _executors[name]
+
+
+def executor_stats() -> list[dict]:
+    with _lock:
+        executors = list(_executors.values())
+    return [executor.stats() for executor in executors]
+
+
+def shutdown_executors(wait: bool = True, cancel_futures: bool = False) -> None:
+    """Stop the pools, by default after their queued tasks. Later calls get new pools."""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        logger.info(f"Shutting down executor {executor.name}: {executor.stats()}")
+        executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+atexit.register(shutdown_executors, wait=False, cancel_futures=True)
+
+
+def _register_prometheus_collector() -> None:
+    try:
+        from prometheus_client.core import REGISTRY, GaugeMetricFamily
+    except ImportError:
+        return
+
+    class ExecutorCollector:
+        def collect(self):
+            gauges = {
+                key: GaugeMetricFamily(
+                    f"kai_executor_{key}", description, labels=["executor"]
+                )
+                for key, description in (
+                    ("max_workers", "Threads of the executor"),
+                    ("active", "Tasks running in the executor"),
+                    ("queued", "Tasks waiting for a thread of the executor"),
+                    ("saturation", "Share of the executor threads that are busy"),
+                )
+            }
+            for stats in executor_stats():
+                for key, gauge in gauges.items():
+                    gauge.add_metric([stats["name"]], stats[key])
+            yield from gauges.values()
+
+    REGISTRY.register(ExecutorCollector())
+
+
+_register_prometheus_collector()
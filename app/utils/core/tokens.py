@@ -0,0 +1,31 @@
+"""Token counting for prompt budgets.
+
+Tokens are counted with tiktoken (`SCHEMA_PROMPT_TOKENIZER`); when the encoding
+cannot be loaded, e.g. offline, they are estimated from the length of the text.
+"""
+
+import logging
+import os
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER = os.getenv("SCHEMA_PROMPT_TOKENIZER", "cl100k_base")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(TOKENIZER)
+    except Exception as e:
+        logger.warning(f"Tokenizer {TOKENIZER} unavailable, estimating prompt tokens: {e}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
@@ -14,6 +14,7 @@ from app.utils.sql_tools.column_entity_checker import ColumnEntityChecker
 from app.utils.sql_tools.get_few_shot_examples import GetFewShotExamples
 from app.utils.sql_tools.info_relevant_columns import InfoRelevantColumns
 from app.utils.sql_tools.query_sql_database import QuerySQLDataBaseTool
+from app.utils.sql_tools.schema_catalog import SchemaCatalog
 from app.utils.sql_tools.schema_sql_database import SchemaSQLDatabaseTool
 from app.utils.sql_tools.tables_sql_database import TablesSQLDatabaseTool
 from app.utils.sql_tools.system_time import SystemTime
@@ -47,6 +48,14 @@ def build_tool_specs(ctx: KaiToolContext) -> List[ToolSpec]:
     """Return the default tool specs for a Deep Agent session."""
 
     tool_specs: List[ToolSpec] = []
+    # Tools are built lazily, the first one builds the catalog they share
+    catalog: SchemaCatalog | None = None
+
+    def get_catalog() -> SchemaCatalog:
+        nonlocal catalog
+        if catalog is None:
+            catalog = SchemaCatalog(ctx.db_scan)
+        return catalog
 
     def build_sql_db_query() -> QuerySQLDataBaseTool:
         return QuerySQLDataBaseTool(
@@ -72,10 +81,10 @@ def build_tool_specs(ctx: KaiToolContext) -> List[ToolSpec]:
         )
 
     def build_schema_tool() -> SchemaSQLDatabaseTool:
-        return SchemaSQLDatabaseTool(db_scan=ctx.db_scan)
+        return SchemaSQLDatabaseTool(db_scan=ctx.db_scan, catalog=get_catalog())
 
     def build_columns_tool() -> InfoRelevantColumns:
-        return InfoRelevantColumns(db_scan=ctx.db_scan)
+        return InfoRelevantColumns(db_scan=ctx.db_scan, catalog=get_catalog())
 
     def build_column_entity_checker() -> ColumnEntityChecker:
         return ColumnEntityChecker(
@@ -8,6 +8,7 @@ from overrides import override
 from app.modules.database_connection.models import DatabaseConnection
 from app.utils.model import LLMModel
 from app.utils.model.google_genai_embeddings import GoogleGenAIEmbeddingsOfficial
+from app.utils.tracing import TracedEmbeddings
 
 
 class EmbeddingModel(LLMModel):
@@ -19,6 +20,13 @@ class EmbeddingModel(LLMModel):
         model_name: str | None = None,
         api_base: str | None = None,
         **kwargs: Any,
+    ) -> Embeddings:
+        return TracedEmbeddings(
+            self._get_embeddings(model_family, model_name, **kwargs)
+        )
+
+    def _get_embeddings(
+        self, model_family: str | None, model_name: str | None, **kwargs: Any
     ) -> Embeddings:
         model_family = model_family or self.settings.require("EMBEDDING_FAMILY")
         model_name = model_name or self.settings.require("EMBEDDING_MODEL")
@@ -1,3 +1,6 @@
+import hashlib
+import json
+import logging
 import re
 # import os
 # from dotenv import load_dotenv
@@ -7,6 +10,8 @@ from langchain_core.output_parsers import JsonOutputParser
 
 # load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # def request_ner_service(query, labels: list[str], threshold=0.5):
 #     url = os.getenv("GLINER_API_BASE")
 #     url = url.rstrip("/") + "/get-ner-objects"
@@ -34,7 +39,34 @@ def request_ner_llm(llm_model, prompt_text: str, labels: list[str]) -> list[dict
     parsed_result = JsonOutputParser().parse(result.content)
     print("NER labels-entities\n", parsed_result)
     return parsed_result
-    
+
+
+def request_ner_llm_batch(
+    llm_model, prompt_texts: list[str], labels: list[str], max_concurrency: int = 8
+) -> list[list[dict] | None]:
+    """request_ner_llm for many texts with bounded concurrency; failures give None."""
+    prompts = [PROMPT_NER_LLM.format(text=text, labels=labels) for text in prompt_texts]
+    results = llm_model.batch(
+        prompts, config={"max_concurrency": max_concurrency}, return_exceptions=True
+    )
+    parsed_results = []
+    for result in results:
+        try:
+            if isinstance(result, Exception):
+                raise result
+            parsed_results.append(JsonOutputParser().parse(result.content))
+        except Exception as e:
+            logger.warning(f"NER request failed: {e}")
+            parsed_results.append(None)
+    return parsed_results
+
+
+def get_ner_template_version() -> str:
+    """Changes whenever the labels or the NER prompt change, stored templates are then stale."""
+    payload = json.dumps({"labels": get_ner_labels(""), "prompt": PROMPT_NER_LLM})
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
 def get_ner_labels(text: str) -> list[str]:
     labels = [
         'year',
@@ -0,0 +1,197 @@
+"""Local NER templating and similar-question lookup.
+
+The `using_ner` path used to ask an LLM for the entities of a prompt, then
+search Typesense for context stores with a similar templated prompt. This
+module does both locally:
+
+* `EntityDictionary` maps known entity values to labels. Values come from
+  the categories of low-cardinality columns (labelled by column name), from
+  business glossary metrics and their aliases, plus years and month names.
+  Prompts are templated by replacing the longest known phrases with
+  `<LABEL>` placeholders, the same format `replace_entities_with_labels`
+  produces for LLM entities.
+* `PromptTemplateIndex` holds the templates of every context store of a
+  connection and returns those at least `TEMPLATE_MATCH_THRESHOLD` similar to
+  the templated prompt.
+"""
+
+import bisect
+import math
+import os
+import re
+from difflib import SequenceMatcher
+
+from app.modules.business_glossary.models import BusinessGlossary
+from app.modules.context_store.models import ContextStore
+from app.modules.table_description.models import TableDescription
+from app.utils.core.cache import KeyedCache
+from app.utils.prompts_ner.prompts_ner import replace_entities_with_labels
+
+NER_TEMPLATE_INDEX_TTL_SECONDS = int(os.getenv("NER_TEMPLATE_INDEX_TTL_SECONDS", "300"))
+
+TEMPLATE_MATCH_THRESHOLD = 0.95
+MAX_ENTITY_WORDS = 6
+METRIC_LABEL = "metric"
+YEAR_LABEL = "year"
+MONTH_LABEL = "month"
+
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+MONTHS = {
+    # English
+    "january", "february", "march", "april", "may", "june", "july",
+    "august", "september", "october", "november", "december",
+    # Indonesian
+    "januari", "februari", "maret", "mei", "juni", "juli", "agustus",
+    "oktober", "desember",
+}
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_phrase(text: str) -> str:
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def column_label(column_name: str) -> str:
+    return " ".join(re.split(r"[\W_]+", column_name.lower())).strip()
+
+
+class EntityDictionary:
+    def __init__(self, known_labels: list[str] | None = None):
+        self.known_labels = set(known_labels or [])
+        self.entities: dict[str, str] = {}
+        self.max_words = 1
+
+    def add(self, entity: str, label: str) -> None:
+        phrase = normalize_phrase(entity)
+        # Bare numbers and single letters are too ambiguous to template
+        if len(phrase) < 2 or phrase.replace(" ", "").isdigit():
+            return
+        words = phrase.count(" ") + 1
+        if words > MAX_ENTITY_WORDS:
+            return
+        existing = self.entities.get(phrase)
+        if existing is None or (
+            existing not in self.known_labels and label in self.known_labels
+        ):
+            self.entities[phrase] = label
+            self.max_words = max(self.max_words, words)
+
+    @classmethod
+    def from_sources(
+        cls,
+        tables: list[TableDescription],
+        glossaries: list[BusinessGlossary],
+        known_labels: list[str] | None = None,
+    ) -> "EntityDictionary":
+        dictionary = cls(known_labels)
+        for table in tables:
+            for column in table.columns:
+                if column.low_cardinality and column.categories:
+                    label = column_label(column.name)
+                    for category in column.categories:
+                        dictionary.add(str(category), label)
+        for glossary in glossaries:
+            for term in [glossary.metric, *(glossary.alias or [])]:
+                dictionary.add(term, METRIC_LABEL)
+        return dictionary
+
+    def extract(self, text: str) -> list[dict]:
+        """Entities found in the text, as `[{"entity": ..., "label": ...}]`."""
+        tokens = list(WORD_PATTERN.finditer(text))
+        found = []
+        i = 0
+        while i < len(tokens):
+            for size in range(min(self.max_words, len(tokens) - i), 0, -1):
+                window = tokens[i : i + size]
+                phrase = " ".join(token.group().lower() for token in window)
+                label = self.entities.get(phrase)
+                if label is None and size == 1:
+                    if YEAR_PATTERN.fullmatch(phrase):
+                        label = YEAR_LABEL
+                    elif phrase in MONTHS:
+                        label = MONTH_LABEL
+                if label is not None:
+                    found.append(
+                        {"entity": text[window[0].start() : window[-1].end()], "label": label}
+                    )
+                    i += size
+                    break
+            else:
+                i += 1
+        return found
+
+    def template(self, text: str) -> tuple[str, list[dict]]:
+        """The text with entities replaced by `<LABEL>`, and the entities found."""
+        labels_entities = self.extract(text)
+        if not labels_entities:
+            return text, []
+        return replace_entities_with_labels(text, labels_entities), labels_entities
+
+
+class PromptTemplateIndex:
+    def __init__(
+        self,
+        dictionary: EntityDictionary,
+        context_stores: list[ContextStore],
+        template_version: str | None = None,
+    ):
+        self.dictionary = dictionary
+        self.context_stores = context_stores
+        self._templates: list[tuple[str, int]] = []
+        for index, context_store in enumerate(context_stores):
+            templates = {self._key(dictionary.template(context_store.prompt_text)[0])}
+            # Stored NER templates are only trusted when made with the current labels
+            if context_store.prompt_text_ner and (
+                template_version is None
+                or context_store.template_version == template_version
+            ):
+                templates.add(self._key(context_store.prompt_text_ner))
+            self._templates.extend((template, index) for template in templates)
+        self._templates.sort(key=lambda item: len(item[0]))
+        self._lengths = [len(template) for template, _ in self._templates]
+        self._exact: dict[str, list[int]] = {}
+        for template, index in self._templates:
+            self._exact.setdefault(template, []).append(index)
+
+    @staticmethod
+    def _key(template: str) -> str:
+        return " ".join(template.lower().split())
+
+    def find(
+        self, prompt_text: str, threshold: float = TEMPLATE_MATCH_THRESHOLD
+    ) -> list[dict]:
+        """Context stores whose templated prompt is similar to the templated prompt."""
+        prompt_text_ner = self._key(self.dictionary.template(prompt_text)[0])
+        scores = {index: 1.0 for index in self._exact.get(prompt_text_ner, [])}
+
+        # ratio <= 2 * min(a, b) / (a + b) bounds the lengths worth comparing
+        length = len(prompt_text_ner)
+        low = bisect.bisect_left(self._lengths, math.ceil(length * threshold / (2 - threshold)))
+        high = bisect.bisect_right(self._lengths, math.floor(length * (2 - threshold) / threshold))
+        sequence = SequenceMatcher(None)
+        sequence.set_seq2(prompt_text_ner)
+        for template, index in self._templates[low:high]:
+            if scores.get(index) == 1.0:
+                continue
+            sequence.set_seq1(template)
+            if sequence.quick_ratio() < threshold:
+                continue
+            score = sequence.ratio()
+            if score >= threshold and score > scores.get(index, 0):
+                scores[index] = score
+
+        result = [
+            {
+                "prompt_text": self.context_stores[index].prompt_text,
+                "prompt_text_ner": self.context_stores[index].prompt_text_ner,
+                "sql": self.context_stores[index].sql,
+                "score": score,
+            }
+            for index, score in scores.items()
+        ]
+        return sorted(result, key=lambda x: x["score"], reverse=True)
+
+
+prompt_template_indexes: KeyedCache[PromptTemplateIndex] = KeyedCache(
+    NER_TEMPLATE_INDEX_TTL_SECONDS
+)
@@ -0,0 +1,74 @@
+"""Schema fingerprints used to skip unchanged tables on re-scan.
+
+A table fingerprint hashes each column definition (name, type, nullability)
+together with the cheap data-change signals the dialect exposes (row count
+estimate and modification counter, see `statistics.TableActivity`), read
+from the catalog on PostgreSQL and MySQL. Other dialects only fingerprint the
+structure: data changes alone don't trigger a re-profile there, re-scan with
+`force` (`kai table scan-all --force`) to pick them up.
+"""
+
+import hashlib
+import json
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.reflection import ObjectKind
+
+from app.modules.table_description.models import ColumnFingerprint, TableFingerprint
+from app.utils.sql_database.statistics import TableActivity, load_schema_activity
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(
+        json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+
+
+def build_table_fingerprint(
+    columns: list[dict], activity: TableActivity | None = None
+) -> TableFingerprint:
+    """Fingerprint a table from inspector style column dicts (name, type, nullable)."""
+    column_fingerprints = [
+        ColumnFingerprint(
+            name=column["name"],
+            hash=_digest(
+                [column["name"], str(column["type"]), bool(column.get("nullable", True))]
+            ),
+        )
+        for column in columns
+        if "." not in column["name"]
+    ]
+    row_count = activity.row_count if activity else None
+    modification_count = activity.modification_count if activity else None
+    return TableFingerprint(
+        hash=_digest(
+            [
+                [(column.name, column.hash) for column in column_fingerprints],
+                row_count,
+                modification_count,
+            ]
+        ),
+        columns=column_fingerprints,
+        row_count=row_count,
+        modification_count=modification_count,
+    )
+
+
+def get_schema_fingerprints(
+    db_engine: Engine, schema: str | None, tables: list[str]
+) -> dict[str, TableFingerprint]:
+    """Fingerprint the given tables of a schema with one bulk reflection query."""
+    inspector = inspect(db_engine)
+    wanted = set(tables)
+    columns_by_table = inspector.get_multi_columns(
+        schema=schema,
+        filter_names=list(wanted),
+        kind=ObjectKind.ANY,
+    )
+    activity = load_schema_activity(db_engine, schema)
+    return {
+        table_name: build_table_fingerprint(columns, activity.get(table_name))
+        for (_, table_name), columns in columns_by_table.items()
+        if table_name in wanted
+    }
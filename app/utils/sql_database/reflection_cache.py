@@ -0,0 +1,170 @@
+"""Shared, disk-backed cache of reflected SQLAlchemy metadata.
+
+Reflecting a large schema takes seconds to tens of seconds, and the scanner,
+the DDL generation and the agent tools all need the same table definitions.
+The cache keeps one `MetaData` per connection and schema, extends it with
+tables that were not reflected yet, and pickles it to disk so restarted
+processes and other workers reuse it. Entries expire after a TTL and can be
+invalidated explicitly, e.g. when the table list of a connection is refreshed.
+
+Unpickling runs code, so cache files are only loaded from a directory and
+files owned by the current user that nobody else can write to.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import stat
+import threading
+import time
+
+from sqlalchemy import MetaData
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+REFLECTION_CACHE_PATH = os.getenv(
+    "REFLECTION_CACHE_PATH", os.path.join("app", "data", "dbdata", "reflection_cache")
+)
+REFLECTION_CACHE_TTL_SECONDS = int(os.getenv("REFLECTION_CACHE_TTL_SECONDS", "3600"))
+
+
+class ReflectionCacheEntry:
+    def __init__(self, meta: MetaData, loaded_at: float, complete: bool = False):
+        self.meta = meta
+        self.loaded_at = loaded_at
+        # True once the whole schema (not only some tables) has been reflected
+        self.complete = complete
+
+
+class ReflectionCache:
+    def __init__(self, path: str | None = None, ttl_seconds: int | None = None):
+        self.path = path or REFLECTION_CACHE_PATH
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else REFLECTION_CACHE_TTL_SECONDS
+        )
+        self._entries: dict[str, ReflectionCacheEntry] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def connection_key(db_engine: Engine) -> str:
+        """Stable key for a connection; the URL (and its password) is only hashed."""
+        url = db_engine.url.render_as_string(hide_password=False)
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+
+    def _key(self, db_engine: Engine, schema: str | None) -> str:
+        return f"{self.connection_key(db_engine)}-{schema or '_default'}"
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.pickle")
+
+    def _is_fresh(self, entry: ReflectionCacheEntry | None) -> bool:
+        return entry is not None and time.time() - entry.loaded_at < self.ttl_seconds
+
+    @staticmethod
+    def _is_trusted(path: str) -> bool:
+        """Whether only the current user can have written `path`."""
+        status = os.stat(path)
+        if hasattr(os, "getuid") and status.st_uid != os.getuid():
+            return False
+        return not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+    def _load(self, key: str) -> ReflectionCacheEntry | None:
+        file_path = self._file_path(key)
+        if not os.path.exists(file_path):
+            return None
+        if not (self._is_trusted(self.path) and self._is_trusted(file_path)):
+            logger.warning(
+                f"Ignoring reflection cache {file_path}: writable by other users"
+            )
+            return None
+        try:
+            with open(file_path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable reflection cache {file_path}: {e}")
+            return None
+
+    def _save(self, key: str, entry: ReflectionCacheEntry) -> None:
+        file_path = self._file_path(key)
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.path, mode=0o700, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            logger.warning(f"Unable to persist reflection cache {file_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_metadata(
+        self,
+        db_engine: Engine,
+        schema: str | None = None,
+        tables: list[str] | None = None,
+        refresh: bool = False,
+    ) -> MetaData:
+        """Return reflected metadata containing `tables` (or the whole schema).
+
+        Only tables missing from the cached metadata are reflected, into a
+        copy that replaces the entry, so metadata returned before never
+        changes. The result is shared, callers must treat it as read-only.
+        """
+        key = self._key(db_engine, schema)
+        with self._key_lock(key):
+            entry = None if refresh else self._entries.get(key)
+            if not refresh and not self._is_fresh(entry):
+                entry = self._load(key)
+            if not self._is_fresh(entry):
+                entry = ReflectionCacheEntry(MetaData(schema=schema), time.time())
+
+            if tables is None:
+                missing = None if not entry.complete else []
+            else:
+                missing = [
+                    table
+                    for table in tables
+                    if (f"{schema}.{table}" if schema else table) not in entry.meta.tables
+                ]
+
+            if missing is None or missing:
+                meta = MetaData(schema=schema)
+                for table in entry.meta.tables.values():
+                    table.to_metadata(meta)
+                meta.reflect(bind=db_engine, views=True, schema=schema, only=missing)
+                entry = ReflectionCacheEntry(
+                    meta, entry.loaded_at, entry.complete or missing is None
+                )
+                self._save(key, entry)
+            self._entries[key] = entry
+            return entry.meta
+
+    def invalidate(self, db_engine: Engine, schema: str | None = None) -> None:
+        """Drop cached metadata of a connection (all schemas unless one is given)."""
+        # The exact key of a schema, "sales" must not match "sales_archive"
+        target = self._key(db_engine, schema) if schema else None
+        prefix = f"{self.connection_key(db_engine)}-"
+
+        def matches(name: str) -> bool:
+            return name == target if target else name.startswith(prefix)
+
+        with self._lock:
+            for key in [key for key in self._entries if matches(key)]:
+                del self._entries[key]
+        if os.path.isdir(self.path):
+            for file_name in os.listdir(self.path):
+                if file_name.endswith(".pickle") and matches(file_name[: -len(".pickle")]):
+                    try:
+                        os.remove(os.path.join(self.path, file_name))
+                    except OSError as e:
+                        logger.warning(f"Unable to remove reflection cache {file_name}: {e}")
+
+
+reflection_cache = ReflectionCache()
@@ -0,0 +1,96 @@
+"""Per-table progress checkpoints for long running scans.
+
+A checkpoint is an append-only JSON lines file per database connection and
+set of tables, so scans of different tables of a connection don't share
+progress. The first line records which tables the scan was asked to process;
+every other line records one finished table. Re-running the same scan after a
+crash skips the tables already recorded. The file is removed once the scan
+finishes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SCAN_CHECKPOINT_PATH = os.getenv(
+    "SCAN_CHECKPOINT_PATH", os.path.join("app", "data", "dbdata", "scan_checkpoints")
+)
+
+
+class ScanCheckpoint:
+    def __init__(self, db_connection_id: str, table_ids: list[str], path: str | None = None):
+        self.db_connection_id = db_connection_id
+        self.table_ids = sorted(str(table_id) for table_id in table_ids)
+        self.directory = path or SCAN_CHECKPOINT_PATH
+        tables_hash = hashlib.sha256(json.dumps(self.table_ids).encode()).hexdigest()[:16]
+        self.file_path = os.path.join(self.directory, f"{db_connection_id}-{tables_hash}.jsonl")
+        self.completed: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(
+        cls, db_connection_id: str, table_ids: list[str], path: str | None = None
+    ) -> "ScanCheckpoint":
+        """Resume the checkpoint of an identical unfinished scan, or start a new one."""
+        checkpoint = cls(db_connection_id, table_ids, path)
+        if os.path.exists(checkpoint.file_path):
+            try:
+                with open(checkpoint.file_path) as f:
+                    header = json.loads(f.readline() or "{}")
+                    if header.get("table_ids") == checkpoint.table_ids:
+                        for line in f:
+                            if line.strip():
+                                entry = json.loads(line)
+                                checkpoint.completed[entry["id"]] = entry["status"]
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable scan checkpoint {checkpoint.file_path}: {e}")
+                checkpoint.completed = {}
+
+        if checkpoint.completed:
+            logger.info(
+                f"Resuming scan for {db_connection_id}: "
+                f"{len(checkpoint.completed)}/{len(checkpoint.table_ids)} tables already done"
+            )
+        else:
+            checkpoint._write_header()
+        return checkpoint
+
+    def is_done(self, table_id: str) -> bool:
+        return str(table_id) in self.completed
+
+    def mark(self, table_id: str, status: str) -> None:
+        entry = {"id": str(table_id), "status": status, "at": datetime.now().isoformat()}
+        with self._lock:
+            self.completed[str(table_id)] = status
+            try:
+                with open(self.file_path, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                logger.warning(f"Unable to write scan checkpoint: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)
+
+    def _write_header(self) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.file_path, "w") as f:
+                f.write(
+                    json.dumps(
+                        {
+                            "db_connection_id": self.db_connection_id,
+                            "table_ids": self.table_ids,
+                            "started_at": datetime.now().isoformat(),
+                        }
+                    )
+                    + "\n"
+                )
+        except OSError as e:
+            logger.warning(f"Unable to create scan checkpoint: {e}")
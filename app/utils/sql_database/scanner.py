@@ -1,4 +1,10 @@
+import asyncio
+import hashlib
 import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Any, Dict, List
 import json
@@ -8,21 +14,42 @@ from app.data.db.storage import Storage
 import sqlalchemy
 from sqlalchemy import Column, MetaData, Table, inspect, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy.schema import CreateTable
 from sqlalchemy.sql.sqltypes import NullType
 
 from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
 
 from app.api.requests import ScannerRequest
 from app.modules.table_description.models import (
     ColumnDescription,
     TableDescription,
     TableDescriptionStatus,
+    TableFingerprint,
 )
 from app.modules.table_description.repositories import TableDescriptionRepository
 from app.modules.database_connection.repositories import DatabaseConnectionRepository
 from app.modules.sql_generation.models import LLMConfig
 from app.utils.model.chat_model import ChatModel
+from app.utils.sql_database.fingerprint import (
+    build_table_fingerprint,
+    get_schema_fingerprints,
+)
+from app.utils.sql_database.reflection_cache import reflection_cache
+from app.utils.sql_database.scan_checkpoint import ScanCheckpoint
+from app.utils.sql_database.value_index import (
+    VALUE_INDEX_SCAN_MAX_ROWS,
+    ColumnValueIndex,
+    is_indexable,
+    value_index_store,
+)
+from app.utils.sql_database.statistics import (
+    ColumnStatistics,
+    TableStatistics,
+    load_schema_activity,
+    load_table_statistics,
+)
 from app.utils.prompts.agent_prompts import (
     COLUMN_DESCRIPTION_PROMPT,
     TABLE_DESCRIPTION_PROMPT,
@@ -33,19 +60,77 @@ from app.utils.prompts.agent_prompts import (
 MIN_CATEGORY_VALUE = 1
 MAX_CATEGORY_VALUE = 60
 MAX_SIZE_LETTERS = 50
+SCANNER_MAX_WORKERS = int(os.getenv("SCANNER_MAX_WORKERS", "8"))
+SCANNER_LLM_CONCURRENCY = int(os.getenv("SCANNER_LLM_CONCURRENCY", "8"))
+SCANNER_LLM_MAX_ATTEMPTS = 5
+SCANNER_LLM_BACKOFF_SECONDS = 2.0
+SCANNER_DESCRIPTION_CHUNK = 50
+SCAN_PROGRESS_INTERVAL = 50
 
 logger = logging.getLogger(__name__)
 
 
+class ScanReport(BaseModel):
+    total: int = 0
+    scanned: int = 0
+    skipped: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def tables_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.scanned / self.elapsed_seconds
+
+    def progress(self) -> str:
+        return (
+            f"{self.scanned + self.skipped + self.unchanged}/{self.total} tables "
+            f"({self.skipped} resumed, {self.unchanged} unchanged, {self.failed} failed) "
+            f"in {self.elapsed_seconds:.1f}s, {self.tables_per_second:.2f} tables/s"
+        )
+
+
+def get_scan_workers(db_engine: Engine) -> int:
+    """Number of tables to scan concurrently without exhausting the connection pool.
+
+    Each worker holds at most one connection at a time; the pool overflow is
+    left for the rest of the application.
+    """
+    pool = db_engine.pool
+    if isinstance(pool, QueuePool):
+        return max(1, min(SCANNER_MAX_WORKERS, pool.size()))
+    if isinstance(pool, NullPool):
+        return max(1, SCANNER_MAX_WORKERS)
+    # Singleton/static pools (e.g. in-memory SQLite) share one connection
+    return 1
+
+
 class PostgreSqlScanner:
-    def cardinality_values(self, column: Column, db_engine: Engine) -> list | None:
+    def cardinality_values(
+        self,
+        column: Column,
+        db_engine: Engine,
+        statistics: ColumnStatistics | None = None,
+    ) -> list | None:
         # Skip unsupported types that don't support ordering (like aclitem)
         column_type = str(column.type).lower()
         unsupported_types = ['aclitem', 'pg_node_tree', 'pg_dependencies', 'pg_lsn', 'null']
         if any(unsupported in column_type for unsupported in unsupported_types):
             logger.debug(f"Skipping cardinality analysis for column '{column.name}' with unsupported type '{column.type}'")
             return None
-        
+
+        # Catalog statistics answer the question without touching the table
+        if statistics is not None and statistics.n_distinct is not None:
+            if not MIN_CATEGORY_VALUE <= statistics.n_distinct <= MAX_CATEGORY_VALUE:
+                return None
+            if statistics.has_all_values():
+                return [
+                    str(val) if val is not None else val
+                    for val in statistics.most_common_vals
+                ]
+
         if str(db_engine.__dict__.get("url")).startswith("sqlite"):
             query = text(
                 f"""
@@ -123,59 +208,20 @@ class TableColumnsDescriptionGenerator:
 
         return prompt | llm_model
 
-    def generate_column_description(
-        self, chain, table_name: str, columns_dict: dict, batch_size: int = 10
-    ) -> dict:
-        # Store final results
-        column_descriptions = {}
-
-        # Prepare column data list
-        column_data_list = [
-            {
-                "table_name": table_name,
-                "column_name": column_name,
-                "row_examples": row_examples,
-            }
-            for column_name, row_examples in columns_dict.items()
-        ]
-
-        # Process in batches
-        for i in range(0, len(column_data_list), batch_size):
-            # Get current batch
-            batch_items = column_data_list[i : i + batch_size]
-
-            # Prepare inputs for batch
-            batch_inputs = [
-                {
-                    "table_name": item["table_name"],
-                    "column_name": item["column_name"],
-                    "row_examples": item["row_examples"],
-                }
-                for item in batch_items
-            ]
-
-            # Perform LLM inference for batch
-            batch_results = chain.batch(inputs=batch_inputs)
-
-            # Collect results
-            for result, item in zip(batch_results, batch_items):
-                column_descriptions[item["column_name"]] = result.content
-
-        return column_descriptions
-
-    def get_column_description(
+    def get_column_samples(
         self,
         meta: MetaData,
         db_engine: Engine,
         table: str,
         rows_number: int = 5,
-        instruction: str = "",
-    ) -> List[Dict[str, Any]]:
-        chain = self.create_chain(COLUMN_DESCRIPTION_PROMPT, instruction)
-
+        columns: list[str] | None = None,
+    ) -> dict[str, list]:
         meta_table_name = f"{meta.schema}.{table}" if meta.schema else table
+        selected = set(columns) if columns is not None else None
         columns = [
-            col for col in meta.tables[meta_table_name].columns if "." not in col.name
+            col
+            for col in meta.tables[meta_table_name].columns
+            if "." not in col.name and (selected is None or col.name in selected)
         ]
         examples_query = sqlalchemy.select(*columns).distinct().limit(rows_number)
         with db_engine.connect() as connection:
@@ -189,26 +235,7 @@ class TableColumnsDescriptionGenerator:
             for col, value in zip(columns, row):
                 results_dict[col.name].append(value)
 
-        columns_desc = self.generate_column_description(chain, table, results_dict)
-        return columns_desc
-
-    def get_table_description(
-        self,
-        table: str,
-        columns_description: dict,
-        instruction: str,
-    ) -> str:
-        chain = self.create_chain(TABLE_DESCRIPTION_PROMPT, instruction)
-
-        table_details = "\n".join(
-            f"{key}: {value}" for key, value in columns_description.items()
-        )
-
-        table_description = chain.invoke(
-            {"table_name": table, "table_details": table_details}
-        ).content
-
-        return table_description
+        return results_dict
 
     def reset_table_description(
         self, table_description: TableDescription, keep_keys: List[str]
@@ -226,6 +253,146 @@ class TableColumnsDescriptionGenerator:
 
         return table_description
 
+    @staticmethod
+    def column_description_hash(
+        table_name: str, column_name: str, data_type: str, instruction: str
+    ) -> str:
+        # Not the samples, an unordered DISTINCT LIMIT returns other rows each run
+        return hashlib.sha1(
+            json.dumps(
+                [table_name, column_name, data_type, instruction or ""],
+                default=str,
+            ).encode("utf-8")
+        ).hexdigest()[:16]
+
+    @staticmethod
+    def _is_rate_limited(error: Exception) -> bool:
+        status = getattr(error, "status_code", None) or getattr(error, "code", None)
+        message = str(error).lower()
+        return status == 429 or any(
+            marker in message
+            for marker in ("rate limit", "ratelimit", "429", "resource_exhausted", "quota")
+        )
+
+    async def _abatch(self, chain, inputs: list[dict]) -> list[str | None]:
+        """Run inputs through `chain.abatch`, backing off and retrying rate-limited items.
+
+        Items that keep failing (or fail for other reasons) are returned as None
+        so one bad column does not fail the whole scan.
+        """
+        results: list[str | None] = [None] * len(inputs)
+        pending = list(range(len(inputs)))
+        concurrency = SCANNER_LLM_CONCURRENCY
+        for attempt in range(SCANNER_LLM_MAX_ATTEMPTS):
+            if not pending:
+                break
+            outputs = await chain.abatch(
+                [inputs[index] for index in pending],
+                config={"max_concurrency": concurrency},
+                return_exceptions=True,
+            )
+            retry = []
+            for index, output in zip(pending, outputs):
+                if not isinstance(output, Exception):
+                    results[index] = output.content
+                elif self._is_rate_limited(output):
+                    retry.append(index)
+                else:
+                    logger.warning(f"Description generation failed: {output}")
+            pending = retry
+            if pending:
+                # Halve the pressure on the provider and wait with jitter
+                concurrency = max(1, concurrency // 2)
+                delay = SCANNER_LLM_BACKOFF_SECONDS * (2**attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay))
+        if pending:
+            logger.warning(f"Giving up on {len(pending)} rate limited descriptions")
+        return results
+
+    async def adescribe_tables(
+        self,
+        tables: list[tuple[TableDescription, dict[str, list]]],
+        instruction: str = "",
+    ) -> None:
+        """Describe the columns and tables of many tables in one pipeline.
+
+        Column prompts from every table are sent through one bounded
+        `abatch`; columns whose name, type and instruction are unchanged
+        since their last description are not sent again. Tables get a new
+        table description only when one of their columns changed.
+        """
+        column_jobs = []
+        for table, samples in tables:
+            for column in table.columns:
+                if column.name not in samples:
+                    continue
+                row_examples = samples[column.name]
+                description_hash = self.column_description_hash(
+                    table.table_name, column.name, column.data_type, instruction
+                )
+                if column.description and column.description_hash == description_hash:
+                    continue
+                column_jobs.append((table, column, row_examples, description_hash))
+
+        if column_jobs:
+            chain = self.create_chain(COLUMN_DESCRIPTION_PROMPT, instruction)
+            descriptions = await self._abatch(
+                chain,
+                [
+                    {
+                        "table_name": table.table_name,
+                        "column_name": column.name,
+                        "row_examples": row_examples,
+                    }
+                    for table, column, row_examples, _ in column_jobs
+                ],
+            )
+            for (_, column, _, description_hash), description in zip(
+                column_jobs, descriptions
+            ):
+                if description is not None:
+                    column.description = description
+                    column.description_hash = description_hash
+
+        changed_tables = {id(table) for table, *_ in column_jobs}
+        tables_to_describe = [
+            table
+            for table, _ in tables
+            if id(table) in changed_tables or not table.table_description
+        ]
+        if tables_to_describe:
+            chain = self.create_chain(TABLE_DESCRIPTION_PROMPT, instruction)
+            descriptions = await self._abatch(
+                chain,
+                [
+                    {
+                        "table_name": table.table_name,
+                        "table_details": "\n".join(
+                            f"{column.name}: {column.description}"
+                            for column in table.columns
+                        ),
+                    }
+                    for table in tables_to_describe
+                ],
+            )
+            for table, description in zip(tables_to_describe, descriptions):
+                if description is not None:
+                    table.table_description = description
+
+    def describe_tables(
+        self,
+        tables: list[tuple[TableDescription, dict[str, list]]],
+        instruction: str = "",
+    ) -> None:
+        coroutine = self.adescribe_tables(tables, instruction)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # Called from inside an event loop: run the pipeline on its own loop
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+
     def get_database_description(
         self,
         table_descriptions: List[dict],
@@ -264,24 +431,29 @@ class SqlAlchemyScanner:
 
     def refresh_tables(
         self,
-        schemas_and_tables: dict[str, list],
+        schemas_and_tables: dict[str | None, list],
         db_connection_id: str,
         repository: TableDescriptionRepository,
         metadata: dict = None,
+        fingerprints: dict[str | None, dict[str, TableFingerprint]] | None = None,
     ) -> list[TableDescription]:
+        """Sync stored tables with the source tables.
+
+        When `fingerprints` are given for a schema, scanned tables whose
+        fingerprint did not change are left untouched, and changed tables keep
+        their previous profile so the next scan only re-profiles what moved.
+        """
         rows = []
         table_description_repo = TableColumnsDescriptionGenerator(llm_config=None)
+        fingerprints = fingerprints or {}
         for schema, tables in schemas_and_tables.items():
-            stored_tables = repository.find_by(
+            stored_tables = repository.find_all_by(
                 {"db_connection_id": str(db_connection_id), "db_schema": schema}
             )
             stored_tables_list = [table.table_name for table in stored_tables]
+            schema_fingerprints = fingerprints.get(schema)
 
             for table_description in stored_tables:
-                table_description = table_description_repo.reset_table_description(
-                    table_description,
-                    keep_keys=["id", "db_connection_id", "db_schema", "table_name"],
-                )
                 # If source table not exist but exist in Typesense
                 if table_description.table_name not in tables:
                     table_description = repository.delete_by_id(table_description.id)
@@ -289,11 +461,27 @@ class SqlAlchemyScanner:
                         TableDescriptionStatus.DEPRECATED.value
                     )
                     rows.append(table_description)
+                    continue
+
+                if schema_fingerprints is not None:
+                    fingerprint = schema_fingerprints.get(table_description.table_name)
+                    stored_fingerprint = table_description.schema_fingerprint
+                    if (
+                        fingerprint
+                        and stored_fingerprint
+                        and stored_fingerprint.hash == fingerprint.hash
+                        and table_description.sync_status
+                        == TableDescriptionStatus.SCANNED.value
+                    ):
+                        rows.append(table_description)
+                        continue
                 else:
-                    table_description.sync_status = (
-                        TableDescriptionStatus.NOT_SCANNED.value
+                    table_description = table_description_repo.reset_table_description(
+                        table_description,
+                        keep_keys=["id", "db_connection_id", "db_schema", "table_name"],
                     )
-                    rows.append(repository.save_table_info(table_description))
+                table_description.sync_status = TableDescriptionStatus.NOT_SCANNED.value
+                rows.append(repository.save_table_info(table_description))
 
             for table in tables:
                 # Add if source table not stored in Typesense
@@ -311,6 +499,15 @@ class SqlAlchemyScanner:
                     )
         return rows
 
+    def fingerprint_tables(
+        self, db_engine: Engine, schema: str | None, tables: list[str]
+    ) -> dict[str, TableFingerprint] | None:
+        try:
+            return get_schema_fingerprints(db_engine, schema, tables)
+        except Exception as e:
+            logger.warning(f"Unable to fingerprint schema '{schema}', doing a full refresh: {e}")
+            return None
+
     def synchronizing(
         self,
         scanner_request: ScannerRequest,
@@ -319,14 +516,10 @@ class SqlAlchemyScanner:
         rows = []
         for id in scanner_request.table_description_ids:
             table_description = repository.find_by_id(id)
-            table_info = TableDescription(
-                db_connection_id=table_description.db_connection_id,
-                table_name=table_description.table_name,
-                sync_status=TableDescriptionStatus.SYNCHRONIZING.value,
-                metadata=scanner_request.metadata,
-                db_schema=table_description.db_schema,
-            )
-            rows.append(repository.save_table_info(table_info))
+            # Keep the previous profile so unchanged columns can be reused
+            table_description.sync_status = TableDescriptionStatus.SYNCHRONIZING.value
+            table_description.metadata = scanner_request.metadata
+            rows.append(repository.save_table_info(table_description))
 
         return rows
 
@@ -359,6 +552,7 @@ class SqlAlchemyScanner:
         db_engine: Engine,
         column: dict,
         scanner_service: PostgreSqlScanner,
+        table_statistics: TableStatistics | None = None,
     ) -> ColumnDescription:
         meta_table_name = f"{meta.schema}.{table_name}" if meta.schema else table_name
         dynamic_meta_table = meta.tables[meta_table_name]
@@ -382,7 +576,11 @@ class SqlAlchemyScanner:
             return column_description
 
         category_values = scanner_service.cardinality_values(
-            dynamic_meta_table.c[column["name"]], db_engine
+            dynamic_meta_table.c[column["name"]],
+            db_engine,
+            statistics=(
+                table_statistics.get_column(column_name) if table_statistics else None
+            ),
         )
 
         if category_values:
@@ -402,7 +600,8 @@ class SqlAlchemyScanner:
         return column_description
 
     def get_table_schema(self, meta: MetaData, db_engine: Engine, table: str) -> str:
-        original_table = next((x for x in meta.sorted_tables if x.name == table), None)
+        meta_table_name = f"{meta.schema}.{table}" if meta.schema else table
+        original_table = meta.tables.get(meta_table_name)
         if original_table is None:
             raise ValueError(f"Table '{table}' not found in metadata.")
 
@@ -456,36 +655,86 @@ class SqlAlchemyScanner:
         for table_id in stored_tables_list:
             repository.delete_by_id(table_id)
 
-    def scan_single_table(
+    def profile_table(
         self,
         meta: MetaData,
         table_id: str,
         table_name: str,
         db_engine: Engine,
         db_connection_id: str,
-        repository: TableDescriptionRepository,
         scanner_service: PostgreSqlScanner,
         schema: str | None = None,
-        llm_config: LLMConfig = None,
         instruction: str = "",
+        previous: TableDescription | None = None,
+        fingerprint: TableFingerprint | None = None,
     ) -> TableDescription:
-        print(f"Scanning table '{table_name}'...")
-        inspector = inspect(db_engine)
+        """Profile columns, DDL and examples of a table, without any LLM call."""
         table_columns = []
-        columns = inspector.get_columns(table_name=table_name, schema=schema)
-        columns = [column for column in columns if column["name"].find(".") < 0]
+        meta_table_name = f"{meta.schema}.{table_name}" if meta.schema else table_name
+        columns = [
+            {"name": column.name, "type": column.type}
+            for column in meta.tables[meta_table_name].columns
+            if column.name.find(".") < 0
+        ]
+
+        # Columns whose definition and table data did not move keep their profile
+        reusable_columns = {}
+        if (
+            previous
+            and previous.columns
+            and fingerprint
+            and not fingerprint.data_changed(previous.schema_fingerprint)
+        ):
+            changed = fingerprint.changed_columns(previous.schema_fingerprint)
+            reusable_columns = {
+                column.name: column
+                for column in previous.columns
+                if column.name not in changed
+            }
 
+        table_statistics = None
+        if len(reusable_columns) < len(columns):
+            table_statistics = load_table_statistics(db_engine, table_name, schema)
+
+        previous_columns = {
+            column.name: column for column in (previous.columns if previous else [])
+        }
+        profiled_columns = []
         for column in columns:
-            table_columns.append(
-                self.get_processed_column(
-                    meta=meta,
-                    table_id=table_id,
-                    table_name=table_name,
-                    column=column,
-                    db_engine=db_engine,
-                    scanner_service=scanner_service,
-                )
+            if column["name"] in reusable_columns:
+                table_columns.append(reusable_columns[column["name"]])
+                continue
+            processed_column = self.get_processed_column(
+                meta=meta,
+                table_id=table_id,
+                table_name=table_name,
+                column=column,
+                db_engine=db_engine,
+                scanner_service=scanner_service,
+                table_statistics=table_statistics,
             )
+            # Keep descriptions; they are regenerated only when the column name, type
+            # or description instruction change
+            if column["name"] in previous_columns:
+                processed_column.description = previous_columns[column["name"]].description
+                processed_column.description_hash = previous_columns[
+                    column["name"]
+                ].description_hash
+            table_columns.append(processed_column)
+            profiled_columns.append(processed_column)
+
+        row_count = table_statistics.row_count if table_statistics else None
+        if row_count is None and fingerprint:
+            row_count = fingerprint.row_count
+        self.index_column_values(
+            meta,
+            db_engine,
+            table_name,
+            schema,
+            profiled_columns,
+            row_count=row_count,
+            table_statistics=table_statistics,
+        )
 
         table_schema = self.get_table_schema(
             meta=meta, db_engine=db_engine, table=table_name
@@ -495,34 +744,10 @@ class SqlAlchemyScanner:
             meta=meta, db_engine=db_engine, table=table_name, rows_number=3
         )
 
-        if llm_config:
-            table_columns_descriptions = TableColumnsDescriptionGenerator(llm_config)
-            columns_description = table_columns_descriptions.get_column_description(
-                meta=meta,
-                db_engine=db_engine,
-                table=table_name,
-                rows_number=5,
-                instruction=instruction,
-            )
-
-            table_description = table_columns_descriptions.get_table_description(
-                table=table_name,
-                columns_description=columns_description,
-                instruction=instruction,
-            )
-
-            for column in table_columns:
-                if column.name in columns_description:
-                    # Update the description with the value from the dictionary
-                    column.description = columns_description[column.name]
-            print(f"Table and columns generation `{table_name}` is DONE")
-        else:
-            table_description = columns_description = None
-
-        object = TableDescription(
+        return TableDescription(
             db_connection_id=db_connection_id,
             table_name=table_name,
-            table_description=table_description,
+            table_description=previous.table_description if previous else None,
             columns=table_columns,
             examples=examples,
             table_schema=table_schema,
@@ -531,11 +756,208 @@ class SqlAlchemyScanner:
             sync_status=TableDescriptionStatus.SCANNED.value,
             db_schema=schema,
             instruction=instruction,
+            schema_fingerprint=fingerprint,
         )
 
+    def index_column_values(
+        self,
+        meta: MetaData,
+        db_engine: Engine,
+        table_name: str,
+        schema: str | None,
+        columns: list[ColumnDescription],
+        row_count: int | None = None,
+        table_statistics: TableStatistics | None = None,
+    ) -> None:
+        """Refresh the value index of the string columns that were (re)profiled.
+
+        Indexes come from the profiled categories or catalog statistics when
+        they hold every value; a GROUP BY over the column only runs on tables
+        known to have at most VALUE_INDEX_SCAN_MAX_ROWS rows, other columns
+        are indexed on their first lookup.
+        """
+        if value_index_store.max_values <= 0:
+            return
+        # Their previous index describes data that may have changed
+        value_index_store.invalidate(
+            db_engine, schema, table_name, [column.name for column in columns]
+        )
+        meta_table_name = f"{meta.schema}.{table_name}" if meta.schema else table_name
+        table = meta.tables[meta_table_name]
+        scan_values = row_count is not None and row_count <= VALUE_INDEX_SCAN_MAX_ROWS
+        indexes = {}
+        for column in columns:
+            if not is_indexable(table.c[column.name]):
+                continue
+            statistics = table_statistics.get_column(column.name) if table_statistics else None
+            try:
+                if column.low_cardinality and column.categories:
+                    indexes[column.name] = ColumnValueIndex(
+                        [str(value) for value in column.categories], complete=True
+                    )
+                elif statistics and statistics.has_all_values():
+                    indexes[column.name] = ColumnValueIndex(
+                        [str(value) for value in statistics.most_common_vals], complete=True
+                    )
+                elif scan_values:
+                    indexes[column.name] = value_index_store.build(
+                        db_engine, table, column.name
+                    )
+            except Exception as e:
+                logger.warning(f"Unable to index values of '{table_name}.{column.name}': {e}")
+        value_index_store.put(db_engine, schema, table_name, indexes)
+
+    def _profile_table_with_samples(
+        self,
+        generator: TableColumnsDescriptionGenerator,
+        **kwargs: Any,
+    ) -> tuple[TableDescription, dict[str, list]]:
+        table = self.profile_table(**kwargs)
+        samples = generator.get_column_samples(
+            kwargs["meta"], kwargs["db_engine"], kwargs["table_name"], rows_number=5
+        )
+        return table, samples
+
+    def scan_single_table(
+        self,
+        meta: MetaData,
+        table_id: str,
+        table_name: str,
+        db_engine: Engine,
+        db_connection_id: str,
+        repository: TableDescriptionRepository,
+        scanner_service: PostgreSqlScanner,
+        schema: str | None = None,
+        llm_config: LLMConfig = None,
+        instruction: str = "",
+        previous: TableDescription | None = None,
+        fingerprint: TableFingerprint | None = None,
+    ) -> TableDescription:
+        print(f"Scanning table '{table_name}'...")
+        object = self.profile_table(
+            meta=meta,
+            table_id=table_id,
+            table_name=table_name,
+            db_engine=db_engine,
+            db_connection_id=db_connection_id,
+            scanner_service=scanner_service,
+            schema=schema,
+            instruction=instruction,
+            previous=previous,
+            fingerprint=fingerprint,
+        )
+
+        if llm_config:
+            generator = TableColumnsDescriptionGenerator(llm_config)
+            samples = generator.get_column_samples(meta, db_engine, table_name, rows_number=5)
+            generator.describe_tables([(object, samples)], instruction)
+            print(f"Table and columns generation `{table_name}` is DONE")
+
         repository.save_table_info(object)
         return object
 
+    def _save_failed_table(
+        self,
+        repository: TableDescriptionRepository,
+        table: TableDescription,
+        error_message: str,
+    ) -> None:
+        repository.save_table_info(
+            TableDescription(
+                db_connection_id=table.db_connection_id,
+                table_name=table.table_name,
+                sync_status=TableDescriptionStatus.FAILED.value,
+                error_message=error_message,
+                db_schema=table.db_schema,
+            )
+        )
+
+    def _mark_scanned(
+        self,
+        table: TableDescription,
+        checkpoint: ScanCheckpoint,
+        report: ScanReport,
+        started: float,
+    ) -> None:
+        checkpoint.mark(table.id or table.table_name, TableDescriptionStatus.SCANNED.value)
+        report.scanned += 1
+        if report.scanned % SCAN_PROGRESS_INTERVAL == 0:
+            report.elapsed_seconds = time.perf_counter() - started
+            print(report.progress())
+
+    def _describe_and_save(
+        self,
+        generator: TableColumnsDescriptionGenerator,
+        profiled: list[tuple[TableDescription, tuple[TableDescription, dict]]],
+        instruction: str,
+        repository: TableDescriptionRepository,
+        checkpoint: ScanCheckpoint,
+        report: ScanReport,
+        started: float,
+    ) -> None:
+        try:
+            generator.describe_tables([result for _, result in profiled], instruction)
+        except Exception as e:
+            # Keep the profiles; descriptions are retried on the next scan
+            logger.error(f"Description generation failed for {len(profiled)} tables: {e}")
+        for table, (table_description, _) in profiled:
+            repository.save_table_info(table_description)
+            self._mark_scanned(table, checkpoint, report, started)
+
+    def get_table_fingerprint(
+        self, meta: MetaData, table_name: str, activity: dict
+    ) -> TableFingerprint:
+        meta_table_name = f"{meta.schema}.{table_name}" if meta.schema else table_name
+        columns = [
+            {"name": col.name, "type": col.type, "nullable": col.nullable}
+            for col in meta.tables[meta_table_name].columns
+        ]
+        return build_table_fingerprint(columns, activity.get(table_name))
+
+    def is_unchanged(
+        self,
+        table: TableDescription,
+        fingerprint: TableFingerprint,
+        llm_config: LLMConfig | None,
+        instruction: str,
+    ) -> bool:
+        """Whether a stored scan result is still valid for the current source table."""
+        if table.schema_fingerprint is None or not table.columns:
+            return False
+        if table.sync_status not in (
+            TableDescriptionStatus.SCANNED.value,
+            TableDescriptionStatus.SYNCHRONIZING.value,
+        ):
+            return False
+        if (table.instruction or "") != (instruction or ""):
+            return False
+        if llm_config and (
+            not table.table_description
+            or any(not column.description for column in table.columns)
+        ):
+            return False
+        return table.schema_fingerprint.hash == fingerprint.hash
+
+    def reflect_schema(
+        self,
+        db_engine: Engine,
+        schema: str | None,
+        tables: list[str],
+        refresh: bool = False,
+    ) -> tuple[MetaData, set[str]]:
+        """Reflect the requested tables of a schema, reusing the reflection cache."""
+        inspector = inspect(db_engine)
+        available = set(inspector.get_table_names(schema=schema)) | set(
+            inspector.get_view_names(schema=schema)
+        )
+        meta = reflection_cache.get_metadata(
+            db_engine,
+            schema=schema,
+            tables=[table for table in tables if table in available],
+            refresh=refresh,
+        )
+        return meta, available
+
     def scan(
         self,
         db_engine: Engine,
@@ -543,42 +965,131 @@ class SqlAlchemyScanner:
         repository: TableDescriptionRepository,
         llm_config: LLMConfig = None,
         instruction: str = "",
-    ) -> None:
+        resume: bool = True,
+        max_workers: int | None = None,
+        force: bool = False,
+    ) -> ScanReport:
         scanner_service = PostgreSqlScanner()
         db_connection_id = table_descriptions[0].db_connection_id
+        started = time.perf_counter()
 
-        inspect(db_engine)
-        payload_table_descriptions = []
-        for table in table_descriptions:
-            meta = MetaData(schema=table.db_schema)
-            meta.reflect(bind=db_engine, views=True, schema=table.db_schema)
-            try:
-                self.scan_single_table(
-                    meta=meta,
-                    table_id=table.id,
-                    table_name=table.table_name,
-                    db_engine=db_engine,
-                    db_connection_id=table.db_connection_id,
-                    repository=repository,
-                    scanner_service=scanner_service,
-                    schema=table.db_schema,
-                    llm_config=llm_config,
-                    instruction=instruction,
+        checkpoint_ids = [table.id or table.table_name for table in table_descriptions]
+        checkpoint = (
+            ScanCheckpoint.load(db_connection_id, checkpoint_ids)
+            if resume
+            else ScanCheckpoint(db_connection_id, checkpoint_ids)
+        )
+        pending = [
+            table
+            for table in table_descriptions
+            if not checkpoint.is_done(table.id or table.table_name)
+        ]
+        report = ScanReport(
+            total=len(table_descriptions),
+            skipped=len(table_descriptions) - len(pending),
+        )
+
+        tables_by_schema: dict[str | None, list[TableDescription]] = {}
+        for table in pending:
+            tables_by_schema.setdefault(table.db_schema, []).append(table)
+
+        workers = max_workers or get_scan_workers(db_engine)
+        generator = TableColumnsDescriptionGenerator(llm_config) if llm_config else None
+        print(f"Scanning {len(pending)} tables with {workers} workers...")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for schema, tables in tables_by_schema.items():
+                meta, available = self.reflect_schema(
+                    db_engine, schema, [table.table_name for table in tables], refresh=force
                 )
-            except Exception as e:
-                raise e
-                repository.save_table_info(
-                    TableDescription(
-                        db_connection_id=table.db_connection_id,
+                activity = load_schema_activity(db_engine, schema)
+                for table in tables:
+                    if table.table_name not in available:
+                        self._save_failed_table(
+                            repository, table, f"Table '{table.table_name}' not found"
+                        )
+                        report.failed += 1
+                        continue
+                    fingerprint = self.get_table_fingerprint(
+                        meta, table.table_name, activity
+                    )
+                    if not force and self.is_unchanged(
+                        table, fingerprint, llm_config, instruction
+                    ):
+                        if table.sync_status != TableDescriptionStatus.SCANNED.value:
+                            table.sync_status = TableDescriptionStatus.SCANNED.value
+                            repository.save_table_info(table)
+                        checkpoint.mark(
+                            table.id or table.table_name,
+                            TableDescriptionStatus.SCANNED.value,
+                        )
+                        report.unchanged += 1
+                        continue
+                    table_kwargs = dict(
+                        meta=meta,
+                        table_id=table.id,
                         table_name=table.table_name,
-                        status=TableDescriptionStatus.FAILED.value,
-                        error_message=f"{e}",
-                        db_schema=table.db_schema,
+                        db_engine=db_engine,
+                        db_connection_id=table.db_connection_id,
+                        scanner_service=scanner_service,
+                        schema=table.db_schema,
+                        instruction=instruction,
+                        previous=table,
+                        fingerprint=fingerprint,
                     )
+                    if generator:
+                        # LLM descriptions are generated across tables below
+                        future = executor.submit(
+                            self._profile_table_with_samples, generator, **table_kwargs
+                        )
+                    else:
+                        future = executor.submit(
+                            self.scan_single_table, repository=repository, **table_kwargs
+                        )
+                    futures[future] = table
+
+            profiled = []
+            for future in as_completed(futures):
+                table = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Scanning table '{table.table_name}' failed: {e}")
+                    self._save_failed_table(repository, table, str(e))
+                    report.failed += 1
+                    continue
+                if generator:
+                    # Describe in chunks while the workers keep profiling
+                    profiled.append((table, result))
+                    if len(profiled) >= SCANNER_DESCRIPTION_CHUNK:
+                        self._describe_and_save(
+                            generator,
+                            profiled,
+                            instruction,
+                            repository,
+                            checkpoint,
+                            report,
+                            started,
+                        )
+                        profiled = []
+                else:
+                    self._mark_scanned(table, checkpoint, report, started)
+
+            if profiled:
+                self._describe_and_save(
+                    generator,
+                    profiled,
+                    instruction,
+                    repository,
+                    checkpoint,
+                    report,
+                    started,
                 )
-            except Exception:  # noqa: S112
-                continue
-        print("Scanning tables is DONE")
+
+        report.elapsed_seconds = time.perf_counter() - started
+        if report.failed == 0:
+            checkpoint.clear()
+        print(f"Scanning tables is DONE. {report.progress()}")
 
         payload_table_descriptions = repository.get_all_tables_by_db(
             {
@@ -596,9 +1107,9 @@ class SqlAlchemyScanner:
                 for table in payload_table_descriptions
             ]
 
-            database_description = TableColumnsDescriptionGenerator(
-                llm_config
-            ).get_database_description(table_descriptions=payload_table_descriptions)
+            database_description = generator.get_database_description(
+                table_descriptions=payload_table_descriptions
+            )
 
             print(database_description)
 
@@ -610,3 +1121,5 @@ class SqlAlchemyScanner:
             db_connection = database_connection_repository.find_by_id(db_connection_id)
             db_connection.description = database_description
             database_connection_repository.update(db_connection)
+
+        return report
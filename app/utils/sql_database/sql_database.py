@@ -13,7 +13,7 @@ from urllib.parse import urlparse
 
 from fastapi import HTTPException
 import sqlparse
-from sqlalchemy import MetaData, create_engine, inspect, text
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.engine.row import Row
 from sqlalchemy.exc import OperationalError
@@ -272,8 +272,6 @@ class SQLDatabase:
 
     def get_tables_and_views(self, schema=None) -> List[str]:
         inspector = inspect(self._engine)
-        meta = MetaData()
-        meta.reflect(bind=self._engine, views=True, schema=schema)
         rows = inspector.get_table_names(schema=schema) + inspector.get_view_names(
             schema=schema
         )
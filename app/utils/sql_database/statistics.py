@@ -0,0 +1,259 @@
+"""Catalog statistics providers used by the scanner.
+
+Most warehouses already keep per-column statistics (distinct counts, most
+common values) in their catalog. Reading them is a metadata lookup, while
+`PostgreSqlScanner.cardinality_values` runs a GROUP BY over the whole column.
+Providers are registered per SQLAlchemy dialect name; dialects without a
+provider (or tables whose statistics are missing/stale) fall back to the
+query based path.
+"""
+
+import logging
+from datetime import datetime
+
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Fraction of rows modified since the last ANALYZE after which catalog
+# statistics are no longer trusted.
+STALE_MODIFIED_RATIO = 0.2
+
+
+class ColumnStatistics(BaseModel):
+    name: str
+    n_distinct: int | None = None
+    most_common_vals: list | None = None
+    null_frac: float | None = None
+
+    def has_all_values(self) -> bool:
+        """True when the most common values list enumerates every distinct value."""
+        if self.n_distinct is None or self.most_common_vals is None:
+            return False
+        return len(self.most_common_vals) >= self.n_distinct
+
+
+class TableStatistics(BaseModel):
+    table_name: str
+    db_schema: str | None = None
+    row_count: int | None = None
+    last_analyzed: datetime | None = None
+    stale: bool = False
+    columns: dict[str, ColumnStatistics] = {}
+
+    def get_column(self, column_name: str) -> ColumnStatistics | None:
+        if self.stale:
+            return None
+        return self.columns.get(column_name)
+
+
+class TableActivity(BaseModel):
+    """Cheap change signals for a table, used to fingerprint its data."""
+
+    row_count: int | None = None
+    modification_count: int | None = None
+
+
+class StatisticsProvider:
+    """Default provider: knows nothing, the scanner queries the table itself."""
+
+    # Whether get_schema_activity reports data changes, else fingerprints
+    # only see structure changes
+    tracks_activity = False
+
+    def get_table_statistics(
+        self, db_engine: Engine, table_name: str, schema: str | None = None
+    ) -> TableStatistics | None:
+        return None
+
+    def get_schema_activity(
+        self, db_engine: Engine, schema: str | None = None
+    ) -> dict[str, TableActivity]:
+        return {}
+
+
+class PostgreSqlStatisticsProvider(StatisticsProvider):
+    """Reads `pg_stats` and `pg_stat_user_tables`."""
+
+    tracks_activity = True
+
+    TABLE_QUERY = text(
+        """
+        SELECT
+            c.reltuples::bigint AS row_count,
+            GREATEST(s.last_analyze, s.last_autoanalyze) AS last_analyzed,
+            s.n_mod_since_analyze AS modified,
+            s.n_live_tup AS live_rows
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE n.nspname = :schema AND c.relname = :table_name
+        """
+    )
+
+    COLUMN_QUERY = text(
+        """
+        SELECT
+            attname,
+            n_distinct,
+            null_frac,
+            most_common_vals::text::text[] AS most_common_vals
+        FROM pg_stats
+        WHERE schemaname = :schema AND tablename = :table_name
+        """
+    )
+
+    ACTIVITY_QUERY = text(
+        """
+        SELECT
+            c.relname,
+            c.reltuples::bigint AS row_count,
+            s.n_tup_ins + s.n_tup_upd + s.n_tup_del AS modification_count
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE n.nspname = :schema AND c.relkind IN ('r', 'p', 'm', 'f')
+        """
+    )
+
+    def get_table_statistics(
+        self, db_engine: Engine, table_name: str, schema: str | None = None
+    ) -> TableStatistics | None:
+        params = {"schema": schema or "public", "table_name": table_name}
+        with db_engine.connect() as connection:
+            table_row = connection.execute(self.TABLE_QUERY, params).first()
+            if table_row is None:
+                return None
+            column_rows = connection.execute(self.COLUMN_QUERY, params).fetchall()
+
+        row_count, last_analyzed, modified, live_rows = table_row
+        row_count = max(int(row_count or 0), 0)
+
+        stale = last_analyzed is None or not column_rows
+        if not stale and modified is not None:
+            stale = modified > STALE_MODIFIED_RATIO * max(live_rows or row_count, 1)
+
+        columns = {}
+        for name, n_distinct, null_frac, most_common_vals in column_rows:
+            columns[name] = ColumnStatistics(
+                name=name,
+                n_distinct=self._absolute_distinct(n_distinct, row_count),
+                most_common_vals=most_common_vals,
+                null_frac=null_frac,
+            )
+
+        return TableStatistics(
+            table_name=table_name,
+            db_schema=schema,
+            row_count=row_count,
+            last_analyzed=last_analyzed,
+            stale=stale,
+            columns=columns,
+        )
+
+    def get_schema_activity(
+        self, db_engine: Engine, schema: str | None = None
+    ) -> dict[str, TableActivity]:
+        with db_engine.connect() as connection:
+            rows = connection.execute(
+                self.ACTIVITY_QUERY, {"schema": schema or "public"}
+            ).fetchall()
+        return {
+            name: TableActivity(
+                row_count=max(int(row_count), 0) if row_count is not None else None,
+                modification_count=modification_count,
+            )
+            for name, row_count, modification_count in rows
+        }
+
+    @staticmethod
+    def _absolute_distinct(n_distinct: float | None, row_count: int) -> int | None:
+        # Negative values in pg_stats are a fraction of the row count
+        if n_distinct is None:
+            return None
+        if n_distinct < 0:
+            return round(-n_distinct * row_count)
+        return int(n_distinct)
+
+
+class MySqlStatisticsProvider(StatisticsProvider):
+    """Reads the row estimate and last update time of `information_schema.tables`.
+
+    MySQL keeps no per-column statistics there, only activity is reported.
+    """
+
+    tracks_activity = True
+
+    ACTIVITY_QUERY = text(
+        """
+        SELECT
+            table_name,
+            table_rows,
+            UNIX_TIMESTAMP(update_time) AS updated_at
+        FROM information_schema.tables
+        WHERE table_schema = COALESCE(:schema, DATABASE())
+        """
+    )
+
+    def get_schema_activity(
+        self, db_engine: Engine, schema: str | None = None
+    ) -> dict[str, TableActivity]:
+        with db_engine.connect() as connection:
+            rows = connection.execute(self.ACTIVITY_QUERY, {"schema": schema}).fetchall()
+        return {
+            name: TableActivity(
+                row_count=int(row_count) if row_count is not None else None,
+                modification_count=int(updated_at) if updated_at is not None else None,
+            )
+            for name, row_count, updated_at in rows
+        }
+
+
+STATISTICS_PROVIDERS: dict[str, StatisticsProvider] = {
+    "postgresql": PostgreSqlStatisticsProvider(),
+    "mysql": MySqlStatisticsProvider(),
+}
+
+
+def register_statistics_provider(dialect: str, provider: StatisticsProvider) -> None:
+    STATISTICS_PROVIDERS[dialect] = provider
+
+
+def get_statistics_provider(db_engine: Engine) -> StatisticsProvider:
+    return STATISTICS_PROVIDERS.get(db_engine.dialect.name, StatisticsProvider())
+
+
+def tracks_activity(db_engine: Engine) -> bool:
+    """Whether fingerprints of this engine's tables see data changes."""
+    return get_statistics_provider(db_engine).tracks_activity
+
+
+def load_table_statistics(
+    db_engine: Engine, table_name: str, schema: str | None = None
+) -> TableStatistics | None:
+    """Fetch catalog statistics for a table, never failing the scan."""
+    provider = get_statistics_provider(db_engine)
+    try:
+        statistics = provider.get_table_statistics(db_engine, table_name, schema)
+    except Exception as e:
+        logger.warning(
+            f"Unable to read catalog statistics for '{table_name}', falling back to queries: {e}"
+        )
+        return None
+    if statistics and statistics.stale:
+        logger.debug(f"Catalog statistics for '{table_name}' are stale")
+    return statistics
+
+
+def load_schema_activity(
+    db_engine: Engine, schema: str | None = None
+) -> dict[str, TableActivity]:
+    """Fetch row count / modification counters for every table of a schema."""
+    provider = get_statistics_provider(db_engine)
+    try:
+        return provider.get_schema_activity(db_engine, schema)
+    except Exception as e:
+        logger.warning(f"Unable to read table activity for schema '{schema}': {e}")
+        return {}
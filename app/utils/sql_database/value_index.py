@@ -0,0 +1,270 @@
+"""Per-column value index used by the entity lookup tools.
+
+`ColumnEntityChecker` and the evaluation agent's `EntityFinder` look up cell
+values similar to an entity mentioned in a question. Fetching every distinct
+value of the column for each call is slow on high-cardinality columns, so the
+most frequent values of string columns (up to `VALUE_INDEX_MAX_VALUES`) are
+indexed once with trigram postings:
+
+* the scanner indexes the string columns it profiles from their categories or
+  catalog statistics, and with a GROUP BY only on tables of at most
+  `VALUE_INDEX_SCAN_MAX_ROWS` rows (by the catalog estimate);
+* re-profiled columns drop their previous index, columns of a table whose
+  data didn't change keep it;
+* the tools build a missing index on first use, or rebuild one older than
+  `VALUE_INDEX_TTL_SECONDS`, and query it afterwards.
+
+Indexes are kept in memory and persisted as JSON, one file per table, under
+`VALUE_INDEX_PATH`, keyed like the reflection cache by connection URL.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+import sqlalchemy
+from sqlalchemy import Table, func, select
+from sqlalchemy.engine import Engine
+
+from app.utils.sql_database.reflection_cache import ReflectionCache, reflection_cache
+
+logger = logging.getLogger(__name__)
+
+VALUE_INDEX_PATH = os.getenv(
+    "VALUE_INDEX_PATH", os.path.join("app", "data", "dbdata", "value_index")
+)
+VALUE_INDEX_MAX_VALUES = int(os.getenv("VALUE_INDEX_MAX_VALUES", "10000"))
+VALUE_INDEX_TTL_SECONDS = int(os.getenv("VALUE_INDEX_TTL_SECONDS", "86400"))
+# Larger tables, or tables of unknown size, are indexed on first lookup instead
+VALUE_INDEX_SCAN_MAX_ROWS = int(os.getenv("VALUE_INDEX_SCAN_MAX_ROWS", "1000000"))
+# Number of tables whose indexes are kept in memory
+VALUE_INDEX_CACHED_TABLES = 256
+
+
+def _trigrams(value: str) -> set[str]:
+    padded = f"\x02{value}\x03"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def is_indexable(column: sqlalchemy.Column) -> bool:
+    return isinstance(column.type, sqlalchemy.String)
+
+
+class ColumnValueIndex:
+    def __init__(self, values: list[str], complete: bool, built_at: float | None = None):
+        self.values = values
+        # True when `values` holds every distinct value of the column
+        self.complete = complete
+        self.built_at = built_at or time.time()
+        self._normalized = [value.strip().lower() for value in values]
+        self._postings: dict[str, list[int]] = {}
+        for index, value in enumerate(self._normalized):
+            for trigram in _trigrams(value):
+                self._postings.setdefault(trigram, []).append(index)
+
+    def is_stale(self, ttl_seconds: int) -> bool:
+        return time.time() - self.built_at >= ttl_seconds
+
+    def to_dict(self) -> dict:
+        return {"values": self.values, "complete": self.complete, "built_at": self.built_at}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ColumnValueIndex":
+        return cls(data["values"], data["complete"], data.get("built_at"))
+
+    def _candidates(self, entity: str) -> set[int]:
+        candidates = set()
+        for trigram in _trigrams(entity):
+            candidates.update(self._postings.get(trigram, ()))
+        return candidates
+
+    def similar(
+        self, entity: str, threshold: float = 0.4, limit: int = 25
+    ) -> list[tuple[str, float]]:
+        """Values whose similarity ratio with the entity reaches the threshold."""
+        entity = entity.strip().lower()
+        sequence = SequenceMatcher(None)
+        sequence.set_seq2(entity)
+        matches = []
+        for index in self._candidates(entity):
+            sequence.set_seq1(self._normalized[index])
+            if (
+                sequence.real_quick_ratio() >= threshold
+                and sequence.quick_ratio() >= threshold
+            ):
+                ratio = sequence.ratio()
+                if ratio >= threshold:
+                    matches.append((self.values[index].strip(), ratio))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches[:limit]
+
+    def containing(self, entity: str, limit: int = 25) -> list[str]:
+        """Values containing the entity, case-insensitively (like ILIKE '%entity%')."""
+        entity = entity.strip().lower()
+        inner = [entity[i : i + 3] for i in range(len(entity) - 2)]
+        if inner:
+            postings = sorted(
+                (self._postings.get(trigram, []) for trigram in inner), key=len
+            )
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            candidates = range(len(self.values))
+        return [
+            self.values[index]
+            for index in sorted(candidates)
+            if entity in self._normalized[index]
+        ][:limit]
+
+
+class ValueIndexStore:
+    def __init__(
+        self,
+        path: str | None = None,
+        max_values: int | None = None,
+        ttl_seconds: int | None = None,
+    ):
+        self.path = path or VALUE_INDEX_PATH
+        self.max_values = max_values if max_values is not None else VALUE_INDEX_MAX_VALUES
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else VALUE_INDEX_TTL_SECONDS
+        )
+        self._tables: OrderedDict[str, dict[str, ColumnValueIndex]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _table_key(db_engine: Engine, schema: str | None, table_name: str) -> str:
+        return f"{ReflectionCache.connection_key(db_engine)}-{schema or '_default'}-{table_name}"
+
+    def _file_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key.replace(os.sep, '_')}.json")
+
+    def _load_table(self, key: str) -> dict[str, ColumnValueIndex]:
+        with self._lock:
+            if key in self._tables:
+                self._tables.move_to_end(key)
+                return self._tables[key]
+        indexes = {}
+        file_path = self._file_path(key)
+        if os.path.exists(file_path):
+            try:
+                with open(file_path) as f:
+                    indexes = {
+                        column: ColumnValueIndex.from_dict(data)
+                        for column, data in json.load(f).items()
+                    }
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable value index {file_path}: {e}")
+        with self._lock:
+            self._tables[key] = indexes
+            while len(self._tables) > VALUE_INDEX_CACHED_TABLES:
+                self._tables.popitem(last=False)
+        return indexes
+
+    def _save_table(self, key: str, indexes: dict[str, ColumnValueIndex]) -> None:
+        file_path = self._file_path(key)
+        tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump({column: index.to_dict() for column, index in indexes.items()}, f)
+            os.replace(tmp_path, file_path)
+        except Exception as e:
+            logger.warning(f"Unable to persist value index {file_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(
+        self, db_engine: Engine, schema: str | None, table_name: str, column_name: str
+    ) -> ColumnValueIndex | None:
+        return self._load_table(self._table_key(db_engine, schema, table_name)).get(
+            column_name
+        )
+
+    def put(
+        self,
+        db_engine: Engine,
+        schema: str | None,
+        table_name: str,
+        indexes: dict[str, ColumnValueIndex],
+    ) -> None:
+        """Store (or replace) the indexes of some columns of a table."""
+        if not indexes:
+            return
+        key = self._table_key(db_engine, schema, table_name)
+        table_indexes = dict(self._load_table(key))
+        table_indexes.update(indexes)
+        with self._lock:
+            self._tables[key] = table_indexes
+        self._save_table(key, table_indexes)
+
+    def build(
+        self, db_engine: Engine, table: Table, column_name: str
+    ) -> ColumnValueIndex:
+        """Index the most frequent values of a column with one bounded GROUP BY."""
+        column = table.c[column_name]
+        occurrences = func.count().label("occurrences")
+        query = (
+            select(column, occurrences)
+            .where(column.isnot(None))
+            .group_by(column)
+            .order_by(occurrences.desc())
+            .limit(self.max_values + 1)
+        )
+        with db_engine.connect() as connection:
+            rows = connection.execute(query).fetchall()
+        return ColumnValueIndex(
+            [str(row[0]) for row in rows[: self.max_values]],
+            complete=len(rows) <= self.max_values,
+        )
+
+    def get_or_build(
+        self, db_engine: Engine, table_name: str, column_name: str
+    ) -> ColumnValueIndex:
+        """Index of `[schema.]table_name.column_name`, built on first use.
+
+        Indexes older than the TTL are rebuilt, they miss values added since.
+        """
+        schema, _, name = table_name.rpartition(".")
+        schema = schema or None
+        index = self.get(db_engine, schema, name, column_name)
+        if index is None or index.is_stale(self.ttl_seconds):
+            metadata = reflection_cache.get_metadata(db_engine, schema=schema, tables=[name])
+            table = metadata.tables[f"{schema}.{name}" if schema else name]
+            index = self.build(db_engine, table, column_name)
+            self.put(db_engine, schema, name, {column_name: index})
+        return index
+
+    def invalidate(
+        self,
+        db_engine: Engine,
+        schema: str | None,
+        table_name: str,
+        columns: list[str] | None = None,
+    ) -> None:
+        """Drop the indexes of some columns of a table, or of the whole table."""
+        key = self._table_key(db_engine, schema, table_name)
+        if columns is not None:
+            table_indexes = self._load_table(key)
+            if not any(column in table_indexes for column in columns):
+                return
+            table_indexes = {
+                column: index
+                for column, index in table_indexes.items()
+                if column not in columns
+            }
+            with self._lock:
+                self._tables[key] = table_indexes
+            self._save_table(key, table_indexes)
+            return
+        with self._lock:
+            self._tables.pop(key, None)
+        file_path = self._file_path(key)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+value_index_store = ValueIndexStore()
@@ -1,7 +1,6 @@
 import logging
 import re
 import time
-from difflib import SequenceMatcher
 from typing import Annotated, Any, Dict, List
 
 from langchain_classic.agents import AgentExecutor, create_react_agent
@@ -16,12 +15,12 @@ from langchain_community.tools.sql_database.tool import (
 )
 from overrides import override
 from pydantic import Field
-from sqlalchemy import MetaData, Table, select
 
 from app.modules.database_connection.models import DatabaseConnection
 from app.modules.prompt.models import Prompt
 from app.modules.sql_generation.models import SQLGeneration
 from app.utils.sql_database.sql_database import SQLDatabase
+from app.utils.sql_database.value_index import value_index_store
 from app.utils.sql_evaluator import Evaluation, Evaluator
 
 logger = logging.getLogger(__name__)
@@ -80,9 +79,6 @@ class EntityFinder(BaseSQLDatabaseTool, BaseTool):
     similarity_threshold: Annotated[float, Field(ge=0, le=1)] = 0.7
     number_similar_items: int = 20
 
-    def similarity(self, first_string: str, second_string: str) -> float:
-        return SequenceMatcher(None, first_string, second_string).ratio()
-
     def _run(
         self,
         input: str,
@@ -94,27 +90,15 @@ class EntityFinder(BaseSQLDatabaseTool, BaseTool):
             entity, column_name, table_name = input.split(", ")
             engine = self.db._engine
 
-            metadata = MetaData()
-            metadata.reflect(bind=engine)
-            table = Table(table_name, metadata, autoload=True)
-            column = table.c[column_name]
-
-            query = select(column.distinct()).select_from(table)
-
-            # Execute the query and fetch all rows
-            with engine.connect() as conn:
-                result = conn.execute(query)
-                rows = result.fetchall()
-
-            # Process the retrieved rows as needed
-            similar_items = []
-            for row in rows:
-                pair_similarity = self.similarity(entity, str(row[0]))
-                if pair_similarity > self.similarity_threshold:
-                    similar_items.append({"row": str(row[0]), "score": pair_similarity})
-            similar_items = sorted(
-                similar_items, key=lambda x: x["score"], reverse=True
-            )[: self.number_similar_items]
+            index = value_index_store.get_or_build(engine, table_name, column_name)
+            similar_items = [
+                {"row": value, "score": score}
+                for value, score in index.similar(
+                    entity,
+                    threshold=self.similarity_threshold,
+                    limit=self.number_similar_items,
+                )
+            ]
             for item in similar_items:
                 response += f"Column {column_name}, contains -> {item['row']}.\n"
 
@@ -20,12 +20,12 @@ from langchain_core.messages import HumanMessage
 from langgraph.prebuilt import create_react_agent
 from overrides import override
 from pydantic import Field
-from sqlalchemy import MetaData, Table, select
 
 from app.modules.database_connection.models import DatabaseConnection
 from app.modules.prompt.models import Prompt
 from app.modules.sql_generation.models import SQLGeneration
 from app.utils.sql_database.sql_database import SQLDatabase
+from app.utils.sql_database.value_index import value_index_store
 from app.utils.sql_evaluator import Evaluation, Evaluator
 
 logger = logging.getLogger(__name__)
@@ -83,25 +83,15 @@ class EntityFinderTool(BaseSQLDatabaseTool, BaseTool):
             entity, column_name, table_name = input.split(", ")
             engine = self.db._engine
 
-            metadata = MetaData()
-            metadata.reflect(bind=engine)
-            table = Table(table_name, metadata, autoload=True)
-            column = table.c[column_name]
-
-            query = select(column.distinct()).select_from(table)
-
-            with engine.connect() as conn:
-                result = conn.execute(query)
-                rows = result.fetchall()
-
-            similar_items = []
-            for row in rows:
-                pair_similarity = self.similarity(entity, str(row[0]))
-                if pair_similarity > self.similarity_threshold:
-                    similar_items.append({"row": str(row[0]), "score": pair_similarity})
-            similar_items = sorted(
-                similar_items, key=lambda x: x["score"], reverse=True
-            )[: self.number_similar_items]
+            index = value_index_store.get_or_build(engine, table_name, column_name)
+            similar_items = [
+                {"row": value, "score": score}
+                for value, score in index.similar(
+                    entity,
+                    threshold=self.similarity_threshold,
+                    limit=self.number_similar_items,
+                )
+            ]
             for item in similar_items:
                 response += f"Column {column_name}, contains -> {item['row']}.\n"
 
@@ -11,10 +11,16 @@ from app.modules.prompt.models import Prompt
 from app.modules.sql_generation.models import SQLGeneration
 # from app.server.config import Settings
 from app.utils.sql_database.sql_database import SQLDatabase
+from app.utils.sql_evaluator.simple_evaluator import SimpleEvaluator
 from app.utils.sql_generator.sql_generator import SQLGenerator
 from app.utils.sql_tools import replace_unprocessable_characters
 from app.utils.sql_generator.graph_agent.state import SQLAgentState
 from app.utils.sql_generator.graph_agent.graph import build_sql_agent_graph
+from app.utils.sql_generator.graph_agent.nodes import (
+    SQL_SPECULATIVE_EVALUATE,
+    SQL_SPECULATIVE_TEMPERATURE,
+)
+from app.utils.tracing import Trace, trace_generation
 
 logger = logging.getLogger(__name__)
 
@@ -22,16 +28,18 @@ logger = logging.getLogger(__name__)
 class LangGraphSQLAgent(SQLGenerator):
     """SQL agent implemented using LangGraph."""
 
-    def __init__(self, llm_config):
+    def __init__(self, llm_config, candidates: int = 1):
         from app.server.config import Settings
         super().__init__(llm_config)
         self.settings = Settings()
+        # More than one enables the speculative mode, see generate_candidates
+        self.candidates = candidates
 
-    def _get_llm(self, database_connection: DatabaseConnection):
+    def _get_llm(self, database_connection: DatabaseConnection, temperature: float = 0):
         """Get the LLM model configured for the specific database connection."""
         return self.model.get_model(
             database_connection=database_connection,
-            temperature=0,
+            temperature=temperature,
             model_family=self.llm_config.model_family,
             model_name=self.llm_config.model_name,
             api_base=self.llm_config.api_base,
@@ -46,6 +54,21 @@ class LangGraphSQLAgent(SQLGenerator):
         metadata: dict = None,
     ) -> SQLGeneration:
         """Generate SQL response using LangGraph."""
+        with trace_generation("graph_agent") as trace:
+            response = self._generate_response(
+                user_prompt, database_connection, metadata, trace
+            )
+            response.metadata = response.metadata or {}
+            response.metadata["trace"] = trace.to_dict()
+        return response
+
+    def _generate_response(
+        self,
+        user_prompt: Prompt,
+        database_connection: DatabaseConnection,
+        metadata: dict | None,
+        trace: Trace,
+    ) -> SQLGeneration:
         generation_start_time = datetime.now()
 
         # Initialize response object
@@ -59,7 +82,21 @@ class LangGraphSQLAgent(SQLGenerator):
         llm = self._get_llm(database_connection)
 
         # Build the graph
-        graph = build_sql_agent_graph(llm)
+        if self.candidates > 1:
+            evaluator = None
+            if SQL_SPECULATIVE_EVALUATE:
+                evaluator = SimpleEvaluator()
+                evaluator.llm_config = self.llm_config
+            graph = build_sql_agent_graph(
+                llm,
+                candidates=self.candidates,
+                candidate_llm=self._get_llm(
+                    database_connection, temperature=SQL_SPECULATIVE_TEMPERATURE
+                ),
+                evaluator=evaluator,
+            )
+        else:
+            graph = build_sql_agent_graph(llm)
 
         # Initialize the state
         initial_state = SQLAgentState(
@@ -75,7 +112,9 @@ class LangGraphSQLAgent(SQLGenerator):
         with get_openai_callback() as cb:
             try:
                 logger.info(f"Generating SQL response to question: {user_prompt.text}")
-                final_state = graph.invoke(initial_state)
+                final_state = graph.invoke(
+                    initial_state, {"callbacks": [trace.callback_handler]}
+                )
 
                 # Update response with results from final state
                 response.sql = replace_unprocessable_characters(
@@ -102,6 +141,9 @@ class LangGraphSQLAgent(SQLGenerator):
 
                 response.metadata = response.metadata or {}
                 response.metadata["timing"] = time_taken
+                speculation = final_state.get("metadata", {}).get("speculation")
+                if speculation:
+                    response.metadata["speculation"] = speculation
 
                 logger.info(
                     f"cost: {str(cb.total_cost)} tokens: {str(cb.total_tokens)}"
@@ -1,15 +1,18 @@
 from typing import Any, Dict
 
 from langchain_core.language_models import BaseLLM
-from langgraph.graph import StateGraph
+from langgraph.graph import START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
+from app.utils.sql_evaluator import Evaluator
 from app.utils.sql_generator.graph_agent.state import SQLAgentState
 from app.utils.sql_generator.graph_agent.nodes import (
     collect_context,
+    rank_tables,
     identify_relevant_tables,
     analyze_schemas,
     analyze_columns,
+    generate_candidates,
     generate_query,
     validate_query,
     format_response,
@@ -17,35 +20,58 @@ from app.utils.sql_generator.graph_agent.nodes import (
 )
 
 
-def build_sql_agent_graph(llm: BaseLLM) -> CompiledStateGraph:
-    """Build and compile the SQL agent graph."""
+def build_sql_agent_graph(
+    llm: BaseLLM,
+    candidates: int = 1,
+    candidate_llm: BaseLLM | None = None,
+    evaluator: Evaluator | None = None,
+) -> CompiledStateGraph:
+    """Build and compile the SQL agent graph.
+
+    With more than one candidate, generate_query generates and validates that
+    many candidates concurrently (see generate_candidates) with candidate_llm
+    and evaluator, and there is no separate validate_query node.
+    """
 
     # Create a new graph with the SQLAgentState
     graph = StateGraph(SQLAgentState)
 
     # Add nodes to the graph
     graph.add_node("collect_context", collect_context)
+    graph.add_node("rank_tables", rank_tables)
     graph.add_node("identify_tables", identify_relevant_tables)
     graph.add_node("analyze_schemas", analyze_schemas)
     graph.add_node("analyze_columns", analyze_columns)
 
     # For nodes that require additional parameters (like the LLM),
     # we need to use a lambda to pass them
-    graph.add_node("generate_query", lambda state: generate_query(state, llm))
-
-    graph.add_node("validate_query", validate_query)
+    if candidates > 1:
+        graph.add_node(
+            "generate_query",
+            lambda state: generate_candidates(
+                state, candidate_llm or llm, candidates, evaluator
+            ),
+        )
+    else:
+        graph.add_node("generate_query", lambda state: generate_query(state, llm))
+        graph.add_node("validate_query", validate_query)
     graph.add_node("format_response", format_response)
 
     # Add edges to the graph
-    graph.add_edge("collect_context", "identify_tables")
+    # Context retrieval and table ranking only need the question, so they run
+    # in parallel and identify_tables waits for both
+    graph.add_edge(START, "collect_context")
+    graph.add_edge(START, "rank_tables")
+    graph.add_edge(["collect_context", "rank_tables"], "identify_tables")
     graph.add_edge("identify_tables", "analyze_schemas")
     graph.add_edge("analyze_schemas", "analyze_columns")
     graph.add_edge("analyze_columns", "generate_query")
-    graph.add_edge("generate_query", "validate_query")
+    if candidates == 1:
+        graph.add_edge("generate_query", "validate_query")
 
     # Add conditional edges
     graph.add_conditional_edges(
-        "validate_query",
+        "generate_query" if candidates > 1 else "validate_query",
         should_refine_query,
         {
             "refine": "generate_query",  # Loop back to refine the query
@@ -53,8 +79,7 @@ def build_sql_agent_graph(llm: BaseLLM) -> CompiledStateGraph:
         },
     )
 
-    # Set entry and exit points
-    graph.set_entry_point("collect_context")
+    # Set exit point
     graph.set_finish_point("format_response")
 
     # Compile the graph
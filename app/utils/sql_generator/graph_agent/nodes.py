@@ -1,9 +1,11 @@
+from concurrent.futures import as_completed
 from typing import List
 from datetime import datetime
 import logging
+import os
+import threading
 import numpy as np
 from langchain_core.language_models import BaseLLM
-from concurrent.futures import ThreadPoolExecutor
 
 from app.data.db.storage import Storage
 from app.modules.business_glossary.services import BusinessGlossaryService
@@ -11,137 +13,123 @@ from app.modules.context_store.services import ContextStoreService
 from app.modules.database_connection.repositories import DatabaseConnectionRepository
 from app.modules.instruction.services import InstructionService
 from app.modules.prompt.models import Prompt
+from app.modules.sql_generation.models import SQLGeneration
 from app.modules.table_description.models import TableDescriptionStatus
 from app.modules.table_description.repositories import TableDescriptionRepository
 # from app.server.config import Settings
+from app.utils.core.executors import get_executor
 from app.utils.model.embedding_model import EmbeddingModel
 from app.utils.sql_database.sql_database import SQLDatabase
+from app.utils.sql_evaluator import Evaluator
 from app.utils.sql_generator.sql_generator import SQLGenerator
 from app.utils.sql_tools import replace_unprocessable_characters
+from app.utils.sql_tools.schema_catalog import SchemaCatalog
+from app.utils.sql_tools.schema_prompt import compile_schema_prompt
 from app.utils.sql_generator.graph_agent.state import SQLAgentState
 
 logger = logging.getLogger(__name__)
 
+# Number of most similar tables kept by rank_tables
+TOP_K_TABLES = 20
+
+# Speculative mode, see generate_candidates. Candidates generated per attempt
+# when the mode is requested, temperature of the candidate LLM, and the score
+# a candidate needs to win without waiting for the others
+SQL_SPECULATIVE_CANDIDATES = int(os.getenv("SQL_SPECULATIVE_CANDIDATES", "3"))
+SQL_SPECULATIVE_TEMPERATURE = float(os.getenv("SQL_SPECULATIVE_TEMPERATURE", "0.7"))
+SQL_SPECULATIVE_ACCEPT_SCORE = float(os.getenv("SQL_SPECULATIVE_ACCEPT_SCORE", "0.8"))
+SQL_SPECULATIVE_EVALUATE = os.getenv("SQL_SPECULATIVE_EVALUATE", "true").lower() == "true"
+
+CANDIDATE_HINTS = [
+    "",
+    "Build the query step by step with common table expressions.",
+    "Prefer explicit JOINs over subqueries.",
+    "Double check the filters, NULL handling and the grain of the aggregations.",
+    "Write the simplest query that answers the question.",
+]
+# Dialects where EXPLAIN checks a query without running it
+EXPLAIN_DIALECTS = {"postgresql", "mysql", "mariadb", "sqlite", "duckdb", "snowflake"}
+
 # Context Collection Nodes
 
 
-def collect_context(state: SQLAgentState) -> SQLAgentState:
-    from app.server.config import Settings
-    
-    start_time = datetime.now()
+def collect_context(state: SQLAgentState) -> dict:
     """Collect context from various services.
 
-    This node is responsible for:
-    1. Retrieving the database connection
-    2. Getting table descriptions (db_scan)
-    3. Retrieving few-shot examples relevant to the question
-    4. Retrieving instructions relevant to the question
-    5. Retrieving business metrics relevant to the question
-    6. Retrieving aliases if provided in metadata
+    This node runs in parallel with `rank_tables` and is responsible for:
+    1. Retrieving few-shot examples relevant to the question
+    2. Retrieving instructions relevant to the question
+    3. Retrieving business metrics relevant to the question
+    4. Retrieving aliases if provided in metadata
+
+    The retrievals run concurrently on the shared `typesense` executor. A failed
+    retrieval only leaves its context empty; missing tables are what make the
+    generation fail, and `rank_tables` reports those.
 
     Args:
         state: The current state of the SQL agent
 
     Returns:
-        Updated state with collected context
+        Update with the collected context
     """
-    try:
-        logger.info(f"Collecting context for question: {state.question}")
-
-        # Initialize services
-        storage = Storage(Settings())
-        context_store_service = ContextStoreService(storage)
-        instruction_service = InstructionService(storage)
-        business_metrics_service = BusinessGlossaryService(storage)
-        repository = TableDescriptionRepository(storage)
-        db_connection_repository = DatabaseConnectionRepository(storage)
-
-        # Get database connection
-        db_connection = db_connection_repository.find_by_id(state.db_connection_id)
-        if not db_connection:
-            state.error = (
-                f"Database connection with ID {state.db_connection_id} not found"
-            )
-            state.status = "INVALID"
-            return state
-
-        # Create a prompt object from the question
-        # This is needed because the services expect a Prompt object
-        prompt = Prompt(
-            id=state.prompt_id,
-            text=state.question,
-            db_connection_id=state.db_connection_id,
-            schemas=db_connection.schemas if hasattr(db_connection, "schemas") else [],
-            created_at=state.created_at,
-        )
-
-        # Use ThreadPoolExecutor to fetch context in parallel
-        with ThreadPoolExecutor() as executor:
-            # Get table descriptions (db_scan)
-            future_db_scan = executor.submit(
-                repository.get_all_tables_by_db,
-                {
-                    "db_connection_id": state.db_connection_id,
-                    "sync_status": TableDescriptionStatus.SCANNED.value,
-                }
-            )
-            # Get few-shot examples
-            future_few_shots_examples = executor.submit(context_store_service.retrieve_context_for_question, prompt)
-            # Get instructions
-            future_instructions = executor.submit(instruction_service.retrieve_instruction_for_question, prompt)
-            # Get business metrics
-            future_metrics = executor.submit(business_metrics_service.retrieve_business_metrics_for_question, prompt)
-
-            db_scan = future_db_scan.result()
-            few_shot_examples = future_few_shots_examples.result()
-            instructions = future_instructions.result()
-            business_metrics = future_metrics.result()
-
-        if not db_scan:
-            state.error = "No scanned tables found for database"
-            state.status = "INVALID"
-            return state
-
-        # Filter tables by schema if specified in the prompt
-        if hasattr(prompt, "schemas") and prompt.schemas:
-            db_scan = SQLGenerator.filter_tables_by_schema(
-                db_scan=db_scan, prompt=prompt
-            )
-        # Get aliases from metadata if available
-        aliases = state.metadata.get("aliases") if state.metadata else None
-
-        # Update state with collected context
-        state.db_scan = [table.model_dump() for table in db_scan]
-
-        if few_shot_examples:
-            # Remove duplicates
-            state.few_shot_examples = remove_duplicate_examples(few_shot_examples)
+    from app.server.config import Settings
 
-        if instructions:
-            state.instructions = instructions
+    logger.info(f"Collecting context for question: {state.question}")
 
-        if business_metrics:
-            state.business_metrics = business_metrics
+    storage = Storage(Settings())
+    context_store_service = ContextStoreService(storage)
+    instruction_service = InstructionService(storage)
+    business_metrics_service = BusinessGlossaryService(storage)
 
-        if aliases:
-            state.aliases = aliases
+    # Create a prompt object from the question
+    # This is needed because the services expect a Prompt object
+    prompt = Prompt(
+        id=state.prompt_id,
+        text=state.question,
+        db_connection_id=state.db_connection_id,
+        created_at=state.created_at,
+    )
 
-        logger.info(
-            f"Context collection complete. Found {len(state.db_scan)} tables, "
-            f"{len(state.few_shot_examples) if state.few_shot_examples else 0} examples, "
-            f"{len(state.instructions) if state.instructions else 0} instructions, "
-            f"{len(state.business_metrics) if state.business_metrics else 0} business metrics, "
-            f"{len(state.aliases) if state.aliases else 0} aliases."
+    futures = {
+        "few_shot_examples": get_executor("typesense").submit(
+            context_store_service.retrieve_context_for_question, prompt
+        ),
+        "instructions": get_executor("typesense").submit(
+            instruction_service.retrieve_instruction_for_question, prompt
+        ),
+        "business_metrics": get_executor("typesense").submit(
+            business_metrics_service.retrieve_business_metrics_for_question, prompt
+        ),
+    }
+    update = {}
+    for key, future in futures.items():
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Error collecting {key}: {str(e)}")
+            continue
+        if result:
+            update[key] = result
+
+    if update.get("few_shot_examples"):
+        # Remove duplicates
+        update["few_shot_examples"] = remove_duplicate_examples(
+            update["few_shot_examples"]
         )
-        print("="*50)
-        print(f"Time for collecting context: {datetime.now()-start_time}")
-        print("="*50)
-        return state
-    except Exception as e:
-        logger.error(f"Error collecting context: {str(e)}")
-        state.error = f"Error collecting context: {str(e)}"
-        state.status = "INVALID"
-        return state
+
+    # Get aliases from metadata if available
+    aliases = state.metadata.get("aliases") if state.metadata else None
+    if aliases:
+        update["aliases"] = aliases
+
+    logger.info(
+        f"Context collection complete. Found "
+        f"{len(update.get('few_shot_examples') or [])} examples, "
+        f"{len(update.get('instructions') or [])} instructions, "
+        f"{len(update.get('business_metrics') or [])} business metrics, "
+        f"{len(aliases or [])} aliases."
+    )
+    return update
 
 
 def remove_duplicate_examples(examples: List[dict]) -> List[dict]:
@@ -163,83 +151,134 @@ def remove_duplicate_examples(examples: List[dict]) -> List[dict]:
     return returned_result
 
 
-# Table Identification Node
+# Table Identification Nodes
 
 
-def identify_relevant_tables(state: SQLAgentState) -> SQLAgentState:
-    """Identify tables that are relevant to the user's question using embedding similarity.
+def table_representation(table: dict) -> str:
+    """Text embedded for a table: its columns (with descriptions) and description."""
+    col_parts = [
+        f"{col['name']}: {col['description']}" if col.get("description") else col["name"]
+        for col in table.get("columns", [])
+    ]
+    col_rep = ", ".join(col_parts)
+    if table.get("table_description"):
+        return f"Table {table['table_name']} contain columns: [{col_rep}], this tables has: {table['table_description']}"
+    return f"Table {table['table_name']} contain columns: [{col_rep}]"
 
-    This node is responsible for:
-    1. Creating embeddings for the user's question
-    2. Creating embeddings for table representations
-    3. Calculating similarity scores between the question and tables
-    4. Selecting the most relevant tables
-    5. Including tables from few-shot examples if available
+
+def rank_tables(state: SQLAgentState) -> dict:
+    """Load the scanned tables and rank them by similarity to the question.
+
+    This node runs in parallel with `collect_context` since it only needs the
+    question and the connection. It is responsible for:
+    1. Retrieving the database connection and its scanned tables (db_scan)
+    2. Embedding the question and the table representations concurrently
+    3. Keeping the `TOP_K_TABLES` most similar tables
+    4. Formatting the schemas of those tables ahead of `analyze_schemas`
 
     Args:
         state: The current state of the SQL agent
 
     Returns:
-        Updated state with relevant tables
+        Update with db_scan, ranked_tables and table_schemas, or the error
     """
-    start_time = datetime.now()
-    try:
-        logger.info(f"Identifying relevant tables for question: {state.question}")
-
-        if not state.db_scan:
-            logger.warning("No tables available in db_scan")
-            return state
+    from app.server.config import Settings
 
-        # Get embedding model
-        embedding_model = EmbeddingModel().get_model()
+    try:
+        logger.info(f"Ranking tables for question: {state.question}")
 
-        # Get question embedding
-        question_embedding = embedding_model.embed_query(
-            state.question.replace("\n", " ")
+        storage = Storage(Settings())
+        db_connection = DatabaseConnectionRepository(storage).find_by_id(
+            state.db_connection_id
         )
+        if not db_connection:
+            return {
+                "error": f"Database connection with ID {state.db_connection_id} not found",
+                "status": "INVALID",
+            }
+
+        db_scan = TableDescriptionRepository(storage).get_all_tables_by_db(
+            {
+                "db_connection_id": state.db_connection_id,
+                "sync_status": TableDescriptionStatus.SCANNED.value,
+            }
+        )
+        if not db_scan:
+            return {"error": "No scanned tables found for database", "status": "INVALID"}
 
-        # Create table representations and calculate similarity
-        table_representations = []
-        for table in state.db_scan:
-            # Create column representation
-            col_parts = [
-                f"{col['name']}: {col['description']}" if col.get("description") else col["name"]
-                for col in table.get("columns", [])
-            ]
-            col_rep = ", ".join(col_parts)
-
-            # Create table representation
-            if table.get("table_description"):
-                table_rep = f"Table {table['table_name']} contain columns: [{col_rep}], this tables has: {table['table_description']}"
-            else:
-                table_rep = f"Table {table['table_name']} contain columns: [{col_rep}]"
-
-            # Add to list
-            table_representations.append(
-                {
-                    "db_schema": table.get("db_schema"),
-                    "table_name": table.get("table_name"),
-                    "representation": table_rep,
-                }
+        # Filter tables by schema of the connection if any
+        schemas = db_connection.schemas if hasattr(db_connection, "schemas") else []
+        if schemas:
+            db_scan = SQLGenerator.filter_tables_by_schema(
+                db_scan=db_scan,
+                prompt=Prompt(
+                    text=state.question,
+                    db_connection_id=state.db_connection_id,
+                    schemas=schemas,
+                ),
             )
+        db_scan = [table.model_dump() for table in db_scan]
+        update = {"db_scan": db_scan}
 
-        # Batch embed table representations
-        texts = [table["representation"] for table in table_representations]
-        table_embeddings = embedding_model.embed_documents(texts)  # Batch embedding
+        try:
+            embedding_model = EmbeddingModel().get_model()
+            future_question = get_executor("typesense").submit(
+                embedding_model.embed_query, state.question.replace("\n", " ")
+            )
+            # Batch embed table representations
+            table_embeddings = embedding_model.embed_documents(
+                [table_representation(table) for table in db_scan]
+            )
+            question_embedding = future_question.result()
+        except Exception as e:
+            # Not critical, few-shot tables may still be found
+            logger.error(f"Error ranking tables: {str(e)}")
+            return update
 
-        # Compute batch similarities
         similarities = batch_cosine_similarity(question_embedding, table_embeddings)
-        for table, sim in zip(table_representations, similarities):
-            table["similarity"] = sim
+        ranked = sorted(
+            zip(db_scan, similarities, strict=True), key=lambda item: item[1], reverse=True
+        )[:TOP_K_TABLES]
+        update["ranked_tables"] = [
+            {
+                "db_schema": table.get("db_schema"),
+                "table_name": table.get("table_name"),
+                "similarity": similarity,
+            }
+            for table, similarity in ranked
+        ]
+        update["table_schemas"] = {
+            table_key(table): format_table_schema(table) for table, _ in ranked
+        }
 
+        return update
+    except Exception as e:
+        logger.error(f"Error loading tables: {str(e)}")
+        return {"error": f"Error loading tables: {str(e)}", "status": "INVALID"}
 
-        # Sort by similarity
-        table_representations.sort(key=lambda x: x["similarity"], reverse=True)
+
+def identify_relevant_tables(state: SQLAgentState) -> SQLAgentState:
+    """Identify tables that are relevant to the user's question.
+
+    Joins the two context branches: tables used by the few-shot examples come
+    first, followed by the tables ranked by embedding similarity.
+
+    Args:
+        state: The current state of the SQL agent
+
+    Returns:
+        Updated state with relevant tables
+    """
+    try:
+        if not state.db_scan:
+            logger.warning("No tables available in db_scan")
+            return state
 
         # Get tables from few-shot examples
         few_shot_tables = []
         seen_tables = set()
         if state.few_shot_examples:
+            catalog = SchemaCatalog(state.db_scan)
             try:
                 from sql_metadata import Parser
 
@@ -248,20 +287,19 @@ def identify_relevant_tables(state: SQLAgentState) -> SQLAgentState:
                         try:
                             tables = Parser(example["sql"]).tables
                             for table_name in tables:
-                                # Find matching tables in db_scan
-                                for table in state.db_scan:
-                                    if table["table_name"] == table_name:
-                                        key = f"{table.get('db_schema', '')}.{table_name}"
-                                        if key not in seen_tables:
-                                            seen_tables.add(key)
-                                            few_shot_tables.append(
-                                                {
-                                                    "db_schema": table.get("db_schema"),
-                                                    "table_name": table["table_name"],
-                                                    "similarity": 1.0,  # High similarity since it's from examples
-                                                    "from_few_shot": True,
-                                                }
-                                            )
+                                # Same table name in several schemas adds each of them
+                                for table in catalog.find_tables(table_name):
+                                    key = f"{table.get('db_schema', '')}.{table['table_name']}"
+                                    if key not in seen_tables:
+                                        seen_tables.add(key)
+                                        few_shot_tables.append(
+                                            {
+                                                "db_schema": table.get("db_schema"),
+                                                "table_name": table["table_name"],
+                                                "similarity": 1.0,  # High similarity since it's from examples
+                                                "from_few_shot": True,
+                                            }
+                                        )
                         except Exception as e:
                             logger.error(
                                 f"Error parsing SQL in few-shot example: {str(e)}"
@@ -273,9 +311,7 @@ def identify_relevant_tables(state: SQLAgentState) -> SQLAgentState:
 
         # Combine few-shot + top-K similar
         combined_tables = list(few_shot_tables)
-        top_k = 20  # Limit to top 20 tables
-
-        for table in table_representations[:top_k]:
+        for table in state.ranked_tables:
             key = f"{table.get('db_schema', '')}.{table['table_name']}"
             if key not in seen_tables:
                 seen_tables.add(key)
@@ -292,11 +328,6 @@ def identify_relevant_tables(state: SQLAgentState) -> SQLAgentState:
         logger.info(
             f"Identified {len(state.relevant_tables)} relevant tables: {', '.join(table_names)}"
         )
-
-        print("="*50)
-        print(f"Time for identifying table: {datetime.now()-start_time}")
-        print("="*50)
-
         return state
     except Exception as e:
         logger.error(f"Error identifying relevant tables: {str(e)}")
@@ -345,6 +376,37 @@ def batch_cosine_similarity(query_vector: List[float], matrix: List[List[float]]
 # Schema Analysis Node
 
 
+def table_key(table: dict) -> str:
+    db_schema = table.get("db_schema")
+    return f"{db_schema}.{table['table_name']}" if db_schema else table["table_name"]
+
+
+def format_table_schema(table: dict) -> dict:
+    """Schema information of a db_scan table, as used in the generation prompt."""
+    columns = []
+    for column in table.get("columns", []):
+        column_info = {
+            "name": column["name"],
+            "type": column.get("data_type", "UNKNOWN"),
+            "description": column.get("description", ""),
+            "is_primary_key": column.get("is_primary_key", False),
+            "is_foreign_key": column.get("foreign_key", False),
+            "references": column.get("references", None),
+            "low_cardinality": column.get("low_cardinality", False),
+            "categories": column.get("categories", []),
+        }
+        columns.append(column_info)
+
+    return {
+        "table_name": table["table_name"],
+        "db_schema": table.get("db_schema"),
+        "description": table.get("table_description", ""),
+        "columns": columns,
+        "sql_schema": table.get("table_schema", ""),
+        "examples": table.get("examples", []),
+    }
+
+
 def analyze_schemas(state: SQLAgentState) -> SQLAgentState:
     """Analyze schemas of relevant tables.
 
@@ -359,7 +421,6 @@ def analyze_schemas(state: SQLAgentState) -> SQLAgentState:
     Returns:
         Updated state with table schemas
     """
-    start_time = datetime.now()
     try:
         logger.info("Analyzing schemas for relevant tables")
 
@@ -375,63 +436,34 @@ def analyze_schemas(state: SQLAgentState) -> SQLAgentState:
             else:
                 relevant_table_names.append((None, table["table_name"]))
 
-        # Get schema information for relevant tables
+        # Get schema information for relevant tables, the ranked ones were
+        # already formatted by rank_tables
+        catalog = None
         schemas = {}
         for db_schema, table_name in relevant_table_names:
-            # Find the table in db_scan
-            for table in state.db_scan:
-                if (
-                    table["table_name"] == table_name
-                    and table.get("db_schema") == db_schema
-                ):
-                    # Format table schema
-                    table_key = f"{db_schema}.{table_name}" if db_schema else table_name
-
-                    # Extract column information
-                    columns = []
-                    for column in table.get("columns", []):
-                        column_info = {
-                            "name": column["name"],
-                            "type": column.get("data_type", "UNKNOWN"),
-                            "description": column.get("description", ""),
-                            "is_primary_key": column.get("is_primary_key", False),
-                            "is_foreign_key": column.get("foreign_key", False),
-                            "references": column.get("references", None),
-                            "low_cardinality": column.get("low_cardinality", False),
-                            "categories": column.get("categories", []),
-                        }
-                        columns.append(column_info)
-
-                    # Create schema information
-                    schema_info = {
-                        "table_name": table_name,
-                        "db_schema": db_schema,
-                        "description": table.get("table_description", ""),
-                        "columns": columns,
-                        "sql_schema": table.get("table_schema", ""),
-                        "examples": table.get("examples", []),
-                    }
-
-                    schemas[table_key] = schema_info
-                    break
+            key = f"{db_schema}.{table_name}" if db_schema else table_name
+            if key in state.table_schemas:
+                schemas[key] = state.table_schemas[key]
+                continue
+            if catalog is None:
+                catalog = SchemaCatalog(state.db_scan)
+            table = catalog.get_table(table_name, db_schema)
+            if table is not None:
+                schemas[key] = format_table_schema(table)
 
         # Update state
         state.table_schemas = schemas
 
         # Format schema information for logging
         schema_summary = []
-        for table_key, schema in schemas.items():
+        for key, schema in schemas.items():
             column_count = len(schema["columns"])
-            schema_summary.append(f"{table_key} ({column_count} columns)")
+            schema_summary.append(f"{key} ({column_count} columns)")
 
         logger.info(
             f"Analyzed schemas for {len(schemas)} tables: {', '.join(schema_summary)}"
         )
 
-        print("="*50)
-        print(f"Time for analyzing schema: {datetime.now()-start_time}")
-        print("="*50)
-
         return state
     except Exception as e:
         logger.error(f"Error analyzing schemas: {str(e)}")
@@ -457,7 +489,6 @@ def analyze_columns(state: SQLAgentState) -> SQLAgentState:
     Returns:
         Updated state with relevant column information
     """
-    start_time = datetime.now()
     try:
         logger.info("Analyzing columns for relevant tables")
 
@@ -545,10 +576,6 @@ def analyze_columns(state: SQLAgentState) -> SQLAgentState:
             f"Analyzed {len(column_info)} columns, identified {len(relevant_columns)} as potentially relevant"
         )
 
-        print("="*50)
-        print(f"Time for analyzing columns: {datetime.now()-start_time}")
-        print("="*50)
-
         return state
     except Exception as e:
         logger.error(f"Error analyzing columns: {str(e)}")
@@ -575,7 +602,6 @@ def generate_query(state: SQLAgentState, llm: BaseLLM) -> SQLAgentState:
     Returns:
         Updated state with generated SQL query
     """
-    start_time = datetime.now()
     try:
         logger.info(f"Generating SQL query for question: {state.question}")
 
@@ -612,10 +638,6 @@ def generate_query(state: SQLAgentState, llm: BaseLLM) -> SQLAgentState:
             f"Generated SQL query (iteration {state.iteration_count}): {sql_query[:100]}..."
         )
 
-        print("="*50)
-        print(f"Time for generating Query: {datetime.now()-start_time}")
-        print("="*50)
-
         return state
     except Exception as e:
         logger.error(f"Error generating SQL query: {str(e)}")
@@ -624,6 +646,160 @@ def generate_query(state: SQLAgentState, llm: BaseLLM) -> SQLAgentState:
         return state
 
 
+# Speculative Generation Node
+
+
+def probe_query(database: SQLDatabase, sql_query: str) -> str | None:
+    """Cheap validity check of a query, EXPLAIN where supported else a one row fetch.
+
+    Returns:
+        The error, or None when the query is valid
+    """
+    from app.utils.core.timeout import run_with_timeout
+
+    command = f"EXPLAIN {sql_query}" if database.dialect in EXPLAIN_DIALECTS else sql_query
+    try:
+        run_with_timeout(
+            database.run_sql,
+            args=(command,),
+            kwargs={"top_k": 1},
+            timeout_duration=int(os.getenv("SQL_EXECUTION_TIMEOUT", "60")),
+        )
+        return None
+    except TimeoutError:
+        return "SQL query execution timed out"
+    except Exception as e:
+        return f"Error executing SQL query: {str(e)}"
+
+
+def generate_candidates(
+    state: SQLAgentState,
+    llm: BaseLLM,
+    candidates: int,
+    evaluator: Evaluator | None = None,
+) -> SQLAgentState:
+    """Generate several SQL candidates concurrently and keep the first good one.
+
+    Replaces generate_query and validate_query in speculative mode. Every
+    candidate gets a different hint, is probed with `probe_query` and, with an
+    evaluator, scored. The first valid candidate scoring at least
+    SQL_SPECULATIVE_ACCEPT_SCORE wins and the others are cancelled; otherwise
+    the best valid candidate is used. Without an evaluator the first valid
+    candidate wins. When none is valid, the error of the first one is kept for
+    the refinement loop.
+
+    Args:
+        state: The current state of the SQL agent
+        llm: The language model to use for generation
+        candidates: Number of candidates to generate
+        evaluator: Optional evaluator scoring the valid candidates
+
+    Returns:
+        Updated state with the selected SQL query
+    """
+    try:
+        from app.server.config import Settings
+
+        state.iteration_count += 1
+        logger.info(f"Generating {candidates} SQL candidates for question: {state.question}")
+
+        db_connection = DatabaseConnectionRepository(Storage(Settings())).find_by_id(
+            state.db_connection_id
+        )
+        if not db_connection:
+            state.error = f"Database connection with ID {state.db_connection_id} not found"
+            state.status = "INVALID"
+            return state
+        database = SQLDatabase.get_sql_engine(db_connection)
+        prompt = construct_sql_generation_prompt(state)
+        user_prompt = Prompt(
+            id=state.prompt_id, text=state.question, db_connection_id=state.db_connection_id
+        )
+        # Set once a winner is chosen, candidates still running stop early
+        decided = threading.Event()
+
+        def run_candidate(index: int) -> dict:
+            candidate = {"index": index, "sql": "", "valid": False, "score": 0.0, "error": None}
+            hint = CANDIDATE_HINTS[index % len(CANDIDATE_HINTS)]
+            response = llm.invoke(f"{prompt}5. {hint}\n" if hint else prompt)
+            candidate["sql"] = replace_unprocessable_characters(
+                extract_sql_from_response(response.content)
+            )
+            if not candidate["sql"]:
+                candidate["error"] = "No SQL query was generated"
+                return candidate
+            if decided.is_set():
+                return candidate
+            candidate["error"] = probe_query(database, candidate["sql"])
+            candidate["valid"] = candidate["error"] is None
+            if not candidate["valid"] or decided.is_set():
+                return candidate
+            if evaluator is None:
+                candidate["score"] = 1.0
+                return candidate
+            try:
+                candidate["score"] = evaluator.evaluate(
+                    user_prompt=user_prompt,
+                    sql_generation=SQLGeneration(
+                        prompt_id=state.prompt_id, sql=candidate["sql"], status="VALID"
+                    ),
+                    database_connection=db_connection,
+                ).score
+            except Exception as e:
+                logger.warning(f"Unable to score SQL candidate {index}: {str(e)}")
+            return candidate
+
+        futures = [get_executor("llm").submit(run_candidate, index) for index in range(candidates)]
+        results = []
+        winner = None
+        for future in as_completed(futures):
+            try:
+                candidate = future.result()
+            except Exception as e:
+                candidate = {"sql": "", "valid": False, "score": 0.0, "error": str(e)}
+            results.append(candidate)
+            if candidate["valid"] and candidate["score"] >= SQL_SPECULATIVE_ACCEPT_SCORE:
+                winner = candidate
+                break
+        decided.set()
+        cancelled = sum(future.cancel() for future in futures)
+        if winner is None:
+            valid = [candidate for candidate in results if candidate["valid"]]
+            winner = max(valid, key=lambda candidate: candidate["score"], default=None)
+
+        state.metadata["speculation"] = {
+            "candidates": [
+                {key: candidate.get(key) for key in ("index", "valid", "score", "error")}
+                for candidate in results
+            ],
+            "cancelled": cancelled,
+            "winner": winner.get("index") if winner else None,
+            "confidence_score": winner["score"] if winner and evaluator else None,
+        }
+        if winner is not None:
+            state.generated_sql = winner["sql"]
+            state.status = "VALID"
+            state.error = None
+            logger.info(
+                f"Selected SQL candidate {winner.get('index')} with score {winner['score']}, "
+                f"{cancelled} candidates cancelled"
+            )
+            return state
+
+        failed = min(results, key=lambda candidate: candidate.get("index", candidates))
+        state.generated_sql = failed["sql"] or state.generated_sql
+        state.error = failed["error"] or "No SQL query was generated"
+        if state.iteration_count >= state.max_iterations:
+            state.status = "INVALID"
+        logger.warning(f"No valid SQL candidate (iteration {state.iteration_count})")
+        return state
+    except Exception as e:
+        logger.error(f"Error generating SQL candidates: {str(e)}")
+        state.error = f"Error generating SQL candidates: {str(e)}"
+        state.status = "INVALID"
+        return state
+
+
 def construct_sql_generation_prompt(state: SQLAgentState) -> str:
     """Construct a prompt for SQL generation based on the state.
 
@@ -655,40 +831,19 @@ def construct_sql_generation_prompt(state: SQLAgentState) -> str:
                 prompt += f"- {table_name} (relevance: {similarity})\n"
         prompt += "\n"
 
-    # Add table schemas section
+    # Add table schemas, packed into the schema token budget with the
+    # columns found by analyze_columns ranked first
     if state.table_schemas:
-        prompt += "### Table Schemas\n"
-        for table_key, schema in state.table_schemas.items():
-            prompt += f"Table: {table_key}\n"
-            if schema.get("description"):
-                prompt += f"Description: {schema['description']}\n"
-
-            prompt += "Columns:\n"
-            for column in schema.get("columns", []):
-                column_desc = f"- {column['name']} ({column['type']})"
-                if column.get("is_primary_key"):
-                    column_desc += " (PRIMARY KEY)"
-                if column.get("is_foreign_key"):
-                    column_desc += (
-                        f" (FOREIGN KEY -> {column.get('references', 'unknown')})"
-                    )
-                if column.get("description"):
-                    column_desc += f": {column['description']}"
-                prompt += column_desc + "\n"
-
-            prompt += "\n"
-
-    # Add relevant columns section with sample values
-    if state.relevant_columns:
-        prompt += "### Relevant Columns with Sample Values\n"
-        for column_key, info in state.relevant_columns.items():
-            prompt += f"- {column_key}"
-            if info.get("description"):
-                prompt += f": {info['description']}"
-            if info.get("sample_values"):
-                prompt += f" (samples: {', '.join(info['sample_values'])})"
-            prompt += "\n"
-        prompt += "\n"
+        schema_prompt = compile_schema_prompt(
+            state.table_schemas.values(),
+            question=state.question,
+            relevant_columns=state.relevant_columns.keys(),
+        )
+        prompt += f"### Table Schemas\n{schema_prompt.text}"
+        if schema_prompt.omitted_tables:
+            logger.info(
+                f"Schema token budget reached, omitted tables: {', '.join(schema_prompt.omitted_tables)}"
+            )
 
     # Add few-shot examples if available
     if state.few_shot_examples:
@@ -787,7 +942,6 @@ def validate_query(state: SQLAgentState) -> SQLAgentState:
     Returns:
         Updated state with execution result or error
     """
-    start_time = datetime.now()
     try:
         logger.info("Validating generated SQL query")
 
@@ -854,10 +1008,6 @@ def validate_query(state: SQLAgentState) -> SQLAgentState:
             # Don't mark as invalid yet, give a chance to refine
             logger.warning(f"Error executing SQL query: {str(e)}")
 
-        print("="*50)
-        print(f"Time for validating query: {datetime.now()-start_time}")
-        print("="*50)
-
         return state
     except Exception as e:
         logger.error(f"Error validating SQL query: {str(e)}")
@@ -19,6 +19,7 @@ class SQLAgentState(BaseModel):
     aliases: Optional[List[Dict[str, Any]]] = None
     
     # Processing state
+    ranked_tables: List[Dict[str, Any]] = Field(default_factory=list)
     relevant_tables: List[Dict[str, Any]] = Field(default_factory=list)
     table_schemas: Dict[str, Any] = Field(default_factory=dict)
     relevant_columns: Dict[str, Any] = Field(default_factory=dict)
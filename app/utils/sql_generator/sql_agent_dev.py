@@ -8,7 +8,6 @@ from langchain_classic.agents import AgentExecutor, create_react_agent
 from langchain_core.prompts import PromptTemplate
 from langchain_community.callbacks import get_openai_callback
 from overrides import override
-from concurrent.futures import ThreadPoolExecutor
 
 from app.data.db.storage import Storage
 from app.modules.business_glossary.services import BusinessGlossaryService
@@ -43,6 +42,7 @@ from app.utils.sql_generator.sql_database_toolkit_dev import SQLDatabaseToolkitD
 from app.utils.sql_generator.sql_generator import SQLGenerator
 from app.utils.sql_generator.sql_history import SQLHistory
 from app.utils.sql_tools import replace_unprocessable_characters
+from app.utils.core.executors import get_executor
 from app.utils.model.embedding_model import EmbeddingModel
 
 logger = logging.getLogger(__name__)
@@ -184,34 +184,34 @@ Thought:{{agent_scratchpad}}"""
         )
         repository = TableDescriptionRepository(storage)
 
-        # Use ThreadPoolExecutor to fetch context in parallel
-        with ThreadPoolExecutor() as executor:
-            # Get table descriptions (db_scan)
-            future_db_scan = executor.submit(
-                repository.get_all_tables_by_db,
-                {
-                    "db_connection_id": str(database_connection.id),
-                    "sync_status": TableDescriptionStatus.SCANNED.value,
-                },
-            )
-            # Get few-shot examples
-            future_few_shots_examples = executor.submit(
-                context_store_service.retrieve_context_for_question, user_prompt
-            )
-            # Get instructions
-            future_instructions = executor.submit(
-                instruction_service.retrieve_instruction_for_question, user_prompt
-            )
-            # Get business metrics
-            future_metrics = executor.submit(
-                business_metrics_service.retrieve_business_metrics_for_question,
-                user_prompt,
-            )
+        # Fetch context in parallel on the shared Typesense pool
+        executor = get_executor("typesense")
+        # Get table descriptions (db_scan)
+        future_db_scan = executor.submit(
+            repository.get_all_tables_by_db,
+            {
+                "db_connection_id": str(database_connection.id),
+                "sync_status": TableDescriptionStatus.SCANNED.value,
+            },
+        )
+        # Get few-shot examples
+        future_few_shots_examples = executor.submit(
+            context_store_service.retrieve_context_for_question, user_prompt
+        )
+        # Get instructions
+        future_instructions = executor.submit(
+            instruction_service.retrieve_instruction_for_question, user_prompt
+        )
+        # Get business metrics
+        future_metrics = executor.submit(
+            business_metrics_service.retrieve_business_metrics_for_question,
+            user_prompt,
+        )
 
-            db_scan = future_db_scan.result()
-            few_shot_examples = future_few_shots_examples.result()
-            instructions = future_instructions.result()
-            business_metrics = future_metrics.result()
+        db_scan = future_db_scan.result()
+        few_shot_examples = future_few_shots_examples.result()
+        instructions = future_instructions.result()
+        business_metrics = future_metrics.result()
 
         if not db_scan:
             raise ValueError("No scanned tables found for database")
@@ -240,6 +240,7 @@ Thought:{{agent_scratchpad}}"""
             is_multiple_schema=len(user_prompt.schemas) > 1 if user_prompt.schemas else False,
             db_scan=db_scan,
             embedding=EmbeddingModel().get_model(),
+            question=user_prompt.text,
         )
 
         repository_retrieval_end_time = datetime.now()
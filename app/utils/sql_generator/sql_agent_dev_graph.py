@@ -2,7 +2,6 @@
 
 import logging
 import os
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from queue import Queue
 from typing import Annotated, Any, Dict, List, Tuple
@@ -30,6 +29,7 @@ from app.modules.prompt.models import Prompt
 from app.modules.sql_generation.models import IntermediateStep, SQLGeneration
 from app.modules.table_description.models import TableDescriptionStatus
 from app.modules.table_description.repositories import TableDescriptionRepository
+from app.utils.core.executors import get_executor
 from app.utils.model.embedding_model import EmbeddingModel
 from app.utils.prompts.agent_prompts_dev import (
     ADDITIONAL_PROMPT,
@@ -346,30 +346,30 @@ class LangGraphFullContextSQLAgent(SQLGenerator):
 
         repository = TableDescriptionRepository(storage)
 
-        # Use ThreadPoolExecutor to fetch context in parallel
-        with ThreadPoolExecutor() as executor:
-            future_db_scan = executor.submit(
-                repository.get_all_tables_by_db,
-                {
-                    "db_connection_id": str(database_connection.id),
-                    "sync_status": TableDescriptionStatus.SCANNED.value,
-                },
-            )
-            future_few_shots_examples = executor.submit(
-                context_store_service.retrieve_context_for_question, user_prompt
-            )
-            future_instructions = executor.submit(
-                instruction_service.retrieve_instruction_for_question, user_prompt
-            )
-            future_metrics = executor.submit(
-                business_metrics_service.retrieve_business_metrics_for_question,
-                user_prompt,
-            )
-
-            db_scan = future_db_scan.result()
-            few_shot_examples = future_few_shots_examples.result()
-            instructions = future_instructions.result()
-            business_metrics = future_metrics.result()
+        # Fetch context in parallel on the shared Typesense pool
+        executor = get_executor("typesense")
+        future_db_scan = executor.submit(
+            repository.get_all_tables_by_db,
+            {
+                "db_connection_id": str(database_connection.id),
+                "sync_status": TableDescriptionStatus.SCANNED.value,
+            },
+        )
+        future_few_shots_examples = executor.submit(
+            context_store_service.retrieve_context_for_question, user_prompt
+        )
+        future_instructions = executor.submit(
+            instruction_service.retrieve_instruction_for_question, user_prompt
+        )
+        future_metrics = executor.submit(
+            business_metrics_service.retrieve_business_metrics_for_question,
+            user_prompt,
+        )
+
+        db_scan = future_db_scan.result()
+        few_shot_examples = future_few_shots_examples.result()
+        instructions = future_instructions.result()
+        business_metrics = future_metrics.result()
 
         if not db_scan:
             raise ValueError("No scanned tables found for database")
@@ -394,6 +394,7 @@ class LangGraphFullContextSQLAgent(SQLGenerator):
             is_multiple_schema=len(user_prompt.schemas) > 1 if user_prompt.schemas else False,
             db_scan=db_scan,
             embedding=EmbeddingModel().get_model(),
+            question=user_prompt.text,
         )
 
         repository_retrieval_end_time = datetime.now()
@@ -543,30 +544,30 @@ class LangGraphFullContextSQLAgent(SQLGenerator):
 
         repository = TableDescriptionRepository(storage)
 
-        # Use ThreadPoolExecutor to fetch context in parallel
-        with ThreadPoolExecutor() as executor:
-            future_db_scan = executor.submit(
-                repository.get_all_tables_by_db,
-                {
-                    "db_connection_id": str(database_connection.id),
-                    "sync_status": TableDescriptionStatus.SCANNED.value,
-                },
-            )
-            future_few_shots_examples = executor.submit(
-                context_store_service.retrieve_context_for_question, user_prompt
-            )
-            future_instructions = executor.submit(
-                instruction_service.retrieve_instruction_for_question, user_prompt
-            )
-            future_metrics = executor.submit(
-                business_metrics_service.retrieve_business_metrics_for_question,
-                user_prompt,
-            )
-
-            db_scan = future_db_scan.result()
-            few_shot_examples = future_few_shots_examples.result()
-            instructions = future_instructions.result()
-            business_metrics = future_metrics.result()
+        # Fetch context in parallel on the shared Typesense pool
+        executor = get_executor("typesense")
+        future_db_scan = executor.submit(
+            repository.get_all_tables_by_db,
+            {
+                "db_connection_id": str(database_connection.id),
+                "sync_status": TableDescriptionStatus.SCANNED.value,
+            },
+        )
+        future_few_shots_examples = executor.submit(
+            context_store_service.retrieve_context_for_question, user_prompt
+        )
+        future_instructions = executor.submit(
+            instruction_service.retrieve_instruction_for_question, user_prompt
+        )
+        future_metrics = executor.submit(
+            business_metrics_service.retrieve_business_metrics_for_question,
+            user_prompt,
+        )
+
+        db_scan = future_db_scan.result()
+        few_shot_examples = future_few_shots_examples.result()
+        instructions = future_instructions.result()
+        business_metrics = future_metrics.result()
 
         if not db_scan:
             queue.put("Error: No scanned tables found for database\n")
@@ -591,6 +592,7 @@ class LangGraphFullContextSQLAgent(SQLGenerator):
             is_multiple_schema=len(user_prompt.schemas) > 1 if user_prompt.schemas else False,
             db_scan=db_scan,
             embedding=EmbeddingModel().get_model(),
+            question=user_prompt.text,
         )
 
         aliases = metadata.get("aliases") if metadata and "aliases" in metadata else None
@@ -42,6 +42,7 @@ from app.utils.sql_generator.sql_database_toolkit import SQLDatabaseToolkit
 from app.utils.sql_generator.sql_generator import SQLGenerator
 from app.utils.sql_generator.sql_history import SQLHistory
 from app.utils.sql_tools import replace_unprocessable_characters
+from app.utils.tracing import Trace, trace_generation
 
 logger = logging.getLogger(__name__)
 
@@ -264,6 +265,22 @@ class LangGraphReActSQLAgent(SQLGenerator):
         metadata: dict = None,
     ) -> SQLGeneration:
         """Generate SQL response using LangGraph ReAct agent."""
+        with trace_generation("langgraph_react") as trace:
+            response = self._generate_response(
+                user_prompt, database_connection, context, metadata, trace
+            )
+            response.metadata = response.metadata or {}
+            response.metadata["trace"] = trace.to_dict()
+        return response
+
+    def _generate_response(
+        self,
+        user_prompt: Prompt,
+        database_connection: DatabaseConnection,
+        context: List[dict] | None,
+        metadata: dict | None,
+        trace: Trace,
+    ) -> SQLGeneration:
         generation_start_time = datetime.now()
         storage = Storage(self.settings)
         context_store_service = ContextStoreService(storage)
@@ -284,23 +301,24 @@ class LangGraphReActSQLAgent(SQLGenerator):
             api_base=self.llm_config.api_base,
         )
 
-        repository = TableDescriptionRepository(storage)
-        db_scan = repository.get_all_tables_by_db(
-            {
-                "db_connection_id": str(database_connection.id),
-                "sync_status": TableDescriptionStatus.SCANNED.value,
-            }
-        )
-        if not db_scan:
-            raise ValueError("No scanned tables found for database")
-
-        db_scan = SQLGenerator.filter_tables_by_schema(db_scan=db_scan, prompt=user_prompt)
-
-        few_shot_examples = context_store_service.retrieve_context_for_question(user_prompt)
-        instructions = instruction_service.retrieve_instruction_for_question(user_prompt)
-        business_metrics = business_metrics_service.retrieve_business_metrics_for_question(
-            user_prompt
-        )
+        with trace.span("collect_context"):
+            repository = TableDescriptionRepository(storage)
+            db_scan = repository.get_all_tables_by_db(
+                {
+                    "db_connection_id": str(database_connection.id),
+                    "sync_status": TableDescriptionStatus.SCANNED.value,
+                }
+            )
+            if not db_scan:
+                raise ValueError("No scanned tables found for database")
+
+            db_scan = SQLGenerator.filter_tables_by_schema(db_scan=db_scan, prompt=user_prompt)
+
+            few_shot_examples = context_store_service.retrieve_context_for_question(user_prompt)
+            instructions = instruction_service.retrieve_instruction_for_question(user_prompt)
+            business_metrics = business_metrics_service.retrieve_business_metrics_for_question(
+                user_prompt
+            )
 
         if few_shot_examples is not None:
             new_fewshot_examples = self.remove_duplicate_examples(few_shot_examples)
@@ -352,7 +370,10 @@ class LangGraphReActSQLAgent(SQLGenerator):
 
         with get_openai_callback() as cb:
             try:
-                result = graph.invoke(initial_state, {"metadata": metadata})
+                result = graph.invoke(
+                    initial_state,
+                    {"metadata": metadata, "callbacks": [trace.callback_handler]},
+                )
             except Exception as e:
                 logger.exception("LangGraph agent execution failed")
                 return SQLGeneration(
@@ -392,11 +413,12 @@ class LangGraphReActSQLAgent(SQLGenerator):
         intermediate_steps = extract_intermediate_steps(messages)
         response.intermediate_steps = self._build_intermediate_steps(intermediate_steps)
 
-        result_response = self.create_sql_query_status(
-            self.database,
-            response.sql,
-            response,
-        )
+        with trace.span("sql_query_status"):
+            result_response = self.create_sql_query_status(
+                self.database,
+                response.sql,
+                response,
+            )
 
         time_taken = {
             "agent_repository_setup_time": (
@@ -449,6 +471,20 @@ class LangGraphReActSQLAgent(SQLGenerator):
         metadata: dict = None,
     ):
         """Stream SQL response using LangGraph ReAct agent."""
+        with trace_generation("langgraph_react") as trace:
+            self._stream_response(
+                user_prompt, database_connection, response, queue, metadata, trace
+            )
+
+    def _stream_response(
+        self,
+        user_prompt: Prompt,
+        database_connection: DatabaseConnection,
+        response: SQLGeneration,
+        queue: Queue,
+        metadata: dict | None,
+        trace: Trace,
+    ):
         storage = Storage(self.settings)
         context_store_service = ContextStoreService(storage)
         instruction_service = InstructionService(storage)
@@ -528,7 +564,8 @@ class LangGraphReActSQLAgent(SQLGenerator):
         try:
             with get_openai_callback() as cb:
                 # Stream the graph execution
-                for event in graph.stream(initial_state, {"metadata": metadata}):
+                config = {"metadata": metadata, "callbacks": [trace.callback_handler]}
+                for event in graph.stream(initial_state, config):
                     for node_name, node_output in event.items():
                         if node_name == "agent":
                             messages = node_output.get("messages", [])
@@ -555,7 +592,7 @@ class LangGraphReActSQLAgent(SQLGenerator):
                                     )
 
                 # Get final result
-                final_result = graph.invoke(initial_state, {"metadata": metadata})
+                final_result = graph.invoke(initial_state, config)
                 messages = final_result.get("messages", [])
 
                 sql_query = ""
@@ -593,4 +630,6 @@ class LangGraphReActSQLAgent(SQLGenerator):
             response.status = "INVALID"
             response.error = str(e)
         finally:
+            response.metadata = response.metadata or {}
+            response.metadata["trace"] = trace.to_dict()
             queue.put(None)
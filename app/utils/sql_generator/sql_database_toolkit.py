@@ -12,6 +12,7 @@ from app.utils.sql_tools.get_few_shot_examples import GetFewShotExamples
 from app.utils.sql_tools.get_user_instructions import GetUserInstructions
 from app.utils.sql_tools.info_relevant_columns import InfoRelevantColumns
 from app.utils.sql_tools.query_sql_database import QuerySQLDataBaseTool
+from app.utils.sql_tools.schema_catalog import SchemaCatalog
 from app.utils.sql_tools.schema_sql_database import SchemaSQLDatabaseTool
 from app.utils.sql_tools.system_time import SystemTime
 from app.utils.sql_tools.tables_sql_database import TablesSQLDatabaseTool
@@ -42,6 +43,8 @@ class SQLDatabaseToolkit(BaseToolkit):
     def get_tools(self) -> List[BaseTool]:
         """Get the tools in the toolkit."""
         tools = []
+        # One keyed view of db_scan for all the tools of this generation
+        catalog = SchemaCatalog(self.db_scan)
         query_sql_db_tool = QuerySQLDataBaseTool(db=self.db, context=self.context)
         tools.append(query_sql_db_tool)
         if self.instructions:
@@ -54,9 +57,9 @@ class SQLDatabaseToolkit(BaseToolkit):
             few_shot_examples=self.few_shot_examples,
         )
         tools.append(tables_sql_db_tool)
-        schema_sql_db_tool = SchemaSQLDatabaseTool(db_scan=self.db_scan)
+        schema_sql_db_tool = SchemaSQLDatabaseTool(db_scan=self.db_scan, catalog=catalog)
         tools.append(schema_sql_db_tool)
-        info_relevant_tool = InfoRelevantColumns(db_scan=self.db_scan)
+        info_relevant_tool = InfoRelevantColumns(db_scan=self.db_scan, catalog=catalog)
         tools.append(info_relevant_tool)
         column_sample_tool = ColumnEntityChecker(
             db=self.db,
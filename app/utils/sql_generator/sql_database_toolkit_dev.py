@@ -13,6 +13,8 @@ from app.utils.sql_tools.column_entity_checker import ColumnEntityChecker
 # from app.utils.sql_tools.get_user_instructions import GetUserInstructions
 from app.utils.sql_tools.info_relevant_columns import InfoRelevantColumns
 from app.utils.sql_tools.query_sql_database import QuerySQLDataBaseTool
+from app.utils.sql_tools.schema_catalog import SchemaCatalog
+from app.utils.sql_tools.schema_prompt import SCHEMA_PROMPT_TOKEN_BUDGET
 from app.utils.sql_tools.schema_sql_database import SchemaSQLDatabaseTool
 from app.utils.sql_tools.system_time import SystemTime
 from app.utils.sql_tools.tables_sql_database import TablesSQLDatabaseTool
@@ -29,6 +31,7 @@ class SQLDatabaseToolkitDev(BaseToolkit):
     db_scan: List[TableDescription] = Field(exclude=True)
     embedding: Embeddings = Field(exclude=True)
     is_multiple_schema: bool = False
+    question: str | None = None
 
     @property
     def dialect(self) -> str:
@@ -43,6 +46,8 @@ class SQLDatabaseToolkitDev(BaseToolkit):
     def get_tools(self) -> List[BaseTool]:
         """Get the tools in the toolkit."""
         tools = []
+        # One keyed view of db_scan for all the tools of this generation
+        catalog = SchemaCatalog(self.db_scan)
         query_sql_db_tool = QuerySQLDataBaseTool(db=self.db, context=self.context)
         tools.append(query_sql_db_tool)
         get_current_datetime = SystemTime()
@@ -53,9 +58,14 @@ class SQLDatabaseToolkitDev(BaseToolkit):
             few_shot_examples=self.few_shot_examples,
         )
         tools.append(tables_sql_db_tool)
-        schema_sql_db_tool = SchemaSQLDatabaseTool(db_scan=self.db_scan)
+        schema_sql_db_tool = SchemaSQLDatabaseTool(
+            db_scan=self.db_scan,
+            catalog=catalog,
+            question=self.question,
+            token_budget=SCHEMA_PROMPT_TOKEN_BUDGET,
+        )
         tools.append(schema_sql_db_tool)
-        info_relevant_tool = InfoRelevantColumns(db_scan=self.db_scan)
+        info_relevant_tool = InfoRelevantColumns(db_scan=self.db_scan, catalog=catalog)
         tools.append(info_relevant_tool)
         column_sample_tool = ColumnEntityChecker(
             db=self.db,
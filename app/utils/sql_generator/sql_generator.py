@@ -26,6 +26,7 @@ from app.utils.core.strings import contains_line_breaks
 from app.utils.model.chat_model import ChatModel
 from app.utils.sql_database.sql_database import SQLDatabase
 from app.utils.sql_generator.sql_query_status import create_sql_query_status
+from app.utils.sql_tools.schema_catalog import SchemaCatalog
 
 
 def replace_unprocessable_characters(text: str) -> str:
@@ -58,11 +59,11 @@ class SQLGenerator(ABC):
         return query
 
     @staticmethod
-    def get_table_schema(table_name: str, db_scan: List[TableDescription]) -> str:
-        for table in db_scan:
-            if table.table_name == table_name:
-                return table.table_schema
-        return ""
+    def get_table_schema(
+        table_name: str, db_scan: List[TableDescription] | SchemaCatalog
+    ) -> str:
+        """Pass a SchemaCatalog when looking up several tables of the same scan."""
+        return SchemaCatalog.of(db_scan).table_schema(table_name)
 
     @staticmethod
     def filter_tables_by_schema(
@@ -1,6 +1,5 @@
-import difflib
 from typing import List
-from sqlalchemy import text
+from sqlalchemy import select
 
 from fastapi import HTTPException
 from langchain_core.callbacks import CallbackManagerForToolRun
@@ -10,7 +9,9 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.modules.table_description.models import TableDescription
 from app.server.errors import sql_agent_exceptions
+from app.utils.sql_database.reflection_cache import reflection_cache
 from app.utils.sql_database.sql_database import SQLDatabase
+from app.utils.sql_database.value_index import value_index_store
 from app.utils.sql_tools import replace_unprocessable_characters
 
 
@@ -30,19 +31,6 @@ class ColumnEntityChecker(BaseTool):
     db_scan: List[TableDescription]
     is_multiple_schema: bool
 
-    def find_similar_strings(
-        self, input_list: List[tuple], target_string: str, threshold=0.4
-    ):
-        similar_strings = []
-        for item in input_list:
-            similarity = difflib.SequenceMatcher(
-                None, str(item[0]).strip().lower(), target_string.lower()
-            ).ratio()
-            if similarity >= threshold:
-                similar_strings.append((str(item[0]).strip(), similarity))
-        similar_strings.sort(key=lambda x: x[1], reverse=True)
-        return similar_strings[:25]
-
     @sql_agent_exceptions()
     def _run(
         self,
@@ -60,25 +48,37 @@ class ColumnEntityChecker(BaseTool):
                 )
         except ValueError:
             return "Invalid input format, use following format: table_name -> column_name, entity (entity should be a string without ',')"
-        search_pattern = f"%{entity.strip().lower()}%"
-        search_query = text(f"SELECT DISTINCT {column_name} FROM {table_name} WHERE {column_name} ILIKE :search_pattern")
-        try:
-            search_results = self.db.engine.connect().execute(
-                search_query, {"search_pattern": search_pattern}
-            ).fetchall()
-            search_results = search_results[:25]
-        except SQLAlchemyError:
-            search_results = []
-        distinct_query = text(f"SELECT DISTINCT {column_name} FROM {table_name}")
-        results = self.db.engine.connect().execute(distinct_query).fetchall()
-        results = self.find_similar_strings(results, entity)
+        index = value_index_store.get_or_build(self.db.engine, table_name, column_name)
+        results = index.similar(entity)
+        search_results = index.containing(entity)
+        if not index.complete:
+            # Rare values are not indexed, look them up in the column itself
+            search_results += self.search_column(table_name, column_name, entity)
         similar_items = "Similar items:\n"
         already_added = {}
         for item in results:
             similar_items += f"{item[0]}\n"
             already_added[item[0]] = True
-        if len(search_results) > 0:
-            for item in search_results:
-                if item[0] not in already_added:
-                    similar_items += f"{item[0]}\n"
+        for item in search_results:
+            if item not in already_added:
+                similar_items += f"{item}\n"
+                already_added[item] = True
         return similar_items
+
+    def search_column(self, table_name: str, column_name: str, entity: str) -> list[str]:
+        schema, _, name = table_name.rpartition(".")
+        metadata = reflection_cache.get_metadata(
+            self.db.engine, schema=schema or None, tables=[name]
+        )
+        column = metadata.tables[table_name].c[column_name]
+        search_query = (
+            select(column)
+            .distinct()
+            .where(column.ilike(f"%{entity.strip().lower()}%"))
+            .limit(25)
+        )
+        try:
+            with self.db.engine.connect() as connection:
+                return [str(row[0]) for row in connection.execute(search_query)]
+        except SQLAlchemyError:
+            return []
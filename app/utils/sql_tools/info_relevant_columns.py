@@ -2,10 +2,12 @@ from typing import List
 
 from langchain_core.callbacks import CallbackManagerForToolRun
 from langchain_core.tools import BaseTool
+from pydantic import Field, model_validator
 
 from app.modules.table_description.models import TableDescription
 from app.server.errors import sql_agent_exceptions
 from app.utils.sql_tools import replace_unprocessable_characters
+from app.utils.sql_tools.schema_catalog import SchemaCatalog
 
 
 class InfoRelevantColumns(BaseTool):
@@ -20,9 +22,16 @@ class InfoRelevantColumns(BaseTool):
     Example Input: table1 -> column1, table1 -> column2, table2 -> column1
     """
     db_scan: List[TableDescription]
+    catalog: SchemaCatalog | None = Field(exclude=True, default=None)
+
+    @model_validator(mode="after")
+    def build_catalog(self) -> "InfoRelevantColumns":
+        if self.catalog is None:
+            self.catalog = SchemaCatalog(self.db_scan)
+        return self
 
     @sql_agent_exceptions()
-    def _run(  # noqa: C901, PLR0912
+    def _run(
         self,
         column_names: str,
         run_manager: CallbackManagerForToolRun | None = None,  # noqa: ARG002
@@ -38,25 +47,19 @@ class InfoRelevantColumns(BaseTool):
                 table_name = replace_unprocessable_characters(table_name)
                 column_name = replace_unprocessable_characters(column_name)
                 found = False
-                for table in self.db_scan:
-                    if table_name == table.table_name:
-                        col_info = ""
-                        for column in table.columns:
-                            if column_name == column.name:
-                                found = True
-                                col_info += f"Description: {column.description},"
-                                if column.low_cardinality:
-                                    col_info += f" categories = {column.categories},"
-                        col_info += " Sample rows: "
-                        if found:
-                            for row in table.examples:
-                                col_info += row[column_name] + ", "
-                            col_info = col_info[:-2]
-                            if table.db_schema:
-                                schema_table = f"{table.db_schema}.{table.table_name}"
-                            else:
-                                schema_table = table.table_name
-                            column_full_info += f"Table: {schema_table}, column: {column_name}, additional info: {col_info}\n"
+                for table, column in self.catalog.find_columns(table_name, column_name):
+                    found = True
+                    col_info = f"Description: {column.description},"
+                    if column.low_cardinality:
+                        col_info += f" categories = {column.categories},"
+                    col_info += " Sample rows: " + ", ".join(
+                        str(row[column_name]) for row in table.examples
+                    )
+                    if table.db_schema:
+                        schema_table = f"{table.db_schema}.{table.table_name}"
+                    else:
+                        schema_table = table.table_name
+                    column_full_info += f"Table: {schema_table}, column: {column_name}, additional info: {col_info}\n"
             else:
                 return "Malformed input, input should be in the following format Example Input: table1 -> column1, table1 -> column2, table2 -> column1"  # noqa: E501
             if not found:
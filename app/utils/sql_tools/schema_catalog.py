@@ -0,0 +1,65 @@
+from typing import Any, Generic, Iterable, TypeVar
+
+from app.modules.table_description.models import TableDescription
+
+T = TypeVar("T", TableDescription, dict)
+
+
+def _field(item: Any, name: str, default: Any = None) -> Any:
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+
+class SchemaCatalog(Generic[T]):
+    """Keyed view of a db_scan snapshot for O(1) table and column lookups.
+
+    Works on `TableDescription` objects as well as their `model_dump()` dicts
+    (the graph agent state). Build it once per snapshot and share it between
+    the tools of a generation; it does not follow later changes of the list.
+    """
+
+    def __init__(self, tables: Iterable[T]):
+        self.tables: dict[tuple[str | None, str], T] = {}
+        self.tables_by_name: dict[str, list[T]] = {}
+        self.columns: dict[tuple[str, str], list[tuple[T, Any]]] = {}
+        for table in tables:
+            db_schema = _field(table, "db_schema") or None
+            table_name = _field(table, "table_name")
+            if (db_schema, table_name) in self.tables:
+                continue
+            self.tables[(db_schema, table_name)] = table
+            self.tables_by_name.setdefault(table_name, []).append(table)
+            for column in _field(table, "columns") or []:
+                self.columns.setdefault((table_name, _field(column, "name")), []).append(
+                    (table, column)
+                )
+
+    @classmethod
+    def of(cls, tables: "Iterable[T] | SchemaCatalog[T]") -> "SchemaCatalog[T]":
+        return tables if isinstance(tables, SchemaCatalog) else cls(tables)
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def find_tables(self, table_name: str) -> list[T]:
+        """Tables matching `table_name`, either `db_schema.table` or a bare name in any schema."""
+        if table_name in self.tables_by_name:
+            return self.tables_by_name[table_name]
+        db_schema, _, name = table_name.partition(".")
+        table = self.tables.get((db_schema, name)) if name else None
+        return [table] if table is not None else []
+
+    def get_table(self, table_name: str, db_schema: str | None = None) -> T | None:
+        if db_schema:
+            return self.tables.get((db_schema, table_name))
+        tables = self.find_tables(table_name)
+        return tables[0] if tables else None
+
+    def find_columns(self, table_name: str, column_name: str) -> list[tuple[T, Any]]:
+        """(table, column) pairs of the tables named `table_name` having the column."""
+        return self.columns.get((table_name, column_name), [])
+
+    def table_schema(self, table_name: str) -> str:
+        table = self.get_table(table_name)
+        return (_field(table, "table_schema") or "") if table is not None else ""
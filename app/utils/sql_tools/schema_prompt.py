@@ -0,0 +1,303 @@
+"""Token-budgeted schema section of the SQL generation prompts.
+
+Wide tables with long descriptions, categories and sample rows easily exceed
+the context of the model, so the schema is packed into a token budget instead
+of being pasted as a whole. Tables are taken in retrieval order, then for each
+table the columns that look relevant to the question. What still fits is
+added in this order until the budget is used:
+
+1. tables (name and description) with their key columns and the columns
+   matching the question, most relevant table first;
+2. the other columns;
+3. categories of low cardinality columns;
+4. sample values.
+
+Every table is compiled to token-counted fragments once per version of its
+description and the fragments are cached, so only the packing runs per
+question. Tokens are counted with `count_tokens` of app.utils.core.tokens.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from app.modules.table_description.models import TableDescription
+from app.utils.core.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PROMPT_TOKEN_BUDGET = int(os.getenv("SCHEMA_PROMPT_TOKEN_BUDGET", "4000"))
+SCHEMA_PROMPT_CACHE_SIZE = 2048
+MAX_SAMPLE_VALUES = 3
+# Kept free per table for the "... more columns" line
+OMITTED_NOTE_TOKENS = 8
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class Fragment:
+    text: str
+    tokens: int
+
+    @classmethod
+    def of(cls, text: str) -> "Fragment | None":
+        return cls(text, count_tokens(text)) if text else None
+
+
+@dataclass
+class CompiledColumn:
+    name: str
+    words: set[str]
+    is_key: bool
+    line: Fragment
+    categories: Fragment | None = None
+    samples: Fragment | None = None
+
+
+@dataclass
+class CompiledTable:
+    key: str
+    header: Fragment
+    columns: list[CompiledColumn]
+
+
+@dataclass
+class SchemaPrompt:
+    text: str
+    tokens: int
+    tables: list[str] = field(default_factory=list)
+    omitted_tables: list[str] = field(default_factory=list)
+    omitted_columns: int = 0
+
+
+def _words(text: str | None) -> set[str]:
+    return {word for word in WORD_RE.findall((text or "").lower()) if len(word) > 2}
+
+
+def _schema_of(table: TableDescription | dict) -> dict:
+    """Accepts TableDescriptions, their dumps and the graph agent table schemas."""
+    if isinstance(table, TableDescription):
+        table = table.model_dump()
+    columns = []
+    for column in table.get("columns") or []:
+        # format_table_schema keeps the ForeignKeyDetail dump in is_foreign_key
+        foreign_key = column.get("foreign_key") or column.get("is_foreign_key")
+        references = column.get("references")
+        if isinstance(foreign_key, dict) and not references:
+            references = foreign_key.get("reference_table")
+        columns.append(
+            {
+                "name": column["name"],
+                "type": column.get("type") or column.get("data_type") or "UNKNOWN",
+                "description": column.get("description") or "",
+                "is_primary_key": bool(column.get("is_primary_key")),
+                "is_foreign_key": bool(foreign_key),
+                "references": references,
+                "low_cardinality": bool(column.get("low_cardinality")),
+                "categories": column.get("categories") or [],
+            }
+        )
+    return {
+        "table_name": table["table_name"],
+        "db_schema": table.get("db_schema"),
+        "description": table.get("description") or table.get("table_description") or "",
+        "columns": columns,
+        "examples": table.get("examples") or [],
+    }
+
+
+def _compile(schema: dict) -> CompiledTable:
+    db_schema = schema["db_schema"]
+    key = f"{db_schema}.{schema['table_name']}" if db_schema else schema["table_name"]
+    header = f"Table: {key}\n"
+    if schema["description"]:
+        header += f"Description: {schema['description']}\n"
+    header += "Columns:\n"
+
+    columns = []
+    for column in schema["columns"]:
+        name = column["name"]
+        line = f"- {name} ({column['type']})"
+        if column["is_primary_key"]:
+            line += " (PRIMARY KEY)"
+        if column["is_foreign_key"]:
+            line += f" (FOREIGN KEY -> {column['references'] or 'unknown'})"
+        if column["description"]:
+            line += f": {column['description']}"
+        categories = ""
+        if column["low_cardinality"] and column["categories"]:
+            categories = f" [categories: {', '.join(map(str, column['categories']))}]"
+        samples = []
+        for row in schema["examples"]:
+            value = row.get(name) if isinstance(row, dict) else None
+            if value is not None and str(value) not in samples:
+                samples.append(str(value))
+            if len(samples) == MAX_SAMPLE_VALUES:
+                break
+        columns.append(
+            CompiledColumn(
+                name=name,
+                words=_words(name.replace("_", " ")) | _words(column["description"]),
+                is_key=column["is_primary_key"] or column["is_foreign_key"],
+                line=Fragment(line, count_tokens(line + "\n")),
+                categories=Fragment.of(categories),
+                samples=Fragment.of(f" [samples: {', '.join(samples)}]" if samples else ""),
+            )
+        )
+    # The blank line after the table is counted with its header
+    return CompiledTable(
+        key=key, header=Fragment(header, count_tokens(header + "\n")), columns=columns
+    )
+
+
+class CompiledTableCache:
+    """Compiled tables by content hash, so an updated description is recompiled."""
+
+    def __init__(self, max_size: int = SCHEMA_PROMPT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, CompiledTable] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, table: TableDescription | dict) -> CompiledTable:
+        schema = _schema_of(table)
+        version = hashlib.sha1(
+            json.dumps(schema, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        with self._lock:
+            compiled = self._entries.get(version)
+            if compiled is not None:
+                self._entries.move_to_end(version)
+                return compiled
+        compiled = _compile(schema)
+        with self._lock:
+            self._entries[version] = compiled
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+compiled_tables = CompiledTableCache()
+
+
+def _column_score(
+    table_key: str, column: CompiledColumn, question_words: set[str], relevant: set[str]
+) -> float:
+    score = len(column.words & question_words)
+    if f"{table_key}.{column.name}" in relevant:
+        score += 2
+    if column.is_key:
+        score += 1
+    return score
+
+
+def compile_schema_prompt(
+    tables: Iterable[TableDescription | dict],
+    question: str = "",
+    token_budget: int | None = None,
+    relevant_columns: Iterable[str] = (),
+) -> SchemaPrompt:
+    """Pack the schema of `tables`, most relevant first, into `token_budget` tokens.
+
+    `relevant_columns` are `table_key.column` names known to matter (e.g. from
+    the column analysis); they are ranked before the other columns.
+    """
+    budget = SCHEMA_PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    question_words = _words(question)
+    relevant = set(relevant_columns)
+    compiled = []
+    seen = set()
+    for table in tables:
+        table = compiled_tables.get(table)
+        if table.key not in seen:
+            seen.add(table.key)
+            compiled.append(table)
+
+    used = 0
+    included: dict[str, set[tuple[str, str]]] = {}
+
+    def add(
+        table: CompiledTable, part: str, fragment: Fragment | None, name: str = "", extra: int = 0
+    ) -> bool:
+        nonlocal used
+        if fragment is None or used + fragment.tokens + extra > budget:
+            return False
+        used += fragment.tokens + extra
+        included[table.key].add((part, name))
+        return True
+
+    ranked_columns: dict[str, list[tuple[float, CompiledColumn]]] = {}
+    for table in compiled:
+        included[table.key] = set()
+        ranked = sorted(
+            (
+                (_column_score(table.key, column, question_words, relevant), column)
+                for column in table.columns
+            ),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        # A table is only worth listing with at least its best column
+        best = ranked[0][1].line.tokens if ranked else 0
+        if used + table.header.tokens + OMITTED_NOTE_TOKENS + best > budget:
+            continue
+        add(table, "header", table.header, extra=OMITTED_NOTE_TOKENS)
+        ranked_columns[table.key] = ranked
+        for position, (score, column) in enumerate(ranked):
+            if score > 0 or position == 0:
+                add(table, "column", column.line, column.name)
+    tables = [table for table in compiled if table.key in ranked_columns]
+
+    for table in tables:
+        for _, column in ranked_columns[table.key]:
+            if ("column", column.name) not in included[table.key]:
+                add(table, "column", column.line, column.name)
+    for part in ("categories", "samples"):
+        for table in tables:
+            for _, column in ranked_columns[table.key]:
+                if ("column", column.name) in included[table.key]:
+                    add(table, part, getattr(column, part), column.name)
+
+    text = ""
+    omitted_columns = 0
+    for table in tables:
+        parts = included[table.key]
+        text += table.header.text
+        omitted = 0
+        for column in table.columns:
+            if ("column", column.name) not in parts:
+                omitted += 1
+                continue
+            text += column.line.text
+            if ("categories", column.name) in parts:
+                text += column.categories.text
+            if ("samples", column.name) in parts:
+                text += column.samples.text
+            text += "\n"
+        if omitted:
+            text += f"- ... {omitted} more columns\n"
+        text += "\n"
+        omitted_columns += omitted
+
+    prompt = SchemaPrompt(
+        text=text,
+        tokens=count_tokens(text),
+        tables=[table.key for table in tables],
+        omitted_tables=[table.key for table in compiled if table.key not in ranked_columns],
+        omitted_columns=omitted_columns,
+    )
+    logger.debug(
+        f"Schema prompt: {prompt.tokens} tokens, {len(prompt.tables)} tables, "
+        f"{len(prompt.omitted_tables)} tables and {omitted_columns} columns omitted"
+    )
+    return prompt
@@ -2,10 +2,13 @@ from typing import List
 
 from langchain_core.callbacks import CallbackManagerForToolRun
 from langchain_core.tools import BaseTool
+from pydantic import Field, model_validator
 
 from app.modules.table_description.models import TableDescription
 from app.server.errors import sql_agent_exceptions
 from app.utils.sql_tools import replace_unprocessable_characters
+from app.utils.sql_tools.schema_catalog import SchemaCatalog
+from app.utils.sql_tools.schema_prompt import compile_schema_prompt
 
 
 class SchemaSQLDatabaseTool(BaseTool):
@@ -20,9 +23,20 @@ class SchemaSQLDatabaseTool(BaseTool):
     Example Input: table1, table2, table3
     """
     db_scan: List[TableDescription]
+    catalog: SchemaCatalog | None = Field(exclude=True, default=None)
+    # With a token budget the schemas are packed by compile_schema_prompt,
+    # columns relevant to the question first, instead of returned whole
+    question: str | None = Field(exclude=True, default=None)
+    token_budget: int | None = Field(exclude=True, default=None)
+
+    @model_validator(mode="after")
+    def build_catalog(self) -> "SchemaSQLDatabaseTool":
+        if self.catalog is None:
+            self.catalog = SchemaCatalog(self.db_scan)
+        return self
 
     @sql_agent_exceptions()
-    def _run(  # noqa: C901
+    def _run(
         self,
         table_names: str,
         run_manager: CallbackManagerForToolRun | None = None,  # noqa: ARG002
@@ -33,21 +47,32 @@ class SchemaSQLDatabaseTool(BaseTool):
         for table in table_names_list:
             formatted_table = replace_unprocessable_characters(table)
             if "." in formatted_table:
-                processed_table_names.append(formatted_table.split(".")[1])
-            else:
+                formatted_table = formatted_table.split(".")[1]
+            if formatted_table not in processed_table_names:
                 processed_table_names.append(formatted_table)
+        if self.token_budget is not None:
+            tables = [
+                table
+                for table_name in processed_table_names
+                for table in self.catalog.find_tables(table_name)
+            ]
+            if not tables:
+                return "Tables not found in the database"
+            return compile_schema_prompt(
+                tables, question=self.question or "", token_budget=self.token_budget
+            ).text
         tables_schema = "```sql\n"
-        for table in self.db_scan:
-            if table.table_name in processed_table_names:
+        for table_name in processed_table_names:
+            for table in self.catalog.find_tables(table_name):
                 tables_schema += table.table_schema + "\n"
                 descriptions = []
                 if table.table_description is not None:
                     if table.db_schema:
-                        table_name = f"{table.db_schema}.{table.table_name}"
+                        qualified_name = f"{table.db_schema}.{table.table_name}"
                     else:
-                        table_name = table.table_name
+                        qualified_name = table.table_name
                     descriptions.append(
-                        f"Table `{table_name}`: {table.table_description}\n"
+                        f"Table `{qualified_name}`: {table.table_description}\n"
                     )
                     for column in table.columns:
                         if column.description is not None:
@@ -0,0 +1,31 @@
+from app.utils.tracing.exporters import (
+    TraceExporter,
+    export_trace,
+    get_exporters,
+    register_exporter,
+)
+from app.utils.tracing.spans import (
+    Span,
+    Trace,
+    TraceCallbackHandler,
+    TracedEmbeddings,
+    current_trace,
+    record,
+    timed,
+    trace_generation,
+)
+
+__all__ = [
+    "Span",
+    "Trace",
+    "TraceCallbackHandler",
+    "TraceExporter",
+    "TracedEmbeddings",
+    "current_trace",
+    "export_trace",
+    "get_exporters",
+    "record",
+    "register_exporter",
+    "timed",
+    "trace_generation",
+]
@@ -0,0 +1,148 @@
+"""Exporters for finished generation traces.
+
+`SQL_AGENT_TRACE_EXPORTERS` lists the exporters to use, comma separated:
+
+* `log`: one structured log line per trace (default);
+* `prometheus`: histograms/counters per node, needs `prometheus_client`;
+* `otel`: OpenTelemetry spans through the globally configured tracer
+  provider, needs `opentelemetry-api`.
+
+Other exporters can be added with `register_exporter`.
+"""
+
+import json
+import logging
+import os
+from typing import Callable, Protocol
+
+from app.utils.tracing.spans import Trace
+
+logger = logging.getLogger(__name__)
+
+SQL_AGENT_TRACE_EXPORTERS = os.getenv("SQL_AGENT_TRACE_EXPORTERS", "log")
+
+
+class TraceExporter(Protocol):
+    def export(self, trace: Trace) -> None: ...
+
+
+class LogTraceExporter:
+    def export(self, trace: Trace) -> None:
+        logger.info(f"SQL agent trace: {json.dumps(trace.to_dict())}")
+
+
+class PrometheusTraceExporter:
+    def __init__(self):
+        from prometheus_client import Counter, Histogram
+
+        self.durations = Histogram(
+            "kai_sql_agent_node_duration_seconds",
+            "Wall time of SQL agent graph nodes",
+            ["agent", "node"],
+        )
+        self.tokens = Counter(
+            "kai_sql_agent_node_tokens_total",
+            "LLM tokens used by SQL agent graph nodes",
+            ["agent", "node", "kind"],
+        )
+        self.io_seconds = Counter(
+            "kai_sql_agent_node_io_seconds_total",
+            "Time SQL agent graph nodes spent in embedding, Typesense and database calls",
+            ["agent", "node", "kind"],
+        )
+
+    def export(self, trace: Trace) -> None:
+        for span in [trace.root, *trace.spans]:
+            node = "total" if span is trace.root else span.name
+            self.durations.labels(trace.name, node).observe(span.duration_ms / 1000)
+            self.tokens.labels(trace.name, node, "input").inc(span.input_tokens)
+            self.tokens.labels(trace.name, node, "output").inc(span.output_tokens)
+            for kind in ("embedding", "typesense", "db"):
+                self.io_seconds.labels(trace.name, node, kind).inc(
+                    getattr(span, f"{kind}_ms") / 1000
+                )
+
+
+class OpenTelemetryTraceExporter:
+    def __init__(self):
+        from opentelemetry import trace as otel_trace
+
+        self.otel_trace = otel_trace
+        self.tracer = otel_trace.get_tracer("kai.sql_agent")
+
+    @staticmethod
+    def _attributes(span) -> dict:
+        return {
+            f"kai.{key}": value
+            for key, value in span.to_dict().items()
+            if key not in ("name", "started_at", "duration_ms", "parent")
+            and value is not None
+        }
+
+    def export(self, trace: Trace) -> None:
+        def nanoseconds(span) -> tuple[int, int]:
+            start = int(span.started_at * 1e9)
+            return start, start + int(span.duration_ms * 1e6)
+
+        start, end = nanoseconds(trace.root)
+        root = self.tracer.start_span(
+            f"sql_agent.{trace.name}",
+            start_time=start,
+            attributes=self._attributes(trace.root),
+        )
+        otel_spans = {}
+        for span in trace.spans:
+            parent = otel_spans.get(span.parent, root)
+            span_start, span_end = nanoseconds(span)
+            otel_span = self.tracer.start_span(
+                span.name,
+                context=self.otel_trace.set_span_in_context(parent),
+                start_time=span_start,
+                attributes=self._attributes(span),
+            )
+            otel_span.end(end_time=span_end)
+            otel_spans.setdefault(span.name, otel_span)
+        root.end(end_time=end)
+
+
+EXPORTER_FACTORIES: dict[str, Callable[[], TraceExporter]] = {
+    "log": LogTraceExporter,
+    "prometheus": PrometheusTraceExporter,
+    "otel": OpenTelemetryTraceExporter,
+}
+_exporters: dict[str, TraceExporter | None] = {}
+
+
+def register_exporter(name: str, factory: Callable[[], TraceExporter]) -> None:
+    """Make an exporter selectable in SQL_AGENT_TRACE_EXPORTERS."""
+    EXPORTER_FACTORIES[name] = factory
+    _exporters.pop(name, None)
+
+
+def get_exporters(names: str | None = None) -> list[TraceExporter]:
+    exporters = []
+    for name in (names if names is not None else SQL_AGENT_TRACE_EXPORTERS).split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in _exporters:
+            factory = EXPORTER_FACTORIES.get(name)
+            try:
+                if factory is None:
+                    raise ValueError("unknown exporter")
+                _exporters[name] = factory()
+            except Exception as e:
+                # Missing optional dependency or bad name, warn once
+                logger.warning(f"Trace exporter {name} disabled: {e}")
+                _exporters[name] = None
+        if _exporters[name] is not None:
+            exporters.append(_exporters[name])
+    return exporters
+
+
+def export_trace(trace: Trace) -> None:
+    for exporter in get_exporters():
+        try:
+            exporter.export(trace)
+        except Exception as e:
+            logger.warning(f"Unable to export trace with {type(exporter).__name__}: {e}")
@@ -0,0 +1,348 @@
+"""Per-node spans of an SQL generation.
+
+A `Trace` covers one generation. While it is active (see `trace_generation`)
+every LangGraph node run through its `callback_handler` gets a `Span`, and the
+work done inside the node is added to that span:
+
+* LLM calls and tokens, from the callback handler;
+* embedding calls, Typesense round-trips and database queries, recorded with
+  `record` by `TracedEmbeddings`, `timed` wrappers and SQLAlchemy events.
+
+Work is attributed to the innermost node whose LangChain run is active in the
+calling context, else to the innermost explicit `Trace.span`, else to the
+trace itself. The trace totals always include everything.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Callable, Iterator
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.embeddings import Embeddings
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables.config import var_child_runnable_config
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+current_trace: ContextVar["Trace | None"] = ContextVar("current_trace", default=None)
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+COUNTERS = (
+    "llm_calls",
+    "input_tokens",
+    "output_tokens",
+    "embedding_calls",
+    "embedding_ms",
+    "typesense_calls",
+    "typesense_ms",
+    "db_queries",
+    "db_ms",
+)
+
+
+@dataclass
+class Span:
+    name: str
+    started_at: float
+    parent: str | None = None
+    duration_ms: float = 0.0
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    embedding_calls: int = 0
+    embedding_ms: float = 0.0
+    typesense_calls: int = 0
+    typesense_ms: float = 0.0
+    db_queries: int = 0
+    db_ms: float = 0.0
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        for field in fields(self):
+            if isinstance(data[field.name], float):
+                data[field.name] = round(data[field.name], 3)
+        return data
+
+
+class Trace:
+    def __init__(self, name: str):
+        self.name = name
+        self.root = Span(name=name, started_at=time.time())
+        self.spans: list[Span] = []
+        self.callback_handler = TraceCallbackHandler(self)
+        self._started = time.perf_counter()
+        self._span_starts: dict[int, float] = {}
+        self._run_spans: dict[UUID, Span] = {}
+        self._run_parents: dict[UUID, UUID | None] = {}
+        self._lock = threading.Lock()
+
+    def _start_span(self, name: str, parent: Span | None) -> Span:
+        span = Span(
+            name=name,
+            started_at=time.time(),
+            parent=parent.name if parent is not None and parent is not self.root else None,
+        )
+        with self._lock:
+            self.spans.append(span)
+            self._span_starts[id(span)] = time.perf_counter()
+        return span
+
+    def _end_span(self, span: Span, error: BaseException | None = None) -> None:
+        with self._lock:
+            started = self._span_starts.pop(id(span), None)
+        if started is not None:
+            span.duration_ms = (time.perf_counter() - started) * 1000
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        """Explicit span for work done outside of graph nodes."""
+        span = self._start_span(name, self.current_span())
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            self._end_span(span, e)
+            raise
+        else:
+            self._end_span(span)
+        finally:
+            _current_span.reset(token)
+
+    def start_run(self, run_id: UUID, parent_run_id: UUID | None, node: str | None) -> None:
+        with self._lock:
+            self._run_parents[run_id] = parent_run_id
+        if node is not None:
+            parent = self.span_for_run(parent_run_id) or _current_span.get() or self.root
+            self._run_spans[run_id] = self._start_span(node, parent)
+
+    def end_run(self, run_id: UUID, error: BaseException | None = None) -> None:
+        span = self._run_spans.get(run_id)
+        if span is not None:
+            self._end_span(span, error)
+
+    def span_for_run(self, run_id: UUID | None) -> Span | None:
+        """Span of the innermost node enclosing a LangChain run."""
+        seen = 0
+        while run_id is not None and seen < 1000:
+            span = self._run_spans.get(run_id)
+            if span is not None:
+                return span
+            run_id = self._run_parents.get(run_id)
+            seen += 1
+        return None
+
+    def current_span(self) -> Span:
+        config = var_child_runnable_config.get()
+        callbacks = config.get("callbacks") if config else None
+        if isinstance(callbacks, BaseCallbackManager):
+            span = self.span_for_run(callbacks.parent_run_id)
+            if span is not None:
+                return span
+        return _current_span.get() or self.root
+
+    def record(self, span: Span | None = None, **amounts: float) -> None:
+        span = span or self.current_span()
+        with self._lock:
+            for key, amount in amounts.items():
+                setattr(span, key, getattr(span, key) + amount)
+                if span is not self.root:
+                    setattr(self.root, key, getattr(self.root, key) + amount)
+
+    def finish(self) -> None:
+        self.root.duration_ms = (time.perf_counter() - self._started) * 1000
+        for span in list(self._run_spans.values()):
+            # Runs interrupted without an end callback
+            if id(span) in self._span_starts:
+                self._end_span(span)
+
+    def to_dict(self) -> dict:
+        root = self.root.to_dict()
+        # Still running when attached from inside trace_generation
+        duration_ms = self.root.duration_ms or (time.perf_counter() - self._started) * 1000
+        return {
+            "name": self.name,
+            "started_at": root["started_at"],
+            "duration_ms": round(duration_ms, 3),
+            "totals": {key: root[key] for key in COUNTERS},
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+
+def _token_usage(response: LLMResult) -> tuple[int, int]:
+    input_tokens = output_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                input_tokens += usage.get("input_tokens", 0)
+                output_tokens += usage.get("output_tokens", 0)
+    if not (input_tokens or output_tokens) and response.llm_output:
+        usage = response.llm_output.get("token_usage") or {}
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+    return input_tokens, output_tokens
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """Opens a span per LangGraph node run and counts LLM calls and tokens."""
+
+    run_inline = True
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Runnables inside a node inherit its metadata, only the node run is named after it
+        is_node = node is not None and kwargs.get("name") == node
+        self.trace.start_run(run_id, parent_run_id, node if is_node else None)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.trace.end_run(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.trace.end_run(run_id, error)
+
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any] | None,
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self.trace.start_run(run_id, parent_run_id, None)
+
+    def on_llm_end(
+        self,
+        response: LLMResult,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any,
+    ) -> None:
+        input_tokens, output_tokens = _token_usage(response)
+        span = self.trace.span_for_run(parent_run_id) or self.trace.root
+        self.trace.record(
+            span, llm_calls=1, input_tokens=input_tokens, output_tokens=output_tokens
+        )
+
+
+def record(**amounts: float) -> None:
+    """Add amounts (see `COUNTERS`) to the current span of the active trace."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.record(**amounts)
+
+
+def timed(kind: str, func: Callable) -> Callable:
+    """Wrap func to record `<kind>_calls` and `<kind>_ms` in the active trace."""
+
+    def wrapper(*args, **kwargs):
+        if current_trace.get() is None:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(
+                **{
+                    f"{kind}_calls": 1,
+                    f"{kind}_ms": (time.perf_counter() - started) * 1000,
+                }
+            )
+
+    return wrapper
+
+
+class TracedEmbeddings(Embeddings):
+    """Embeddings that record their calls in the active trace."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return timed("embedding", self.embeddings.embed_documents)(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return timed("embedding", self.embeddings.embed_query)(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        started = time.perf_counter()
+        try:
+            return await self.embeddings.aembed_documents(texts)
+        finally:
+            record(embedding_calls=1, embedding_ms=(time.perf_counter() - started) * 1000)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        started = time.perf_counter()
+        try:
+            return await self.embeddings.aembed_query(text)
+        finally:
+            record(embedding_calls=1, embedding_ms=(time.perf_counter() - started) * 1000)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_trace.get() is not None:
+        conn.info.setdefault("trace_query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("trace_query_started")
+    if started:
+        record(db_queries=1, db_ms=(time.perf_counter() - started.pop()) * 1000)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    started = connection.info.get("trace_query_started") if connection is not None else None
+    if started:
+        record(db_queries=1, db_ms=(time.perf_counter() - started.pop()) * 1000)
+
+
+@contextmanager
+def trace_generation(name: str) -> Iterator[Trace]:
+    """Activate a trace for a generation; it is exported when the block exits.
+
+    Pass `trace.callback_handler` in the callbacks of the graph invocation to
+    get node spans, and attach `trace.to_dict()` to the response metadata.
+    """
+    from app.utils.tracing.exporters import export_trace
+
+    trace = Trace(name)
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+        trace.finish()
+        export_trace(trace)
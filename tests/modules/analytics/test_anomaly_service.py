@@ -1,5 +1,6 @@
 """Tests for AnomalyService."""
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -114,3 +115,71 @@ class TestIsolationForest:
         assert result.method == "isolation_forest"
         assert result.total_points == 10
         assert result.anomaly_count > 0
+
+
+class TestMultiSeriesDetection:
+    """Test cases for anomaly detection over many series at once."""
+
+    def test_matches_single_series_detection(
+        self,
+        anomaly_service: AnomalyService,
+        normal_series: pd.Series,
+        series_with_outliers: pd.Series,
+    ) -> None:
+        """Should flag the same points as the single-series methods."""
+        wide = pd.DataFrame({"normal": normal_series, "outliers": series_with_outliers})
+
+        for method, single in (
+            ("zscore", anomaly_service.detect_zscore(series_with_outliers, threshold=2.0)),
+            ("iqr", anomaly_service.detect_iqr(series_with_outliers, multiplier=2.0)),
+        ):
+            result = anomaly_service.detect_multi_series(wide, method=method, threshold=2.0)
+
+            assert result.series_count == 2
+            assert result.anomaly_count == single.anomaly_count
+            assert set(result.anomalies["series_id"]) == {"outliers"}
+            assert result.anomalies["index"] == [a["index"] for a in single.anomalies]
+            assert result.anomalies["value"] == [a["value"] for a in single.anomalies]
+            assert result.series["anomaly_count"] == [0, single.anomaly_count]
+
+    def test_long_data_and_rolling_windows(self, anomaly_service: AnomalyService) -> None:
+        """Should pivot long data by time and score points against their window."""
+        level_shift = [10.0] * 10 + [50.0] * 10
+        records = [
+            {"kpi": kpi, "day": day, "value": values[day]}
+            for kpi, values in (("steady", [10.0, 11.0] * 10), ("shifted", level_shift))
+            for day in reversed(range(20))
+        ] + [{"kpi": "short", "day": 0, "value": 1.0}]
+
+        result = anomaly_service.detect_multi_series(
+            pd.DataFrame(records),
+            method="rolling_iqr",
+            window=5,
+            series_column="kpi",
+            value_column="value",
+            time_column="day",
+        )
+
+        assert result.window == 5
+        assert result.skipped_series == ["short"]
+        # Flagged until the shifted level reaches the upper quartile of the window
+        assert result.anomalies["series_id"] == ["shifted", "shifted"]
+        assert result.anomalies["index"] == [10, 11]
+        assert result.anomalies["direction"] == ["high", "high"]
+        assert result.anomalies["upper_bound"] == [10.0, 10.0]
+
+    def test_scans_many_series_in_one_call(self, anomaly_service: AnomalyService) -> None:
+        """Should scan a thousand series and agree with pandas rolling statistics."""
+        rng = np.random.default_rng(0)
+        wide = pd.DataFrame(rng.normal(size=(100, 1000)))
+        wide.iloc[60, 7] = 25.0
+
+        result = anomaly_service.detect_multi_series(wide, method="rolling_zscore", window=10)
+
+        history = wide.rolling(10).agg(["mean", "std"]).shift(1)
+        mean = history.xs("mean", axis=1, level=1).to_numpy()
+        std = history.xs("std", axis=1, level=1).to_numpy()
+        expected = np.abs((wide.to_numpy() - mean) / std) > 3.0
+        assert result.series_count == 1000
+        assert result.anomaly_count == int(expected.sum())
+        assert ("7", 60) in zip(result.anomalies["series_id"], result.anomalies["index"])
@@ -278,6 +278,47 @@ class TestAnomalyDetectionErrors:
         assert "Anomaly detection failed" in body["message"]
 
 
+class TestMultiSeriesAnomalyDetection:
+    """Tests for /anomalies/multi endpoint responses."""
+
+    def test_wide_series_return_columnar_anomalies(self, client):
+        """Should scan series of different lengths in one call."""
+        response = client.post(
+            "/api/v2/analytics/anomalies/multi",
+            json={
+                "series": {
+                    "orders": [10, 11, 12, 10, 11, 100, 10, 11, 12, 10],
+                    "visits": [5, 6, 5, None, 6],
+                },
+                "method": "zscore",
+                "threshold": 2.0,
+            },
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["series"] == {
+            "series_id": ["orders", "visits"],
+            "total_points": [10, 4],
+            "anomaly_count": [1, 0],
+        }
+        assert body["anomalies"]["series_id"] == ["orders"]
+        assert body["anomalies"]["index"] == [5]
+
+    def test_invalid_method_and_missing_data_return_structured_response(self, client):
+        """Should return structured errors for unknown methods and missing data."""
+        response = client.post(
+            "/api/v2/analytics/anomalies/multi",
+            json={"series": {"a": [1, 2, 3]}, "method": "unknown_method"},
+        )
+        assert response.status_code == 400
+        assert response.json()["error_code"] == "invalid_method"
+
+        response = client.post("/api/v2/analytics/anomalies/multi", json={})
+        assert response.status_code == 400
+        assert response.json()["error_code"] == "anomaly_detection_failed"
+
+
 class TestForecastErrors:
     """Tests for /forecast endpoint error responses."""
 
@@ -26,12 +26,18 @@ from app.modules.analytics.batch_models import (
     BatchJobStatus,
     SingleAnalyticsRequest,
 )
-from app.modules.analytics.services.batch_service import AnalyticsBatchService
+from app.modules.analytics.services.batch_service import (
+    AnalyticsBatchService,
+    analytics_batch_service,
+)
+from app.modules.analytics.services.job_store import MemoryBatchJobStore
 
 
 @pytest.fixture
-def test_app() -> FastAPI:
+def test_app(monkeypatch) -> FastAPI:
     """Create a FastAPI test app with the batch analytics router."""
+    # Jobs in memory, not in the SQLite file the server configures
+    monkeypatch.setattr(analytics_batch_service, "_job_store", MemoryBatchJobStore())
     app = FastAPI()
     app.include_router(batch_router)
     return app
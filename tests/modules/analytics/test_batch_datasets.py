@@ -0,0 +1,224 @@
+"""Tests for datasets shared by the operations of an analytics batch."""
+
+from __future__ import annotations
+
+import pytest
+from pydantic import ValidationError
+
+from app.modules.analytics.batch_models import (
+    AnalyticsBatchRequest,
+    AnalyticsOperationType,
+    BatchDataset,
+    BatchJobStatus,
+    SingleAnalyticsRequest,
+)
+from app.modules.analytics.services.batch_service import AnalyticsBatchService
+from app.modules.analytics.services.executor import (
+    ProcessAnalyticsExecutor,
+    SharedArray,
+    ThreadAnalyticsExecutor,
+)
+
+REVENUE = [10.0, 12.0, 9.0, 11.0, 95.0, 10.0, 13.0, 12.0, 11.0, 10.0]
+COST = [4.0, 5.0, 4.0, 5.0, 40.0, 4.0, 6.0, 5.0, 5.0, 4.0]
+
+
+def make_operations() -> list[SingleAnalyticsRequest]:
+    revenue = {"dataset": "sales", "column": "revenue"}
+    return [
+        SingleAnalyticsRequest(
+            operation_id="stats",
+            operation_type=AnalyticsOperationType.DESCRIPTIVE_STATS,
+            params={"data": revenue},
+        ),
+        SingleAnalyticsRequest(
+            operation_id="anomalies",
+            operation_type=AnalyticsOperationType.ANOMALY_DETECTION,
+            params={"data": revenue, "method": "zscore", "threshold": 2.0},
+        ),
+        SingleAnalyticsRequest(
+            operation_id="corr",
+            operation_type=AnalyticsOperationType.CORRELATION,
+            params={"x": revenue, "y": {"dataset": "sales", "column": "cost"}},
+        ),
+        SingleAnalyticsRequest(
+            operation_id="matrix",
+            operation_type=AnalyticsOperationType.CORRELATION_MATRIX,
+            params={"data": {"dataset": "sales"}},
+        ),
+    ]
+
+
+def make_datasets() -> list[BatchDataset]:
+    return [BatchDataset(dataset_id="sales", columns={"revenue": REVENUE, "cost": COST})]
+
+
+class TestBatchDatasetModels:
+    """Test cases for dataset declarations and references."""
+
+    def test_dataset_needs_one_source(self) -> None:
+        with pytest.raises(ValidationError):
+            BatchDataset(dataset_id="empty")
+        with pytest.raises(ValidationError):
+            BatchDataset(dataset_id="both", columns={"a": [1]}, records=[{"a": 1}])
+        with pytest.raises(ValidationError):
+            BatchDataset(dataset_id="sql", sql="SELECT 1")
+        with pytest.raises(ValidationError):
+            BatchDataset(dataset_id="ragged", columns={"a": [1, 2], "b": [1]})
+
+    def test_references_must_name_a_dataset_of_the_batch(self) -> None:
+        request = AnalyticsBatchRequest(operations=make_operations(), datasets=make_datasets())
+        assert request.operations[2].get_dataset_ids() == {"sales"}
+
+        with pytest.raises(ValidationError, match="unknown datasets: sales"):
+            AnalyticsBatchRequest(operations=make_operations())
+        with pytest.raises(ValidationError, match="unique"):
+            AnalyticsBatchRequest(
+                operations=make_operations(), datasets=make_datasets() + make_datasets()
+            )
+
+
+class TestBatchDatasetProcessing:
+    """Test cases for operations over batch datasets."""
+
+    @pytest.mark.asyncio
+    async def test_operations_match_inline_data(self) -> None:
+        """Should give the results of the same operations with inline data."""
+        batch_service = AnalyticsBatchService(executor=ThreadAnalyticsExecutor())
+        operations = make_operations()
+        job = batch_service.create_batch_job(operations)
+        result = await batch_service.process_batch(
+            job.batch_id, operations, datasets=make_datasets()
+        )
+
+        assert result.status == BatchJobStatus.COMPLETED
+        inline = batch_service.execute_single_operation(
+            SingleAnalyticsRequest(
+                operation_type=AnalyticsOperationType.ANOMALY_DETECTION,
+                params={"data": REVENUE, "method": "zscore", "threshold": 2.0},
+            )
+        )
+        assert result.results["anomalies"].result == inline.result
+        assert result.results["stats"].result["column"] == "revenue"
+        assert result.results["corr"].result["coefficient"] > 0.99
+        assert result.results["matrix"].result["columns"] == ["revenue", "cost"]
+
+    @pytest.mark.asyncio
+    async def test_anomaly_detection_scans_every_series_of_a_table(self) -> None:
+        """Should detect anomalies in every column of a dataset table at once."""
+        batch_service = AnalyticsBatchService(executor=ThreadAnalyticsExecutor())
+        operations = [
+            SingleAnalyticsRequest(
+                operation_id="all_kpis",
+                operation_type=AnalyticsOperationType.ANOMALY_DETECTION,
+                params={"data": {"dataset": "sales"}, "method": "iqr"},
+            )
+        ]
+        job = batch_service.create_batch_job(operations)
+        result = await batch_service.process_batch(
+            job.batch_id, operations, datasets=make_datasets()
+        )
+
+        anomalies = result.results["all_kpis"].result["anomalies"]
+        assert result.results["all_kpis"].result["series_count"] == 2
+        assert anomalies["series_id"] == ["revenue", "cost"]
+        assert anomalies["index"] == [4, 4]
+
+    @pytest.mark.asyncio
+    async def test_unresolved_references_fail_their_operations(self) -> None:
+        """Should fail operations on datasets that didn't load or lack the column."""
+        batch_service = AnalyticsBatchService(executor=ThreadAnalyticsExecutor())
+        operations = [
+            SingleAnalyticsRequest(
+                operation_id="from_sql",
+                operation_type=AnalyticsOperationType.FORECAST,
+                params={"values": {"dataset": "orders", "column": "amount"}},
+            ),
+            SingleAnalyticsRequest(
+                operation_id="missing_column",
+                operation_type=AnalyticsOperationType.FORECAST,
+                params={"values": {"dataset": "sales", "column": "profit"}},
+            ),
+            make_operations()[0],
+        ]
+        datasets = make_datasets() + [
+            BatchDataset(dataset_id="orders", sql="SELECT amount FROM orders", db_connection_id="db1")
+        ]
+        job = batch_service.create_batch_job(operations)
+        result = await batch_service.process_batch(job.batch_id, operations, datasets=datasets)
+
+        assert result.status == BatchJobStatus.PARTIAL
+        assert "Dataset orders could not be loaded" in result.results["from_sql"].error
+        assert result.results["missing_column"].error == "Dataset sales has no column profit"
+        assert result.results["stats"].is_successful
+
+    @pytest.mark.asyncio
+    async def test_columns_are_shared_once_with_workers(self, monkeypatch) -> None:
+        """Should place each column in shared memory once per batch and release it."""
+        from multiprocessing import shared_memory
+
+        from app.modules.analytics.services import executor as executor_module
+
+        monkeypatch.setattr(executor_module, "ANALYTICS_SHARED_MEMORY_MIN_VALUES", 5)
+        created = []
+        original_create = SharedArray.create.__func__
+
+        def create(cls, array):
+            shared = original_create(cls, array)
+            created.append(shared)
+            return shared
+
+        monkeypatch.setattr(SharedArray, "create", classmethod(create))
+        executor = ProcessAnalyticsExecutor(max_workers=2, timeout=30)
+        try:
+            batch_service = AnalyticsBatchService(executor=executor)
+            operations = make_operations()
+            job = batch_service.create_batch_job(operations)
+            result = await batch_service.process_batch(
+                job.batch_id, operations, datasets=make_datasets()
+            )
+        finally:
+            executor.shutdown()
+
+        assert result.status == BatchJobStatus.COMPLETED
+        assert result.results["stats"].result["column"] == "revenue"
+        assert result.results["matrix"].result["columns"] == ["revenue", "cost"]
+        assert len(created) == 2
+        for shared in created:
+            with pytest.raises(FileNotFoundError):
+                shared_memory.SharedMemory(name=shared.name)
+
+    @pytest.mark.asyncio
+    async def test_datasets_are_released_when_the_batch_is_cancelled(self, monkeypatch) -> None:
+        """Should release the datasets and stop the operations of a cancelled batch."""
+        import asyncio
+
+        from app.modules.analytics.services.datasets import BatchDatasets
+
+        released = []
+        original_release = BatchDatasets.release
+
+        def release(self):
+            released.append(self)
+            original_release(self)
+
+        monkeypatch.setattr(BatchDatasets, "release", release)
+        started = asyncio.Event()
+
+        class BlockingExecutor(ThreadAnalyticsExecutor):
+            async def run(self, service, operation):
+                started.set()
+                await asyncio.sleep(30)
+
+        batch_service = AnalyticsBatchService(executor=BlockingExecutor())
+        operations = make_operations()
+        job = batch_service.create_batch_job(operations)
+        processing = asyncio.create_task(
+            batch_service.process_batch(job.batch_id, operations, datasets=make_datasets())
+        )
+        await started.wait()
+        processing.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await processing
+
+        assert len(released) == 1
@@ -0,0 +1,181 @@
+"""Tests for the stores of analytics batch jobs."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from app.modules.analytics.batch_models import (
+    AnalyticsOperationType,
+    BatchJobStatus,
+    SingleAnalyticsRequest,
+)
+from app.modules.analytics.services.batch_service import AnalyticsBatchService
+from app.modules.analytics.services.executor import ThreadAnalyticsExecutor
+from app.modules.analytics.services.job_store import (
+    MemoryBatchJobStore,
+    SQLiteBatchJobStore,
+    create_batch_job_store,
+)
+
+
+def make_operations(count: int = 3) -> list[SingleAnalyticsRequest]:
+    return [
+        SingleAnalyticsRequest(
+            operation_id=f"stats_{i}",
+            operation_type=AnalyticsOperationType.DESCRIPTIVE_STATS,
+            params={"data": [float(j) for j in range(i, i + 10)]},
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    return str(tmp_path / "batches.db")
+
+
+def make_service(db_path: str) -> AnalyticsBatchService:
+    """A service as another API worker would have, sharing the SQLite file."""
+    return AnalyticsBatchService(
+        executor=ThreadAnalyticsExecutor(), job_store=SQLiteBatchJobStore(db_path)
+    )
+
+
+def record_operations(service: AnalyticsBatchService) -> list[str]:
+    executed = []
+    execute = service.execute_single_operation
+
+    def execute_single_operation(operation):
+        executed.append(operation.operation_id)
+        return execute(operation)
+
+    service.execute_single_operation = execute_single_operation
+    return executed
+
+
+class TestSQLiteBatchJobStore:
+    """Test cases for jobs kept in a SQLite file."""
+
+    @pytest.mark.asyncio
+    async def test_jobs_and_results_are_visible_to_other_workers(self, db_path: str) -> None:
+        """Should read a job and its results through another store on the same file."""
+        service = make_service(db_path)
+        job = service.create_batch_job(make_operations())
+        await service.process_batch(job.batch_id)
+
+        stored = make_service(db_path).get_batch_job(job.batch_id)
+        assert stored.status == BatchJobStatus.COMPLETED
+        assert stored.completed == 3
+        assert list(stored.results) == ["stats_0", "stats_1", "stats_2"]
+        assert stored.results["stats_1"].result["mean"] == 5.5
+
+    @pytest.mark.asyncio
+    async def test_interrupted_job_resumes_where_it_stopped(self, db_path: str) -> None:
+        """Should only run the operations without a stored result after a crash."""
+        crashed = make_service(db_path)
+        job = crashed.create_batch_job(make_operations())
+        # The worker took the lease, stored one result and died
+        store = SQLiteBatchJobStore(db_path)
+        assert store.acquire(job.batch_id, "crashed", lease=0.1)
+        job.completed = 1
+        store.add_result(job, crashed.execute_single_operation(make_operations()[0]))
+
+        service = make_service(db_path)
+        service._lease = 0.3
+        executed = record_operations(service)
+        assert await service.resume_unfinished() == []
+
+        await asyncio.sleep(0.35)
+        assert await service.resume_unfinished() == [job.batch_id]
+        await asyncio.gather(*service._resumed_tasks)
+
+        stored = service.get_batch_job(job.batch_id)
+        assert sorted(executed) == ["stats_1", "stats_2"]
+        assert stored.status == BatchJobStatus.COMPLETED
+        assert stored.completed == 3
+        assert set(stored.results) == {"stats_0", "stats_1", "stats_2"}
+        assert store.unfinished() == []
+
+    @pytest.mark.asyncio
+    async def test_leased_job_runs_on_one_worker(self, db_path: str) -> None:
+        """Should leave a job leased by another worker alone."""
+        service = make_service(db_path)
+        job = service.create_batch_job(make_operations())
+        store = SQLiteBatchJobStore(db_path)
+        assert store.acquire(job.batch_id, "other", lease=60)
+        assert not store.acquire(job.batch_id, service._owner, lease=60)
+
+        executed = record_operations(service)
+        result = await service.process_batch(job.batch_id)
+
+        assert executed == []
+        assert result.status == BatchJobStatus.PENDING
+        assert store.unfinished() == []
+
+    @pytest.mark.asyncio
+    async def test_operations_lost_with_their_worker_are_stored_as_failed(
+        self, db_path: str
+    ) -> None:
+        """Should store a failed result for an operation whose worker died."""
+        from concurrent.futures.process import BrokenProcessPool
+
+        class DyingExecutor(ThreadAnalyticsExecutor):
+            async def run(self, service, operation):
+                if operation.operation_id == "stats_1":
+                    raise BrokenProcessPool("Analytics worker died")
+                return await super().run(service, operation)
+
+        service = AnalyticsBatchService(
+            executor=DyingExecutor(), job_store=SQLiteBatchJobStore(db_path)
+        )
+        job = service.create_batch_job(make_operations())
+        await service.process_batch(job.batch_id)
+
+        stored = make_service(db_path).get_batch_job(job.batch_id)
+        assert stored.status == BatchJobStatus.PARTIAL
+        assert (stored.completed, stored.failed) == (2, 1)
+        assert stored.results["stats_1"].error == "Analytics worker died"
+
+    def test_cancel_reaches_the_running_worker(self, db_path: str) -> None:
+        """Should report a cancel from another worker when the lease is renewed."""
+        service = make_service(db_path)
+        job = service.create_batch_job(make_operations())
+        running = SQLiteBatchJobStore(db_path)
+        assert running.acquire(job.batch_id, "worker", lease=60)
+        assert running.renew(job.batch_id, "worker", lease=60) == BatchJobStatus.PENDING
+
+        service.cancel_batch_job(job.batch_id)
+
+        assert running.renew(job.batch_id, "worker", lease=60) == BatchJobStatus.CANCELLED
+        assert running.renew(job.batch_id, "someone else", lease=60) is None
+
+    def test_cleanup_deletes_expired_jobs(self, db_path: str) -> None:
+        """Should delete jobs and their results once not updated for the TTL."""
+        service = make_service(db_path)
+        job = service.create_batch_job(make_operations())
+        store = SQLiteBatchJobStore(db_path)
+        store.add_result(job, service.execute_single_operation(make_operations()[0]))
+
+        assert store.cleanup(ttl=60) == 0
+        time.sleep(0.01)
+        assert store.cleanup(ttl=0) == 1
+        assert store.get(job.batch_id) is None
+        assert store._execute("SELECT COUNT(*) FROM batch_results").fetchone()[0] == 0
+
+
+class TestCreateBatchJobStore:
+    """Test cases for selecting the job store."""
+
+    def test_store_types(self, db_path: str, monkeypatch) -> None:
+        from app.modules.analytics.services import job_store
+
+        monkeypatch.setattr(job_store, "ANALYTICS_BATCH_STORE_PATH", db_path)
+        assert isinstance(create_batch_job_store("memory"), MemoryBatchJobStore)
+        assert create_batch_job_store("sqlite").path == db_path
+        with pytest.raises(ValueError, match="needs a Storage"):
+            create_batch_job_store("storage")
+        with pytest.raises(ValueError, match="Unknown batch job store"):
+            create_batch_job_store("redis")
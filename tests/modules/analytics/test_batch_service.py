@@ -16,6 +16,7 @@ from app.modules.analytics.batch_models import (
     SingleAnalyticsRequest,
 )
 from app.modules.analytics.services.batch_service import AnalyticsBatchService
+from app.modules.analytics.services.job_store import MemoryBatchJobStore
 
 
 @pytest.fixture
@@ -914,10 +915,11 @@ class TestServiceInitialization:
     """Test cases for service initialization."""
 
     def test_service_creates_empty_job_storage(self) -> None:
-        """Should initialize with empty job storage."""
+        """Should initialize with an empty in-memory job store."""
         service = AnalyticsBatchService()
 
-        assert service._batch_jobs == {}
+        assert isinstance(service._job_store, MemoryBatchJobStore)
+        assert len(service._job_store) == 0
 
     def test_service_initializes_analytics_services(self) -> None:
         """Should initialize all analytics services."""
@@ -1187,3 +1189,65 @@ class TestEdgeCases:
         fail_result = batch_service.execute_single_operation(fail_op)
 
         assert fail_result.is_successful is False
+
+
+class TestProcessExecution:
+    """Test cases for the process-pool execution backend."""
+
+    @pytest.fixture
+    def executor(self):
+        from app.modules.analytics.services.executor import ProcessAnalyticsExecutor
+
+        executor = ProcessAnalyticsExecutor(max_workers=2, timeout=30)
+        yield executor
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_operations_run_in_worker_processes(self, executor, monkeypatch) -> None:
+        """Should run operations in other processes, large series via shared memory."""
+        import os
+        from multiprocessing import shared_memory
+
+        from app.modules.analytics.services import executor as executor_module
+
+        batch_service = AnalyticsBatchService(executor=executor)
+        operations = [
+            SingleAnalyticsRequest(
+                operation_id=f"stats_{i}",
+                operation_type=AnalyticsOperationType.DESCRIPTIVE_STATS,
+                params={"data": [float(v) for v in range(1000)]},
+            )
+            for i in range(4)
+        ]
+        job = batch_service.create_batch_job(operations)
+        shared = []
+        original_share_params = executor_module.share_params
+
+        def share_params(params):
+            shared_params, arrays = original_share_params(params, min_values=100)
+            shared.extend(arrays)
+            return shared_params, arrays
+
+        monkeypatch.setattr(executor_module, "share_params", share_params)
+        result = await batch_service.process_batch(job.batch_id, operations)
+
+        assert result.status == BatchJobStatus.COMPLETED
+        assert result.results["stats_0"].result["mean"] == 499.5
+        assert len(shared) == 4
+        # Shared blocks are released once the operations finish
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=shared[0].name)
+        assert await executor.call(os.getpid) != os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_operations_are_killed(self, executor) -> None:
+        """Should fail an operation past its timeout and restart the workers."""
+        import time
+
+        from app.modules.analytics.services.executor import OperationTimeoutError
+
+        with pytest.raises(OperationTimeoutError):
+            await executor.call(time.sleep, 30, timeout=0.5)
+
+        assert executor.restarts == 1
+        assert await executor.call(abs, -3) == 3
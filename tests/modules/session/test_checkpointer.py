@@ -2,6 +2,11 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 import json
+from operator import add
+from typing import Annotated, TypedDict
+
+from langgraph.constants import END, START
+from langgraph.graph.state import StateGraph
 
 from app.modules.session.graph.checkpointer import TypesenseCheckpointer
 
@@ -90,3 +95,187 @@ def test_serialize_deserialize_roundtrip(checkpointer):
     deserialized = checkpointer._deserialize(serialized)
 
     assert deserialized == checkpoint
+
+
+class FakeStorage:
+    """In-memory storage with the methods the checkpointer uses."""
+
+    def __init__(self):
+        self.collections = {}
+        self.imports = []
+
+    def docs(self, collection):
+        return self.collections.setdefault(collection, {})
+
+    def find_by_id(self, collection, id):
+        doc = self.docs(collection).get(id)
+        return dict(doc) if doc else None
+
+    def update_or_create(self, collection, filter, doc):
+        self.docs(collection).setdefault(filter["id"], {"id": filter["id"]}).update(doc)
+        return filter["id"]
+
+    def bulk_import(self, collection, docs, action="upsert"):
+        self.imports.append((collection, [doc["id"] for doc in docs]))
+        results = []
+        for doc in docs:
+            if action == "create" and doc["id"] in self.docs(collection):
+                results.append({"success": False, "code": 409})
+                continue
+            self.docs(collection)[doc["id"]] = dict(doc)
+            results.append({"success": True})
+        return results
+
+    def filter_in(self, field, values):
+        return list(values)
+
+    def multi_search(self, collection, searches, common_params=None):
+        return [
+            {
+                "hits": [
+                    {"document": dict(self.docs(collection)[id])}
+                    for id in search["filter_by"]
+                    if id in self.docs(collection)
+                ]
+            }
+            for search in searches
+        ]
+
+    def find(self, collection, filter, sort=None, page=0, limit=0):
+        return [
+            dict(doc)
+            for doc in self.docs(collection).values()
+            if all(doc.get(k) == v for k, v in filter.items())
+        ]
+
+    def delete_by_filter(self, collection, filter, exclude=None):
+        docs = self.docs(collection)
+        deleted = [
+            id
+            for id, doc in docs.items()
+            if all(doc.get(k) == v for k, v in filter.items())
+            and not any(doc.get(k) in values for k, values in (exclude or {}).items())
+        ]
+        for id in deleted:
+            del docs[id]
+        return len(deleted)
+
+
+class CounterState(TypedDict):
+    messages: Annotated[list, add]
+    turns: int
+
+
+def build_counter_graph(checkpointer):
+    def respond(state):
+        turns = state.get("turns", 0) + 1
+        return {"messages": [f"answer {turns}"], "turns": turns}
+
+    builder = StateGraph(CounterState)
+    builder.add_node("respond", respond)
+    builder.add_edge(START, "respond")
+    builder.add_edge("respond", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+@pytest.mark.asyncio
+async def test_checkpoints_are_written_as_deltas():
+    storage = FakeStorage()
+    checkpointer = TypesenseCheckpointer(storage=storage)
+    graph = build_counter_graph(checkpointer)
+    config = {"configurable": {"thread_id": "sess_123"}}
+
+    await graph.ainvoke({"messages": ["question 1"]}, config)
+    storage.imports.clear()
+    state = await graph.ainvoke({"messages": ["question 2"]}, config)
+
+    assert state["messages"] == ["question 1", "answer 1", "question 2", "answer 2"]
+    assert state["turns"] == 2
+    blob_writes = [ids for collection, ids in storage.imports if collection == "checkpoint_blobs"]
+    # Each step writes only the channels it changed
+    assert all(len(ids) <= 3 for ids in blob_writes)
+    # The session document holds the checkpoint without its values
+    session = storage.docs("sessions")["sess_123"]
+    assert "channel_values" not in checkpointer._deserialize(session["checkpoint"])
+
+    # A new checkpointer restores the state from the blobs
+    restored = await TypesenseCheckpointer(storage=storage).aget(config)
+    assert restored["channel_values"]["messages"] == state["messages"]
+    assert restored["channel_values"]["turns"] == 2
+
+
+@pytest.mark.asyncio
+async def test_pending_writes_are_saved_and_old_versions_compacted(monkeypatch):
+    from app.modules.session.graph import checkpointer as checkpointer_module
+
+    monkeypatch.setattr(checkpointer_module, "CHECKPOINT_COMPACT_EVERY", 3)
+    storage = FakeStorage()
+    checkpointer = TypesenseCheckpointer(storage=storage)
+    graph = build_counter_graph(checkpointer)
+    config = {"configurable": {"thread_id": "sess_123"}}
+    await graph.ainvoke({"messages": ["question 1"]}, config)
+
+    saved = await checkpointer.aget_tuple(config)
+    await checkpointer.aput_writes(saved.config, [("messages", ["pending"])], "task_1")
+    await checkpointer.aput_writes(saved.config, [("messages", ["again"])], "task_1")
+    saved = await checkpointer.aget_tuple(config)
+    assert saved.pending_writes == [("task_1", "messages", ["pending"])]
+
+    for turn in range(2, 5):
+        await graph.ainvoke({"messages": [f"question {turn}"]}, config)
+    saved = await checkpointer.aget_tuple(config)
+
+    # Only the versions of the latest checkpoint are left
+    assert len(storage.docs("checkpoint_blobs")) <= len(saved.checkpoint["channel_versions"]) + 3
+    assert storage.docs("checkpoint_writes") == {}
+    assert saved.checkpoint["channel_values"]["turns"] == 4
+
+
+@pytest.mark.asyncio
+async def test_inline_checkpoints_are_migrated_on_save():
+    storage = FakeStorage()
+    inline = {
+        "v": 1,
+        "ts": "2024-01-01T00:00:00",
+        "id": "1ef4f797-8335-6428-8001-8a1503f9b875",
+        "channel_values": {"messages": ["question 1", "answer 1"], "turns": 1},
+        "channel_versions": {"messages": 2, "turns": 2},
+        "versions_seen": {},
+    }
+    storage.docs("sessions")["sess_123"] = {
+        "id": "sess_123",
+        "checkpoint": json.dumps(inline),
+        "checkpoint_metadata": json.dumps({"source": "loop", "step": 1}),
+    }
+    graph = build_counter_graph(TypesenseCheckpointer(storage=storage))
+    config = {"configurable": {"thread_id": "sess_123"}}
+
+    await graph.ainvoke({"messages": ["question 2"]}, config)
+
+    restored = await TypesenseCheckpointer(storage=storage).aget(config)
+    assert restored["channel_values"]["messages"][:2] == ["question 1", "answer 1"]
+    assert restored["channel_values"]["turns"] == 2
+
+
+@pytest.mark.asyncio
+async def test_deleting_a_session_removes_its_blobs_and_writes():
+    from app.modules.session.services import SessionService
+
+    storage = FakeStorage()
+    checkpointer = TypesenseCheckpointer(storage=storage)
+    graph = build_counter_graph(checkpointer)
+    for thread_id in ("sess_123", "sess_456"):
+        config = {"configurable": {"thread_id": thread_id}}
+        await graph.ainvoke({"messages": ["question 1"]}, config)
+        saved = await checkpointer.aget_tuple(config)
+        await checkpointer.aput_writes(saved.config, [("messages", ["pending"])], "task_1")
+    repository = MagicMock()
+    repository.delete = AsyncMock()
+    service = SessionService(repository=repository, graph=graph, checkpointer=checkpointer)
+
+    await service.delete_session("sess_123")
+
+    repository.delete.assert_called_once_with("sess_123")
+    for collection in ("checkpoint_blobs", "checkpoint_writes"):
+        thread_ids = {doc["thread_id"] for doc in storage.docs(collection).values()}
+        assert thread_ids == {"sess_456"}
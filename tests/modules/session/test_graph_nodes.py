@@ -93,3 +93,55 @@ def test_format_history_for_summarization():
     assert "Result 1" in history
     assert "Query 2" in history
     assert "---" in history  # Separator
+
+
+def make_messages(start, end):
+    return [
+        {"id": f"msg_{i}", "role": "assistant", "query": f"Query {i}", "sql": f"SQL {i}", "results_summary": f"Result {i}", "analysis": None, "timestamp": "2024-01-01T00:00:00"}
+        for i in range(start, end)
+    ]
+
+
+class RecordingLLM:
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return type("Response", (), {"content": f"summary {len(self.prompts)}"})()
+
+
+@pytest.mark.asyncio
+async def test_summarize_folds_only_new_messages():
+    """Each summarization should only send messages not yet in the summary."""
+    from app.modules.session.graph.nodes import summarize_node
+
+    llm = RecordingLLM()
+    state = create_initial_state("sess_123", "db_456")
+    state["messages"] = make_messages(0, 6)
+
+    update = await summarize_node(state, llm)
+    assert update == {"summary": "summary 1", "summarized_count": 3}
+    assert "Query 2" in llm.prompts[0] and "Query 3" not in llm.prompts[0]
+
+    state.update(update)
+    state["messages"] = make_messages(0, 9)
+    assert should_summarize(state) is True
+    update = await summarize_node(state, llm)
+
+    assert update == {"summary": "summary 2", "summarized_count": 6}
+    assert "Previous summary:\nsummary 1" in llm.prompts[1]
+    assert "Query 2" not in llm.prompts[1]
+    assert "Query 3" in llm.prompts[1] and "Query 5" in llm.prompts[1]
+
+
+def test_format_context_respects_token_budget():
+    """Older recent messages should be dropped when over budget, never the latest."""
+    state = create_initial_state("sess_123", "db_456")
+    state["messages"] = make_messages(0, 3)
+    state["messages"][-1]["analysis"] = "word " * 400
+
+    context = format_context_for_llm(state, max_tokens=50)
+
+    assert "Query 2" in context
+    assert "Query 0" not in context and "Query 1" not in context
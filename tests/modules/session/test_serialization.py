@@ -0,0 +1,97 @@
+"""Tests for session serialization."""
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.modules.session.models import Message
+from app.modules.session.repositories import SessionRepository
+from app.modules.session.serialization import SessionSerializer
+
+
+def make_history(count: int) -> list[dict]:
+    return [
+        {
+            "id": f"msg_{i}",
+            "role": "assistant",
+            "query": "What was the revenue per region last quarter?",
+            "sql": "SELECT region, SUM(amount) FROM orders GROUP BY region",
+            "analysis": "Revenue grew in every region, led by the west.",
+            "timestamp": datetime(2024, 1, 1, 12, i % 60),
+            "total": Decimal("1234.50"),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("format", ["msgpack+zstd", "msgpack"])
+def test_values_roundtrip_losslessly(format):
+    serializer = SessionSerializer(format)
+    history = make_history(3)
+
+    text = serializer.dumps(history)
+
+    assert text.startswith(f"msgpack{'+zstd' if format == 'msgpack+zstd' else ''}:")
+    assert serializer.loads(text) == history
+    assert serializer.loads_bytes(serializer.dumps_bytes(b"blob")) == b"blob"
+
+
+def test_compressed_histories_are_smaller_and_json_still_loads():
+    history = make_history(200)
+    legacy = json.dumps(history, default=str)
+    serializer = SessionSerializer("msgpack+zstd")
+
+    assert len(serializer.dumps(history)) * 5 < len(legacy)
+    # Sessions saved as JSON keep loading, whatever the configured format
+    assert serializer.loads(legacy)[0]["timestamp"] == "2024-01-01 12:00:00"
+    assert serializer.loads("{}") == {}
+    assert serializer.loads(None) is None
+
+
+class FakeStorage:
+    def __init__(self):
+        self.docs = {}
+        self.finds = []
+
+    def find_by_id(self, collection, id):
+        return dict(self.docs[id]) if id in self.docs else None
+
+    def update_or_create(self, collection, filter, doc):
+        self.docs.setdefault(filter["id"], {"id": filter["id"]}).update(doc)
+
+    def find(self, collection, filter, sort=None, page=0, limit=0, exclude_fields=None):
+        self.finds.append(exclude_fields)
+        return [
+            {k: v for k, v in doc.items() if k not in (exclude_fields or [])}
+            for doc in self.docs.values()
+        ]
+
+
+@pytest.mark.asyncio
+async def test_repository_reads_both_formats():
+    storage = FakeStorage()
+    legacy = Message(id="msg_1", role="human", query="Revenue?", timestamp=datetime(2024, 1, 1))
+    storage.docs["sess_1"] = {
+        "id": "sess_1",
+        "db_connection_id": "db_1",
+        "messages": json.dumps([legacy.to_dict()]),
+        "checkpoint": "{}",
+        "status": "idle",
+        "created_at": 0,
+        "updated_at": 0,
+    }
+    repository = SessionRepository(storage, SessionSerializer("msgpack+zstd"))
+
+    session = await repository.get("sess_1")
+    assert session.messages == [legacy]
+
+    session.messages.append(
+        Message(id="msg_2", role="assistant", query="Revenue?", timestamp=datetime(2024, 1, 2, 3, 4, 5, 6))
+    )
+    await repository.update(session)
+    assert storage.docs["sess_1"]["messages"].startswith("msgpack+zstd:")
+
+    [listed] = await repository.list(db_connection_id="db_1")
+    assert listed.messages == session.messages
+    assert storage.finds == [["checkpoint", "checkpoint_metadata"]]
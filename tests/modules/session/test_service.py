@@ -28,7 +28,9 @@ def mock_graph():
 
 @pytest.fixture
 def mock_checkpointer():
-    return MagicMock()
+    checkpointer = MagicMock()
+    checkpointer.adelete_thread = AsyncMock()
+    return checkpointer
 
 
 @pytest.fixture
@@ -84,11 +86,12 @@ async def test_list_sessions(service, mock_repository):
 
 
 @pytest.mark.asyncio
-async def test_delete_session(service, mock_repository):
-    """Should delete session."""
+async def test_delete_session(service, mock_repository, mock_checkpointer):
+    """Should delete session and its checkpoints."""
     await service.delete_session("sess_123")
 
     mock_repository.delete.assert_called_once_with("sess_123")
+    mock_checkpointer.adelete_thread.assert_called_once_with("sess_123")
 
 
 def test_format_sse(service):
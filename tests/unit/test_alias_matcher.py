@@ -0,0 +1,109 @@
+"""Tests for the compiled alias matcher."""
+
+import random
+from difflib import SequenceMatcher
+
+from app.modules.alias.models import Alias
+from app.modules.alias.matcher import AliasMatcher, alias_matchers
+from app.modules.sql_generation.services import SQLGenerationService
+from app.utils.core.cache import KeyedCache
+
+
+def make_alias(name: str) -> Alias:
+    return Alias(
+        db_connection_id="db1", name=name, target_name=f"t_{name}", target_type="column"
+    )
+
+
+def brute_force(aliases: list[Alias], prompt: str) -> list[str]:
+    """The previous per-alias matching, used as reference."""
+    prompt = prompt.lower()
+    words = prompt.split()
+    phrases = {
+        " ".join(words[i : i + n])
+        for n in range(1, min(len(words), 5) + 1)
+        for i in range(len(words) - n + 1)
+    }
+    found = []
+    for alias in aliases:
+        name = alias.name.lower()
+        if name in prompt or (
+            len(name) >= 3
+            and any(
+                abs(len(phrase) - len(name)) <= len(name) * 0.5
+                and SequenceMatcher(None, name, phrase).ratio() >= 0.8
+                for phrase in phrases
+            )
+        ):
+            found.append(alias.name)
+    return found
+
+
+def test_exact_and_fuzzy_matches():
+    aliases = [make_alias(name) for name in ("Revenue", "net sales", "churn", "region")]
+    matcher = AliasMatcher(aliases)
+
+    matched = matcher.match("Show net sales and revenu by regions")
+
+    assert [alias.name for alias in matched] == ["Revenue", "net sales", "region"]
+
+
+def test_matches_are_a_subset_of_previous_behaviour():
+    rng = random.Random(7)
+    vocabulary = ["sales", "salez", "revenue", "gross margin", "gm", "customer id",
+                  "cust", "orders", "order count", "active users", "user", "arpu"]
+    aliases = [make_alias(name) for name in vocabulary]
+    matcher = AliasMatcher(aliases)
+    words = vocabulary + ["show", "by", "month", "for", "the", "totl", "custmer", "ordrs"]
+
+    for _ in range(300):
+        prompt = " ".join(rng.choice(words) for _ in range(rng.randint(1, 12)))
+        matched = [alias.name for alias in matcher.match(prompt)]
+        reference = brute_force(aliases, prompt)
+        assert set(matched) <= set(reference)
+        # Exact hits and single typos are never lost
+        for typo, name in (("custmer", "customer id"), ("ordrs", "orders")):
+            if typo in prompt.split() and name in reference:
+                assert name in matched
+        for name in vocabulary:
+            if name in prompt:
+                assert name in matched
+
+
+def test_cache_rebuilds_only_after_invalidation():
+    cache: KeyedCache[AliasMatcher] = KeyedCache(ttl_seconds=3600)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return AliasMatcher([make_alias("revenue")])
+
+    first = cache.get("db1", load)
+    assert cache.get("db1", load) is first
+    cache.invalidate("db1")
+    assert cache.get("db1", load) is not first
+    assert len(loads) == 2
+
+
+class AliasStorage:
+    def __init__(self, aliases):
+        self.rows = [alias.model_dump() for alias in aliases]
+
+    def find(self, collection, filter, page=0, limit=0):
+        rows = [
+            row
+            for row in self.rows
+            if all(row.get(field) == value for field, value in filter.items())
+        ]
+        return rows[(page - 1) * limit : page * limit]
+
+
+def test_aliases_are_found_in_prompts():
+    storage = AliasStorage([make_alias(name) for name in ("revenue", "region")])
+    service = SQLGenerationService(storage)
+    alias_matchers.invalidate("db1")
+
+    aliases = service.find_aliases_in_prompt("total revenue last month", "db1")
+
+    assert [alias["name"] for alias in aliases] == ["revenue"]
+    alias_matchers.invalidate("db1")
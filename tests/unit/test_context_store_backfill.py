@@ -0,0 +1,174 @@
+"""Tests for batched NER templating and backfill of context stores."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.modules.context_store import services as context_store_services
+from app.modules.context_store.models import ContextStore
+from app.modules.context_store.services import ContextStoreService
+from app.utils.prompts_ner.prompts_ner import get_ner_template_version
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+class FakeNerModel:
+    def __init__(self, failing: str | None = None):
+        self.failing = failing
+        self.configs = []
+
+    def batch(self, prompts, config=None, return_exceptions=False):
+        self.configs.append(config)
+        results = []
+        for prompt in prompts:
+            if self.failing and self.failing in prompt:
+                results.append(ValueError("rate limited"))
+            elif "Jakarta" in prompt:
+                content = json.dumps([{"entity": "Jakarta", "label": "city name"}])
+                results.append(SimpleNamespace(content=content))
+            else:
+                results.append(SimpleNamespace(content="[]"))
+        return results
+
+
+@pytest.fixture
+def service(monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(
+        context_store_services,
+        "EmbeddingModel",
+        lambda: SimpleNamespace(get_model=lambda: embeddings),
+    )
+    monkeypatch.setattr(context_store_services, "CONTEXT_STORE_EMBEDDING_BATCH", 2)
+    storage = MagicMock()
+    storage.bulk_import.side_effect = lambda collection, docs, action: [
+        {"success": True} for _ in docs
+    ]
+    service = ContextStoreService(storage)
+    service.embeddings = embeddings
+    service.ner_model = FakeNerModel()
+    monkeypatch.setattr(service, "_get_ner_model", lambda: service.ner_model)
+    return service
+
+
+def make_context_store(id: str, prompt_text: str, template_version=None) -> ContextStore:
+    return ContextStore(
+        id=id,
+        db_connection_id="db1",
+        prompt_text=prompt_text,
+        prompt_text_ner=prompt_text,
+        entities=[],
+        labels=[],
+        prompt_embedding=[],
+        sql="SELECT 1",
+        template_version=template_version,
+    )
+
+
+def test_stale_context_stores_are_templated_in_one_bulk_import(service, monkeypatch):
+    current = make_context_store("1", "sales in Bandung", get_ner_template_version())
+    stale = [
+        make_context_store("2", "sales in Jakarta"),
+        make_context_store("3", "total revenue", "old"),
+        make_context_store("4", "number of halls"),
+    ]
+    monkeypatch.setattr(
+        service.repository, "find_all_by", lambda filter: [current, *stale]
+    )
+
+    report = service.backfill_templates("db1")
+
+    assert (report.total, report.updated, report.failed) == (4, 3, 0)
+    assert service.embeddings.batches == [
+        ["sales in Jakarta", "total revenue"],
+        ["number of halls"],
+    ]
+    service.storage.bulk_import.assert_called_once()
+    _, docs = service.storage.bulk_import.call_args.args
+    assert [doc["id"] for doc in docs] == ["2", "3", "4"]
+    assert service.storage.bulk_import.call_args.kwargs == {"action": "upsert"}
+    assert stale[0].prompt_text_ner == "sales in <CITY NAME>"
+    assert stale[0].entities == ["Jakarta"]
+    assert all(cs.template_version == get_ner_template_version() for cs in stale)
+
+
+def test_failed_ner_rows_stay_stale(service, monkeypatch):
+    service.ner_model = FakeNerModel(failing="total revenue")
+    context_stores = [
+        make_context_store("1", "sales in Jakarta"),
+        make_context_store("2", "total revenue"),
+    ]
+    monkeypatch.setattr(service.repository, "find_all_by", lambda filter: context_stores)
+
+    report = service.backfill_templates("db1")
+
+    assert (report.updated, report.failed) == (1, 1)
+    assert context_stores[1].template_version is None
+    assert context_stores[1].prompt_text_ner == "total revenue"
+    assert service.ner_model.configs == [
+        {"max_concurrency": context_store_services.CONTEXT_STORE_NER_CONCURRENCY}
+    ]
+
+
+def test_up_to_date_connection_is_not_rewritten(service, monkeypatch):
+    version = get_ner_template_version()
+    monkeypatch.setattr(
+        service.repository,
+        "find_all_by",
+        lambda filter: [make_context_store("1", "sales in Jakarta", version)],
+    )
+
+    report = service.backfill_templates("db1")
+
+    assert (report.total, report.updated) == (1, 0)
+    service.storage.bulk_import.assert_not_called()
+    assert service.embeddings.batches == []
+
+
+def test_backfill_runs_in_the_background(service, monkeypatch):
+    from fastapi import BackgroundTasks
+
+    context_stores = [
+        make_context_store("1", "sales in Jakarta", get_ner_template_version()),
+        make_context_store("2", "total revenue"),
+    ]
+    monkeypatch.setattr(service.repository, "find_all_by", lambda filter: context_stores)
+    background_tasks = BackgroundTasks()
+
+    report = service.schedule_backfill_templates("db1", background_tasks)
+
+    assert (report.total, report.stale, report.status) == (2, 1, "scheduled")
+    assert service.embeddings.batches == []
+    assert len(background_tasks.tasks) == 1
+    assert background_tasks.tasks[0].args == ("db1", False)
+
+
+def test_exact_prompt_lookup_falls_back_without_template_version(service, monkeypatch):
+    version = get_ner_template_version()
+    filters = []
+
+    def find_by_prompt_ner(db_connection_id, prompt_text_ner, filter_by):
+        filters.append(filter_by)
+        if "template_version" in filter_by:
+            raise RuntimeError("Could not find a filter field named `template_version`")
+        return [
+            {"prompt_text": "a", "template_version": None},
+            {"prompt_text": "b", "template_version": "old"},
+            {"prompt_text": "c", "template_version": version},
+        ]
+
+    monkeypatch.setattr(service.repository, "find_by_prompt_ner", find_by_prompt_ner)
+
+    matches = service.retrieve_exact_prompt_ner("db1", "sales in <CITY>", {"labels": ["city"]})
+
+    assert [match["prompt_text"] for match in matches] == ["a", "c"]
+    assert filters == [{"labels": ["city"], "template_version": version}, {"labels": ["city"]}]
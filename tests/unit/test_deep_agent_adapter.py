@@ -282,7 +282,7 @@ class DeepAgentProxyTests(unittest.TestCase):
 
     def _fake_agent(self):
         class Agent:
-            def stream(self, payload):  # noqa: ARG002
+            def stream(self, payload, config=None):  # noqa: ARG002
                 yield {
                     "todos": [{"status": "pending", "text": "Plan"}],
                     "tool": {"name": "sql_db_query", "output": "rows"},
@@ -291,7 +291,7 @@ class DeepAgentProxyTests(unittest.TestCase):
                     "files": ["/tmp/result.csv"],
                 }
 
-            def invoke(self, payload):  # noqa: ARG002
+            def invoke(self, payload, config=None):  # noqa: ARG002
                 return {"messages": [{"content": "SELECT 1"}]}
 
         return Agent()
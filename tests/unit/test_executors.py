@@ -0,0 +1,64 @@
+"""Tests for the shared named thread pools."""
+
+import contextvars
+import threading
+import time
+
+import pytest
+
+from app.utils.core.executors import executor_stats, get_executor, shutdown_executors
+from app.utils.core.timeout import run_with_timeout
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+@pytest.fixture(autouse=True)
+def fresh_executors(monkeypatch):
+    monkeypatch.setenv("EXECUTOR_TEST_WORKERS", "2")
+    shutdown_executors()
+    yield
+    shutdown_executors(cancel_futures=True)
+
+
+def test_pools_are_shared_and_bounded():
+    executor = get_executor("test")
+    release = threading.Event()
+
+    futures = [executor.submit(release.wait) for _ in range(5)]
+    time.sleep(0.1)
+    stats = executor.stats()
+    assert get_executor("test") is executor
+    assert stats["max_workers"] == 2
+    assert (stats["active"], stats["queued"], stats["saturation"]) == (2, 3, 1.0)
+
+    release.set()
+    for future in futures:
+        future.result(timeout=1)
+    [stats] = executor_stats()
+    assert (stats["active"], stats["queued"], stats["completed"]) == (0, 0, 5)
+    assert stats["peak_queued"] >= 3
+
+
+def test_run_times_out_and_runs_inline_in_workers():
+    executor = get_executor("test")
+
+    with pytest.raises(TimeoutError):
+        run_with_timeout(time.sleep, args=(0.5,), timeout_duration=0.05, pool="test")
+
+    # Nested calls would otherwise wait for a worker held by their caller
+    def nested(depth):
+        return executor.run(nested, args=(depth - 1,)) if depth else threading.current_thread().name
+
+    assert executor.run(nested, args=(5,), timeout=1).startswith("kai-test_")
+
+
+def test_context_follows_the_work_and_pools_are_recreated():
+    request_id.set("abc")
+    executor = get_executor("test")
+
+    assert executor.submit(request_id.get).result(timeout=1) == "abc"
+
+    shutdown_executors()
+    assert executor_stats() == []
+    assert get_executor("test") is not executor
+    assert get_executor("test").run(lambda: 1 + 1) == 2
@@ -0,0 +1,242 @@
+"""Tests for the fan-out/fan-in context branches of the LangGraph SQL agent."""
+
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.modules.table_description.models import ColumnDescription, TableDescription
+from app.server import config
+from app.utils.sql_generator.graph_agent import nodes
+from app.utils.sql_generator.graph_agent.graph import build_sql_agent_graph
+from app.utils.sql_generator.graph_agent.state import SQLAgentState
+from app.utils.tracing import exporters, trace_generation
+
+DELAY = 0.3
+
+
+def slow(value):
+    def call(*args, **kwargs):
+        time.sleep(DELAY)
+        return value
+
+    return call
+
+
+def make_table(name: str, *columns: str) -> TableDescription:
+    return TableDescription(
+        db_connection_id="db1",
+        db_schema="public",
+        table_name=name,
+        table_description=f"{name} table",
+        columns=[ColumnDescription(name=column, data_type="TEXT") for column in columns],
+    )
+
+
+@pytest.fixture
+def services(monkeypatch):
+    monkeypatch.setattr(config, "Settings", lambda: None)
+    monkeypatch.setattr(nodes, "Storage", lambda settings: MagicMock())
+    monkeypatch.setattr(
+        nodes,
+        "DatabaseConnectionRepository",
+        lambda storage: SimpleNamespace(find_by_id=lambda id: SimpleNamespace(schemas=[])),
+    )
+    tables = [make_table("orders", "id", "status"), make_table("users", "id", "email")]
+    monkeypatch.setattr(
+        nodes,
+        "TableDescriptionRepository",
+        lambda storage: SimpleNamespace(get_all_tables_by_db=slow(tables)),
+    )
+    examples = [
+        {"prompt_text": "all users", "sql": "SELECT * FROM users"},
+        {"prompt_text": "all users", "sql": "SELECT * FROM users"},
+    ]
+    monkeypatch.setattr(
+        nodes,
+        "ContextStoreService",
+        lambda storage: SimpleNamespace(retrieve_context_for_question=slow(examples)),
+    )
+    monkeypatch.setattr(
+        nodes,
+        "InstructionService",
+        lambda storage: SimpleNamespace(
+            retrieve_instruction_for_question=slow([{"instruction": "be nice"}])
+        ),
+    )
+    monkeypatch.setattr(
+        nodes,
+        "BusinessGlossaryService",
+        lambda storage: SimpleNamespace(
+            retrieve_business_metrics_for_question=slow([])
+        ),
+    )
+
+    def embed_documents(texts):
+        time.sleep(DELAY)
+        return [[1.0, 0.0] if "orders" in text else [0.0, 1.0] for text in texts]
+
+    embedding_model = SimpleNamespace(
+        embed_query=slow([1.0, 0.0]), embed_documents=embed_documents
+    )
+    monkeypatch.setattr(
+        nodes, "EmbeddingModel", lambda: SimpleNamespace(get_model=lambda: embedding_model)
+    )
+    database = SimpleNamespace(run_sql=lambda sql, top_k: ("[(1,)]", {}))
+    monkeypatch.setattr(
+        nodes.SQLDatabase, "get_sql_engine", staticmethod(lambda db_connection: database)
+    )
+
+
+def run_graph(config: dict | None = None) -> dict:
+    llm = SimpleNamespace(invoke=lambda prompt: SimpleNamespace(content="SELECT 1"))
+    return build_sql_agent_graph(llm).invoke(
+        SQLAgentState(
+            question="open orders",
+            db_connection_id="db1",
+            prompt_id="p1",
+            dialect="postgresql",
+        ),
+        config,
+    )
+
+
+def test_context_branches_overlap(services):
+    start = time.monotonic()
+    final_state = run_graph()
+    elapsed = time.monotonic() - start
+
+    # Sequentially: table scan, retrievals, then both embeddings (4 * DELAY)
+    assert elapsed < 3 * DELAY
+    assert final_state["status"] == "VALID"
+    assert final_state["generated_sql"] == "SELECT 1"
+    assert len(final_state["few_shot_examples"]) == 1
+    assert final_state["instructions"] == [{"instruction": "be nice"}]
+
+
+def test_few_shot_tables_come_before_ranked_tables(services):
+    final_state = run_graph()
+
+    assert [table["table_name"] for table in final_state["ranked_tables"]] == [
+        "orders",
+        "users",
+    ]
+    assert [table["table_name"] for table in final_state["relevant_tables"]] == [
+        "users",
+        "orders",
+    ]
+    assert list(final_state["table_schemas"]) == ["public.users", "public.orders"]
+    assert [
+        column["name"] for column in final_state["table_schemas"]["public.orders"]["columns"]
+    ] == ["id", "status"]
+
+
+def test_missing_connection_fails_generation(services, monkeypatch):
+    monkeypatch.setattr(
+        nodes,
+        "DatabaseConnectionRepository",
+        lambda storage: SimpleNamespace(find_by_id=lambda id: None),
+    )
+
+    update = nodes.rank_tables(
+        SQLAgentState(question="q", db_connection_id="db1", prompt_id="p1", dialect="x")
+    )
+
+    assert update["status"] == "INVALID"
+    assert "not found" in update["error"]
+
+
+def test_every_node_gets_a_span(services, monkeypatch):
+    monkeypatch.setattr(exporters, "SQL_AGENT_TRACE_EXPORTERS", "")
+
+    with trace_generation("graph_agent") as trace:
+        run_graph({"callbacks": [trace.callback_handler]})
+
+    spans = {span.name: span for span in trace.spans}
+    assert set(spans) == {
+        "collect_context",
+        "rank_tables",
+        "identify_tables",
+        "analyze_schemas",
+        "analyze_columns",
+        "generate_query",
+        "validate_query",
+        "format_response",
+    }
+    assert spans["rank_tables"].duration_ms >= 2 * DELAY * 1000
+
+
+def run_speculative_graph(monkeypatch, responses: dict, scores: dict, evaluator=True) -> dict:
+    def invoke(prompt):
+        for hint, (delay, sql) in responses.items():
+            if hint in prompt:
+                time.sleep(delay)
+                return SimpleNamespace(content=sql)
+        raise AssertionError("unexpected prompt")
+
+    def run_sql(sql, top_k=None):
+        if "missing" in sql:
+            raise ValueError("no such table: missing")
+        return "[(1,)]", {}
+
+    database = SimpleNamespace(dialect="sqlite", run_sql=run_sql)
+    monkeypatch.setattr(
+        nodes.SQLDatabase, "get_sql_engine", staticmethod(lambda db_connection: database)
+    )
+    scorer = SimpleNamespace(
+        evaluate=lambda user_prompt, sql_generation, database_connection: SimpleNamespace(
+            score=scores[sql_generation.sql]
+        )
+    )
+    llm = SimpleNamespace(invoke=invoke)
+    graph = build_sql_agent_graph(
+        llm, candidates=3, candidate_llm=llm, evaluator=scorer if evaluator else None
+    )
+    return graph.invoke(
+        SQLAgentState(
+            question="open orders", db_connection_id="db1", prompt_id="p1", dialect="sqlite"
+        )
+    )
+
+
+def test_first_accepted_candidate_wins(services, monkeypatch):
+    responses = {
+        "common table expressions": (0.0, "SELECT * FROM missing"),
+        "explicit JOINs": (0.05, "SELECT 2"),
+        "Task": (2.0, "SELECT 1"),
+    }
+    start = time.monotonic()
+    final_state = run_speculative_graph(monkeypatch, responses, {"SELECT 2": 0.9})
+
+    # The slow candidate is not waited for
+    assert time.monotonic() - start < 2.0
+    assert final_state["status"] == "VALID"
+    assert final_state["generated_sql"] == "SELECT 2"
+    speculation = final_state["metadata"]["speculation"]
+    assert speculation["winner"] == 2
+    assert speculation["confidence_score"] == 0.9
+    assert [candidate["valid"] for candidate in speculation["candidates"]] == [False, True]
+
+
+def test_best_candidate_wins_below_threshold(services, monkeypatch):
+    responses = {
+        "common table expressions": (0.0, "SELECT 1"),
+        "explicit JOINs": (0.0, "SELECT 2"),
+        "Task": (0.0, "SELECT * FROM missing"),
+    }
+    final_state = run_speculative_graph(
+        monkeypatch, responses, {"SELECT 1": 0.5, "SELECT 2": 0.7}
+    )
+
+    assert final_state["generated_sql"] == "SELECT 2"
+    assert len(final_state["metadata"]["speculation"]["candidates"]) == 3
+
+
+def test_invalid_candidates_are_refined(services, monkeypatch):
+    responses = {"Task": (0.0, "SELECT * FROM missing")}
+    final_state = run_speculative_graph(monkeypatch, responses, {}, evaluator=False)
+
+    assert final_state["iteration_count"] == 3
+    assert final_state["status"] == "INVALID"
+    assert "no such table" in final_state["error"]
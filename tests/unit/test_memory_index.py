@@ -0,0 +1,155 @@
+"""Tests for the in-memory recall index of agent sessions."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.modules.memory.backends import typesense as typesense_backend
+from app.modules.memory.backends.typesense import TypeSenseMemoryBackend
+from app.modules.memory.index import MemoryIndex
+from app.modules.memory.models import Memory
+from app.modules.memory.repositories import MemoryRepository
+
+EMBEDDINGS = {
+    "fiscal year": [1.0, 0.0],
+    "currency": [0.0, 1.0],
+    "money": [0.1, 1.0],
+}
+
+
+def make_memory(namespace: str, key: str, content: str, embedding: list[float]) -> Memory:
+    return Memory(
+        id=f"{namespace}-{key}",
+        db_connection_id="db1",
+        namespace=namespace,
+        key=key,
+        value={"content": content},
+        content_text=content,
+        memory_embedding=embedding,
+        created_at="2024-01-01T00:00:00+00:00",
+        updated_at="2024-01-01T00:00:00+00:00",
+    )
+
+
+def make_memories() -> list[Memory]:
+    return [
+        make_memory("facts", "fiscal_year", "fiscal year starts in April", [1.0, 0.1]),
+        make_memory("facts", "currency", "amounts are in IDR", [0.0, 1.0]),
+        make_memory("preferences", "dates", "dates as YYYY-MM-DD", [0.7, 0.7]),
+        make_memory("preferences", "opposite", "unrelated", [-1.0, 0.0]),
+    ]
+
+
+def test_hybrid_scores_follow_vector_distance():
+    index = MemoryIndex("db1")
+    index.load(make_memories())
+
+    results = index.search("fiscal year", [1.0, 0.0], limit=4)
+
+    assert [r.memory.key for r in results] == ["fiscal_year", "dates", "currency"]
+    assert results[0].score == pytest.approx(1 - (1 - 1 / (1.01**0.5)) / 2)
+    assert results[2].score == pytest.approx(0.5)
+    assert [r.memory.key for r in index.search("currency", [0.0, 1.0], "preferences")] == [
+        "dates",
+        "opposite",
+    ]
+    # Without embedding the text match decides
+    [text_match] = index.search("April", None)
+    assert text_match.memory.key == "fiscal_year" and text_match.match_type == "text"
+
+
+class FakeRepository:
+    def __init__(self):
+        self.loads = 0
+        self.deleted = []
+
+    def find_shared_for_connection(self, db_connection_id, limit=None):
+        self.loads += 1
+        return make_memories()
+
+    def find_by_key(self, db_connection_id, namespace, key, session_id=None):
+        return None
+
+    def delete_by_key(self, db_connection_id, namespace, key, session_id=None):
+        self.deleted.append(key)
+        return True
+
+    def bulk_upsert(self, memories):
+        return [{"success": True} for _ in memories]
+
+    def bulk_increment_access(self, memories):
+        for memory in memories:
+            memory.access_count += 1
+
+    def search(self, *args, **kwargs):
+        raise AssertionError("recall should be answered by the index")
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    embedded = []
+
+    def embed_query(text):
+        embedded.append(text)
+        return EMBEDDINGS.get(text, [0.5, 0.5])
+
+    monkeypatch.setattr(
+        typesense_backend,
+        "EmbeddingModel",
+        lambda: SimpleNamespace(get_model=lambda: SimpleNamespace(embed_query=embed_query)),
+    )
+    monkeypatch.setattr(typesense_backend, "get_memory_writer", lambda storage: None)
+    backend = TypeSenseMemoryBackend(None, index=MemoryIndex("db1"))
+    backend.repository = FakeRepository()
+    backend.embedded = embedded
+    return backend
+
+
+def test_backend_recalls_from_the_index(backend):
+    for _ in range(3):
+        results = backend.recall("db1", "fiscal year", limit=1)
+
+    assert [r.memory.key for r in results] == ["fiscal_year"]
+    assert results[0].memory.access_count == 3
+    assert backend.repository.loads == 1
+    assert backend.embedded == ["fiscal year"]
+
+    backend.remember("db1", "facts", "currency_symbol", {"content": "Rp"})
+    backend.forget("db1", "facts", "currency")
+    keys = [r.memory.key for r in backend.recall("db1", "money", "facts")]
+    assert "currency_symbol" in keys and "currency" not in keys
+    assert backend.repository.loads == 1
+
+    # Other connections and session memories are still searched in TypeSense
+    assert backend._use_index("db1", "session-1") is False
+    assert backend._use_index("db2", None) is False
+
+
+class PagedStorage:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = []
+
+    def find(self, collection, filter, page=0, limit=0):
+        self.finds.append((filter, page))
+        docs = [
+            doc
+            for doc in self.docs
+            if all(doc.get(field) == value for field, value in filter.items())
+        ]
+        return [dict(doc) for doc in docs[(page - 1) * limit : page * limit]]
+
+
+def test_shared_memories_stop_paging_past_the_limit():
+    shared = [memory.model_dump() for memory in make_memories()]
+    session = dict(shared[0], id="session-memory", session_id="session-1")
+    storage = PagedStorage([session] + shared * 3)
+    repository = MemoryRepository(storage)
+
+    memories = repository.find_shared_for_connection("db1", limit=4, page_size=2)
+
+    assert len(memories) == 6
+    assert all(memory.session_id is None for memory in memories)
+    assert storage.finds[0][0] == {"db_connection_id": "db1", "session_id": None}
+    assert [page for _, page in storage.finds] == [1, 2, 3]
+    assert len(repository.find_shared_for_connection("db1", page_size=5)) == 12
@@ -0,0 +1,126 @@
+"""Tests for the grouped reads of the LangGraph memory store."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from langgraph.store.base import GetOp, ListNamespacesOp, MatchCondition, PutOp, SearchOp
+
+from app.data.db.storage import Storage
+from app.modules.memory.backends import typesense as typesense_backend
+from app.modules.memory.backends.typesense import TypeSenseMemoryBackend
+from app.modules.memory.services import MemoryService
+from app.modules.memory.store import TypesenseStore
+
+
+class FakeStorage(Storage):
+    def __init__(self):
+        self.docs = {}
+        self.searches = []
+
+    def bulk_import(self, collection, docs, action="upsert"):
+        for doc in docs:
+            if action == "update":
+                self.docs[doc["id"]].update(doc)
+            else:
+                self.docs[doc["id"]] = dict(doc)
+        return [{"success": True} for _ in docs]
+
+    def find_one(self, collection, filter):
+        for doc in self.docs.values():
+            if doc["namespace"] == filter["namespace"] and doc["key"] == filter["key"]:
+                return dict(doc)
+        return None
+
+    def find(self, collection, filter, sort=None, page=0, limit=0):
+        return [dict(doc) for doc in self.docs.values()]
+
+    def delete_by_id(self, collection, id):
+        return self.docs.pop(id, None)
+
+    def multi_search(self, collection, searches, common_params=None):
+        self.searches.append(searches)
+        results = []
+        for search in searches:
+            hits = [
+                {"document": dict(doc), "vector_distance": 0.2}
+                for doc in self.docs.values()
+                if doc["key"] in search["filter_by"] or "vector_query" in search
+            ]
+            results.append({"found": len(hits), "hits": hits})
+        return results
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.batches = []
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[1.0] for _ in texts]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(
+        typesense_backend,
+        "EmbeddingModel",
+        lambda: SimpleNamespace(get_model=lambda: embeddings),
+    )
+    monkeypatch.setattr(typesense_backend, "get_memory_writer", lambda storage: None)
+    storage = FakeStorage()
+    store = TypesenseStore.__new__(TypesenseStore)
+    store.storage = storage
+    store.db_connection_id = "db1"
+    store.service = MemoryService(backend=TypeSenseMemoryBackend(storage))
+    store.embeddings = embeddings
+    store.batch(
+        [
+            PutOp(("facts",), "fiscal_year", {"content": "starts in April"}),
+            PutOp(("facts",), "currency", {"content": "IDR"}),
+            PutOp(("preferences", "dates"), "format", {"content": "YYYY-MM-DD"}),
+        ]
+    )
+    storage.searches.clear()
+    return store
+
+
+def test_abatch_groups_reads(store):
+    results = asyncio.run(
+        store.abatch(
+            [
+                GetOp(("facts",), "fiscal_year"),
+                SearchOp(("facts",), query="fiscal year"),
+                GetOp(("facts",), "missing"),
+                GetOp(("preferences", "dates"), "format"),
+                SearchOp(("facts",), query="currency"),
+                ListNamespacesOp(
+                    match_conditions=(MatchCondition("prefix", ("preferences",)),)
+                ),
+            ]
+        )
+    )
+
+    # One lookup for the gets, one embedding call and search for the queries
+    assert len(store.storage.searches) == 2
+    assert store.embeddings.batches == [["fiscal year", "currency"]]
+    assert results[0].value == {"content": "starts in April"}
+    assert results[2] is None
+    assert results[3].namespace == ("preferences", "dates")
+    assert len(results[1]) == len(results[4]) == 3
+    assert results[5] == [("preferences", "dates")]
+    assert all(doc["access_count"] > 0 for doc in store.storage.docs.values())
+
+
+def test_async_helpers_go_through_abatch(store):
+    async def run():
+        await store.aput(("facts",), "currency", {"content": "USD"})
+        item = await store.aget(("facts",), "currency")
+        await store.adelete(("facts",), "fiscal_year")
+        return item
+
+    item = asyncio.run(run())
+
+    assert item.value == {"content": "USD"}
+    assert sorted(doc["key"] for doc in store.storage.docs.values()) == ["currency", "format"]
@@ -0,0 +1,159 @@
+"""Tests for the write-behind queue of memory writes and access counts."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.data.db.storage import Storage
+from app.modules.memory.backends import typesense as typesense_backend
+from app.modules.memory.backends.typesense import TypeSenseMemoryBackend
+from app.modules.memory.repositories import MemoryRepository
+from app.modules.memory.write_behind import MemoryWriteBehind
+
+
+class FakeStorage:
+    def __init__(self):
+        self.docs = {}
+        self.imports = []
+        self.fail_next = False
+
+    def bulk_import(self, collection, docs, action="upsert"):
+        self.imports.append((action, [dict(doc) for doc in docs]))
+        if self.fail_next:
+            self.fail_next = False
+            return [{"success": False, "error": "unavailable"} for _ in docs]
+        for doc in docs:
+            if action == "update":
+                self.docs[doc["id"]].update(doc)
+            else:
+                self.docs[doc["id"]] = dict(doc)
+        return [{"success": True} for _ in docs]
+
+    def delete_by_id(self, collection, id):
+        return self.docs.pop(id, None)
+
+    def find_one(self, collection, filter):
+        for doc in self.docs.values():
+            if all(doc.get(field) == value for field, value in filter.items()):
+                return dict(doc)
+        return None
+
+    def multi_search(self, collection, searches, common_params=None):
+        hits = [{"document": dict(doc), "vector_distance": 0.2} for doc in self.docs.values()]
+        return [{"hits": hits} for _ in searches]
+
+    rank_hybrid_hits = staticmethod(Storage.rank_hybrid_hits)
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.texts = []
+
+    def embed_query(self, text):
+        self.texts.append(text)
+        return [float(len(text))]
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(
+        typesense_backend,
+        "EmbeddingModel",
+        lambda: SimpleNamespace(get_model=lambda: embeddings),
+    )
+    storage = FakeStorage()
+    writer = MemoryWriteBehind(MemoryRepository(storage), flush_interval=60, batch_size=100)
+    monkeypatch.setattr(typesense_backend, "get_memory_writer", lambda storage: writer)
+    backend = TypeSenseMemoryBackend(storage)
+    backend.embeddings = embeddings
+    yield backend
+    writer.close()
+
+
+def test_remember_is_coalesced_per_key(backend):
+    storage = backend.storage
+
+    backend.remember("db1", "facts", "fiscal_year", {"content": "starts in April"})
+    backend.remember("db1", "facts", "fiscal_year", {"content": "starts in April"}, 0.9)
+    memory = backend.get_memory("db1", "facts", "fiscal_year")
+
+    assert storage.imports == []
+    assert memory.importance == 0.9
+    assert backend.embeddings.texts == ["starts in April"]
+
+    assert backend.writer.flush() == 1
+    [(action, docs)] = storage.imports
+    assert action == "upsert" and docs[0]["id"] == memory.id
+    assert docs[0]["access_count"] == 2
+    assert docs[0]["memory_embedding"] == [15.0]
+
+    backend.remember("db1", "facts", "fiscal_year", {"content": "starts in July"})
+    assert backend.embeddings.texts == ["starts in April", "starts in July"]
+
+
+def test_recall_only_reads(backend):
+    storage = backend.storage
+    backend.remember("db1", "facts", "a", {"content": "a"})
+    backend.remember("db1", "facts", "b", {"content": "b"})
+    backend.writer.flush()
+    storage.imports.clear()
+
+    for _ in range(3):
+        results = backend.recall("db1", "anything")
+    assert storage.imports == []
+    assert [result.memory.access_count for result in results] == [3, 3]
+
+    backend.writer.flush()
+    [(action, updates)] = storage.imports
+    assert action == "update"
+    assert sorted(update["access_count"] for update in updates) == [3, 3]
+    assert all(doc["access_count"] == 3 for doc in storage.docs.values())
+
+
+def test_failed_writes_are_retried_and_drained(backend):
+    storage = backend.storage
+    storage.fail_next = True
+    backend.remember("db1", "facts", "a", {"content": "a"})
+
+    assert backend.writer.flush() == 0
+    assert len(backend.writer) == 1
+    assert backend.forget("db1", "facts", "missing") is False
+
+    backend.writer.close()
+    assert len(backend.writer) == 0
+    assert [doc["key"] for doc in storage.docs.values()] == ["a"]
+
+
+def test_memory_forgotten_during_a_flush_stays_deleted(backend):
+    storage = backend.storage
+    backend.remember("db1", "facts", "a", {"content": "a"})
+    bulk_import = storage.bulk_import
+
+    def forget_while_writing(collection, docs, action="upsert"):
+        # The delete reaches Typesense before the in-flight upsert
+        assert backend.forget("db1", "facts", "a") is True
+        return bulk_import(collection, docs, action)
+
+    storage.bulk_import = forget_while_writing
+    backend.writer.flush()
+
+    assert storage.docs == {}
+    assert len(backend.writer) == 0
+
+
+def test_failed_write_of_a_forgotten_memory_is_not_retried(backend):
+    storage = backend.storage
+    backend.remember("db1", "facts", "a", {"content": "a"})
+    bulk_import = storage.bulk_import
+
+    def clear_while_writing(collection, docs, action="upsert"):
+        backend.writer.discard("db1")
+        storage.fail_next = True
+        return bulk_import(collection, docs, action)
+
+    storage.bulk_import = clear_while_writing
+    backend.writer.flush()
+
+    assert len(backend.writer) == 0
+    assert storage.docs == {}
@@ -0,0 +1,94 @@
+"""Tests for the shared reflection cache."""
+
+import os
+
+import pytest
+from sqlalchemy import MetaData, create_engine, text
+
+from app.utils.sql_database.reflection_cache import ReflectionCache
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    with engine.begin() as connection:
+        for name in ("customers", "orders"):
+            connection.execute(text(f"CREATE TABLE {name} (id INTEGER, status TEXT)"))
+    return engine
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReflectionCache(path=str(tmp_path / "cache"), ttl_seconds=3600)
+
+
+def count_reflections(monkeypatch):
+    calls = []
+    original = MetaData.reflect
+
+    def reflect(self, *args, **kwargs):
+        calls.append(kwargs.get("only"))
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(MetaData, "reflect", reflect)
+    return calls
+
+
+def test_only_missing_tables_are_reflected(engine, cache, monkeypatch):
+    calls = count_reflections(monkeypatch)
+
+    first = cache.get_metadata(engine, tables=["orders"])
+    cache.get_metadata(engine, tables=["orders"])
+    meta = cache.get_metadata(engine, tables=["orders", "customers"])
+
+    assert calls == [["orders"], ["customers"]]
+    assert set(meta.tables) == {"orders", "customers"}
+    # Readers of the earlier metadata never see it change
+    assert set(first.tables) == {"orders"}
+
+
+def test_cache_is_shared_through_disk(engine, cache, tmp_path, monkeypatch):
+    cache.get_metadata(engine)
+    calls = count_reflections(monkeypatch)
+
+    restarted = ReflectionCache(path=str(tmp_path / "cache"))
+    meta = restarted.get_metadata(engine, tables=["orders"])
+
+    assert calls == []
+    assert [column.name for column in meta.tables["orders"].columns] == ["id", "status"]
+
+
+def test_expired_and_invalidated_entries_are_reflected_again(engine, cache, monkeypatch):
+    cache.get_metadata(engine)
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE orders ADD COLUMN channel TEXT"))
+
+    assert "channel" not in cache.get_metadata(engine).tables["orders"].c
+    cache.invalidate(engine)
+    assert "channel" in cache.get_metadata(engine).tables["orders"].c
+
+    calls = count_reflections(monkeypatch)
+    cache.ttl_seconds = 0
+    cache.get_metadata(engine)
+    assert calls == [None]
+
+
+def test_invalidating_a_schema_keeps_schemas_sharing_its_prefix(engine, cache):
+    cache.get_metadata(engine, schema="main")
+    key = cache._key(engine, "main_archive")
+    cache._entries[key] = cache._entries[cache._key(engine, "main")]
+
+    cache.invalidate(engine, "main")
+
+    assert cache._key(engine, "main") not in cache._entries
+    assert key in cache._entries
+
+
+def test_cache_files_writable_by_others_are_ignored(engine, cache, tmp_path, monkeypatch):
+    cache.get_metadata(engine)
+    os.chmod(cache._file_path(cache._key(engine, None)), 0o666)
+    calls = count_reflections(monkeypatch)
+
+    ReflectionCache(path=str(tmp_path / "cache")).get_metadata(engine)
+
+    assert calls == [None]
@@ -0,0 +1,152 @@
+"""Tests for the cross-table LLM description pipeline."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+from sqlalchemy import create_engine, text
+
+from app.modules.sql_generation.models import LLMConfig
+from app.modules.table_description.models import ColumnDescription, TableDescription
+from app.utils.sql_database import scan_checkpoint, scanner
+from app.utils.sql_database.reflection_cache import ReflectionCache
+from app.utils.sql_database.value_index import ValueIndexStore
+from app.utils.sql_database.scanner import TableColumnsDescriptionGenerator
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    monkeypatch.setattr(scanner, "ChatModel", lambda: None)
+    monkeypatch.setattr(scanner, "SCANNER_LLM_BACKOFF_SECONDS", 0)
+    generator = TableColumnsDescriptionGenerator(LLMConfig())
+    generator.calls = []
+
+    def respond(inputs: dict):
+        generator.calls.append(inputs)
+        if "column_name" in inputs:
+            return SimpleNamespace(content=f"about {inputs['column_name']}")
+        return SimpleNamespace(content=f"table {inputs['table_name']}")
+
+    monkeypatch.setattr(
+        generator, "create_chain", lambda *args, **kwargs: RunnableLambda(respond)
+    )
+    return generator
+
+
+def make_table(name: str, *columns: str) -> TableDescription:
+    return TableDescription(
+        db_connection_id="db1",
+        db_schema="public",
+        table_name=name,
+        columns=[ColumnDescription(name=column) for column in columns],
+    )
+
+
+def test_columns_from_many_tables_are_described_together(generator):
+    orders = make_table("orders", "id", "status")
+    users = make_table("users", "email")
+
+    generator.describe_tables(
+        [
+            (orders, {"id": [1, 2], "status": ["open"]}),
+            (users, {"email": ["a@b.c"]}),
+        ]
+    )
+
+    assert [column.description for column in orders.columns] == ["about id", "about status"]
+    assert users.columns[0].description == "about email"
+    assert orders.table_description == "table orders"
+    assert users.table_description == "table users"
+    assert all(column.description_hash for column in orders.columns + users.columns)
+
+
+def test_unchanged_columns_are_not_described_again(generator):
+    orders = make_table("orders", "id", "status")
+    generator.describe_tables([(orders, {"id": [1, 2], "status": ["open"]})])
+    generator.calls.clear()
+
+    # Other samples of the same column, DISTINCT LIMIT isn't ordered
+    generator.describe_tables([(orders, {"id": [2, 3], "status": ["closed"]})])
+    assert generator.calls == []
+
+    orders.columns[1].data_type = "int"
+    generator.describe_tables([(orders, {"id": [1, 2], "status": [1]})])
+    assert [call.get("column_name") for call in generator.calls] == ["status", None]
+
+
+def test_rate_limited_items_are_retried(generator, monkeypatch):
+    attempts = {"count": 0}
+
+    def flaky(inputs: dict):
+        attempts["count"] += 1
+        if attempts["count"] == 1:
+            raise RateLimitError("slow down")
+        return SimpleNamespace(content="ok")
+
+    monkeypatch.setattr(
+        generator, "create_chain", lambda *args, **kwargs: RunnableLambda(flaky)
+    )
+    orders = make_table("orders", "id")
+
+    generator.describe_tables([(orders, {"id": [1]})])
+
+    assert orders.columns[0].description == "ok"
+    assert orders.table_description == "ok"
+
+
+def test_other_errors_leave_description_empty(generator, monkeypatch):
+    def broken(inputs: dict):
+        raise ValueError("bad prompt")
+
+    monkeypatch.setattr(
+        generator, "create_chain", lambda *args, **kwargs: RunnableLambda(broken)
+    )
+    orders = make_table("orders", "id")
+
+    generator.describe_tables([(orders, {"id": [1]})])
+
+    assert orders.columns[0].description is None
+    assert orders.table_description is None
+
+
+def test_scan_describes_profiled_tables_in_one_batch(generator, monkeypatch, tmp_path):
+    monkeypatch.setattr(scan_checkpoint, "SCAN_CHECKPOINT_PATH", str(tmp_path))
+    monkeypatch.setattr(
+        scanner, "reflection_cache", ReflectionCache(path=str(tmp_path / "reflection"))
+    )
+    monkeypatch.setattr(
+        scanner, "value_index_store", ValueIndexStore(path=str(tmp_path / "values"))
+    )
+    engine = create_engine(f"sqlite:///{tmp_path / 'scan.db'}")
+    with engine.begin() as connection:
+        for name in ("orders", "users"):
+            connection.execute(text(f"CREATE TABLE {name} (id INTEGER)"))
+    repository = MagicMock()
+    repository.get_all_tables_by_db.return_value = []
+    batches = []
+    monkeypatch.setattr(
+        TableColumnsDescriptionGenerator,
+        "describe_tables",
+        lambda self, tables, instruction="": batches.append(
+            sorted(table.table_name for table, _ in tables)
+        ),
+    )
+
+    report = scanner.SqlAlchemyScanner().scan(
+        engine,
+        [
+            TableDescription(id=name, db_connection_id="db1", db_schema="main", table_name=name)
+            for name in ("orders", "users")
+        ],
+        repository,
+        llm_config=LLMConfig(),
+    )
+
+    assert report.scanned == 2
+    assert batches == [["orders", "users"]]
+    assert repository.save_table_info.call_count == 2
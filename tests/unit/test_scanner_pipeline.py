@@ -0,0 +1,234 @@
+"""Tests for the concurrent, resumable scan pipeline."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.modules.table_description.models import TableDescription
+from app.utils.sql_database import scan_checkpoint, scanner as scanner_module
+from app.utils.sql_database.reflection_cache import ReflectionCache
+from app.utils.sql_database.value_index import ValueIndexStore
+from app.utils.sql_database.scan_checkpoint import ScanCheckpoint
+from app.utils.sql_database.scanner import SqlAlchemyScanner, get_scan_workers
+
+
+@pytest.fixture
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_checkpoint, "SCAN_CHECKPOINT_PATH", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture(autouse=True)
+def reflection_cache(tmp_path, monkeypatch):
+    cache = ReflectionCache(path=str(tmp_path / "reflection"))
+    monkeypatch.setattr(scanner_module, "reflection_cache", cache)
+    monkeypatch.setattr(
+        scanner_module, "value_index_store", ValueIndexStore(path=str(tmp_path / "values"))
+    )
+    return cache
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'scan.db'}")
+    with engine.begin() as connection:
+        for name in ("customers", "orders", "payments"):
+            connection.execute(text(f"CREATE TABLE {name} (id INTEGER, status TEXT)"))
+            connection.execute(text(f"INSERT INTO {name} VALUES (1, 'open'), (2, 'closed')"))
+    return engine
+
+
+@pytest.fixture
+def repository():
+    repository = MagicMock()
+    repository.save_table_info.side_effect = lambda table: table
+    repository.get_all_tables_by_db.return_value = []
+    return repository
+
+
+def make_tables(*names):
+    return [
+        TableDescription(id=f"id-{name}", db_connection_id="db1", db_schema="main", table_name=name)
+        for name in names
+    ]
+
+
+def test_scan_reports_all_tables_and_clears_checkpoint(engine, repository, checkpoint_dir):
+    report = SqlAlchemyScanner().scan(
+        engine, make_tables("customers", "orders", "payments"), repository
+    )
+
+    assert report.scanned == 3
+    assert report.failed == 0
+    assert list(checkpoint_dir.glob("*.jsonl")) == []
+    saved = {call.args[0].table_name for call in repository.save_table_info.call_args_list}
+    assert saved == {"customers", "orders", "payments"}
+
+
+def test_scan_resumes_from_checkpoint(engine, repository, checkpoint_dir):
+    tables = make_tables("customers", "orders", "payments")
+    checkpoint = ScanCheckpoint.load("db1", [table.id for table in tables])
+    checkpoint.mark("id-customers", "SCANNED")
+
+    report = SqlAlchemyScanner().scan(engine, tables, repository)
+
+    assert report.skipped == 1
+    assert report.scanned == 2
+    saved = {call.args[0].table_name for call in repository.save_table_info.call_args_list}
+    assert "customers" not in saved
+
+
+def test_scans_of_other_tables_keep_their_own_checkpoint(engine, repository, checkpoint_dir):
+    tables = make_tables("customers", "orders", "payments")
+    checkpoint = ScanCheckpoint.load("db1", [table.id for table in tables])
+    checkpoint.mark("id-customers", "SCANNED")
+
+    report = SqlAlchemyScanner().scan(engine, make_tables("orders"), repository)
+
+    assert report.scanned == 1
+    assert [str(path) for path in checkpoint_dir.glob("*.jsonl")] == [checkpoint.file_path]
+    resumed = ScanCheckpoint.load("db1", [table.id for table in tables])
+    assert resumed.is_done("id-customers")
+
+
+def test_missing_table_is_marked_failed_and_checkpoint_kept(engine, repository, checkpoint_dir):
+    report = SqlAlchemyScanner().scan(engine, make_tables("orders", "ghost"), repository)
+
+    assert report.scanned == 1
+    assert report.failed == 1
+    assert len(list(checkpoint_dir.glob("db1-*.jsonl"))) == 1
+    failed = [
+        call.args[0]
+        for call in repository.save_table_info.call_args_list
+        if call.args[0].sync_status == "FAILED"
+    ]
+    assert [table.table_name for table in failed] == ["ghost"]
+
+
+def test_scan_workers_bounded_by_pool():
+    memory_engine = create_engine("sqlite:///:memory:")
+    pooled_engine = create_engine("postgresql+psycopg2://u:p@localhost/db", pool_size=3)
+
+    assert get_scan_workers(memory_engine) == 1
+    assert get_scan_workers(pooled_engine) == 3
+
+
+def scanned_tables(repository):
+    return {
+        call.args[0].table_name: call.args[0]
+        for call in repository.save_table_info.call_args_list
+    }
+
+
+def test_rescan_skips_tables_with_same_fingerprint(engine, repository, checkpoint_dir):
+    scanner = SqlAlchemyScanner()
+    scanner.scan(engine, make_tables("customers", "orders"), repository)
+    previous = [
+        table.model_copy(update={"id": f"id-{name}"})
+        for name, table in scanned_tables(repository).items()
+    ]
+    repository.save_table_info.reset_mock()
+
+    report = scanner.scan(engine, previous, repository)
+
+    assert report.unchanged == 2
+    assert report.scanned == 0
+    repository.save_table_info.assert_not_called()
+
+
+def test_rescan_only_profiles_changed_columns(
+    engine, repository, checkpoint_dir, reflection_cache, monkeypatch
+):
+    scanner = SqlAlchemyScanner()
+    scanner.scan(engine, make_tables("orders"), repository)
+    previous = scanned_tables(repository)["orders"].model_copy(update={"id": "id-orders"})
+    previous.columns[0].description = "kept"
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE orders ADD COLUMN channel TEXT"))
+    reflection_cache.invalidate(engine)
+    repository.save_table_info.reset_mock()
+
+    profiled = []
+    original = SqlAlchemyScanner.get_processed_column
+
+    def track(self, **kwargs):
+        profiled.append(kwargs["column"]["name"])
+        return original(self, **kwargs)
+
+    monkeypatch.setattr(SqlAlchemyScanner, "get_processed_column", track)
+    report = scanner.scan(engine, [previous], repository)
+
+    assert report.scanned == 1
+    assert profiled == ["channel"]
+    rescanned = scanned_tables(repository)["orders"]
+    assert [column.name for column in rescanned.columns] == ["id", "status", "channel"]
+    assert rescanned.columns[0].description == "kept"
+
+
+def test_refresh_keeps_unchanged_tables(engine, repository, checkpoint_dir):
+    scanner = SqlAlchemyScanner()
+    scanner.scan(engine, make_tables("customers", "orders"), repository)
+    stored = list(scanned_tables(repository).values())
+    repository.find_all_by.return_value = stored
+    repository.save_table_info.reset_mock()
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE orders ADD COLUMN channel TEXT"))
+
+    fingerprints = scanner.fingerprint_tables(engine, "main", ["customers", "orders"])
+    rows = scanner.refresh_tables(
+        {"main": ["customers", "orders"]}, "db1", repository, fingerprints={"main": fingerprints}
+    )
+
+    statuses = {row.table_name: row.sync_status for row in rows}
+    assert statuses == {"customers": "SCANNED", "orders": "NOT_SCANNED"}
+    saved = scanned_tables(repository)
+    assert list(saved) == ["orders"]
+    assert saved["orders"].columns
+
+
+
+def test_refresh_without_schemas_keeps_unchanged_tables(
+    engine, repository, checkpoint_dir, reflection_cache, monkeypatch
+):
+    from types import SimpleNamespace
+
+    from app.modules.table_description import services as services_module
+    from app.modules.table_description.services import TableDescriptionService
+
+    scanner = SqlAlchemyScanner()
+    scanner.scan(engine, make_tables("customers", "orders"), repository)
+    repository.find_all_by.return_value = list(scanned_tables(repository).values())
+    repository.save_table_info.reset_mock()
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE orders ADD COLUMN channel TEXT"))
+
+    database = SimpleNamespace(
+        engine=engine, get_tables_and_views=lambda: ["customers", "orders"]
+    )
+    connections = MagicMock()
+    connections.find_by_id.return_value = SimpleNamespace(id="db1", schemas=None)
+    connection_service = MagicMock()
+    connection_service.get_sql_database.return_value = database
+    monkeypatch.setattr(
+        services_module, "DatabaseConnectionRepository", lambda storage: connections
+    )
+    monkeypatch.setattr(
+        services_module, "DatabaseConnectionService", lambda scanner, storage: connection_service
+    )
+    monkeypatch.setattr(services_module, "TableDescriptionRepository", lambda storage: repository)
+    monkeypatch.setattr(services_module, "reflection_cache", reflection_cache)
+
+    rows = TableDescriptionService(None).refresh_table_description("db1")
+
+    statuses = {row.table_name: row.sync_status for row in rows}
+    assert statuses == {"customers": "SCANNED", "orders": "NOT_SCANNED"}
+    assert list(scanned_tables(repository)) == ["orders"]
+
+
+def test_only_catalog_dialects_track_data_activity(engine):
+    from app.utils.sql_database.statistics import STATISTICS_PROVIDERS, tracks_activity
+
+    assert not tracks_activity(engine)
+    assert STATISTICS_PROVIDERS["postgresql"].tracks_activity
+    assert STATISTICS_PROVIDERS["mysql"].tracks_activity
@@ -0,0 +1,97 @@
+"""Tests for catalog statistics used by the scanner."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine
+
+from app.utils.sql_database.scanner import MAX_CATEGORY_VALUE, PostgreSqlScanner
+from app.utils.sql_database.statistics import (
+    STATISTICS_PROVIDERS,
+    ColumnStatistics,
+    PostgreSqlStatisticsProvider,
+    StatisticsProvider,
+    TableStatistics,
+    load_table_statistics,
+    register_statistics_provider,
+)
+
+
+@pytest.fixture
+def sqlite_table():
+    engine = create_engine("sqlite:///:memory:")
+    meta = MetaData()
+    table = Table("orders", meta, Column("id", Integer), Column("status", String))
+    meta.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            table.insert(),
+            [{"id": i, "status": ["open", "closed"][i % 2]} for i in range(10)],
+        )
+    return engine, table
+
+
+def test_high_cardinality_statistics_skip_query():
+    engine = MagicMock()
+    column = Column("id", Integer)
+    Table("orders", MetaData(), column)
+
+    stats = ColumnStatistics(name="id", n_distinct=MAX_CATEGORY_VALUE + 1)
+
+    assert PostgreSqlScanner().cardinality_values(column, engine, stats) is None
+    engine.connect.assert_not_called()
+
+
+def test_complete_most_common_values_skip_query():
+    engine = MagicMock()
+    column = Column("status", String)
+    Table("orders", MetaData(), column)
+
+    stats = ColumnStatistics(
+        name="status", n_distinct=2, most_common_vals=["open", "closed"]
+    )
+
+    assert PostgreSqlScanner().cardinality_values(column, engine, stats) == [
+        "open",
+        "closed",
+    ]
+    engine.connect.assert_not_called()
+
+
+def test_incomplete_statistics_fall_back_to_query(sqlite_table):
+    engine, table = sqlite_table
+    stats = ColumnStatistics(name="status", n_distinct=2, most_common_vals=["open"])
+
+    values = PostgreSqlScanner().cardinality_values(table.c.status, engine, stats)
+
+    assert sorted(values) == ["closed", "open"]
+
+
+def test_stale_table_statistics_hide_columns():
+    stats = TableStatistics(
+        table_name="orders",
+        stale=True,
+        columns={"status": ColumnStatistics(name="status", n_distinct=2)},
+    )
+
+    assert stats.get_column("status") is None
+
+
+def test_negative_n_distinct_is_row_fraction():
+    assert PostgreSqlStatisticsProvider._absolute_distinct(-0.5, 1000) == 500
+    assert PostgreSqlStatisticsProvider._absolute_distinct(12.0, 1000) == 12
+    assert PostgreSqlStatisticsProvider._absolute_distinct(None, 1000) is None
+
+
+def test_load_table_statistics_swallows_provider_errors(sqlite_table):
+    engine, _ = sqlite_table
+
+    class BrokenProvider(StatisticsProvider):
+        def get_table_statistics(self, db_engine, table_name, schema=None):
+            raise RuntimeError("permission denied")
+
+    register_statistics_provider("sqlite", BrokenProvider())
+    try:
+        assert load_table_statistics(engine, "orders") is None
+    finally:
+        STATISTICS_PROVIDERS.pop("sqlite")
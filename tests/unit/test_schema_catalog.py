@@ -0,0 +1,79 @@
+"""Tests for the keyed db_scan view shared by the SQL agent tools."""
+
+from app.modules.table_description.models import ColumnDescription, TableDescription
+from app.utils.sql_generator.sql_generator import SQLGenerator
+from app.utils.sql_tools.info_relevant_columns import InfoRelevantColumns
+from app.utils.sql_tools.schema_catalog import SchemaCatalog
+from app.utils.sql_tools.schema_sql_database import SchemaSQLDatabaseTool
+
+
+def make_table(db_schema: str, name: str) -> TableDescription:
+    return TableDescription(
+        db_connection_id="db1",
+        db_schema=db_schema,
+        table_name=name,
+        table_description=f"{name} of {db_schema}",
+        table_schema=f"CREATE TABLE {db_schema}.{name} (id INT, status TEXT)",
+        columns=[
+            ColumnDescription(name="id", description="identifier"),
+            ColumnDescription(
+                name="status", low_cardinality=True, categories=["open", "closed"]
+            ),
+        ],
+        examples=[{"id": 1, "status": "open"}, {"id": 2, "status": "closed"}],
+    )
+
+
+def make_scan() -> list[TableDescription]:
+    tables = [make_table("public", f"table_{i}") for i in range(1000)]
+    return tables + [make_table("public", "orders"), make_table("sales", "orders")]
+
+
+def test_lookups_by_table_and_column():
+    catalog = SchemaCatalog(make_scan())
+
+    assert len(catalog) == 1002
+    assert [table.db_schema for table in catalog.find_tables("orders")] == ["public", "sales"]
+    assert catalog.find_tables("sales.orders")[0].db_schema == "sales"
+    assert catalog.get_table("orders", "sales").db_schema == "sales"
+    assert catalog.get_table("missing") is None
+    assert [column.name for _, column in catalog.find_columns("orders", "status")] == [
+        "status",
+        "status",
+    ]
+    assert catalog.find_columns("orders", "missing") == []
+    assert SQLGenerator.get_table_schema("table_7", catalog).startswith(
+        "CREATE TABLE public.table_7"
+    )
+
+
+def test_catalog_over_state_dicts():
+    catalog = SchemaCatalog([table.model_dump() for table in make_scan()])
+
+    assert catalog.get_table("orders", "sales")["table_description"] == "orders of sales"
+    assert catalog.find_columns("table_3", "id")[0][1]["description"] == "identifier"
+
+
+def test_tools_share_the_catalog():
+    db_scan = make_scan()
+    catalog = SchemaCatalog(db_scan)
+    columns_tool = InfoRelevantColumns(db_scan=db_scan, catalog=catalog)
+    schema_tool = SchemaSQLDatabaseTool(db_scan=db_scan, catalog=catalog)
+
+    assert columns_tool.catalog is schema_tool.catalog is catalog
+    assert InfoRelevantColumns(db_scan=db_scan).catalog.get_table("orders") is not None
+
+    info = columns_tool._run("sales.orders -> status, orders -> missing")
+    assert info.splitlines() == [
+        "Table: public.orders, column: status, additional info: Description: None,"
+        " categories = ['open', 'closed'], Sample rows: open, closed",
+        "Table: sales.orders, column: status, additional info: Description: None,"
+        " categories = ['open', 'closed'], Sample rows: open, closed",
+        "Table: orders, column: missing not found in database",
+    ]
+
+    schema = schema_tool._run("sales.orders, table_1, orders")
+    assert schema.count("CREATE TABLE") == 3
+    assert schema.index("public.orders") < schema.index("sales.orders")
+    assert schema.index("sales.orders") < schema.index("public.table_1")
+    assert "Column `id`: identifier" in schema
@@ -0,0 +1,86 @@
+"""Tests for the token-budgeted schema section of the SQL generation prompts."""
+
+from app.modules.table_description.models import ColumnDescription, TableDescription
+from app.utils.sql_tools.schema_catalog import SchemaCatalog
+from app.utils.core.tokens import count_tokens
+from app.utils.sql_tools.schema_prompt import compile_schema_prompt, compiled_tables
+from app.utils.sql_tools.schema_sql_database import SchemaSQLDatabaseTool
+
+
+def make_table(name: str, width: int = 60) -> TableDescription:
+    columns = [
+        ColumnDescription(name="id", data_type="INT", is_primary_key=True),
+        ColumnDescription(
+            name="status",
+            description="order status",
+            low_cardinality=True,
+            categories=["open", "closed"],
+        ),
+    ] + [
+        ColumnDescription(name=f"attribute_{i}", description=f"attribute number {i} of the {name}")
+        for i in range(width)
+    ]
+    return TableDescription(
+        db_connection_id="db1",
+        db_schema="public",
+        table_name=name,
+        table_description=f"All the {name}",
+        columns=columns,
+        examples=[{"id": 1, "status": "open"}, {"id": 2, "status": "closed"}],
+    )
+
+
+def test_large_schemas_fit_the_budget():
+    tables = [make_table(f"table_{i}") for i in range(20)]
+
+    full = compile_schema_prompt(tables, "orders by status", token_budget=10**6)
+    packed = compile_schema_prompt(tables, "orders by status", token_budget=500)
+
+    assert full.omitted_tables == [] and full.omitted_columns == 0
+    assert "[categories: open, closed] [samples: open, closed]" in full.text
+    assert packed.tokens <= 500 < full.tokens // 10
+    assert packed.tables[0] == "public.table_0"
+    assert packed.omitted_tables
+    # Key and matching columns of every table come before the other columns
+    for table in packed.tables[:-1]:
+        section = packed.text.split(f"Table: {table}\n")[1].split("\n\n")[0]
+        assert "- id (INT) (PRIMARY KEY)" in section
+        assert "- status (str): order status" in section
+        assert "more columns" in section
+
+
+def test_relevant_columns_are_kept_first():
+    table = make_table("orders")
+
+    prompt = compile_schema_prompt(
+        [table], "", token_budget=80, relevant_columns=["public.orders.attribute_42"]
+    )
+
+    assert "attribute_42" in prompt.text
+    assert "attribute_41" not in prompt.text
+
+
+def test_compiled_tables_are_cached_per_version():
+    table = make_table("orders", width=2)
+
+    compiled = compiled_tables.get(table)
+    assert compiled_tables.get(table.model_copy()) is compiled
+    table.columns[2].description = "changed"
+    assert compiled_tables.get(table) is not compiled
+    assert count_tokens("") == 0
+
+
+def test_schema_tool_uses_the_budget():
+    db_scan = [make_table("orders"), make_table("users")]
+    tool = SchemaSQLDatabaseTool(
+        db_scan=db_scan,
+        catalog=SchemaCatalog(db_scan),
+        question="open orders",
+        token_budget=200,
+    )
+
+    schema = tool._run("public.users, orders")
+
+    assert schema.index("Table: public.users") < schema.index("Table: public.orders")
+    assert count_tokens(schema) <= 200
+    assert tool._run("missing") == "Tables not found in the database"
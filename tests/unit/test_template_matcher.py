@@ -0,0 +1,75 @@
+"""Tests for local NER templating of prompts and context stores."""
+
+from app.modules.business_glossary.models import BusinessGlossary
+from app.modules.context_store.models import ContextStore
+from app.modules.table_description.models import ColumnDescription, TableDescription
+from app.utils.prompts_ner.template_matcher import EntityDictionary, PromptTemplateIndex
+
+
+def make_dictionary() -> EntityDictionary:
+    table = TableDescription(
+        db_connection_id="db1",
+        db_schema="public",
+        table_name="sales",
+        columns=[
+            ColumnDescription(
+                name="province_name",
+                low_cardinality=True,
+                categories=["Jawa Barat", "DKI Jakarta", "Bali", "1"],
+            ),
+            ColumnDescription(name="amount", low_cardinality=False),
+        ],
+    )
+    glossary = BusinessGlossary(
+        db_connection_id="db1", metric="Gross Sales", alias=["GMV"], sql="SELECT 1"
+    )
+    return EntityDictionary.from_sources(
+        [table], [glossary], known_labels=["province name", "year"]
+    )
+
+
+def make_context_store(prompt_text: str, sql: str) -> ContextStore:
+    return ContextStore(
+        db_connection_id="db1",
+        prompt_text=prompt_text,
+        prompt_text_ner=prompt_text,
+        entities=[],
+        labels=[],
+        prompt_embedding=[],
+        sql=sql,
+    )
+
+
+def test_prompt_is_templated_with_longest_known_entities():
+    dictionary = make_dictionary()
+
+    template, entities = dictionary.template("Total GMV in DKI Jakarta for March 2023, top 1")
+
+    assert template == "Total <METRIC> in <PROVINCE NAME> for <MONTH> <YEAR>, top 1"
+    assert {entity["label"] for entity in entities} == {
+        "metric", "province name", "month", "year"
+    }
+
+
+def test_similar_question_is_found_without_llm():
+    index = PromptTemplateIndex(
+        make_dictionary(),
+        [
+            make_context_store("Total GMV in Bali for 2021", "SELECT bali"),
+            make_context_store("List all provinces", "SELECT provinces"),
+        ],
+    )
+
+    hits = index.find("total gmv in jawa barat for 2024")
+
+    assert [hit["sql"] for hit in hits] == ["SELECT bali"]
+    assert hits[0]["score"] == 1.0
+    assert index.find("how many orders were cancelled") == []
+
+
+def test_stored_prompts_are_templated_locally():
+    stored = make_context_store("Sales in Bandung 2020", "SELECT bandung")
+    stored.prompt_text_ner = "Sales in <CITY NAME> <YEAR>"
+    index = PromptTemplateIndex(EntityDictionary(), [stored])
+
+    assert index.find("Sales in Bandung 2021")[0]["sql"] == "SELECT bandung"
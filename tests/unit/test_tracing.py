@@ -0,0 +1,120 @@
+"""Tests for per-node generation traces and their exporters."""
+
+from typing import TypedDict
+
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langgraph.constants import START
+from langgraph.graph.state import StateGraph
+from sqlalchemy import create_engine, text
+
+from app.utils.tracing import (
+    TracedEmbeddings,
+    exporters,
+    record,
+    register_exporter,
+    timed,
+    trace_generation,
+)
+
+
+class State(TypedDict, total=False):
+    sql: str
+    rows: int
+
+
+def build_graph(engine, executor):
+    llm = GenericFakeChatModel(
+        messages=iter(
+            [
+                AIMessage(
+                    content="SELECT 1",
+                    usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15},
+                )
+            ]
+        )
+    )
+    embeddings = TracedEmbeddings(FakeEmbeddings(size=4))
+    typesense_request = timed("typesense", lambda: {"hits": []})
+
+    def retrieve(state: State) -> dict:
+        # Work submitted to a context-copying pool stays in the node's span
+        executor.submit(embeddings.embed_query, "question").result()
+        embeddings.embed_documents(["a", "b"])
+        typesense_request()
+        return {}
+
+    def generate(state: State) -> dict:
+        return {"sql": llm.invoke("question").content}
+
+    def execute(state: State) -> dict:
+        with engine.connect() as connection:
+            rows = connection.execute(text(state["sql"])).fetchall()
+        return {"rows": len(rows)}
+
+    graph = StateGraph(State)
+    graph.add_node("retrieve", retrieve)
+    graph.add_node("generate", generate)
+    graph.add_node("execute", execute)
+    graph.add_edge(START, "retrieve")
+    graph.add_edge("retrieve", "generate")
+    graph.add_edge("generate", "execute")
+    graph.set_finish_point("execute")
+    return graph.compile()
+
+
+def test_work_is_attributed_to_graph_nodes(monkeypatch):
+    monkeypatch.setattr(exporters, "SQL_AGENT_TRACE_EXPORTERS", "")
+    engine = create_engine("sqlite://")
+    executor = ContextThreadPoolExecutor(max_workers=2)
+    graph = build_graph(engine, executor)
+
+    with trace_generation("test_agent") as trace:
+        with trace.span("setup"):
+            record(typesense_calls=1)
+        result = graph.invoke({}, {"callbacks": [trace.callback_handler]})
+    executor.shutdown()
+
+    assert result["rows"] == 1
+    data = trace.to_dict()
+    spans = {span["name"]: span for span in data["spans"]}
+    assert list(spans) == ["setup", "retrieve", "generate", "execute"]
+    assert (spans["retrieve"]["embedding_calls"], spans["retrieve"]["typesense_calls"]) == (2, 1)
+    assert (spans["generate"]["llm_calls"], spans["generate"]["input_tokens"]) == (1, 12)
+    assert spans["generate"]["output_tokens"] == 3
+    assert spans["execute"]["db_queries"] == 1
+    assert all(span["duration_ms"] > 0 for span in data["spans"])
+    assert data["totals"]["typesense_calls"] == 2
+    assert data["totals"]["input_tokens"] == 12
+
+
+def test_nothing_is_recorded_without_active_trace(monkeypatch):
+    monkeypatch.setattr(exporters, "SQL_AGENT_TRACE_EXPORTERS", "")
+    embeddings = TracedEmbeddings(FakeEmbeddings(size=4))
+    embeddings.embed_query("question")
+
+    with trace_generation("test_agent") as trace:
+        pass
+
+    assert trace.to_dict()["totals"]["embedding_calls"] == 0
+
+
+def test_configured_exporters_receive_finished_traces(monkeypatch, caplog):
+    exported = []
+
+    class ListExporter:
+        def export(self, trace):
+            exported.append(trace.to_dict())
+
+    register_exporter("list", ListExporter)
+    monkeypatch.setattr(exporters, "SQL_AGENT_TRACE_EXPORTERS", "list, missing")
+
+    with trace_generation("test_agent") as trace:
+        with trace.span("node"):
+            pass
+
+    assert [data["spans"][0]["name"] for data in exported] == ["node"]
+    assert exported[0]["duration_ms"] > 0
+    assert "Trace exporter missing disabled" in caplog.text
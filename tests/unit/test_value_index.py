@@ -0,0 +1,136 @@
+"""Tests for the per-column value index and the tools using it."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app.modules.table_description.models import TableDescription
+from app.utils.sql_database import scan_checkpoint, value_index
+from app.utils.sql_database import scanner as scanner_module
+from app.utils.sql_database.reflection_cache import ReflectionCache
+from app.utils.sql_database.scanner import SqlAlchemyScanner
+from app.utils.sql_database.sql_database import SQLDatabase
+from app.utils.sql_database.value_index import ColumnValueIndex, ValueIndexStore
+from app.utils.sql_tools import column_entity_checker
+from app.utils.sql_tools.column_entity_checker import ColumnEntityChecker
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ValueIndexStore(path=str(tmp_path / "values"), max_values=100)
+    cache = ReflectionCache(path=str(tmp_path / "reflection"))
+    monkeypatch.setattr(value_index, "value_index_store", store)
+    monkeypatch.setattr(value_index, "reflection_cache", cache)
+    monkeypatch.setattr(scanner_module, "value_index_store", store)
+    monkeypatch.setattr(scanner_module, "reflection_cache", cache)
+    monkeypatch.setattr(column_entity_checker, "reflection_cache", cache)
+    monkeypatch.setattr(column_entity_checker, "value_index_store", store)
+    return store
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'source.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE customers (id INTEGER, city TEXT)"))
+        for i, city in enumerate(["Jakarta", "Bandung", "Surabaya", "Jakarta Selatan"] * 3):
+            connection.execute(text(f"INSERT INTO customers VALUES ({i}, '{city}')"))
+    return engine
+
+
+def count_queries(engine) -> list[str]:
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+def test_similar_and_containing_values():
+    index = ColumnValueIndex(["Jakarta", "Bandung", "Jakarta Selatan", "Surabaya"], complete=True)
+
+    assert [value for value, _ in index.similar("jakarta")][:2] == ["Jakarta", "Jakarta Selatan"]
+    assert index.similar("Bandng", threshold=0.8)[0][0] == "Bandung"
+    assert index.containing("karta") == ["Jakarta", "Jakarta Selatan"]
+    assert index.containing("ba") == ["Bandung", "Surabaya"]
+
+
+def test_index_is_built_once_and_persisted(engine, store, tmp_path):
+    index = store.get_or_build(engine, "customers", "city")
+    assert index.complete
+    assert sorted(index.values) == ["Bandung", "Jakarta", "Jakarta Selatan", "Surabaya"]
+
+    statements = count_queries(engine)
+    restarted = ValueIndexStore(path=str(tmp_path / "values"))
+    assert restarted.get(engine, None, "customers", "city").values == index.values
+    assert statements == []
+
+
+def test_index_marks_truncated_columns_incomplete(engine, store):
+    store.max_values = 2
+
+    index = store.get_or_build(engine, "customers", "city")
+
+    assert not index.complete
+    assert len(index.values) == 2
+
+
+def test_entity_checker_uses_the_index(engine, store):
+    checker = ColumnEntityChecker(
+        db=SQLDatabase(engine), db_scan=[], is_multiple_schema=False
+    )
+    checker._run("customers -> city, jakarta")
+    statements = count_queries(engine)
+
+    result = checker._run("customers -> city, jakarta")
+
+    assert result.splitlines()[:3] == ["Similar items:", "Jakarta", "Jakarta Selatan"]
+    assert statements == []
+
+
+def test_scan_indexes_string_columns(engine, store, tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_checkpoint, "SCAN_CHECKPOINT_PATH", str(tmp_path))
+    repository = MagicMock()
+    repository.get_all_tables_by_db.return_value = []
+
+    SqlAlchemyScanner().scan(
+        engine,
+        [TableDescription(id="1", db_connection_id="db1", db_schema="main", table_name="customers")],
+        repository,
+    )
+
+    assert store.get(engine, "main", "customers", "city") is not None
+    assert store.get(engine, "main", "customers", "id") is None
+
+
+def test_stale_index_is_rebuilt(engine, store):
+    index = store.get_or_build(engine, "customers", "city")
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO customers VALUES (99, 'Medan')"))
+
+    assert store.get_or_build(engine, "customers", "city") is index
+    store.ttl_seconds = 0
+    assert "Medan" in store.get_or_build(engine, "customers", "city").values
+
+
+def test_scan_skips_value_queries_on_large_tables(engine, store):
+    store.put(engine, None, "customers", {"city": ColumnValueIndex(["Old"], complete=True)})
+    table = scanner_module.reflection_cache.get_metadata(engine).tables["customers"]
+    column = MagicMock(low_cardinality=False, categories=None)
+    column.name = "city"
+    statements = count_queries(engine)
+
+    SqlAlchemyScanner().index_column_values(
+        table.metadata, engine, "customers", None, [column], row_count=10_000_000
+    )
+
+    assert statements == []
+    assert store.get(engine, None, "customers", "city") is None
+
+    SqlAlchemyScanner().index_column_values(
+        table.metadata, engine, "customers", None, [column], row_count=12
+    )
+    assert len(store.get(engine, None, "customers", "city").values) == 4